@@ -10,11 +10,18 @@ retaining walls.
 from typing import Tuple
 import math
 
+from instrumentation import instrumented
+
+
+# Unit weight of water in kN/m³
+GAMMA_WATER = 9.81
+
 
 class ShallowFoundationCalculator:
     """Calculator for shallow foundation bearing capacity and settlement."""
     
     @staticmethod
+    @instrumented
     def calculate_bearing_capacity_factors(friction_angle: float) -> Tuple[float, float, float]:
         """
         Calculate Terzaghi bearing capacity factors.
@@ -39,6 +46,7 @@ class ShallowFoundationCalculator:
         return Nc, Nq, Ngamma
     
     @staticmethod
+    @instrumented
     def calculate_ultimate_bearing_capacity(
         width: float,
         length: float,
@@ -50,6 +58,10 @@ class ShallowFoundationCalculator:
         """
         Calculate ultimate bearing capacity using Terzaghi's equation.
         
+        This is the strip-footing equation, so length does not enter the result.
+        Use bearing_capacity.BearingCapacityEngine for shape, depth, inclination,
+        eccentricity and groundwater effects.
+        
         Args:
             width: Foundation width in meters
             length: Foundation length in meters
@@ -72,6 +84,7 @@ class ShallowFoundationCalculator:
         return qu
     
     @staticmethod
+    @instrumented
     def calculate_allowable_bearing_capacity(ultimate_capacity: float, factor_of_safety: float = 3.0) -> float:
         """
         Calculate allowable bearing capacity.
@@ -86,6 +99,7 @@ class ShallowFoundationCalculator:
         return ultimate_capacity / factor_of_safety
     
     @staticmethod
+    @instrumented
     def calculate_applied_pressure(load: float, width: float, length: float) -> float:
         """
         Calculate applied pressure on foundation.
@@ -106,6 +120,7 @@ class DeepFoundationCalculator:
     """Calculator for deep foundation (pile) capacity."""
     
     @staticmethod
+    @instrumented
     def calculate_pile_end_bearing(
         pile_diameter: float,
         unit_weight: float,
@@ -142,6 +157,7 @@ class DeepFoundationCalculator:
         return Qb
     
     @staticmethod
+    @instrumented
     def calculate_pile_skin_friction(
         pile_diameter: float,
         pile_length: float,
@@ -182,6 +198,7 @@ class DeepFoundationCalculator:
         return Qs
     
     @staticmethod
+    @instrumented
     def calculate_pile_capacity(
         pile_diameter: float,
         pile_length: float,
@@ -220,6 +237,7 @@ class DeepFoundationCalculator:
         return Qu, Qa, Qb, Qs
     
     @staticmethod
+    @instrumented
     def calculate_pile_group_efficiency(num_piles: int, spacing: float, diameter: float) -> float:
         """
         Calculate pile group efficiency factor.
@@ -249,6 +267,7 @@ class RetainingWallCalculator:
     """Calculator for retaining wall earth pressures and stability."""
     
     @staticmethod
+    @instrumented
     def calculate_active_earth_pressure_coefficient(friction_angle: float) -> float:
         """
         Calculate active earth pressure coefficient using Rankine theory.
@@ -263,6 +282,7 @@ class RetainingWallCalculator:
         return Ka
     
     @staticmethod
+    @instrumented
     def calculate_passive_earth_pressure_coefficient(friction_angle: float) -> float:
         """
         Calculate passive earth pressure coefficient using Rankine theory.
@@ -275,8 +295,116 @@ class RetainingWallCalculator:
         """
         Kp = math.tan(math.radians(45 + friction_angle / 2)) ** 2
         return Kp
-    
+
+    @staticmethod
+    @instrumented
+    def calculate_coulomb_active_earth_pressure_coefficient(
+        friction_angle: float,
+        wall_friction: float = 0.0,
+        backfill_slope: float = 0.0,
+        wall_inclination: float = 0.0
+    ) -> float:
+        """
+        Calculate active earth pressure coefficient using Coulomb theory.
+
+        Args:
+            friction_angle: Internal friction angle in degrees
+            wall_friction: Wall friction angle δ in degrees
+            backfill_slope: Backfill slope angle β in degrees (positive upwards)
+            wall_inclination: Angle of the wall back from the vertical in degrees
+                (positive when the back leans away from the retained soil)
+
+        Returns:
+            Active earth pressure coefficient Ka (resultant inclined at δ to the wall normal)
+        """
+        if backfill_slope > friction_angle:
+            raise ValueError("Backfill slope cannot exceed the friction angle in the active case")
+
+        phi = math.radians(friction_angle)
+        delta = math.radians(wall_friction)
+        beta = math.radians(backfill_slope)
+        theta = math.radians(wall_inclination)
+
+        root = math.sqrt(math.sin(phi + delta) * math.sin(phi - beta) /
+                         (math.cos(delta + theta) * math.cos(theta - beta)))
+        Ka = math.cos(phi - theta) ** 2 / (
+            math.cos(theta) ** 2 * math.cos(delta + theta) * (1 + root) ** 2
+        )
+        return Ka
+
+    @staticmethod
+    @instrumented
+    def calculate_coulomb_passive_earth_pressure_coefficient(
+        friction_angle: float,
+        wall_friction: float = 0.0,
+        backfill_slope: float = 0.0,
+        wall_inclination: float = 0.0
+    ) -> float:
+        """
+        Calculate passive earth pressure coefficient using Coulomb theory.
+
+        Coulomb's plane failure surface overestimates passive resistance when the
+        wall friction exceeds about φ/3; use the log-spiral coefficient in that case.
+
+        Args:
+            friction_angle: Internal friction angle in degrees
+            wall_friction: Wall friction angle δ in degrees
+            backfill_slope: Backfill slope angle β in degrees (positive upwards)
+            wall_inclination: Angle of the wall back from the vertical in degrees
+                (positive when the back leans away from the retained soil)
+
+        Returns:
+            Passive earth pressure coefficient Kp (resultant inclined at δ to the wall normal)
+        """
+        if backfill_slope < -friction_angle:
+            raise ValueError("Backfill slope cannot be below -φ in the passive case")
+
+        phi = math.radians(friction_angle)
+        delta = math.radians(wall_friction)
+        beta = math.radians(backfill_slope)
+        theta = math.radians(wall_inclination)
+
+        root = math.sqrt(math.sin(phi + delta) * math.sin(phi + beta) /
+                         (math.cos(delta - theta) * math.cos(beta - theta)))
+        if root >= 1.0:
+            raise ValueError("No finite Coulomb passive coefficient for this geometry")
+        Kp = math.cos(phi + theta) ** 2 / (
+            math.cos(theta) ** 2 * math.cos(delta - theta) * (1 - root) ** 2
+        )
+        return Kp
+
+    @staticmethod
+    @instrumented
+    def calculate_log_spiral_passive_earth_pressure_coefficient(
+        friction_angle: float,
+        wall_friction: float = 0.0,
+        backfill_slope: float = 0.0,
+        wall_inclination: float = 0.0
+    ) -> float:
+        """
+        Calculate passive earth pressure coefficient for a log-spiral failure surface.
+
+        The value is interpolated from precomputed log-spiral tables (see
+        log_spiral.py), which load on first use.
+
+        Args:
+            friction_angle: Internal friction angle in degrees
+            wall_friction: Wall friction angle δ in degrees
+            backfill_slope: Backfill slope angle β in degrees (positive upwards)
+            wall_inclination: Angle of the wall back from the vertical in degrees
+                (positive when the back leans away from the retained soil)
+
+        Returns:
+            Passive earth pressure coefficient Kp (resultant inclined at δ to the wall normal)
+        """
+        from log_spiral import log_spiral_passive_coefficient
+
+        return float(log_spiral_passive_coefficient(
+            friction_angle, wall_friction, backfill_slope, wall_inclination
+        ))
+
     @staticmethod
+    @instrumented
     def calculate_total_active_force(
         wall_height: float,
         unit_weight: float,
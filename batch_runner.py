@@ -0,0 +1,522 @@
+"""
+Batch Runner for ENGIPIT
+
+Command-line runner that reads a table of foundation cases from a CSV or
+Parquet file, evaluates it in chunks with the vectorized calculators and
+writes the input columns plus the results to a file of the same format.
+
+Case types and their columns:
+    footing  BearingCapacityEngine.calculate arguments (width, length, depth,
+             unit_weight, cohesion, friction_angle, optional loads, water, ...)
+    pile     DeepFoundationCalculator.calculate_pile_capacity arguments
+    wall     RetainingWallStabilityCalculator.calculate_stability arguments
+
+Optional columns may be left empty per row; those rows use the calculator
+default. Rows that cannot be evaluated get a message in the 'error' column
+and do not stop the run. Chunks are streamed, so the file never has to fit
+in memory, and can be evaluated in parallel worker processes.
+
+Parquet files need pyarrow, which is only imported when a Parquet file is read
+or written.
+
+Run with: python batch_runner.py cases.csv --type footing --workers 4 --progress
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+from bearing_capacity import BearingCapacityEngine, METHODS, VESIC
+from kernels import pile_capacity
+from wall_stability import RetainingWallStabilityCalculator
+
+
+FOOTING = "footing"
+PILE = "pile"
+WALL = "wall"
+CASE_TYPES = (FOOTING, PILE, WALL)
+
+CSV = "csv"
+PARQUET = "parquet"
+
+ERROR_COLUMN = "error"
+
+# A chunk is a column-oriented table: column name -> list of cell values
+Chunk = Dict[str, List[Any]]
+
+
+def _footing(arrays: Dict[str, np.ndarray], method: str) -> Dict[str, np.ndarray]:
+    factor_of_safety = arrays.pop('factor_of_safety', 3.0)
+    result = BearingCapacityEngine.calculate(method=method, **arrays)
+    outputs = dict(result.__dict__)
+    outputs['allowable_capacity'] = result.ultimate_capacity / factor_of_safety
+    if 'vertical_load' in arrays:
+        outputs['safety_factor'] = result.ultimate_load / arrays['vertical_load']
+    return outputs
+
+
+def _pile(arrays: Dict[str, np.ndarray], method: str) -> Dict[str, np.ndarray]:
+    """DeepFoundationCalculator.calculate_pile_capacity evaluated on arrays by kernels.pile_capacity."""
+    pile_type = arrays['pile_type']
+    unknown = set(pile_type.tolist()) - {"driven", "bored"}
+    if unknown:
+        raise ValueError(f"Unknown pile_type {sorted(unknown)}")
+    D, L = arrays['pile_diameter'], arrays['pile_length']
+    gamma, phi, c = arrays['unit_weight'], arrays['friction_angle'], arrays['cohesion']
+    if np.any(D <= 0) or np.any(L <= 0):
+        raise ValueError("pile_diameter and pile_length must be positive")
+
+    Qu, Qa, Qb, Qs = pile_capacity(D, L, gamma, phi, c, pile_type, arrays.get('factor_of_safety', 2.5))
+
+    outputs = {
+        'ultimate_capacity': Qu,
+        'allowable_capacity': Qa,
+        'end_bearing': Qb,
+        'skin_friction': Qs,
+    }
+    if 'load' in arrays:
+        outputs['safety_factor'] = Qu / arrays['load']
+    return outputs
+
+
+def _wall(arrays: Dict[str, np.ndarray], method: str) -> Dict[str, np.ndarray]:
+    result = RetainingWallStabilityCalculator.calculate_stability(**arrays)
+    outputs = dict(result.__dict__)
+    outputs['is_stable'] = result.is_stable
+    return outputs
+
+
+@dataclass(frozen=True)
+class CaseType:
+    """
+    Columns and calculation of one case type.
+
+    Attributes:
+        required: Columns every row must fill
+        optional: Columns that may be absent or left empty
+        outputs: Result columns, in output order
+        function: Evaluates a dictionary of column arrays; arguments (arrays, method)
+        text: Columns holding text rather than numbers
+    """
+    required: Tuple[str, ...]
+    optional: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    function: Callable[[Dict[str, np.ndarray], str], Dict[str, np.ndarray]]
+    text: Tuple[str, ...] = ()
+
+
+CASES = {
+    FOOTING: CaseType(
+        required=('width', 'length', 'depth', 'unit_weight', 'cohesion', 'friction_angle'),
+        optional=('vertical_load', 'horizontal_load', 'eccentricity_width', 'eccentricity_length',
+                  'base_tilt', 'ground_slope', 'water_depth', 'saturated_unit_weight', 'factor_of_safety'),
+        outputs=('ultimate_capacity', 'allowable_capacity', 'ultimate_load', 'safety_factor',
+                 'effective_width', 'effective_length', 'Nc', 'Nq', 'Ngamma'),
+        function=_footing,
+    ),
+    PILE: CaseType(
+        required=('pile_diameter', 'pile_length', 'unit_weight', 'friction_angle', 'cohesion', 'pile_type'),
+        optional=('factor_of_safety', 'load'),
+        outputs=('ultimate_capacity', 'allowable_capacity', 'end_bearing', 'skin_friction', 'safety_factor'),
+        function=_pile,
+        text=('pile_type',),
+    ),
+    WALL: CaseType(
+        required=('stem_height', 'stem_thickness', 'base_width', 'base_thickness', 'toe_length',
+                  'unit_weight', 'friction_angle'),
+        optional=('surcharge', 'embedment', 'concrete_unit_weight', 'foundation_unit_weight',
+                  'foundation_friction_angle', 'foundation_cohesion'),
+        outputs=('sliding_fs', 'overturning_fs', 'bearing_fs', 'is_stable', 'active_force',
+                 'active_force_location', 'passive_force', 'vertical_force', 'resisting_moment',
+                 'overturning_moment', 'eccentricity', 'effective_width', 'applied_pressure',
+                 'ultimate_bearing_capacity'),
+        function=_wall,
+    ),
+}
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or \
+        (isinstance(value, float) and np.isnan(value))
+
+
+def _column(name: str, values: Sequence[Any], case: CaseType, errors: Dict[int, str]) -> np.ndarray:
+    """Parse a column; empty cells become NaN (numbers) or '' (text), invalid cells are added to errors."""
+    if name in case.text:
+        return np.array(['' if _is_empty(value) else str(value).strip().lower() for value in values])
+    try:
+        return np.array(values, dtype=float)
+    except (TypeError, ValueError):
+        pass
+    column = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        if _is_empty(value):
+            continue
+        try:
+            column[i] = float(value)
+        except (TypeError, ValueError):
+            errors.setdefault(i, f"{name} is not a number: {value!r}")
+    return column
+
+
+def _filled(column: np.ndarray) -> np.ndarray:
+    return column != '' if column.dtype.kind == 'U' else ~np.isnan(column)
+
+
+def evaluate_chunk(case_type: str, chunk: Chunk, method: str = VESIC) -> Chunk:
+    """
+    Evaluate a chunk of cases.
+
+    Columns are parsed as arrays, rows are grouped by the optional columns they
+    fill and each group is evaluated in one vectorized call. If a group fails
+    as a whole, its rows are evaluated one by one so that only the invalid rows
+    get an error.
+
+    Args:
+        case_type: FOOTING, PILE or WALL
+        chunk: Input columns
+        method: Bearing capacity method for footings
+
+    Returns:
+        Result columns (CaseType.outputs plus 'error'); missing results are None
+
+    Raises:
+        ValueError: If the case type is unknown or a required column is missing
+    """
+    case = CASES.get(case_type)
+    if case is None:
+        raise ValueError(f"Unknown case type {case_type!r}, expected one of {CASE_TYPES}")
+    missing = [name for name in case.required if name not in chunk]
+    if missing:
+        raise ValueError(f"Missing columns for {case_type} cases: {', '.join(missing)}")
+
+    rows = len(chunk[case.required[0]])
+    optional = [name for name in case.optional if name in chunk]
+    errors: Dict[int, str] = {}
+    columns = {name: _column(name, chunk[name], case, errors) for name in case.required + tuple(optional)}
+    for name in case.required:
+        for i in np.flatnonzero(~_filled(columns[name])).tolist():
+            errors.setdefault(i, f"{name} is empty")
+    valid = np.ones(rows, dtype=bool)
+    valid[list(errors)] = False
+
+    # One bit per optional column that a row fills
+    pattern = np.zeros(rows, dtype=np.int64)
+    for bit, name in enumerate(optional):
+        pattern |= _filled(columns[name]).astype(np.int64) << bit
+
+    results = {name: np.full(rows, None, dtype=object) for name in case.outputs}
+
+    def evaluate(names: Sequence[str], indices: np.ndarray) -> None:
+        outputs = case.function({name: columns[name][indices] for name in names}, method)
+        for name, values in outputs.items():
+            results[name][indices] = np.broadcast_to(values, indices.shape)
+
+    for code in np.unique(pattern[valid]).tolist():
+        names = case.required + tuple(name for bit, name in enumerate(optional) if code >> bit & 1)
+        indices = np.flatnonzero(valid & (pattern == code))
+        try:
+            evaluate(names, indices)
+        except (TypeError, ValueError):
+            for i in indices:
+                try:
+                    evaluate(names, np.array([i]))
+                except (TypeError, ValueError) as error:
+                    errors[int(i)] = str(error)
+
+    chunk_results: Chunk = {name: column.tolist() for name, column in results.items()}
+    chunk_results[ERROR_COLUMN] = [errors.get(i) for i in range(rows)]
+    return chunk_results
+
+
+def file_format(path: str) -> str:
+    """
+    File format from the file extension.
+
+    Raises:
+        ValueError: If the extension is neither .csv nor .parquet/.pq
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return CSV
+    if extension in (".parquet", ".pq"):
+        return PARQUET
+    raise ValueError(f"Unsupported file type {extension!r}, expected .csv or .parquet")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Reading and writing Parquet files requires pyarrow (pip install pyarrow)")
+    return pyarrow
+
+
+def read_chunks(path: str, chunk_size: int = 10000) -> Iterator[Chunk]:
+    """
+    Stream a CSV or Parquet file as column-oriented chunks.
+
+    CSV cells are returned as strings, Parquet cells as Python values with
+    None for nulls.
+
+    Args:
+        path: Input file
+        chunk_size: Maximum number of rows per chunk
+
+    Yields:
+        Chunks of at most chunk_size rows
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if file_format(path) == PARQUET:
+        parquet_file = _pyarrow().parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pydict()
+        return
+
+    with open(path, newline='') as handle:
+        reader = csv.reader(handle)
+        header = [name.strip() for name in next(reader, [])]
+        rows = []
+        for row in reader:
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield _columns(header, rows)
+                rows = []
+        if rows:
+            yield _columns(header, rows)
+
+
+def _columns(header: List[str], rows: List[List[str]]) -> Chunk:
+    width = len(header)
+    rows = [row[:width] + [''] * (width - len(row)) for row in rows]
+    return {name: list(values) for name, values in zip(header, zip(*rows))}
+
+
+class ChunkWriter:
+    """
+    Write chunks to a CSV or Parquet file, one chunk at a time.
+
+    The columns are taken from the first chunk written. Chunks can be encoded
+    elsewhere (e.g. in a worker process) with encode() and written with
+    write_encoded().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = file_format(path)
+        self.columns: Optional[List[str]] = None
+        self._handle = None
+        self._writer = None
+
+    @staticmethod
+    def encode(chunk: Chunk, output_format: str) -> Any:
+        """CSV text of the chunk rows for CSV files, the chunk itself for Parquet."""
+        if output_format != CSV:
+            return chunk
+        buffer = io.StringIO()
+        rows = zip(*chunk.values())
+        csv.writer(buffer).writerows([('' if value is None else value) for value in row] for row in rows)
+        return buffer.getvalue()
+
+    def write(self, chunk: Chunk) -> None:
+        """Append a chunk."""
+        self.write_encoded(list(chunk), self.encode(chunk, self.format))
+
+    def write_encoded(self, columns: List[str], payload: Any) -> None:
+        """Append a chunk encoded by encode()."""
+        if self.columns is None:
+            self.columns = list(columns)
+            self._open(payload)
+        elif list(columns) != self.columns:
+            raise ValueError("All chunks must have the same columns")
+        if self.format == CSV:
+            self._handle.write(payload)
+        else:
+            self._writer.write_table(_pyarrow().Table.from_pydict(payload, schema=self._writer.schema))
+
+    def _open(self, payload: Any) -> None:
+        if self.format == CSV:
+            self._handle = open(self.path, 'w', newline='')
+            csv.writer(self._handle).writerow(self.columns)
+            return
+        pyarrow = _pyarrow()
+        inferred = pyarrow.Table.from_pydict(payload).schema
+        fields = []
+        for item in inferred:
+            # Result columns that are all empty in the first chunk would be inferred as null
+            if pyarrow.types.is_null(item.type):
+                item = item.with_type(pyarrow.string() if item.name == ERROR_COLUMN else pyarrow.float64())
+            fields.append(item)
+        self._writer = pyarrow.parquet.ParquetWriter(self.path, pyarrow.schema(fields))
+
+    def close(self) -> None:
+        """Finish the file."""
+        if self._writer is not None and self.format == PARQUET:
+            self._writer.close()
+        if self._handle is not None:
+            self._handle.close()
+        self._writer = self._handle = None
+
+    def __enter__(self) -> 'ChunkWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+@dataclass
+class BatchRunSummary:
+    """
+    Summary of a batch run.
+
+    Attributes:
+        rows: Number of rows read
+        errors: Number of rows with an error
+        chunks: Number of chunks evaluated
+        wall_time: Total elapsed time in seconds
+    """
+    rows: int = 0
+    errors: int = 0
+    chunks: int = 0
+    wall_time: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput of the run."""
+        return self.rows / self.wall_time if self.wall_time > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """Convert to dictionary for storage."""
+        return {'rows': self.rows, 'errors': self.errors, 'chunks': self.chunks, 'wall_time': self.wall_time,
+                'rows_per_second': self.rows_per_second}
+
+
+def _run_chunk(case_type: str, chunk: Chunk, method: str, output_format: str) -> Tuple[List[str], int, int, Any]:
+    """
+    Evaluate and encode a chunk; the unit of work sent to a worker.
+
+    Returns:
+        Tuple of (output columns, rows, rows with an error, encoded input and result columns)
+    """
+    results = evaluate_chunk(case_type, chunk, method)
+    merged = dict(chunk)
+    merged.update(results)
+    errors = sum(error is not None for error in results[ERROR_COLUMN])
+    return list(merged), len(results[ERROR_COLUMN]), errors, ChunkWriter.encode(merged, output_format)
+
+
+def run_file(
+    input_path: str,
+    output_path: str,
+    case_type: str,
+    chunk_size: int = 10000,
+    workers: int = 1,
+    method: str = VESIC,
+    progress: Optional[Callable[[int], None]] = None
+) -> BatchRunSummary:
+    """
+    Evaluate every case of a CSV or Parquet file and write the results.
+
+    Rows are written in input order. With several workers, at most two chunks
+    per worker are in flight, so memory use stays bounded for any file size.
+
+    Args:
+        input_path: CSV or Parquet file with one case per row
+        output_path: Output file; its extension selects the format
+        case_type: FOOTING, PILE or WALL
+        chunk_size: Rows per chunk
+        workers: Number of worker processes (1 evaluates in-process)
+        method: Bearing capacity method for footings
+        progress: Called with the number of rows written after every chunk
+
+    Returns:
+        BatchRunSummary of the run
+    """
+    if case_type not in CASES:
+        raise ValueError(f"Unknown case type {case_type!r}, expected one of {CASE_TYPES}")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+    start = time.perf_counter()
+    summary = BatchRunSummary()
+    chunks = read_chunks(input_path, chunk_size)
+
+    with ChunkWriter(output_path) as writer:
+        def emit(outcome: Tuple[List[str], int, int, Any]) -> None:
+            columns, rows, errors, payload = outcome
+            writer.write_encoded(columns, payload)
+            summary.chunks += 1
+            summary.rows += rows
+            summary.errors += errors
+            if progress is not None:
+                progress(summary.rows)
+
+        if workers <= 1:
+            for chunk in chunks:
+                emit(_run_chunk(case_type, chunk, method, writer.format))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(_run_chunk, case_type, chunk, method, writer.format))
+                    if len(pending) >= 2 * workers:
+                        emit(pending.popleft().result())
+                while pending:
+                    emit(pending.popleft().result())
+
+    summary.wall_time = time.perf_counter() - start
+    return summary
+
+
+def default_output_path(input_path: str) -> str:
+    """'<name>_results<extension>' next to the input file."""
+    root, extension = os.path.splitext(input_path)
+    return f"{root}_results{extension}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Evaluate a CSV/Parquet table of foundation cases")
+    parser.add_argument('input', help="CSV or Parquet file with one case per row")
+    parser.add_argument('-o', '--output', help="Output file (default: <input>_results with the same format)")
+    parser.add_argument('-t', '--type', required=True, choices=CASE_TYPES, help="Case type of every row")
+    parser.add_argument('--method', default=VESIC, choices=METHODS, help="Bearing capacity method for footings")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes (default: 1, in-process)")
+    parser.add_argument('--progress', action='store_true', help="Report progress on stderr")
+    args = parser.parse_args(argv)
+
+    output = args.output or default_output_path(args.input)
+    if file_format(output) != file_format(args.input):
+        parser.error("the output file must have the same format as the input file")
+
+    progress = None
+    if args.progress:
+        start = time.perf_counter()
+
+        def progress(rows: int) -> None:
+            elapsed = time.perf_counter() - start
+            rate = rows / elapsed if elapsed > 0 else 0.0
+            print(f"\r{rows} rows, {rate:.0f} rows/s", end='', file=sys.stderr, flush=True)
+
+    summary = run_file(args.input, output, args.type, args.chunk_size, args.workers, args.method, progress)
+    if args.progress:
+        print(file=sys.stderr)
+    print(f"{summary.rows} rows ({summary.errors} errors) in {summary.wall_time:.2f} s -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
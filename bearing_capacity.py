@@ -0,0 +1,280 @@
+"""
+Extended Bearing Capacity for ENGIPIT
+
+This module evaluates the general bearing capacity equation
+
+    qu = c·Nc·sc·dc·ic·bc·gc + q·Nq·sq·dq·iq·bq·gq + ½·γ·B'·Nγ·sγ·dγ·iγ·bγ·gγ
+
+with the Meyerhof (1963), Hansen (1970) or Vesić (1973, 1975) bearing
+capacity, shape, depth, inclination, base-tilt and ground-slope factors.
+Eccentric loads are handled with Meyerhof's effective area B'×L', and a
+groundwater table reduces the overburden and the unit weight of the wedge
+below the footing.
+
+Every argument broadcasts as a NumPy array, so thousands of footings and
+load cases are evaluated in one call.
+"""
+
+from typing import Dict
+from dataclasses import dataclass
+
+import numpy as np
+
+from app import GAMMA_WATER
+from instrumentation import instrumented
+
+
+MEYERHOF = "meyerhof"
+HANSEN = "hansen"
+VESIC = "vesic"
+METHODS = (MEYERHOF, HANSEN, VESIC)
+
+
+@dataclass
+class BearingCapacityResult:
+    """
+    Bearing capacity results, one entry per footing or load case.
+
+    Attributes:
+        ultimate_capacity: Ultimate bearing pressure on the effective area (kPa)
+        ultimate_load: Ultimate vertical load, capacity times effective area (kN)
+        effective_width: Effective width B' (m)
+        effective_length: Effective length L' (m)
+        Nc: Cohesion bearing capacity factor
+        Nq: Overburden bearing capacity factor
+        Ngamma: Unit weight bearing capacity factor
+    """
+    ultimate_capacity: np.ndarray
+    ultimate_load: np.ndarray
+    effective_width: np.ndarray
+    effective_length: np.ndarray
+    Nc: np.ndarray
+    Nq: np.ndarray
+    Ngamma: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.ultimate_capacity.size)
+
+    def to_dict(self, index: int = 0) -> Dict[str, float]:
+        """Convert the result of a single footing to a dictionary."""
+        return {name: float(np.ravel(value)[index]) for name, value in self.__dict__.items()}
+
+
+def bearing_capacity_factors(friction_angle, method: str = VESIC):
+    """
+    Calculate the bearing capacity factors Nc, Nq and Nγ.
+
+    Nc and Nq (Prandtl-Reissner) are common to all methods; Nγ is
+    (Nq-1)·tan(1.4φ) for Meyerhof, 1.5(Nq-1)·tanφ for Hansen and
+    2(Nq+1)·tanφ for Vesić.
+
+    Args:
+        friction_angle: Internal friction angle in degrees (array-like)
+        method: One of 'meyerhof', 'hansen' or 'vesic'
+
+    Returns:
+        Tuple of (Nc, Nq, Nγ) arrays
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown bearing capacity method '{method}', expected one of {METHODS}")
+
+    phi = np.radians(np.asarray(friction_angle, dtype=float))
+    tan_phi = np.tan(phi)
+    Nq = np.exp(np.pi * tan_phi) * np.tan(np.pi / 4 + phi / 2) ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Nc = np.where(phi > 0, (Nq - 1) / tan_phi, np.pi + 2)
+
+    if method == MEYERHOF:
+        Ngamma = (Nq - 1) * np.tan(1.4 * phi)
+    elif method == HANSEN:
+        Ngamma = 1.5 * (Nq - 1) * tan_phi
+    else:
+        Ngamma = 2 * (Nq + 1) * tan_phi
+
+    return Nc, Nq, Ngamma
+
+
+def _power(base, exponent):
+    """Raise a reduction factor to a power, clipping negative bases to zero."""
+    return np.maximum(base, 0.0) ** exponent
+
+
+class BearingCapacityEngine:
+    """Vectorized general bearing capacity equation for shallow foundations."""
+
+    @staticmethod
+    @instrumented
+    def calculate(
+        width,
+        length,
+        depth,
+        unit_weight,
+        cohesion,
+        friction_angle,
+        vertical_load=None,
+        horizontal_load=0.0,
+        eccentricity_width=0.0,
+        eccentricity_length=0.0,
+        base_tilt=0.0,
+        ground_slope=0.0,
+        water_depth=None,
+        saturated_unit_weight=None,
+        method: str = VESIC,
+        gamma_water: float = GAMMA_WATER
+    ) -> BearingCapacityResult:
+        """
+        Calculate the ultimate bearing capacity of shallow foundations.
+
+        The horizontal load acts parallel to the width. The depth factors use
+        the full width, all other terms the effective dimensions
+        B' = B - 2eB and L' = L - 2eL (swapped if B' > L'). Meyerhof has no
+        base-tilt or ground-slope factors; they are taken as 1.0. For φ = 0
+        Hansen's additive form qu = 5.14·c·(1 + s'c + d'c - i'c - b'c - g'c) + q
+        is used.
+
+        Args:
+            width: Foundation width B in meters
+            length: Foundation length L in meters (use a large value for strips)
+            depth: Foundation depth D in meters
+            unit_weight: Unit weight of soil above the water table in kN/m³
+            cohesion: Cohesion in kPa
+            friction_angle: Internal friction angle in degrees
+            vertical_load: Vertical load V in kN, required for inclined loads
+            horizontal_load: Horizontal load H in kN (default: 0)
+            eccentricity_width: Load eccentricity along the width in meters
+            eccentricity_length: Load eccentricity along the length in meters
+            base_tilt: Inclination of the footing base in degrees
+            ground_slope: Inclination of the ground surface away from the footing in degrees
+            water_depth: Depth of the water table below ground in meters (None: no water)
+            saturated_unit_weight: Unit weight below the water table (default: unit_weight)
+            method: One of 'meyerhof', 'hansen' or 'vesic' (default: 'vesic')
+            gamma_water: Unit weight of water in kN/m³
+
+        Returns:
+            BearingCapacityResult with one entry per broadcast input
+        """
+        if vertical_load is None:
+            if np.any(np.asarray(horizontal_load) != 0):
+                raise ValueError("vertical_load is required for inclined loads")
+            vertical_load = 1.0
+        if saturated_unit_weight is None:
+            saturated_unit_weight = unit_weight
+        if water_depth is None:
+            water_depth = np.inf
+
+        # Factors depend on the soil only; computing them before broadcasting keeps
+        # them at the shape of friction_angle when sweeping many load cases
+        Nc, Nq, Ngamma = bearing_capacity_factors(friction_angle, method)
+
+        (B, L, D, gamma, c, phi_deg, V, H, eB, eL, eta_deg, beta_deg, dw, gamma_sat) = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (
+                width, length, depth, unit_weight, cohesion, friction_angle, vertical_load, horizontal_load,
+                eccentricity_width, eccentricity_length, base_tilt, ground_slope, water_depth,
+                saturated_unit_weight))
+        )
+        if np.any(B <= 0) or np.any(L <= 0):
+            raise ValueError("width and length must be positive")
+        if np.any(V <= 0):
+            raise ValueError("vertical_load must be positive")
+
+        # Effective area (Meyerhof); B' is the smaller effective dimension
+        B1 = B - 2 * np.abs(eB)
+        L1 = L - 2 * np.abs(eL)
+        if np.any(B1 <= 0) or np.any(L1 <= 0):
+            raise ValueError("eccentricity places the load outside the footing")
+        Be = np.minimum(B1, L1)
+        Le = np.maximum(B1, L1)
+        area = Be * Le
+        ratio = Be / Le
+
+        # Groundwater: overburden at base level and unit weight of the failure wedge
+        gamma_eff = gamma_sat - gamma_water
+        dry_depth = np.clip(dw, 0.0, D)
+        q = gamma * dry_depth + gamma_eff * (D - dry_depth)
+        gamma_wedge = gamma_eff + np.clip((dw - D) / Be, 0.0, 1.0) * (gamma - gamma_eff)
+
+        phi = np.radians(phi_deg)
+        eta = np.radians(eta_deg)
+        beta = np.radians(beta_deg)
+        tan_phi = np.tan(phi)
+        sin_phi = np.sin(phi)
+        frictional = phi > 0
+        k = np.where(D <= B, D / B, np.arctan(D / B))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Adhesion term A'·c·cotφ in the inclination factors
+            adhesion = np.where(frictional, area * c / np.where(frictional, tan_phi, 1.0), np.inf)
+
+            if method == MEYERHOF:
+                Kp = np.tan(np.pi / 4 + phi / 2) ** 2
+                above_10 = phi_deg > 10
+                sc = 1 + 0.2 * Kp * ratio
+                sq = np.where(above_10, 1 + 0.1 * Kp * ratio, 1.0)
+                sg = sq
+                dc = 1 + 0.2 * np.sqrt(Kp) * D / B
+                dq = np.where(above_10, 1 + 0.1 * np.sqrt(Kp) * D / B, 1.0)
+                dg = dq
+                theta = np.degrees(np.arctan2(H, V))
+                iq = _power(1 - theta / 90.0, 2)
+                ic = iq
+                ig = np.where(frictional, _power(1 - theta / np.where(frictional, phi_deg, 1.0), 2), 1.0)
+                bc = bq = bg = gc = gq = gg = np.ones_like(B)
+
+            elif method == HANSEN:
+                sc = 1 + Nq / Nc * ratio
+                sq = 1 + ratio * sin_phi
+                sg = np.maximum(1 - 0.4 * ratio, 0.6)
+                dc = 1 + 0.4 * k
+                dq = 1 + 2 * tan_phi * (1 - sin_phi) ** 2 * k
+                dg = np.ones_like(B)
+                iq = _power(1 - 0.5 * H / (V + adhesion), 5)
+                ig = _power(1 - (0.7 - eta_deg / 450.0) * H / (V + adhesion), 5)
+                ic = np.where(frictional, iq - (1 - iq) / (Nq - 1), 1.0)
+                bc = 1 - eta_deg / 147.0
+                bq = np.exp(-2 * eta * tan_phi)
+                bg = np.exp(-2.7 * eta * tan_phi)
+                gc = 1 - beta_deg / 147.0
+                gq = _power(1 - 0.5 * np.tan(beta), 5)
+                gg = gq
+
+            else:
+                m = (2 + ratio) / (1 + ratio)
+                sc = 1 + Nq / Nc * ratio
+                sq = 1 + ratio * tan_phi
+                sg = np.maximum(1 - 0.4 * ratio, 0.6)
+                dc = 1 + 0.4 * k
+                dq = 1 + 2 * tan_phi * (1 - sin_phi) ** 2 * k
+                dg = np.ones_like(B)
+                iq = _power(1 - H / (V + adhesion), m)
+                ig = _power(1 - H / (V + adhesion), m + 1)
+                ic = np.where(frictional, iq - (1 - iq) / (Nc * tan_phi),
+                              1 - m * H / np.maximum(area * c * Nc, 1e-12))
+                gq = _power(1 - np.tan(beta), 2)
+                gg = gq
+                gc = np.where(frictional, gq - (1 - gq) / (Nc * tan_phi), 1 - 2 * beta / (np.pi + 2))
+                bq = _power(1 - eta * tan_phi, 2)
+                bg = bq
+                bc = np.where(frictional, bq - (1 - bq) / (Nc * tan_phi), 1 - 2 * eta / (np.pi + 2))
+
+        qu = (c * Nc * sc * dc * ic * bc * gc +
+              q * Nq * sq * dq * iq * bq * gq +
+              0.5 * gamma_wedge * Be * Ngamma * sg * dg * ig * bg * gg)
+
+        if method == HANSEN:
+            # Additive primed factors for undrained (φ = 0) conditions
+            with np.errstate(invalid='ignore'):
+                ic_prime = 0.5 - 0.5 * np.sqrt(np.maximum(1 - H / np.maximum(area * c, 1e-12), 0.0))
+            qu_undrained = (np.pi + 2) * c * (1 + 0.2 * ratio + 0.4 * k - ic_prime -
+                                              eta_deg / 147.0 - beta_deg / 147.0) + q
+            qu = np.where(frictional, qu, qu_undrained)
+
+        qu = np.maximum(qu, 0.0)
+        return BearingCapacityResult(
+            ultimate_capacity=qu,
+            ultimate_load=qu * area,
+            effective_width=Be,
+            effective_length=Le,
+            Nc=Nc * np.ones_like(qu),
+            Nq=Nq * np.ones_like(qu),
+            Ngamma=Ngamma * np.ones_like(qu),
+        )
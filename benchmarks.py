@@ -0,0 +1,579 @@
+"""
+Benchmark Suite for ENGIPIT
+
+This module times the calculators and project models: scalar and batch calls
+to every calculator method of app.py, the vectorized engines, the compiled
+kernels on every available backend, layer lookup and insertion on deep
+boreholes, average properties of large synthetic sites and serialization of
+large projects.
+
+Cold-start import times of the standard-library-only modules (app.py,
+project_models.py) are benchmarked in fresh interpreters and checked against
+fixed budgets with --check-imports.
+
+Results are written as stable JSON (sorted keys, fixed precision) so that
+runs can be stored and diffed, and a run can be compared against a stored
+baseline to catch regressions.
+
+Run with: python benchmarks.py --output results.json --baseline baseline.json
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from app import DeepFoundationCalculator, RetainingWallCalculator, ShallowFoundationCalculator
+from batch_runner import PILE, evaluate_chunk
+from bearing_capacity import BearingCapacityEngine
+from building_grid import INTERPOLATED, ColumnGrid, design_grid
+from design_charts import PILE as PILE_CHART, ResponseSurface
+from design_history import DesignHistory
+from foundation_optimizer import optimize, pile_group_problem
+from kernels import available_backends, bearing_capacity_factors, get_backend, pile_capacity, total_active_force
+from portfolio_index import PortfolioIndex
+from project_models import Borehole, SoilLayer, SoilType
+from site_views import CrossSection
+from soil_query import LayerTable, depth_between, field, soil_type, within
+from synthetic_site import BOREHOLE, CPT, SiteModel, generate_project, iter_boreholes, iter_layer_chunks, sounding_id
+from wall_stability import RetainingWallStabilityCalculator
+
+
+# Version of the JSON layout; reports with another version are not compared
+SCHEMA_VERSION = 1
+
+# Number of items in a batch call at scale 1
+BATCH_SIZE = 10000
+
+# Cold-start budgets: module -> (maximum import time in s, modules outside the standard library it may load)
+IMPORT_BUDGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    'app': (0.1, ('app', 'instrumentation')),
+    'project_models': (0.1, ('project_models', 'instrumentation')),
+}
+
+# A benchmark setup receives the scale and returns (function to time, items per call)
+Setup = Callable[[float], Tuple[Callable[[], Any], int]]
+
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def _size(count: int, scale: float) -> int:
+    return max(1, int(count * scale))
+
+
+def _round(value: float) -> float:
+    """Four significant digits, so reports diff cleanly."""
+    return float(f"{value:.4g}")
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a benchmark setup under a name."""
+    def register(setup: Setup) -> Setup:
+        if name in BENCHMARKS:
+            raise ValueError(f"Duplicate benchmark {name!r}")
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# Calculator methods of app.py with the arguments of the i-th call
+CALCULATOR_CASES: Tuple[Tuple[type, str, Callable[[int], tuple]], ...] = (
+    (ShallowFoundationCalculator, 'calculate_bearing_capacity_factors', lambda i: (20.0 + i % 20,)),
+    (ShallowFoundationCalculator, 'calculate_ultimate_bearing_capacity',
+     lambda i: (1.0 + i % 30 * 0.1, 2.0, 1.0, 18.0, 5.0, 20.0 + i % 20)),
+    (ShallowFoundationCalculator, 'calculate_allowable_bearing_capacity', lambda i: (500.0 + i, 3.0)),
+    (ShallowFoundationCalculator, 'calculate_applied_pressure', lambda i: (1000.0 + i, 2.0, 2.5)),
+    (DeepFoundationCalculator, 'calculate_pile_end_bearing', lambda i: (0.6, 18.0, 10.0 + i % 10, 30.0, 0.0)),
+    (DeepFoundationCalculator, 'calculate_pile_skin_friction',
+     lambda i: (0.6, 10.0 + i % 10, 18.0, 30.0, 5.0, "driven" if i % 2 else "bored")),
+    (DeepFoundationCalculator, 'calculate_pile_capacity',
+     lambda i: (0.6, 10.0 + i % 10, 18.0, 30.0, 5.0, "driven" if i % 2 else "bored")),
+    (DeepFoundationCalculator, 'calculate_pile_group_efficiency', lambda i: (9, 1.0 + i % 40 * 0.1, 0.5)),
+    (RetainingWallCalculator, 'calculate_active_earth_pressure_coefficient', lambda i: (20.0 + i % 20,)),
+    (RetainingWallCalculator, 'calculate_passive_earth_pressure_coefficient', lambda i: (20.0 + i % 20,)),
+    (RetainingWallCalculator, 'calculate_coulomb_active_earth_pressure_coefficient',
+     lambda i: (20.0 + i % 20, 10.0, 5.0, 0.0)),
+    (RetainingWallCalculator, 'calculate_coulomb_passive_earth_pressure_coefficient',
+     lambda i: (20.0 + i % 20, 10.0, 0.0, 0.0)),
+    (RetainingWallCalculator, 'calculate_log_spiral_passive_earth_pressure_coefficient',
+     lambda i: (20.0 + i % 20, 10.0, 0.0, 0.0)),
+    (RetainingWallCalculator, 'calculate_total_active_force', lambda i: (2.0 + i % 8, 18.0, 30.0, 0.0, 10.0)),
+)
+
+
+def _register_calculator(cls: type, method: str, arguments: Callable[[int], tuple]) -> None:
+    function = getattr(cls, method)
+
+    @benchmark(f"{cls.__name__}.{method}.scalar")
+    def scalar(scale: float):
+        args = arguments(0)
+        return lambda: function(*args), 1
+
+    @benchmark(f"{cls.__name__}.{method}.batch")
+    def batch(scale: float):
+        calls = [arguments(i) for i in range(_size(BATCH_SIZE, scale))]
+        return lambda: [function(*args) for args in calls], len(calls)
+
+
+for _case in CALCULATOR_CASES:
+    _register_calculator(*_case)
+
+
+def cold_import(module: str) -> Tuple[float, List[str]]:
+    """
+    Import a module in a fresh interpreter with instrumentation off.
+
+    Args:
+        module: Module name
+
+    Returns:
+        Tuple of (import time in s, top-level modules outside the standard library it loaded)
+    """
+    script = (
+        "import sys, time\n"
+        "before = set(sys.modules)\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "stdlib = set(getattr(sys, 'stdlib_module_names', ()))\n"
+        "print(elapsed)\n"
+        "print(' '.join(sorted({name.split('.')[0] for name in set(sys.modules) - before} - stdlib)))\n"
+    )
+    environment = {name: value for name, value in os.environ.items() if not name.startswith('ENGIPIT_INSTRUMENT')}
+    output = subprocess.run([sys.executable, '-c', script], env=environment, check=True, capture_output=True,
+                            text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split('\n')
+    return float(output[0]), output[1].split()
+
+
+def check_imports(timings: bool = True) -> List[str]:
+    """
+    Check the cold-start import budgets.
+
+    Args:
+        timings: Also check the import times (False checks only the loaded modules)
+
+    Returns:
+        One message per module over its time budget or loading a module it may not load
+    """
+    problems = []
+    for module, (budget, allowed) in IMPORT_BUDGETS.items():
+        elapsed, loaded = cold_import(module)
+        if timings and elapsed > budget:
+            problems.append(f"import {module} took {elapsed * 1e3:.1f} ms, budget {budget * 1e3:.0f} ms")
+        extra = sorted(set(loaded) - set(allowed))
+        if extra:
+            problems.append(f"import {module} loaded {', '.join(extra)}")
+    return problems
+
+
+def _register_import(module: str) -> None:
+    @benchmark(f"import.{module}.cold")
+    def cold(scale: float):
+        return lambda: cold_import(module), 1
+
+
+for _module in IMPORT_BUDGETS:
+    _register_import(_module)
+
+
+@benchmark("BearingCapacityEngine.calculate.vectorized")
+def _bearing_capacity(scale: float):
+    n = _size(BATCH_SIZE, scale)
+    width = np.linspace(1.0, 4.0, n)
+    phi = 20.0 + np.arange(n) % 20
+    return lambda: BearingCapacityEngine.calculate(width, 2.0, 1.0, 18.0, 5.0, phi), n
+
+
+@benchmark("RetainingWallStabilityCalculator.calculate_stability.vectorized")
+def _wall_stability(scale: float):
+    n = _size(BATCH_SIZE, scale)
+    height = np.linspace(2.0, 6.0, n)
+    return lambda: RetainingWallStabilityCalculator.calculate_stability(
+        height, 0.3, 0.6 * height, 0.5, 0.8, 18.0, 30.0, 10.0), n
+
+
+def _register_kernels(backend: str) -> None:
+    @benchmark(f"kernels.bearing_capacity_factors.{backend}")
+    def factors(scale: float):
+        n = _size(BATCH_SIZE * 10, scale)
+        phi = np.linspace(0.0, 45.0, n)
+        return lambda: bearing_capacity_factors(phi, backend=backend), n
+
+    @benchmark(f"kernels.pile_capacity.{backend}")
+    def piles(scale: float):
+        n = _size(BATCH_SIZE * 10, scale)
+        length = 10.0 + np.arange(n) % 10
+        pile_type = np.where(np.arange(n) % 2 == 0, "driven", "bored")
+        return lambda: pile_capacity(0.6, length, 18.0, 30.0, 5.0, pile_type, backend=backend), n
+
+    @benchmark(f"kernels.total_active_force.{backend}")
+    def active_force(scale: float):
+        n = _size(BATCH_SIZE * 10, scale)
+        height = np.linspace(1.0, 10.0, n)
+        return lambda: total_active_force(height, 18.0, 30.0, 0.0, 10.0, backend=backend), n
+
+
+for _backend in available_backends():
+    _register_kernels(_backend)
+
+
+@benchmark("batch_runner.evaluate_chunk.pile")
+def _pile_chunk(scale: float):
+    n = _size(BATCH_SIZE, scale)
+    chunk = {'pile_diameter': [0.6] * n, 'pile_length': [10.0 + i % 10 for i in range(n)],
+             'unit_weight': [18.0] * n, 'friction_angle': [30.0] * n, 'cohesion': [5.0] * n,
+             'pile_type': ["driven", "bored"] * (n // 2) + ["driven"] * (n % 2)}
+    return lambda: evaluate_chunk(PILE, chunk), n
+
+
+@benchmark("ResponseSurface.query")
+def _chart_query(scale: float):
+    chart = ResponseSurface.build(PILE_CHART, {'unit_weight': 18.0, 'cohesion': 5.0, 'friction_angle': 32.0})
+    rng = np.random.default_rng(2)
+    queries = list(zip(rng.uniform(0.3, 1.5, 1000).tolist(), rng.uniform(5.0, 40.0, 1000).tolist()))
+    return lambda: [chart(diameter, length) for diameter, length in queries], len(queries)
+
+
+@benchmark("Borehole.add_layer")
+def _add_layer(scale: float):
+    n = _size(2000, scale)
+    layers = [SoilLayer(float(i), float(i + 1), SoilType.SAND, unit_weight=18.0) for i in range(n)]
+
+    def run():
+        borehole = Borehole("BH", "BH", 0.0, 0.0)
+        for layer in layers:
+            borehole.add_layer(layer)
+    return run, n
+
+
+@benchmark("Borehole.get_layer_at_depth")
+def _layer_at_depth(scale: float):
+    borehole = next(iter_boreholes(SiteModel.create(layers=_size(10000, scale)), 1))
+    depths = np.random.default_rng(1).uniform(0.0, borehole.total_depth, 1000).tolist()
+    return lambda: [borehole.get_layer_at_depth(depth) for depth in depths], len(depths)
+
+
+@benchmark("SoilInvestigation.get_average_properties")
+def _average_properties(scale: float):
+    investigation = generate_project(boreholes=_size(100000, scale)).soil_investigations[0]
+    return lambda: investigation.get_average_properties((2.0, 8.0)), len(investigation.boreholes)
+
+
+@benchmark("GeotechnicalProject.to_dict")
+def _project_to_dict(scale: float):
+    project = generate_project(boreholes=_size(10000, scale), designs=_size(1000, scale))
+    return project.to_dict, len(project.soil_investigations[0].boreholes)
+
+
+@benchmark("CrossSection.traces")
+def _cross_section(scale: float):
+    n = _size(300, scale)
+    soundings = list(iter_boreholes(SiteModel.create(layers=200, site_size=1000.0), n, CPT))
+    line = [(0.0, 0.0), (1000.0, 1000.0)]
+    return lambda: CrossSection.build(soundings, line).traces(), n
+
+
+@benchmark("optimize.pile_group")
+def _optimize_pile_group(scale: float):
+    problem = pile_group_problem(6000.0, 18.0, 5.0, 30.0)
+    generations = _size(40, scale)
+    return lambda: optimize(problem, population=64, generations=generations), 64 * generations
+
+
+@benchmark("design_grid")
+def _design_grid(scale: float):
+    project = generate_project(boreholes=400, seed=2)
+    lines = np.arange(10.0, 490.0, 6.0)[:_size(60, scale)]
+    loads = np.random.default_rng(0).uniform(300.0, 6000.0, (lines.size, lines.size))
+    grid = ColumnGrid.regular(lines, lines, loads)
+    return lambda: design_grid(project, grid, soil_method=INTERPOLATED, add_to_project=False), len(grid)
+
+
+@benchmark("DesignHistory.commit")
+def _history_commit(scale: float):
+    project = generate_project(boreholes=_size(1000, scale), designs=_size(1000, scale))
+    history = DesignHistory()
+    history.commit(project)
+    layer = project.soil_investigations[0].boreholes[0].layers[0]
+
+    def commit():
+        layer.cohesion = (layer.cohesion or 0.0) + 1.0
+        history.commit(project)
+        history.diff(-2)
+
+    return commit, len(project.soil_investigations[0].boreholes)
+
+
+@benchmark("SoilQuery.sand_near_point")
+def _soil_query(scale: float):
+    soundings = _size(100000, scale)
+    model = SiteModel.create(seed=1, layers=10, site_size=3000.0)
+    table = LayerTable.from_chunks(iter_layer_chunks(model, soundings), lambda i: sounding_id(BOREHOLE, i))
+    query = table.query(soil_type(SoilType.SAND), field('friction_angle') > 32, depth_between(5.0, 15.0),
+                        within(1500.0, 1500.0, 50.0))
+    query.count()  # build the sorted column indexes
+    return query.rows, len(table)
+
+
+@benchmark("PortfolioIndex.search")
+def _portfolio_search(scale: float):
+    index = PortfolioIndex()
+    for number in range(_size(20, scale)):
+        project = generate_project(boreholes=500, seed=number, project_id=f"P{number:03d}")
+        project.coordinates = (50.85 + 0.002 * (number % 5), 4.35 + 0.003 * (number // 5))
+        index.update(project)
+    return lambda: index.search(50.852, 4.353, 500.0, soil_type=SoilType.CLAY, below=8.0), len(index)
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Timing of one benchmark.
+
+    Attributes:
+        name: Benchmark name
+        items: Items processed per call (1 for scalar calls)
+        loops: Calls per timed repeat
+        times: Seconds per call, one per repeat
+    """
+    name: str
+    items: int
+    loops: int
+    times: List[float]
+
+    @property
+    def best(self) -> float:
+        """Fastest time per call (s)."""
+        return min(self.times)
+
+    @property
+    def median(self) -> float:
+        """Median time per call (s)."""
+        return statistics.median(self.times)
+
+    @property
+    def per_item(self) -> float:
+        """Median time per item (s); the quantity compared against a baseline."""
+        return self.median / self.items
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'items': self.items,
+            'loops': self.loops,
+            'repeats': len(self.times),
+            'best': _round(self.best),
+            'median': _round(self.median),
+            'per_item': _round(self.per_item),
+        }
+
+
+def select(patterns: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Names of the registered benchmarks matching any of the glob patterns (all if None).
+    """
+    names = sorted(BENCHMARKS)
+    if not patterns:
+        return names
+    return [name for name in names if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+def time_function(function: Callable[[], Any], repeat: int = 5, min_time: float = 0.05) -> Tuple[int, List[float]]:
+    """
+    Time a function like timeit: calibrate the number of loops, then repeat.
+
+    Args:
+        function: Function without arguments
+        repeat: Number of timed repeats
+        min_time: Minimum duration of one repeat (s)
+
+    Returns:
+        Tuple of (loops per repeat, seconds per call for each repeat)
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    times = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        times.append((time.perf_counter() - start) / loops)
+    return loops, times
+
+
+def run_benchmarks(patterns: Optional[Sequence[str]] = None, scale: float = 1.0, repeat: int = 5,
+                   min_time: float = 0.05,
+                   progress: Optional[Callable[[BenchmarkResult], None]] = None) -> List[BenchmarkResult]:
+    """
+    Run the selected benchmarks.
+
+    Setup (e.g. generating a synthetic site) is not timed.
+
+    Args:
+        patterns: Glob patterns of benchmark names (default: all)
+        scale: Factor on the problem sizes (1.0: 10^4-item batches, 10^5-borehole sites)
+        repeat: Number of timed repeats
+        min_time: Minimum duration of one repeat (s)
+        progress: Called with each result as it completes
+
+    Returns:
+        Results in name order
+    """
+    results = []
+    for name in select(patterns):
+        function, items = BENCHMARKS[name](scale)
+        loops, times = time_function(function, repeat, min_time)
+        result = BenchmarkResult(name, items, loops, times)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+def make_report(results: Sequence[BenchmarkResult], scale: float) -> Dict[str, Any]:
+    """Report of a run, with the environment it ran in."""
+    return {
+        'schema': SCHEMA_VERSION,
+        'scale': scale,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'kernels': get_backend(),
+            'machine': platform.machine(),
+            'system': platform.system(),
+        },
+        'benchmarks': {result.name: result.to_dict() for result in results},
+    }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    """Write a report as stable JSON."""
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """Read a report written by write_report."""
+    with open(path) as handle:
+        return json.load(handle)
+
+
+@dataclass
+class Comparison:
+    """
+    Time per item of one benchmark against the baseline.
+
+    Attributes:
+        name: Benchmark name
+        baseline: Baseline time per item (s)
+        current: Current time per item (s)
+    """
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        """Current over baseline time; above 1 is slower."""
+        return self.current / self.baseline if self.baseline > 0 else float('inf')
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = 0.25) -> Tuple[List[Comparison], List[Comparison]]:
+    """
+    Compare a report against a baseline report.
+
+    Only benchmarks present in both are compared.
+
+    Args:
+        report: Current report
+        baseline: Stored baseline report
+        tolerance: Allowed slowdown as a fraction (0.25: up to 25 % slower)
+
+    Returns:
+        Tuple of (all comparisons, regressions slower than the tolerance)
+
+    Raises:
+        ValueError: If the reports have a different schema or scale
+    """
+    for key in ('schema', 'scale'):
+        if report.get(key) != baseline.get(key):
+            raise ValueError(f"Cannot compare reports with different {key}: "
+                             f"{report.get(key)!r} vs baseline {baseline.get(key)!r}")
+    comparisons = [
+        Comparison(name, baseline['benchmarks'][name]['per_item'], result['per_item'])
+        for name, result in sorted(report['benchmarks'].items()) if name in baseline['benchmarks']
+    ]
+    regressions = [comparison for comparison in comparisons if comparison.ratio > 1.0 + tolerance]
+    return comparisons, regressions
+
+
+def _format_time(seconds: float) -> str:
+    for unit, factor in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line entry point; returns 1 if a regression against the baseline was found."""
+    parser = argparse.ArgumentParser(description="Run the ENGIPIT benchmark suite")
+    parser.add_argument('-k', '--select', action='append', help="Glob pattern of benchmark names (repeatable)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Factor on the problem sizes")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed repeats per benchmark")
+    parser.add_argument('--min-time', type=float, default=0.05, help="Minimum duration of one repeat (s)")
+    parser.add_argument('-o', '--output', help="Write the report to this JSON file")
+    parser.add_argument('--baseline', help="Compare against this baseline report")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown against the baseline")
+    parser.add_argument('--list', action='store_true', help="List the benchmarks and exit")
+    parser.add_argument('--check-imports', action='store_true',
+                        help="Check the cold-start import budgets and exit; returns 1 if one is exceeded")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(select(args.select)))
+        return 0
+
+    if args.check_imports:
+        problems = check_imports()
+        for problem in problems:
+            print(f"IMPORT BUDGET {problem}", file=sys.stderr)
+        return 1 if problems else 0
+
+    def progress(result: BenchmarkResult) -> None:
+        print(f"{result.name:<70} {_format_time(result.median):>10} per call, "
+              f"{_format_time(result.per_item):>10} per item")
+
+    results = run_benchmarks(args.select, args.scale, args.repeat, args.min_time, progress)
+    report = make_report(results, args.scale)
+    if args.output:
+        write_report(report, args.output)
+
+    if args.baseline:
+        _, regressions = compare(report, load_report(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression.name}: {regression.ratio:.2f}x baseline", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
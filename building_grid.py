@@ -0,0 +1,509 @@
+"""
+Building Grid Design for ENGIPIT
+
+Sizes the foundation of every column of a building in one vectorized batch.
+Each column is located in the soil investigation and takes the soil of the
+nearest borehole, or a distance-weighted interpolation of all boreholes.
+It is then designed as a square pad footing, or as a pile group where no
+footing up to the maximum width carries the load:
+
+    footing     smallest width (in construction steps) whose ultimate load,
+                Terzaghi's qu × B², reaches the required safety factor
+    pile group  fewest piles of the given diameter and length whose group
+                capacity, n × efficiency × Qu, reaches the required safety factor
+
+Soil is averaged, weighted by layer thickness, below the footing level for
+footings and over the pile length for piles. The result is a column table
+(writable to CSV or Parquet with batch_runner.ChunkWriter) and one
+FoundationDesign per column in the project.
+
+Example:
+    grid = ColumnGrid.regular([0.0, 6.0, 12.0], [0.0, 7.5], load=1800.0)
+    design = design_grid(project, grid, soil_method=INTERPOLATED)
+    design.write("columns.csv")
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass
+from datetime import datetime
+import math
+
+import numpy as np
+
+from app import DeepFoundationCalculator
+from batch_runner import ChunkWriter
+from foundation_optimizer import FOOTING, PILE_GROUP
+from kernels import pile_capacity, ultimate_bearing_capacity
+from project_models import FoundationDesign, FoundationType, GeotechnicalProject, SoilInvestigation
+
+
+AUTO = "auto"
+FOUNDATIONS = (AUTO, FOOTING, PILE_GROUP)
+
+NEAREST = "nearest"
+INTERPOLATED = "interpolated"
+SOIL_METHODS = (NEAREST, INTERPOLATED)
+
+PROPERTIES = ('unit_weight', 'cohesion', 'friction_angle')
+
+# Columns located against the boreholes per block, bounding the distance matrix
+_BLOCK = 4096
+
+
+def grid_label(index: int) -> str:
+    """Spreadsheet-style label of a grid line: A, B, ..., Z, AA, AB, ..."""
+    label = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord('A') + remainder) + label
+    return label
+
+
+@dataclass
+class ColumnGrid:
+    """
+    Column positions and loads of a building.
+
+    Attributes:
+        names: Column names
+        x: X coordinates in the site coordinate system of the boreholes (m)
+        y: Y coordinates (m)
+        load: Vertical service loads (kN)
+    """
+    names: List[str]
+    x: np.ndarray
+    y: np.ndarray
+    load: np.ndarray
+
+    def __post_init__(self):
+        self.names = [str(name) for name in self.names]
+        self.x, self.y, self.load = (np.asarray(values, dtype=float).ravel() for values in (self.x, self.y, self.load))
+        if not len(self.names) == self.x.size == self.y.size == self.load.size:
+            raise ValueError("names, x, y and load must have the same length")
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("Column names must be unique")
+        if np.any(self.load <= 0):
+            raise ValueError("Column loads must be positive")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def regular(cls, x_lines: Sequence[float], y_lines: Sequence[float],
+                load: Union[float, Sequence[Sequence[float]]]) -> 'ColumnGrid':
+        """
+        Columns at every intersection of the grid lines.
+
+        Columns are named by grid line, letters along x and numbers along y
+        (A1, A2, ..., B1, ...).
+
+        Args:
+            x_lines: X coordinates of the grid lines (m)
+            y_lines: Y coordinates of the grid lines (m)
+            load: Load of every column, or an array of shape (len(x_lines), len(y_lines)) (kN)
+
+        Returns:
+            ColumnGrid
+        """
+        x, y = np.meshgrid(np.asarray(x_lines, dtype=float), np.asarray(y_lines, dtype=float), indexing='ij')
+        names = [f"{grid_label(i)}{j + 1}" for i in range(x.shape[0]) for j in range(x.shape[1])]
+        return cls(names, x, y, np.broadcast_to(np.asarray(load, dtype=float), x.shape))
+
+
+@dataclass(frozen=True)
+class DesignRules:
+    """
+    Foundation options and required safety factors of a grid design.
+
+    Attributes:
+        footing_depth: Founding depth of footings (m)
+        min_footing_width: Smallest footing width (m)
+        max_footing_width: Largest footing width before piles are used (m)
+        footing_step: Construction increment of footing widths (m)
+        footing_fs: Required bearing safety factor of footings
+        pile_diameter: Pile diameter (m)
+        pile_length: Pile length (m)
+        pile_type: "driven" or "bored"
+        spacing_ratio: Pile spacing over diameter
+        pile_fs: Required safety factor of pile groups
+        max_piles: Largest number of piles under a column
+    """
+    footing_depth: float = 1.0
+    min_footing_width: float = 0.6
+    max_footing_width: float = 4.0
+    footing_step: float = 0.05
+    footing_fs: float = 3.0
+    pile_diameter: float = 0.6
+    pile_length: float = 15.0
+    pile_type: str = "bored"
+    spacing_ratio: float = 3.0
+    pile_fs: float = 2.5
+    max_piles: int = 16
+
+    def __post_init__(self):
+        if self.pile_type not in ("driven", "bored"):
+            raise ValueError(f"Unknown pile_type '{self.pile_type}'")
+        if not 0 < self.min_footing_width <= self.max_footing_width or self.footing_step <= 0:
+            raise ValueError("Footing widths must satisfy 0 < min_footing_width <= max_footing_width")
+        if self.pile_diameter <= 0 or self.pile_length <= 0 or self.max_piles < 1:
+            raise ValueError("pile_diameter, pile_length and max_piles must be positive")
+
+    @property
+    def footing_widths(self) -> np.ndarray:
+        """Footing widths in construction steps, smallest first."""
+        count = int(math.floor((self.max_footing_width - self.min_footing_width) / self.footing_step + 1e-9)) + 1
+        return np.round(self.min_footing_width + self.footing_step * np.arange(count), 6)
+
+    @property
+    def footing_soil_range(self) -> Tuple[float, float]:
+        """Depth range of the footing soil: from the founding level down one maximum width."""
+        return (self.footing_depth, self.footing_depth + self.max_footing_width)
+
+    @property
+    def pile_soil_range(self) -> Tuple[float, float]:
+        """Depth range of the pile soil: the pile length."""
+        return (0.0, self.pile_length)
+
+
+@dataclass
+class BoreholeSoil:
+    """
+    Soil properties of each borehole averaged over a depth range.
+
+    Attributes:
+        ids: Borehole IDs
+        x: Borehole X coordinates (m)
+        y: Borehole Y coordinates (m)
+        properties: 'unit_weight', 'cohesion' and 'friction_angle' arrays, one value per borehole
+    """
+    ids: List[str]
+    x: np.ndarray
+    y: np.ndarray
+    properties: Dict[str, np.ndarray]
+
+    @classmethod
+    def from_investigation(cls, investigation: SoilInvestigation,
+                           depth_range: Tuple[float, float]) -> 'BoreholeSoil':
+        """
+        Average each borehole's layers over a depth range, weighted by the thickness inside it.
+
+        Each property is averaged over the layers that have data for it.
+        Boreholes without unit weight or friction angle data in the range are
+        left out; cohesion is zero when no layer in the range has cohesion data.
+
+        Args:
+            investigation: Soil investigation
+            depth_range: (top, bottom) depth range (m)
+
+        Returns:
+            BoreholeSoil
+
+        Raises:
+            ValueError: If no borehole has data in the range
+        """
+        top, bottom = depth_range
+        ids, x, y = [], [], []
+        values: Dict[str, List[float]] = {name: [] for name in PROPERTIES}
+        for borehole in investigation.boreholes:
+            sums = dict.fromkeys(PROPERTIES, 0.0)
+            weights = dict.fromkeys(PROPERTIES, 0.0)
+            for layer in borehole.layers:
+                thickness = min(layer.depth_bottom, bottom) - max(layer.depth_top, top)
+                if thickness <= 0:
+                    continue
+                for name in PROPERTIES:
+                    value = getattr(layer, name)
+                    if value is not None:
+                        sums[name] += thickness * value
+                        weights[name] += thickness
+            if weights['unit_weight'] == 0 or weights['friction_angle'] == 0:
+                continue
+            ids.append(borehole.id)
+            x.append(borehole.location_x)
+            y.append(borehole.location_y)
+            for name in PROPERTIES:
+                values[name].append(sums[name] / weights[name] if weights[name] else 0.0)
+        if not ids:
+            raise ValueError(f"Investigation {investigation.id} has no soil data between {top} and {bottom} m")
+        return cls(ids, np.array(x, dtype=float), np.array(y, dtype=float),
+                   {name: np.array(column) for name, column in values.items()})
+
+    def at(self, x: np.ndarray, y: np.ndarray, method: str = NEAREST,
+           power: float = 2.0) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Soil at points.
+
+        Args:
+            x: X coordinates (m)
+            y: Y coordinates (m)
+            method: NEAREST borehole, or INTERPOLATED by inverse distance weighting
+            power: Distance exponent of the inverse distance weights
+
+        Returns:
+            Tuple of (properties, index of the nearest borehole, distance to it)
+
+        Raises:
+            ValueError: If the method is unknown
+        """
+        if method not in SOIL_METHODS:
+            raise ValueError(f"Unknown soil method '{method}'; use one of {SOIL_METHODS}")
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        nearest = np.empty(x.size, dtype=int)
+        distance = np.empty(x.size)
+        properties = {name: np.empty(x.size) for name in PROPERTIES}
+        stacked = np.stack([self.properties[name] for name in PROPERTIES])
+        for start in range(0, x.size, _BLOCK):
+            block = slice(start, start + _BLOCK)
+            d = np.hypot(x[block, None] - self.x[None, :], y[block, None] - self.y[None, :])
+            nearest[block] = np.argmin(d, axis=1)
+            distance[block] = d[np.arange(d.shape[0]), nearest[block]]
+            if method == NEAREST:
+                values = stacked[:, nearest[block]]
+            else:
+                # A point on a borehole takes that borehole's soil
+                on_borehole = d <= 1e-9
+                weights = np.where(on_borehole.any(axis=1, keepdims=True), on_borehole,
+                                   1.0 / np.maximum(d, 1e-9) ** power)
+                values = stacked @ weights.T / weights.sum(axis=1)
+            for name, row in zip(PROPERTIES, values):
+                properties[name][block] = row
+        return properties, nearest, distance
+
+
+def size_footings(load: np.ndarray, soil: Dict[str, np.ndarray], rules: DesignRules) -> Dict[str, np.ndarray]:
+    """
+    Smallest square footings carrying the loads.
+
+    Args:
+        load: Column loads (kN)
+        soil: Soil properties at the columns
+        rules: Design rules
+
+    Returns:
+        Dictionary of arrays: 'width' (NaN where the largest width falls short),
+        'ultimate_capacity' (kN) and 'safety_factor'
+    """
+    widths = rules.footing_widths
+    qu = ultimate_bearing_capacity(widths[None, :], widths[None, :], rules.footing_depth,
+                                   soil['unit_weight'][:, None], soil['cohesion'][:, None],
+                                   soil['friction_angle'][:, None])
+    capacity = qu * widths ** 2
+    ok = capacity >= rules.footing_fs * load[:, None]
+    feasible = ok.any(axis=1)
+    index = np.where(feasible, np.argmax(ok, axis=1), widths.size - 1)
+    rows = np.arange(load.size)
+    return {'width': np.where(feasible, widths[index], np.nan), 'ultimate_capacity': capacity[rows, index],
+            'safety_factor': capacity[rows, index] / load}
+
+
+def size_pile_groups(load: np.ndarray, soil: Dict[str, np.ndarray], rules: DesignRules) -> Dict[str, np.ndarray]:
+    """
+    Smallest pile groups carrying the loads.
+
+    Args:
+        load: Column loads (kN)
+        soil: Soil properties at the columns
+        rules: Design rules
+
+    Returns:
+        Dictionary of arrays: 'pile_count' (largest count where max_piles falls
+        short), 'feasible', 'ultimate_capacity' of the group (kN) and 'safety_factor'
+    """
+    Qu = pile_capacity(rules.pile_diameter, rules.pile_length, soil['unit_weight'], soil['friction_angle'],
+                       soil['cohesion'], rules.pile_type)[0]
+    efficiency = DeepFoundationCalculator.calculate_pile_group_efficiency(
+        2, rules.spacing_ratio * rules.pile_diameter, rules.pile_diameter)
+    required = rules.pile_fs * load
+    count = np.where(Qu >= required, 1.0, np.maximum(np.ceil(required / (efficiency * Qu) - 1e-9), 2.0))
+    feasible = count <= rules.max_piles
+    count = np.minimum(count, rules.max_piles)
+    capacity = count * np.where(count > 1, efficiency, 1.0) * Qu
+    return {'pile_count': count.astype(int), 'feasible': feasible, 'ultimate_capacity': capacity,
+            'safety_factor': capacity / load}
+
+
+@dataclass
+class GridDesign:
+    """
+    Foundation of every column of a grid.
+
+    Attributes:
+        grid: Column grid
+        investigation_id: Soil investigation the columns were located in
+        rules: Design rules
+        soil_method: NEAREST or INTERPOLATED
+        foundation: FOOTING or PILE_GROUP per column
+        feasible: Whether the foundation reaches the required safety factor
+        borehole: Nearest borehole per column
+        borehole_distance: Distance to the nearest borehole (m)
+        soil: Soil properties the foundation was designed for
+        width: Footing width (m), NaN for pile groups
+        pile_count: Number of piles, 0 for footings
+        ultimate_capacity: Ultimate capacity of the foundation (kN)
+        safety_factor: Ultimate capacity over the column load
+    """
+    grid: ColumnGrid
+    investigation_id: str
+    rules: DesignRules
+    soil_method: str
+    foundation: np.ndarray
+    feasible: np.ndarray
+    borehole: List[str]
+    borehole_distance: np.ndarray
+    soil: Dict[str, np.ndarray]
+    width: np.ndarray
+    pile_count: np.ndarray
+    ultimate_capacity: np.ndarray
+    safety_factor: np.ndarray
+
+    def table(self) -> Dict[str, List[Any]]:
+        """Column-oriented table, one row per column (None where a value does not apply)."""
+        footing = self.foundation == FOOTING
+        rules = self.rules
+
+        def where(mask: np.ndarray, values: Any) -> List[Any]:
+            values = np.broadcast_to(values, mask.shape).tolist()
+            return [value if keep else None for keep, value in zip(mask.tolist(), values)]
+
+        return {
+            'column': list(self.grid.names),
+            'x': self.grid.x.tolist(),
+            'y': self.grid.y.tolist(),
+            'load': self.grid.load.tolist(),
+            'borehole': list(self.borehole),
+            'borehole_distance': self.borehole_distance.tolist(),
+            'foundation': self.foundation.tolist(),
+            'feasible': self.feasible.tolist(),
+            **{name: values.tolist() for name, values in self.soil.items()},
+            'width': where(footing & ~np.isnan(self.width), self.width),
+            'depth': where(footing, rules.footing_depth),
+            'pile_count': where(~footing, self.pile_count),
+            'pile_diameter': where(~footing, rules.pile_diameter),
+            'pile_length': where(~footing, rules.pile_length),
+            'ultimate_capacity': self.ultimate_capacity.tolist(),
+            'safety_factor': self.safety_factor.tolist(),
+        }
+
+    def write(self, path: str) -> None:
+        """Write the table to a CSV or Parquet file (by extension)."""
+        with ChunkWriter(path) as writer:
+            writer.write(self.table())
+
+    def designs(self, project_id: str) -> List[FoundationDesign]:
+        """
+        One FoundationDesign per column.
+
+        Args:
+            project_id: ID of the parent project
+
+        Returns:
+            Designs with IDs 'COL-<column name>'
+        """
+        rules = self.rules
+        table = self.table()
+        designs = []
+        for values in zip(*table.values()):
+            row = dict(zip(table, values))
+            footing = row['foundation'] == FOOTING
+            parameters = {'location_x': row['x'], 'location_y': row['y'], 'load': row['load']}
+            if footing:
+                parameters.update(width=row['width'], length=row['width'], depth=rules.footing_depth)
+            else:
+                parameters.update(pile_diameter=rules.pile_diameter, pile_length=rules.pile_length,
+                                  pile_type=rules.pile_type, pile_count=row['pile_count'],
+                                  spacing=rules.spacing_ratio * rules.pile_diameter)
+            required = rules.footing_fs if footing else rules.pile_fs
+            designs.append(FoundationDesign(
+                id=f"COL-{row['column']}",
+                name=f"Column {row['column']}",
+                foundation_type=FoundationType.SHALLOW if footing else FoundationType.DEEP_PILE,
+                project_id=project_id,
+                soil_investigation_id=self.investigation_id,
+                design_parameters=parameters,
+                results={'ultimate_capacity': row['ultimate_capacity'], 'required_safety_factor': required,
+                         'feasible': row['feasible'], 'borehole': row['borehole'],
+                         'soil_method': self.soil_method, 'soil': {name: row[name] for name in PROPERTIES}},
+                safety_factor=row['safety_factor'],
+                notes="" if row['feasible'] else f"Does not reach the required safety factor of {required}",
+            ))
+        return designs
+
+
+def design_grid(
+    project: GeotechnicalProject,
+    grid: ColumnGrid,
+    rules: DesignRules = DesignRules(),
+    foundation: str = AUTO,
+    soil_method: str = NEAREST,
+    investigation: Optional[SoilInvestigation] = None,
+    add_to_project: bool = True
+) -> GridDesign:
+    """
+    Design the foundations of all columns of a grid.
+
+    Args:
+        project: Project to add the designs to
+        grid: Column positions and loads
+        rules: Foundation options and required safety factors
+        foundation: FOOTING, PILE_GROUP, or AUTO for footings where one up to
+            rules.max_footing_width suffices and pile groups elsewhere
+        soil_method: NEAREST borehole or INTERPOLATED between boreholes
+        investigation: Soil investigation; defaults to the project's active one
+        add_to_project: Add a FoundationDesign per column to the project,
+            replacing earlier designs of the same columns (their creation date is kept)
+
+    Returns:
+        GridDesign
+
+    Raises:
+        ValueError: If the foundation or soil method is unknown or there is no soil data
+    """
+    if foundation not in FOUNDATIONS:
+        raise ValueError(f"Unknown foundation '{foundation}'; use one of {FOUNDATIONS}")
+    investigation = investigation or project.get_active_soil_investigation()
+    if investigation is None:
+        raise ValueError(f"Project {project.id} has no soil investigation")
+
+    n = len(grid)
+    footing = np.zeros(n, dtype=bool)
+    result = {'width': np.full(n, np.nan), 'pile_count': np.zeros(n, dtype=int), 'feasible': np.zeros(n, dtype=bool),
+              'ultimate_capacity': np.zeros(n), 'safety_factor': np.zeros(n)}
+    soil = {name: np.zeros(n) for name in PROPERTIES}
+    nearest_id = [""] * n
+    distance = np.zeros(n)
+
+    def locate(depth_range: Tuple[float, float], mask: np.ndarray) -> Dict[str, np.ndarray]:
+        boreholes = BoreholeSoil.from_investigation(investigation, depth_range)
+        properties, nearest, d = boreholes.at(grid.x[mask], grid.y[mask], soil_method)
+        distance[mask] = d
+        for i, index in zip(np.flatnonzero(mask).tolist(), nearest.tolist()):
+            nearest_id[i] = boreholes.ids[index]
+        for name in PROPERTIES:
+            soil[name][mask] = properties[name]
+        return properties
+
+    if foundation != PILE_GROUP:
+        everything = np.ones(n, dtype=bool)
+        footings = size_footings(grid.load, locate(rules.footing_soil_range, everything), rules)
+        footing = ~np.isnan(footings['width']) if foundation == AUTO else everything
+        for name in ('width', 'ultimate_capacity', 'safety_factor'):
+            result[name][footing] = footings[name][footing]
+        result['feasible'][footing] = ~np.isnan(footings['width'][footing])
+    piles = ~footing
+    if piles.any():
+        groups = size_pile_groups(grid.load[piles], locate(rules.pile_soil_range, piles), rules)
+        for name in ('pile_count', 'feasible', 'ultimate_capacity', 'safety_factor'):
+            result[name][piles] = groups[name]
+
+    design = GridDesign(grid, investigation.id, rules, soil_method, np.where(footing, FOOTING, PILE_GROUP),
+                        result['feasible'], nearest_id, distance, soil, result['width'], result['pile_count'],
+                        result['ultimate_capacity'], result['safety_factor'])
+    if add_to_project:
+        now = datetime.now()
+        for item in design.designs(project.id):
+            previous = project.remove_foundation_design(item.id)
+            item.created_date = previous.created_date if previous is not None else now
+            item.modified_date = now
+            project.add_foundation_design(item)
+    return design
@@ -0,0 +1,211 @@
+"""
+Call Metrics for ENGIPIT
+
+Recording side of the instrumentation: per-function call counts, cumulative
+time, a latency histogram with percentiles and batch sizes, exported as JSON
+or Prometheus text.
+
+The calculators do not import this module; instrumentation.py loads it on
+first use, so that importing app.py stays cheap when instrumentation is off.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+import bisect
+import functools
+import json
+import threading
+import time
+
+import instrumentation
+
+
+# Upper bounds of the latency histogram buckets in seconds: 1 µs to about 8 s in factors of two
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(1e-6 * 2 ** k for k in range(24))
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class CallStats:
+    """
+    Metrics of one instrumented function.
+
+    Attributes:
+        count: Number of calls
+        total_time: Cumulative time in seconds (including nested instrumented calls)
+        min_time: Fastest call (s)
+        max_time: Slowest call (s)
+        buckets: Number of calls per LATENCY_BUCKETS bucket, plus one for slower calls
+        items: Cumulative batch size (elements processed over all calls)
+        max_batch: Largest batch size of a single call
+        errors: Number of calls that raised
+    """
+    count: int = 0
+    total_time: float = 0.0
+    min_time: float = float('inf')
+    max_time: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    items: int = 0
+    max_batch: int = 0
+    errors: int = 0
+
+    def record(self, seconds: float, batch: int, failed: bool = False) -> None:
+        """Add one call."""
+        self.count += 1
+        self.total_time += seconds
+        self.min_time = min(self.min_time, seconds)
+        self.max_time = max(self.max_time, seconds)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.items += batch
+        self.max_batch = max(self.max_batch, batch)
+        self.errors += failed
+
+    def percentile(self, q: float) -> float:
+        """
+        Latency percentile estimated from the histogram (s).
+
+        The result is the upper bound of the bucket holding the percentile,
+        limited to the slowest call seen.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        cumulative = 0
+        for bound, calls in zip(LATENCY_BUCKETS, self.buckets):
+            cumulative += calls
+            if cumulative >= rank:
+                return min(bound, self.max_time)
+        return self.max_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        result = {
+            'count': self.count,
+            'total_time': self.total_time,
+            'mean_time': self.total_time / self.count if self.count else 0.0,
+            'min_time': self.min_time if self.count else 0.0,
+            'max_time': self.max_time,
+            'items': self.items,
+            'mean_batch': self.items / self.count if self.count else 0.0,
+            'max_batch': self.max_batch,
+            'errors': self.errors,
+        }
+        for q in PERCENTILES:
+            result[f'p{q}'] = self.percentile(q)
+        return result
+
+
+class Registry:
+    """Thread-safe collection of CallStats by function name."""
+
+    def __init__(self):
+        self._stats: Dict[str, CallStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, batch: int = 1, failed: bool = False) -> None:
+        """Add one call of a function."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = CallStats()
+            stats.record(seconds, batch, failed)
+
+    def stats(self, name: str) -> Optional[CallStats]:
+        """Metrics of a function, None if it was never called."""
+        return self._stats.get(name)
+
+    def reset(self) -> None:
+        """Forget all metrics."""
+        with self._lock:
+            self._stats.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Metrics of all functions, slowest cumulative time first."""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1].total_time, reverse=True)
+            return {
+                'enabled': instrumentation.ENABLED,
+                'functions': {name: stats.to_dict() for name, stats in items},
+            }
+
+    def to_json(self) -> str:
+        """Metrics as a JSON document."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "engipit") -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {prefix}_call_seconds Latency of instrumented calculator and model calls.",
+            f"# TYPE {prefix}_call_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self._stats.items())
+            for name, stats in items:
+                label = f'function="{name}"'
+                cumulative = 0
+                for bound, calls in zip(LATENCY_BUCKETS, stats.buckets):
+                    cumulative += calls
+                    lines.append(f'{prefix}_call_seconds_bucket{{{label},le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{prefix}_call_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f'{prefix}_call_seconds_sum{{{label}}} {stats.total_time!r}')
+                lines.append(f'{prefix}_call_seconds_count{{{label}}} {stats.count}')
+            for metric, kind, help_text, value in (
+                ('batch_items_total', 'counter', "Elements processed by instrumented calls.", 'items'),
+                ('batch_size_max', 'gauge', "Largest batch of a single instrumented call.", 'max_batch'),
+                ('call_errors_total', 'counter', "Instrumented calls that raised.", 'errors'),
+            ):
+                lines.append(f"# HELP {prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {prefix}_{metric} {kind}")
+                for name, stats in items:
+                    lines.append(f'{prefix}_{metric}{{function="{name}"}} {getattr(stats, value)}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write the metrics to a file; '.prom' and '.txt' give Prometheus text, anything else JSON."""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as handle:
+            handle.write(text)
+
+
+REGISTRY = Registry()
+
+
+def batch_size(args: tuple, kwargs: Dict[str, Any]) -> int:
+    """Largest number of elements among the array and list arguments (1 for scalar calls)."""
+    size = 1
+    for value in (*args, *kwargs.values()):
+        n = getattr(value, 'size', None)
+        if n is None and isinstance(value, list):
+            n = len(value)
+        if isinstance(n, int) and n > size:
+            size = n
+    return size
+
+
+def wrap(function: Callable, name: Optional[str] = None, registry: Registry = REGISTRY) -> Callable:
+    """
+    Wrap a function so that every call is recorded, whether or not instrumentation is enabled.
+
+    Args:
+        function: Function to wrap
+        name: Metric name (default: the function's qualified name)
+        registry: Registry to record into
+
+    Returns:
+        Wrapped function; the original is available as __wrapped__
+    """
+    name = name or f"{function.__module__}.{function.__qualname__}"
+    clock = time.perf_counter
+
+    @functools.wraps(function)
+    def instrumented_call(*args, **kwargs):
+        start = clock()
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            registry.record(name, clock() - start, batch_size(args, kwargs), failed=True)
+            raise
+        registry.record(name, clock() - start, batch_size(args, kwargs))
+        return result
+    return instrumented_call
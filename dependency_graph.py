@@ -0,0 +1,284 @@
+"""
+Dependency Tracking and Incremental Recalculation for ENGIPIT
+
+This module links every FoundationDesign of a GeotechnicalProject to the
+soil data it actually used: the borehole it was calculated against, the
+layers of that borehole it read and, for designs that pick the nearest
+borehole, the set of borehole locations of the investigation. Designs may
+also depend on other designs through design_parameters['depends_on'].
+
+Edits mark only the affected designs dirty, either explicitly
+(mark_layer_edited, mark_borehole_edited, mark_design_edited) or by comparing
+fingerprints of the project data (detect_changes). recalculate_dirty()
+then recomputes the dirty designs, and the designs downstream of them, in
+topological order.
+"""
+
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+from collections import deque
+
+from design_calculation import calculate_design, find_investigation, referenced_boreholes, referenced_layers
+from project_models import Borehole, FoundationDesign, GeotechnicalProject
+from result_cache import ResultCache, stable_hash
+
+
+Node = Tuple[Hashable, ...]
+
+
+def layer_node(investigation_id: str, borehole_id: str, index: int) -> Node:
+    """Node of a soil layer, identified by its index in the sorted layer list."""
+    return ('layer', investigation_id, borehole_id, index)
+
+
+def borehole_node(investigation_id: str, borehole_id: str) -> Node:
+    """Node of the borehole header (location, levels and layer boundaries)."""
+    return ('borehole', investigation_id, borehole_id)
+
+
+def locations_node(investigation_id: str) -> Node:
+    """Node of the borehole locations of an investigation, used by nearest-borehole selection."""
+    return ('locations', investigation_id)
+
+
+def design_node(design_id: str) -> Node:
+    """Node of the inputs of a design."""
+    return ('design', design_id)
+
+
+def _borehole_header(borehole: Borehole) -> Dict[str, object]:
+    """Borehole data other than layer properties; includes layer boundaries so layer indices stay valid."""
+    header = borehole.to_dict()
+    header['layers'] = [(layer.depth_top, layer.depth_bottom) for layer in borehole.layers]
+    return header
+
+
+def _design_inputs(design: FoundationDesign) -> Dict[str, object]:
+    return {
+        'foundation_type': design.foundation_type,
+        'soil_investigation_id': design.soil_investigation_id,
+        'design_parameters': design.design_parameters,
+    }
+
+
+class DependencyGraph:
+    """
+    Dependency graph between soil data and foundation designs of a project.
+
+    The results of the designs are assumed up to date when the graph is
+    built; call mark_all_dirty() before the first recalculation otherwise.
+
+    Attributes:
+        project: The tracked project
+        cache: Optional result cache used for recalculation
+        dirty: IDs of designs that need recalculation
+        errors: Error message per design whose last calculation failed
+    """
+
+    def __init__(self, project: GeotechnicalProject, cache: Optional[ResultCache] = None):
+        self.project = project
+        self.cache = cache
+        self.dirty: Set[str] = set()
+        self.errors: Dict[str, str] = {}
+        self._designs: Dict[str, FoundationDesign] = {}
+        self._dependencies: Dict[str, Set[Node]] = {}
+        self._dependents: Dict[Node, Set[str]] = {}
+        self._upstream: Dict[str, Set[str]] = {}
+        self._downstream: Dict[str, Set[str]] = {}
+        # Designs whose 'depends_on' names a design that is not in the project (yet), by that missing ID
+        self._pending: Dict[str, Set[str]] = {}
+        self._fingerprints: Dict[Node, str] = {}
+        self.rebuild()
+
+    def mark_all_dirty(self) -> None:
+        """Mark every design dirty, e.g. for the first calculation of a project."""
+        self.dirty = set(self._designs)
+
+    def rebuild(self) -> None:
+        """Rebuild all dependencies and fingerprints from the current project data."""
+        self._designs = {design.id: design for design in self.project.foundation_designs}
+        self._dependencies.clear()
+        self._dependents.clear()
+        self._upstream.clear()
+        self._downstream.clear()
+        self._pending.clear()
+        for design_id in self._designs:
+            self._register(design_id)
+        self._fingerprints = self._current_fingerprints()
+
+    def _register(self, design_id: str) -> None:
+        """Record the soil data and designs a design depends on."""
+        for node in self._dependencies.pop(design_id, set()):
+            self._dependents.get(node, set()).discard(design_id)
+        for upstream in self._upstream.pop(design_id, set()):
+            self._downstream.get(upstream, set()).discard(design_id)
+        for referrers in self._pending.values():
+            referrers.discard(design_id)
+
+        design = self._designs[design_id]
+        nodes = {design_node(design_id)}
+        investigation = find_investigation(self.project, design)
+        if investigation is not None:
+            if 'borehole_id' not in design.design_parameters:
+                nodes.add(locations_node(investigation.id))
+            for borehole in referenced_boreholes(design, investigation):
+                nodes.add(borehole_node(investigation.id, borehole.id))
+                nodes.update(layer_node(investigation.id, borehole.id, i)
+                             for i in referenced_layers(design, borehole))
+
+        self._dependencies[design_id] = nodes
+        for node in nodes:
+            self._dependents.setdefault(node, set()).add(design_id)
+
+        declared = set(design.design_parameters.get('depends_on', ()))
+        self._upstream[design_id] = set()
+        for other in declared:
+            if other in self._designs:
+                self._link(other, design_id)
+            else:
+                self._pending.setdefault(other, set()).add(design_id)
+
+    def _link(self, upstream: str, downstream: str) -> None:
+        self._upstream.setdefault(downstream, set()).add(upstream)
+        self._downstream.setdefault(upstream, set()).add(downstream)
+
+    def _unregister(self, design_id: str) -> None:
+        """Drop a removed design; designs depending on it wait for a design with its ID to be added."""
+        for node in self._dependencies.pop(design_id, set()):
+            self._dependents.get(node, set()).discard(design_id)
+        for upstream in self._upstream.pop(design_id, set()):
+            self._downstream.get(upstream, set()).discard(design_id)
+        for downstream in self._downstream.pop(design_id, set()):
+            self._upstream.get(downstream, set()).discard(design_id)
+            self._pending.setdefault(design_id, set()).add(downstream)
+        for referrers in self._pending.values():
+            referrers.discard(design_id)
+
+    def _current_fingerprints(self) -> Dict[Node, str]:
+        """Hash every node of the current project data."""
+        fingerprints = {}
+        for investigation in self.project.soil_investigations:
+            fingerprints[locations_node(investigation.id)] = stable_hash(
+                [(b.id, b.location_x, b.location_y) for b in investigation.boreholes])
+            for borehole in investigation.boreholes:
+                fingerprints[borehole_node(investigation.id, borehole.id)] = stable_hash(_borehole_header(borehole))
+                for i, layer in enumerate(borehole.layers):
+                    fingerprints[layer_node(investigation.id, borehole.id, i)] = stable_hash(layer.to_dict())
+        for design in self.project.foundation_designs:
+            fingerprints[design_node(design.id)] = stable_hash(_design_inputs(design))
+        return fingerprints
+
+    def dependencies(self, design_id: str) -> Set[Node]:
+        """Soil data nodes a design depends on."""
+        return set(self._dependencies.get(design_id, set()))
+
+    def dependents(self, node: Node) -> Set[str]:
+        """IDs of the designs that depend on a node."""
+        return set(self._dependents.get(node, set()))
+
+    def mark_layer_edited(self, investigation_id: str, borehole_id: str, index: int) -> Set[str]:
+        """Mark the designs using a layer dirty and return them."""
+        return self._mark(layer_node(investigation_id, borehole_id, index))
+
+    def mark_borehole_edited(self, investigation_id: str, borehole_id: str) -> Set[str]:
+        """Mark the designs using a borehole dirty and return them."""
+        affected = self._mark(borehole_node(investigation_id, borehole_id))
+        return affected | self._mark(locations_node(investigation_id))
+
+    def mark_design_edited(self, design_id: str) -> Set[str]:
+        """Mark a design dirty and return it."""
+        return self._mark(design_node(design_id))
+
+    def _mark(self, node: Node) -> Set[str]:
+        affected = self.dependents(node)
+        self.dirty |= affected
+        return affected
+
+    def detect_changes(self) -> Set[str]:
+        """
+        Compare the project data with the last known fingerprints and mark affected designs dirty.
+
+        New designs are registered and marked dirty, and linked to the designs
+        whose 'depends_on' already named them; removed designs are dropped
+        with their edges.
+
+        Returns:
+            IDs of the designs newly marked dirty
+        """
+        current = self._current_fingerprints()
+        designs = {design.id: design for design in self.project.foundation_designs}
+        for removed in set(self._designs) - set(designs):
+            self._designs.pop(removed)
+            self.dirty.discard(removed)
+            self._unregister(removed)
+        added = set(designs) - set(self._designs)
+        self._designs = designs
+
+        before = set(self.dirty)
+        for node in set(current) | set(self._fingerprints):
+            if current.get(node) != self._fingerprints.get(node):
+                self._mark(node)
+        for design_id in added:
+            self._register(design_id)
+            self.dirty.add(design_id)
+        for design_id in added:
+            for referrer in self._pending.pop(design_id, set()):
+                if referrer in self._designs:
+                    self._link(design_id, referrer)
+        self._fingerprints = current
+        return self.dirty - before
+
+    def _recalculation_order(self) -> List[str]:
+        """Dirty designs and everything downstream of them, upstream designs first (Kahn's algorithm)."""
+        pending = set()
+        stack = list(self.dirty)
+        while stack:
+            design_id = stack.pop()
+            if design_id in pending or design_id not in self._designs:
+                continue
+            pending.add(design_id)
+            stack.extend(self._downstream.get(design_id, ()))
+
+        indegree = {d: len(self._upstream.get(d, set()) & pending) for d in pending}
+        ready = deque(sorted(d for d, n in indegree.items() if n == 0))
+        order = []
+        while ready:
+            design_id = ready.popleft()
+            order.append(design_id)
+            for downstream in sorted(self._downstream.get(design_id, set()) & pending):
+                indegree[downstream] -= 1
+                if indegree[downstream] == 0:
+                    ready.append(downstream)
+        if len(order) != len(pending):
+            cycle = sorted(pending - set(order))
+            raise ValueError(f"Circular design dependencies between {cycle}")
+        return order
+
+    def recalculate_dirty(self) -> List[str]:
+        """
+        Recompute dirty designs and their downstream designs in topological order.
+
+        Designs whose calculation fails get {'error': message} as results and
+        are listed in errors. Dependencies of recomputed designs are refreshed,
+        since a recalculation may select a different borehole or layers.
+
+        Returns:
+            IDs of the recomputed designs in the order they were calculated
+        """
+        order = self._recalculation_order()
+        for design_id in order:
+            design = self._designs[design_id]
+            investigation = find_investigation(self.project, design)
+            self.errors.pop(design_id, None)
+            try:
+                if investigation is None:
+                    raise ValueError(f"Soil investigation {design.soil_investigation_id} not found")
+                if self.cache is not None:
+                    self.cache.calculate(design, investigation)
+                else:
+                    design.results = calculate_design(design, investigation)
+            except (KeyError, TypeError, ValueError, ArithmeticError) as error:
+                self.errors[design_id] = str(error)
+                design.results = {'error': str(error)}
+            self._register(design_id)
+            self.dirty.discard(design_id)
+        return order
@@ -0,0 +1,222 @@
+"""
+Foundation Design Calculation for ENGIPIT
+
+This module runs the calculation of a FoundationDesign against the soil
+investigation it references. It dispatches on the foundation type, picks the
+borehole the design depends on and returns a results dictionary that can be
+stored in FoundationDesign.results.
+
+The borehole a design depends on is, in order of preference, the one named by
+design_parameters['borehole_id'], the one nearest to
+design_parameters['location_x'] / ['location_y'], or the first borehole of
+the investigation. Only that borehole enters the calculation, so editing any
+other borehole does not affect the result.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import ShallowFoundationCalculator, DeepFoundationCalculator, RetainingWallCalculator
+from project_models import (
+    Borehole,
+    FoundationDesign,
+    FoundationType,
+    GeotechnicalProject,
+    SoilInvestigation,
+    SoilLayer
+)
+
+
+# Bump whenever a calculation changes its results, so cached results are invalidated
+CALCULATOR_VERSION = "1.0"
+
+SHALLOW_TYPES = (FoundationType.SHALLOW, FoundationType.MAT, FoundationType.COMBINED)
+PILE_TYPES = (FoundationType.DEEP_PILE, FoundationType.DEEP_CAISSON)
+
+
+def find_investigation(project: GeotechnicalProject, design: FoundationDesign) -> Optional[SoilInvestigation]:
+    """
+    Find the soil investigation used by a design.
+
+    Args:
+        project: Project containing the design
+        design: Foundation design
+
+    Returns:
+        The referenced investigation, or the active one if the design references none
+    """
+    if design.soil_investigation_id is not None:
+        for investigation in project.soil_investigations:
+            if investigation.id == design.soil_investigation_id:
+                return investigation
+        return None
+    return project.get_active_soil_investigation()
+
+
+def referenced_boreholes(design: FoundationDesign, investigation: SoilInvestigation) -> List[Borehole]:
+    """
+    Get the boreholes a design depends on.
+
+    Args:
+        design: Foundation design
+        investigation: Soil investigation used by the design
+
+    Returns:
+        List with the borehole used for the calculation (empty if there is none)
+    """
+    parameters = design.design_parameters
+    if 'borehole_id' in parameters:
+        borehole = investigation.get_borehole(parameters['borehole_id'])
+        return [borehole] if borehole is not None else []
+    if not investigation.boreholes:
+        return []
+    if 'location_x' in parameters and 'location_y' in parameters:
+        x, y = parameters['location_x'], parameters['location_y']
+        return [min(investigation.boreholes,
+                    key=lambda b: (b.location_x - x) ** 2 + (b.location_y - y) ** 2)]
+    return [investigation.boreholes[0]]
+
+
+def referenced_layers(design: FoundationDesign, borehole: Borehole) -> List[int]:
+    """
+    Get the indices of the layers of a borehole that a design uses.
+
+    Shallow designs use the layer at foundation level, piles the layers along
+    the pile and retaining walls the layers behind the wall. If the design
+    parameters are incomplete all layers are reported.
+
+    Args:
+        design: Foundation design
+        borehole: Borehole used by the design
+
+    Returns:
+        Indices into borehole.layers
+    """
+    p = design.design_parameters
+    everything = list(range(len(borehole.layers)))
+    if design.foundation_type in SHALLOW_TYPES and 'depth' in p:
+        return [i for i, layer in enumerate(borehole.layers) if layer.depth_top <= p['depth'] < layer.depth_bottom]
+    if design.foundation_type in PILE_TYPES and 'pile_length' in p:
+        bottom = p['pile_length']
+    elif design.foundation_type == FoundationType.RETAINING_WALL and 'wall_height' in p:
+        bottom = p['wall_height']
+    else:
+        return everything
+    return [i for i, layer in enumerate(borehole.layers)
+            if min(layer.depth_bottom, bottom) > max(layer.depth_top, 0.0)]
+
+
+def _layer_properties(layer: SoilLayer) -> Dict[str, float]:
+    """Strength parameters of a layer with missing values taken as zero."""
+    if layer.unit_weight is None:
+        raise ValueError(f"Layer {layer.depth_top}-{layer.depth_bottom} m has no unit weight")
+    return {
+        'unit_weight': layer.unit_weight,
+        'cohesion': layer.cohesion or 0.0,
+        'friction_angle': layer.friction_angle or 0.0,
+    }
+
+
+def _averaged_properties(borehole: Borehole, depth_top: float, depth_bottom: float) -> Dict[str, float]:
+    """Thickness-weighted average strength parameters between two depths."""
+    totals = {'unit_weight': 0.0, 'cohesion': 0.0, 'friction_angle': 0.0}
+    thickness = 0.0
+    for layer in borehole.layers:
+        overlap = min(layer.depth_bottom, depth_bottom) - max(layer.depth_top, depth_top)
+        if overlap <= 0:
+            continue
+        for key, value in _layer_properties(layer).items():
+            totals[key] += value * overlap
+        thickness += overlap
+    if thickness <= 0:
+        raise ValueError(f"Borehole {borehole.id} has no layers between {depth_top} and {depth_bottom} m")
+    return {key: value / thickness for key, value in totals.items()}
+
+
+def design_soil(design: FoundationDesign, investigation: SoilInvestigation) -> Tuple[Borehole, Dict[str, float]]:
+    """
+    Select the borehole of a design and the soil parameters it is calculated with.
+
+    Shallow designs use the layer at foundation level; piles and retaining
+    walls use thickness-weighted averages along the pile or wall.
+
+    Args:
+        design: Foundation design with its design parameters
+        investigation: Soil investigation used by the design
+
+    Returns:
+        Tuple of (borehole, dictionary of unit_weight, cohesion and friction_angle)
+    """
+    boreholes = referenced_boreholes(design, investigation)
+    if not boreholes:
+        raise ValueError(f"No borehole available for design {design.id}")
+    borehole = boreholes[0]
+    p = design.design_parameters
+
+    if design.foundation_type in SHALLOW_TYPES:
+        layer = borehole.get_layer_at_depth(p['depth'])
+        if layer is None:
+            raise ValueError(f"Borehole {borehole.id} has no layer at {p['depth']} m")
+        return borehole, _layer_properties(layer)
+    if design.foundation_type in PILE_TYPES:
+        return borehole, _averaged_properties(borehole, 0.0, p['pile_length'])
+    if design.foundation_type == FoundationType.RETAINING_WALL:
+        return borehole, _averaged_properties(borehole, 0.0, p['wall_height'])
+    raise ValueError(f"Unsupported foundation type: {design.foundation_type.value}")
+
+
+def calculate_design(design: FoundationDesign, investigation: SoilInvestigation) -> Dict[str, Any]:
+    """
+    Calculate a foundation design.
+
+    Shallow designs use 'width', 'length', 'depth' and optionally 'load' and
+    'factor_of_safety'; pile designs use 'pile_diameter', 'pile_length',
+    'pile_type' and optionally 'load' and 'factor_of_safety'; retaining walls
+    use 'wall_height' and optionally 'surcharge'.
+
+    Args:
+        design: Foundation design with its design parameters
+        investigation: Soil investigation used by the design
+
+    Returns:
+        Dictionary of results, including the borehole used and the calculator version
+    """
+    borehole, soil = design_soil(design, investigation)
+    p = design.design_parameters
+
+    if design.foundation_type in SHALLOW_TYPES:
+        qu = ShallowFoundationCalculator.calculate_ultimate_bearing_capacity(
+            p['width'], p['length'], p['depth'], soil['unit_weight'], soil['cohesion'], soil['friction_angle'])
+        qa = ShallowFoundationCalculator.calculate_allowable_bearing_capacity(qu, p.get('factor_of_safety', 3.0))
+        results = {'ultimate_bearing_capacity': qu, 'allowable_bearing_capacity': qa}
+        if 'load' in p:
+            pressure = ShallowFoundationCalculator.calculate_applied_pressure(p['load'], p['width'], p['length'])
+            results['applied_pressure'] = pressure
+            results['safety_factor'] = qu / pressure if pressure > 0 else None
+
+    elif design.foundation_type in PILE_TYPES:
+        Qu, Qa, Qb, Qs = DeepFoundationCalculator.calculate_pile_capacity(
+            p['pile_diameter'], p['pile_length'], soil['unit_weight'], soil['friction_angle'], soil['cohesion'],
+            p.get('pile_type', 'driven'), p.get('factor_of_safety', 2.5))
+        results = {'ultimate_capacity': Qu, 'allowable_capacity': Qa, 'end_bearing': Qb, 'skin_friction': Qs}
+        if 'load' in p:
+            results['safety_factor'] = Qu / p['load'] if p['load'] > 0 else None
+
+    else:
+        force, location = RetainingWallCalculator.calculate_total_active_force(
+            p['wall_height'], soil['unit_weight'], soil['friction_angle'], soil['cohesion'], p.get('surcharge', 0.0))
+        results = {
+            'active_coefficient': RetainingWallCalculator.calculate_active_earth_pressure_coefficient(
+                soil['friction_angle']),
+            'active_force': force,
+            'active_force_location': location,
+        }
+
+    return finish_results(results, borehole, soil)
+
+
+def finish_results(results: Dict[str, Any], borehole: Borehole, soil: Dict[str, float]) -> Dict[str, Any]:
+    """Add the soil parameters, borehole and calculator version to a results dictionary."""
+    results['soil'] = soil
+    results['borehole_id'] = borehole.id
+    results['calculator_version'] = CALCULATOR_VERSION
+    return results
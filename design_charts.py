@@ -0,0 +1,376 @@
+"""
+Design Charts for ENGIPIT
+
+Precomputed response surfaces for early-stage design:
+
+- pile charts: allowable capacity of DeepFoundationCalculator.calculate_pile_capacity
+  over pile diameter and length;
+- footing charts: ShallowFoundationCalculator.calculate_ultimate_bearing_capacity
+  over footing width and depth.
+
+A chart is built for one soil (unit weight, cohesion, friction angle) on an
+adaptive grid: starting from a coarse grid, every cell whose bilinear
+interpolant misses the calculator by more than the tolerance is bisected,
+until all cells pass. The accepted error is checked on a verification
+lattice of 21 points per cell (edge midpoints, centre and quarter points),
+where the bilinear error of these formulas, which are at most quadratic
+along each axis, is largest; the largest error found is stored with the
+chart as max_error.
+
+Grid nodes lie on a fixed dyadic lattice, so a query finds its cell through
+a lookup table in O(1) instead of searching the axes. Charts are stored as
+JSON and keyed to the representative soil properties of a SoilInvestigation,
+so that a ChartLibrary loads each project's charts from disk instead of
+rebuilding them.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass
+import json
+import os
+
+import numpy as np
+
+from kernels import pile_capacity, ultimate_bearing_capacity
+from project_models import SoilInvestigation
+from result_cache import stable_hash
+
+
+PILE = "pile"
+FOOTING = "footing"
+CHART_TYPES = (PILE, FOOTING)
+
+# Version of the chart layout and sampling; charts of another version are rebuilt
+CHART_VERSION = 1
+
+# Axes (names and default ranges in m) of each chart type
+AXES: Dict[str, Tuple[Tuple[str, Tuple[float, float]], Tuple[str, Tuple[float, float]]]] = {
+    PILE: (('pile_diameter', (0.3, 1.5)), ('pile_length', (5.0, 40.0))),
+    FOOTING: (('width', (0.5, 6.0)), ('depth', (0.5, 3.0))),
+}
+
+# Decimals of the representative soil properties used in chart keys
+PROPERTY_DECIMALS = 1
+
+# Fractions of a cell at which the interpolation error is verified (corners excluded)
+_CHECK = np.array([(u, v) for u in (0.0, 0.25, 0.5, 0.75, 1.0) for v in (0.0, 0.25, 0.5, 0.75, 1.0)
+                   if u not in (0.0, 1.0) or v not in (0.0, 1.0)])
+
+
+def _sample(chart_type: str, soil: Dict[str, float], options: Dict[str, Any], x, y) -> np.ndarray:
+    """The calculator behind a chart, evaluated on arrays."""
+    gamma, c, phi = soil['unit_weight'], soil['cohesion'], soil['friction_angle']
+    if chart_type == PILE:
+        return pile_capacity(x, y, gamma, phi, c, options['pile_type'], options['factor_of_safety'])[1]
+    return ultimate_bearing_capacity(x, x, y, gamma, c, phi)
+
+
+def _check_chart(chart_type: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Unknown chart type '{chart_type}', expected one of {CHART_TYPES}")
+    if chart_type == FOOTING:
+        return {}
+    pile_type = options.get('pile_type', "driven")
+    if pile_type not in ("driven", "bored"):
+        raise ValueError(f"Unknown pile_type '{pile_type}'")
+    return {'pile_type': pile_type, 'factor_of_safety': float(options.get('factor_of_safety', 2.5))}
+
+
+def _bilinear(values: np.ndarray, i: np.ndarray, j: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    return ((1 - u) * (1 - v) * values[i, j] + u * (1 - v) * values[i + 1, j]
+            + (1 - u) * v * values[i, j + 1] + u * v * values[i + 1, j + 1])
+
+
+@dataclass
+class ResponseSurface:
+    """
+    Bilinear interpolant of a calculator over two design variables.
+
+    Attributes:
+        chart_type: 'pile' or 'footing'
+        soil: Soil properties the chart was built for
+        options: Calculator options (pile_type, factor_of_safety for piles)
+        x_range: Range of the first variable (m)
+        y_range: Range of the second variable (m)
+        x_nodes: Grid nodes of the first variable, as lattice indices
+        y_nodes: Grid nodes of the second variable, as lattice indices
+        lattice: Number of lattice steps across each range
+        values: Calculator values at the grid nodes, shape (len(x_nodes), len(y_nodes))
+        tolerance: Relative error the chart was refined to
+        max_error: Largest relative error found on the verification lattice
+    """
+    chart_type: str
+    soil: Dict[str, float]
+    options: Dict[str, Any]
+    x_range: Tuple[float, float]
+    y_range: Tuple[float, float]
+    x_nodes: np.ndarray
+    y_nodes: np.ndarray
+    lattice: int
+    values: np.ndarray
+    tolerance: float
+    max_error: float
+
+    def __post_init__(self):
+        self._x_step = (self.x_range[1] - self.x_range[0]) / self.lattice
+        self._y_step = (self.y_range[1] - self.y_range[0]) / self.lattice
+        self._x_cells = self._lookup(self.x_nodes)
+        self._y_cells = self._lookup(self.y_nodes)
+        # Plain lists for scalar queries, which are faster to index than arrays
+        self._x_list, self._y_list = self._x_cells.tolist(), self._y_cells.tolist()
+        self._x_coordinates, self._y_coordinates = self.x.tolist(), self.y.tolist()
+        self._value_list = self.values.tolist()
+
+    def _lookup(self, nodes: np.ndarray) -> np.ndarray:
+        """Cell index of every lattice interval."""
+        cells = np.searchsorted(nodes, np.arange(self.lattice + 1), side='right') - 1
+        return np.clip(cells, 0, len(nodes) - 2)
+
+    @property
+    def axes(self) -> Tuple[str, str]:
+        """Names of the two design variables."""
+        return AXES[self.chart_type][0][0], AXES[self.chart_type][1][0]
+
+    @property
+    def x(self) -> np.ndarray:
+        """Grid nodes of the first variable (m)."""
+        return self.x_range[0] + self.x_nodes * self._x_step
+
+    @property
+    def y(self) -> np.ndarray:
+        """Grid nodes of the second variable (m)."""
+        return self.y_range[0] + self.y_nodes * self._y_step
+
+    @staticmethod
+    def build(chart_type: str, soil: Dict[str, float], x_range: Optional[Tuple[float, float]] = None,
+              y_range: Optional[Tuple[float, float]] = None, tolerance: float = 1e-3, initial: int = 5,
+              max_level: int = 10, **options) -> 'ResponseSurface':
+        """
+        Sample a calculator on an adaptive grid.
+
+        Args:
+            chart_type: 'pile' or 'footing'
+            soil: 'unit_weight' (kN/m³), 'cohesion' (kPa) and 'friction_angle' (degrees)
+            x_range: Range of pile diameter or footing width (m); default from AXES
+            y_range: Range of pile length or footing depth (m); default from AXES
+            tolerance: Allowed relative interpolation error
+            initial: Nodes per axis of the starting grid
+            max_level: Maximum number of bisections of a starting cell
+            **options: pile_type ('driven' or 'bored') and factor_of_safety (2.5) for pile charts
+
+        Returns:
+            ResponseSurface
+
+        Raises:
+            ValueError: If the tolerance cannot be met within max_level bisections
+        """
+        options = _check_chart(chart_type, options)
+        soil = {name: float(soil[name]) for name in ('unit_weight', 'cohesion', 'friction_angle')}
+        x_range = tuple(map(float, x_range or AXES[chart_type][0][1]))
+        y_range = tuple(map(float, y_range or AXES[chart_type][1][1]))
+        if x_range[1] <= x_range[0] or y_range[1] <= y_range[0]:
+            raise ValueError("Chart ranges must be increasing")
+
+        lattice = (initial - 1) * 2 ** max_level
+        nodes = [np.arange(initial) * 2 ** max_level, np.arange(initial) * 2 ** max_level]
+        ranges = (x_range, y_range)
+
+        def position(axis, index):
+            return ranges[axis][0] + index * (ranges[axis][1] - ranges[axis][0]) / lattice
+
+        while True:
+            x, y = position(0, nodes[0]), position(1, nodes[1])
+            values = _sample(chart_type, soil, options, x[:, None], y[None, :])
+
+            i, j = np.meshgrid(np.arange(len(x) - 1), np.arange(len(y) - 1), indexing='ij')
+            i, j = i[..., None], j[..., None]
+            u, v = _CHECK[:, 0], _CHECK[:, 1]
+            exact = _sample(chart_type, soil, options, x[i] + u * (x[i + 1] - x[i]), y[j] + v * (y[j + 1] - y[j]))
+            error = np.abs(_bilinear(values, i, j, u, v) - exact) / np.maximum(np.abs(exact), 1e-12)
+            cell_error = error.max(axis=2)
+
+            failing = cell_error > tolerance
+            if not failing.any():
+                return ResponseSurface(chart_type, soil, options, x_range, y_range, nodes[0], nodes[1], lattice,
+                                       values, tolerance, float(cell_error.max()))
+
+            grown = False
+            for axis, cells in ((0, np.flatnonzero(failing.any(axis=1))), (1, np.flatnonzero(failing.any(axis=0)))):
+                width = nodes[axis][cells + 1] - nodes[axis][cells]
+                split = cells[width > 1]
+                if split.size:
+                    nodes[axis] = np.union1d(nodes[axis], (nodes[axis][split] + nodes[axis][split + 1]) // 2)
+                    grown = True
+            if not grown:
+                raise ValueError(f"Tolerance {tolerance} not reached within {max_level} refinements "
+                                 f"(error {cell_error.max():.3g})")
+
+    def __call__(self, x: float, y: float) -> float:
+        """
+        Interpolated value at one point, in constant time.
+
+        Args:
+            x: Pile diameter or footing width (m)
+            y: Pile length or footing depth (m)
+
+        Returns:
+            Allowable pile capacity (kN) or ultimate bearing capacity (kPa)
+        """
+        x0, x1 = self.x_range
+        y0, y1 = self.y_range
+        if not (x0 <= x <= x1 and y0 <= y <= y1):
+            raise ValueError(f"({x}, {y}) is outside the chart range {self.x_range} x {self.y_range}")
+        i = self._x_list[min(int((x - x0) / self._x_step), self.lattice)]
+        j = self._y_list[min(int((y - y0) / self._y_step), self.lattice)]
+        xa, xb = self._x_coordinates[i], self._x_coordinates[i + 1]
+        ya, yb = self._y_coordinates[j], self._y_coordinates[j + 1]
+        u, v = (x - xa) / (xb - xa), (y - ya) / (yb - ya)
+        row, next_row = self._value_list[i], self._value_list[i + 1]
+        return ((1 - u) * (1 - v) * row[j] + u * (1 - v) * next_row[j]
+                + (1 - u) * v * row[j + 1] + u * v * next_row[j + 1])
+
+    def evaluate(self, x, y) -> np.ndarray:
+        """
+        Interpolated values at many points; arguments broadcast.
+
+        Args:
+            x: Pile diameters or footing widths (m)
+            y: Pile lengths or footing depths (m)
+
+        Returns:
+            Array of allowable pile capacities (kN) or ultimate bearing capacities (kPa)
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        if (np.any(x < self.x_range[0]) or np.any(x > self.x_range[1])
+                or np.any(y < self.y_range[0]) or np.any(y > self.y_range[1])):
+            raise ValueError(f"Points outside the chart range {self.x_range} x {self.y_range}")
+        kx = np.minimum(((x - self.x_range[0]) / self._x_step).astype(int), self.lattice)
+        ky = np.minimum(((y - self.y_range[0]) / self._y_step).astype(int), self.lattice)
+        i, j = self._x_cells[kx], self._y_cells[ky]
+        grid_x, grid_y = self.x, self.y
+        u = (x - grid_x[i]) / (grid_x[i + 1] - grid_x[i])
+        v = (y - grid_y[j]) / (grid_y[j + 1] - grid_y[j])
+        return _bilinear(self.values, i, j, u, v)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'version': CHART_VERSION,
+            'chart_type': self.chart_type,
+            'soil': self.soil,
+            'options': self.options,
+            'x_range': list(self.x_range),
+            'y_range': list(self.y_range),
+            'x_nodes': self.x_nodes.tolist(),
+            'y_nodes': self.y_nodes.tolist(),
+            'lattice': self.lattice,
+            'values': self.values.tolist(),
+            'tolerance': self.tolerance,
+            'max_error': self.max_error,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'ResponseSurface':
+        """Create a chart from a dictionary written by to_dict."""
+        if data.get('version') != CHART_VERSION:
+            raise ValueError(f"Chart version {data.get('version')} is not {CHART_VERSION}")
+        return ResponseSurface(data['chart_type'], data['soil'], data['options'], tuple(data['x_range']),
+                               tuple(data['y_range']), np.array(data['x_nodes'], dtype=int),
+                               np.array(data['y_nodes'], dtype=int), data['lattice'],
+                               np.array(data['values'], dtype=float), data['tolerance'], data['max_error'])
+
+
+def representative_soil(investigation: SoilInvestigation,
+                        depth_range: Optional[Tuple[float, float]] = None) -> Dict[str, float]:
+    """
+    Soil properties a chart is built for, rounded to PROPERTY_DECIMALS.
+
+    The investigation's representative_properties are used where they give
+    unit_weight, cohesion or friction_angle; the others are averaged over
+    the boreholes. Rounding lets investigations with practically equal soil
+    share charts.
+
+    Args:
+        investigation: Soil investigation
+        depth_range: Optional (top, bottom) depth range to average over (m)
+
+    Returns:
+        Dictionary with 'unit_weight', 'cohesion' and 'friction_angle'
+
+    Raises:
+        ValueError: If neither gives a unit weight or friction angle
+    """
+    names = ('unit_weight', 'cohesion', 'friction_angle')
+    properties = {name: investigation.representative_properties[name] for name in names
+                  if investigation.representative_properties.get(name) is not None}
+    if len(properties) < len(names):
+        properties = dict(investigation.get_average_properties(depth_range), **properties)
+    missing = [name for name in ('unit_weight', 'friction_angle') if name not in properties]
+    if missing:
+        raise ValueError(f"Investigation {investigation.id} has no {' or '.join(missing)} data")
+    return {name: round(float(properties.get(name, 0.0)), PROPERTY_DECIMALS) for name in names}
+
+
+def chart_key(chart_type: str, soil: Dict[str, float], **settings) -> str:
+    """Stable key of a chart: type, soil, options, ranges and tolerance."""
+    return stable_hash({'version': CHART_VERSION, 'chart_type': chart_type, 'soil': soil, 'settings': settings})
+
+
+class ChartLibrary:
+    """Charts by soil, kept in memory and, if a directory is given, as JSON files."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Initialize the library.
+
+        Args:
+            directory: Directory for chart files; None keeps charts in memory only
+        """
+        self.directory = directory
+        self._charts: Dict[str, ResponseSurface] = {}
+        self.built = 0
+        self.loaded = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def chart(self, investigation: SoilInvestigation, chart_type: str = PILE,
+              depth_range: Optional[Tuple[float, float]] = None, x_range: Optional[Tuple[float, float]] = None,
+              y_range: Optional[Tuple[float, float]] = None, tolerance: float = 1e-3,
+              **options) -> ResponseSurface:
+        """
+        Chart for a soil investigation, loaded or built on first use.
+
+        Args:
+            investigation: Soil investigation whose representative properties are used
+            chart_type: 'pile' or 'footing'
+            depth_range: Optional (top, bottom) depth range to average the soil over (m)
+            x_range: Range of pile diameter or footing width (m); default from AXES
+            y_range: Range of pile length or footing depth (m); default from AXES
+            tolerance: Allowed relative interpolation error
+            **options: pile_type and factor_of_safety for pile charts
+
+        Returns:
+            ResponseSurface
+        """
+        options = _check_chart(chart_type, options)
+        x_range = tuple(map(float, x_range or AXES[chart_type][0][1]))
+        y_range = tuple(map(float, y_range or AXES[chart_type][1][1]))
+        soil = representative_soil(investigation, depth_range)
+        key = chart_key(chart_type, soil, options=options, x_range=x_range, y_range=y_range, tolerance=tolerance)
+        chart = self._charts.get(key)
+        if chart is not None:
+            return chart
+
+        path = os.path.join(self.directory, f"{key}.json") if self.directory else None
+        if path and os.path.exists(path):
+            with open(path) as handle:
+                chart = ResponseSurface.from_dict(json.load(handle))
+            self.loaded += 1
+        else:
+            chart = ResponseSurface.build(chart_type, soil, x_range, y_range, tolerance, **options)
+            self.built += 1
+            if path:
+                with open(path, 'w') as handle:
+                    json.dump(chart.to_dict(), handle)
+        self._charts[key] = chart
+        return chart
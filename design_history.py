@@ -0,0 +1,384 @@
+"""
+Versioned Design History for ENGIPIT
+
+An append-only revision log of a project's soil investigations and
+foundation designs. Revisions share structure: every layer, borehole,
+investigation and design is stored once as an immutable record under the
+stable hash of its content, and its parent refers to it by that hash. A
+revision that changes one layer adds only that layer, its borehole, its
+investigation and a new root; all other records are shared with earlier
+revisions.
+
+Because equal content has equal hashes, diffs skip everything that is
+unchanged without looking inside it, and a past revision is opened in
+constant time by its root hash. Objects are rebuilt from the records when
+they are read, so editing a reopened design never changes the history.
+
+Example:
+    history = DesignHistory()
+    history.commit(project, "Preliminary design")
+    ...
+    history.commit(project, "BH-03 retested")
+    changes = history.diff(0, 1)
+    old = history.open(0).investigation("SI-001")
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
+from datetime import datetime
+import copy
+import json
+
+from project_models import (Borehole, FoundationDesign, FoundationType, GeotechnicalProject, SoilInvestigation,
+                            SoilLayer, SoilType)
+from result_cache import json_default, stable_hash
+
+
+HISTORY_VERSION = 1
+
+INVESTIGATION = "investigation"
+DESIGN = "design"
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+
+class ObjectStore:
+    """Immutable records by the stable hash of their content; equal records are stored once."""
+
+    def __init__(self, records: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.records: Dict[str, Dict[str, Any]] = dict(records or {})
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.records
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        return self.records[key]
+
+    def put(self, record: Dict[str, Any]) -> str:
+        """Store a record (if new) and return its key."""
+        key = stable_hash(record)
+        if key not in self.records:
+            # Detach nested dicts from the live objects they came from
+            self.records[key] = copy.deepcopy(record)
+        return key
+
+
+def _date(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _put_investigation(store: ObjectStore, investigation: SoilInvestigation) -> str:
+    boreholes = []
+    for borehole in investigation.boreholes:
+        record = replace(borehole, layers=[]).to_dict()
+        record['layers'] = [store.put(layer.to_dict()) for layer in borehole.layers]
+        boreholes.append(store.put(record))
+    record = replace(investigation, boreholes=[]).to_dict()
+    record['boreholes'] = boreholes
+    return store.put(record)
+
+
+def _layer(record: Dict[str, Any]) -> SoilLayer:
+    return SoilLayer(**dict(record, soil_type=SoilType(record['soil_type'])))
+
+
+def _borehole(store: ObjectStore, record: Dict[str, Any]) -> Borehole:
+    return Borehole(**dict(record, date=_date(record['date']),
+                           layers=[_layer(store[key]) for key in record['layers']]))
+
+
+def _investigation(store: ObjectStore, record: Dict[str, Any]) -> SoilInvestigation:
+    record = copy.deepcopy(record)
+    return SoilInvestigation(**dict(record, investigation_date=_date(record['investigation_date']),
+                                    boreholes=[_borehole(store, store[key]) for key in record['boreholes']]))
+
+
+def _design(record: Dict[str, Any]) -> FoundationDesign:
+    record = copy.deepcopy(record)
+    return FoundationDesign(**dict(record, foundation_type=FoundationType(record['foundation_type']),
+                                   created_date=_date(record['created_date']),
+                                   modified_date=_date(record['modified_date'])))
+
+
+@dataclass(frozen=True)
+class Revision:
+    """
+    One entry of the revision log.
+
+    Attributes:
+        number: Position in the log, starting at 0
+        parent: Number of the previous revision (None for the first)
+        root: Key of the record mapping investigation and design IDs to their keys
+        message: Description of the change
+        author: Who made the change
+        timestamp: When the revision was committed
+    """
+    number: int
+    parent: Optional[int]
+    root: str
+    message: str = ""
+    author: str = ""
+    timestamp: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'number': self.number,
+            'parent': self.parent,
+            'root': self.root,
+            'message': self.message,
+            'author': self.author,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+        }
+
+
+@dataclass(frozen=True)
+class Change:
+    """
+    Difference of one investigation or design between two revisions.
+
+    Attributes:
+        entity: INVESTIGATION or DESIGN
+        id: ID of the investigation or design
+        status: ADDED, REMOVED or MODIFIED
+        paths: Changed attributes, e.g. 'boreholes[BH-01].layers[2].friction_angle'
+            or 'design_parameters.width'; empty when added or removed
+    """
+    entity: str
+    id: str
+    status: str
+    paths: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {'entity': self.entity, 'id': self.id, 'status': self.status, 'paths': list(self.paths)}
+
+
+def _diff_fields(old: Dict[str, Any], new: Dict[str, Any], prefix: str, skip: Tuple[str, ...] = ()) -> List[str]:
+    """Paths of the changed fields of two records; dicts are compared key by key."""
+    paths = []
+    for name in sorted(set(old) | set(new)):
+        if name in skip or old.get(name) == new.get(name):
+            continue
+        if isinstance(old.get(name), dict) and isinstance(new.get(name), dict):
+            paths.extend(_diff_fields(old[name], new[name], f"{prefix}{name}."))
+        else:
+            paths.append(f"{prefix}{name}")
+    return paths
+
+
+class RevisionView:
+    """
+    Read access to the investigations and designs of one revision.
+
+    Opening a view only looks up the revision's root record; investigations
+    and designs are rebuilt from the shared records when read.
+    """
+
+    def __init__(self, history: 'DesignHistory', revision: Revision):
+        self.history = history
+        self.revision = revision
+        root = history.store[revision.root]
+        self._investigations: Dict[str, str] = root['investigations']
+        self._designs: Dict[str, str] = root['designs']
+
+    @property
+    def investigation_ids(self) -> List[str]:
+        """IDs of the investigations in the revision."""
+        return list(self._investigations)
+
+    @property
+    def design_ids(self) -> List[str]:
+        """IDs of the designs in the revision."""
+        return list(self._designs)
+
+    def investigation(self, investigation_id: str) -> SoilInvestigation:
+        """
+        Rebuild an investigation as it was in the revision.
+
+        Raises:
+            ValueError: If the revision has no such investigation
+        """
+        if investigation_id not in self._investigations:
+            raise ValueError(f"Revision {self.revision.number} has no investigation '{investigation_id}'")
+        store = self.history.store
+        return _investigation(store, store[self._investigations[investigation_id]])
+
+    def design(self, design_id: str) -> FoundationDesign:
+        """
+        Rebuild a design as it was in the revision.
+
+        Raises:
+            ValueError: If the revision has no such design
+        """
+        if design_id not in self._designs:
+            raise ValueError(f"Revision {self.revision.number} has no design '{design_id}'")
+        return _design(self.history.store[self._designs[design_id]])
+
+    def restore(self, project: GeotechnicalProject) -> GeotechnicalProject:
+        """Replace the project's investigations and designs with those of the revision."""
+        project.soil_investigations = [self.investigation(item) for item in self._investigations]
+        project.foundation_designs = [self.design(item) for item in self._designs]
+        return project
+
+
+class DesignHistory:
+    """Append-only revision log of a project's soil investigations and foundation designs."""
+
+    def __init__(self):
+        self.store = ObjectStore()
+        self.revisions: List[Revision] = []
+
+    def __len__(self) -> int:
+        return len(self.revisions)
+
+    @property
+    def head(self) -> Optional[Revision]:
+        """Latest revision, None before the first commit."""
+        return self.revisions[-1] if self.revisions else None
+
+    def commit(self, project: GeotechnicalProject, message: str = "", author: str = "",
+               timestamp: Optional[datetime] = None) -> Revision:
+        """
+        Record the project's investigations and designs as a new revision.
+
+        Only records that are not yet in the store are added. If nothing
+        changed since the latest revision, that revision is returned and no
+        new one is made.
+
+        Args:
+            project: Project to record
+            message: Description of the change
+            author: Who made the change
+            timestamp: Time of the revision (default: now)
+
+        Returns:
+            The new (or unchanged latest) Revision
+
+        Raises:
+            ValueError: If two investigations or two designs share an ID
+        """
+        investigations = {item.id: _put_investigation(self.store, item) for item in project.soil_investigations}
+        designs = {item.id: self.store.put(item.to_dict()) for item in project.foundation_designs}
+        if len(investigations) < len(project.soil_investigations) or len(designs) < len(project.foundation_designs):
+            raise ValueError(f"Project {project.id} has duplicate investigation or design IDs")
+
+        root = self.store.put({'investigations': investigations, 'designs': designs})
+        if self.head is not None and self.head.root == root:
+            return self.head
+        revision = Revision(len(self.revisions), self.head.number if self.head else None, root, message, author,
+                            timestamp or datetime.now())
+        self.revisions.append(revision)
+        return revision
+
+    def revision(self, number: int) -> Revision:
+        """
+        Revision by number; negative numbers count from the latest.
+
+        Raises:
+            ValueError: If there is no such revision
+        """
+        if not -len(self.revisions) <= number < len(self.revisions):
+            raise ValueError(f"No revision {number}; the history has {len(self.revisions)}")
+        return self.revisions[number]
+
+    def open(self, number: int = -1) -> RevisionView:
+        """Open a revision for reading, in constant time."""
+        return RevisionView(self, self.revision(number))
+
+    def diff(self, old: int, new: int = -1) -> List[Change]:
+        """
+        Changes between two revisions.
+
+        Records with equal keys are skipped without being read, so the cost
+        depends on what changed, not on the size of the project.
+
+        Args:
+            old: Number of the earlier revision
+            new: Number of the later revision (default: latest)
+
+        Returns:
+            Changes, investigations first, then designs, each sorted by ID
+        """
+        old_key, new_key = self.revision(old).root, self.revision(new).root
+        if old_key == new_key:
+            return []
+        old_root, new_root = self.store[old_key], self.store[new_key]
+        changes = []
+        for entity, name in ((INVESTIGATION, 'investigations'), (DESIGN, 'designs')):
+            before, after = old_root[name], new_root[name]
+            for item in sorted(set(before) | set(after)):
+                if item not in after:
+                    changes.append(Change(entity, item, REMOVED))
+                elif item not in before:
+                    changes.append(Change(entity, item, ADDED))
+                elif before[item] != after[item]:
+                    old_record, new_record = self.store[before[item]], self.store[after[item]]
+                    if entity == INVESTIGATION:
+                        paths = self._diff_investigation(old_record, new_record)
+                    else:
+                        paths = _diff_fields(old_record, new_record, "")
+                    changes.append(Change(entity, item, MODIFIED, tuple(paths)))
+        return changes
+
+    def _diff_investigation(self, old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+        paths = _diff_fields(old, new, "", skip=('boreholes',))
+        before = {self.store[key]['id']: key for key in old['boreholes']}
+        after = {self.store[key]['id']: key for key in new['boreholes']}
+        for borehole in sorted(set(before) | set(after)):
+            prefix = f"boreholes[{borehole}]"
+            if borehole not in before or borehole not in after:
+                paths.append(prefix)
+                continue
+            if before[borehole] == after[borehole]:
+                continue
+            old_borehole, new_borehole = self.store[before[borehole]], self.store[after[borehole]]
+            paths.extend(_diff_fields(old_borehole, new_borehole, f"{prefix}.", skip=('layers',)))
+            old_layers, new_layers = old_borehole['layers'], new_borehole['layers']
+            for index in range(max(len(old_layers), len(new_layers))):
+                if index >= len(old_layers) or index >= len(new_layers):
+                    paths.append(f"{prefix}.layers[{index}]")
+                elif old_layers[index] != new_layers[index]:
+                    paths.extend(_diff_fields(self.store[old_layers[index]], self.store[new_layers[index]],
+                                              f"{prefix}.layers[{index}]."))
+        return paths
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'version': HISTORY_VERSION,
+            'revisions': [revision.to_dict() for revision in self.revisions],
+            'records': self.store.records,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'DesignHistory':
+        """
+        Rebuild a history from to_dict() output.
+
+        Raises:
+            ValueError: If the data was written by another history version
+        """
+        if data.get('version') != HISTORY_VERSION:
+            raise ValueError(f"Unsupported history version {data.get('version')}")
+        history = DesignHistory()
+        history.store = ObjectStore(data['records'])
+        history.revisions = [Revision(**dict(item, timestamp=_date(item['timestamp'])))
+                             for item in data['revisions']]
+        return history
+
+    def save(self, path: str) -> None:
+        """Write the history to a JSON file."""
+        with open(path, 'w') as handle:
+            json.dump(self.to_dict(), handle, default=json_default)
+
+    @staticmethod
+    def load(path: str) -> 'DesignHistory':
+        """Read a history written by save()."""
+        with open(path) as handle:
+            return DesignHistory.from_dict(json.load(handle))
@@ -0,0 +1,428 @@
+"""
+Layered Earth Pressure Profiles for ENGIPIT
+
+This module builds lateral earth pressure diagrams from the soil layers and
+groundwater level of a Borehole. Each layer gets its own Rankine Ka/Kp,
+cohesive layers develop tension cracks on the active side, and hydrostatic
+water pressure is added below the water table. Diagrams are piecewise linear
+and are integrated exactly to forces and lever arms.
+
+The cumulative vertical stresses depend only on the borehole, so they are
+computed once per borehole and shared by every wall height, surcharge and
+chainage that uses it.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from app import GAMMA_WATER, RetainingWallCalculator
+from project_models import Borehole
+
+# Surcharge and side combinations whose cumulative resultants a profile keeps
+RESULTANT_CACHE_SIZE = 32
+
+ACTIVE = "active"
+PASSIVE = "passive"
+
+
+def _segment_moment(z1, z2, p1, p2):
+    """First moment about the surface, ∫ p·z dz, of a linear pressure segment."""
+    return (z2 - z1) * (p1 * (2 * z1 + z2) + p2 * (z1 + 2 * z2)) / 6.0
+
+
+@dataclass
+class EarthPressureDiagram:
+    """
+    Piecewise linear lateral pressure diagram on one side of a wall.
+
+    Pressures are given at the top and bottom of each segment so that jumps at
+    layer boundaries are represented exactly. All arrays have one entry per
+    segment; depths are below the ground surface on the retained side.
+
+    Attributes:
+        side: "active" or "passive"
+        depth_top: Top depth of each segment (m)
+        depth_bottom: Bottom depth of each segment (m)
+        effective_top: Effective horizontal pressure at the segment top (kPa)
+        effective_bottom: Effective horizontal pressure at the segment bottom (kPa)
+        water_top: Pore water pressure at the segment top (kPa)
+        water_bottom: Pore water pressure at the segment bottom (kPa)
+    """
+    side: str
+    depth_top: np.ndarray
+    depth_bottom: np.ndarray
+    effective_top: np.ndarray
+    effective_bottom: np.ndarray
+    water_top: np.ndarray
+    water_bottom: np.ndarray
+
+    @property
+    def height(self) -> float:
+        """Height of the diagram (m)."""
+        return float(self.depth_bottom[-1]) if self.depth_bottom.size else 0.0
+
+    @property
+    def effective_force(self) -> float:
+        """Resultant of the effective earth pressure in kN/m."""
+        return float(np.sum((self.effective_top + self.effective_bottom) / 2 * (self.depth_bottom - self.depth_top)))
+
+    @property
+    def water_force(self) -> float:
+        """Resultant of the water pressure in kN/m."""
+        return float(np.sum((self.water_top + self.water_bottom) / 2 * (self.depth_bottom - self.depth_top)))
+
+    @property
+    def force(self) -> float:
+        """Total horizontal force (effective plus water) in kN/m."""
+        return self.effective_force + self.water_force
+
+    @property
+    def location(self) -> float:
+        """Height of the total resultant above the base of the diagram (m)."""
+        total = self.force
+        if total == 0:
+            return 0.0
+        moment = np.sum(_segment_moment(
+            self.depth_top, self.depth_bottom,
+            self.effective_top + self.water_top,
+            self.effective_bottom + self.water_bottom
+        ))
+        return self.height - float(moment) / total
+
+    def pressure_at(self, depth: float) -> Tuple[float, float]:
+        """
+        Get the effective and water pressure at a depth.
+
+        At a layer boundary the value of the layer below is returned.
+
+        Args:
+            depth: Depth below the surface (m)
+
+        Returns:
+            Tuple of (effective pressure, water pressure) in kPa
+        """
+        i = int(np.searchsorted(self.depth_bottom, depth, side='right'))
+        i = min(i, self.depth_top.size - 1)
+        z1, z2 = self.depth_top[i], self.depth_bottom[i]
+        t = 0.0 if z2 == z1 else (depth - z1) / (z2 - z1)
+        effective = self.effective_top[i] + t * (self.effective_bottom[i] - self.effective_top[i])
+        water = self.water_top[i] + t * (self.water_bottom[i] - self.water_top[i])
+        return float(effective), float(water)
+
+    def to_dict(self) -> Dict[str, object]:
+        """Convert to dictionary for storage."""
+        return {
+            'side': self.side,
+            'depth_top': self.depth_top.tolist(),
+            'depth_bottom': self.depth_bottom.tolist(),
+            'effective_top': self.effective_top.tolist(),
+            'effective_bottom': self.effective_bottom.tolist(),
+            'water_top': self.water_top.tolist(),
+            'water_bottom': self.water_bottom.tolist(),
+            'force': self.force,
+            'location': self.location,
+        }
+
+
+class VerticalStressProfile:
+    """
+    Cumulative vertical stresses and pore pressures of a borehole.
+
+    The profile is split at every layer boundary and at the water table, so the
+    effective vertical stress is linear within each segment. Earth pressure
+    diagrams for any wall height and surcharge are derived from it without
+    re-summing the layers.
+    """
+
+    def __init__(
+        self,
+        depth_top: np.ndarray,
+        depth_bottom: np.ndarray,
+        sigma_top: np.ndarray,
+        sigma_bottom: np.ndarray,
+        water_top: np.ndarray,
+        water_bottom: np.ndarray,
+        Ka: np.ndarray,
+        Kp: np.ndarray,
+        cohesion: np.ndarray
+    ):
+        """
+        Initialise the profile from per-segment arrays.
+
+        Args:
+            depth_top: Top depth of each segment (m)
+            depth_bottom: Bottom depth of each segment (m)
+            sigma_top: Effective vertical stress at the segment top, without surcharge (kPa)
+            sigma_bottom: Effective vertical stress at the segment bottom, without surcharge (kPa)
+            water_top: Pore pressure at the segment top (kPa)
+            water_bottom: Pore pressure at the segment bottom (kPa)
+            Ka: Active earth pressure coefficient of each segment
+            Kp: Passive earth pressure coefficient of each segment
+            cohesion: Cohesion of each segment (kPa)
+        """
+        self.depth_top = depth_top
+        self.depth_bottom = depth_bottom
+        self.sigma_top = sigma_top
+        self.sigma_bottom = sigma_bottom
+        self.water_top = water_top
+        self.water_bottom = water_bottom
+        self.Ka = Ka
+        self.Kp = Kp
+        self.cohesion = cohesion
+        self._resultant_cache: 'OrderedDict[Tuple[str, float], Tuple[np.ndarray, ...]]' = OrderedDict()
+
+    @property
+    def depth(self) -> float:
+        """Depth of the bottom of the profile (m)."""
+        return float(self.depth_bottom[-1])
+
+    @staticmethod
+    def from_borehole(borehole: Borehole, gamma_water: float = GAMMA_WATER) -> 'VerticalStressProfile':
+        """
+        Get the vertical stress profile of a borehole.
+
+        Profiles are cached on the layer data and water level, so repeated calls for
+        an unchanged borehole return the same object.
+
+        Args:
+            borehole: Borehole with contiguous layers starting at the surface
+            gamma_water: Unit weight of water in kN/m³
+
+        Returns:
+            VerticalStressProfile for the borehole
+        """
+        layers = tuple(
+            (layer.depth_top, layer.depth_bottom, layer.unit_weight,
+             layer.cohesion or 0.0, layer.friction_angle or 0.0)
+            for layer in borehole.layers
+        )
+        return _profile_from_layers(layers, borehole.water_level, gamma_water)
+
+    def diagram(self, height: float, surcharge: float = 0.0, side: str = ACTIVE) -> EarthPressureDiagram:
+        """
+        Build the earth pressure diagram down to a given depth.
+
+        On the active side σh = Ka·σ'v - 2c√Ka; negative values form a tension
+        crack and are set to zero (the crack is assumed dry). On the passive side
+        σh = Kp·σ'v + 2c√Kp. Water pressure is added separately.
+
+        Args:
+            height: Depth of the diagram below the surface (m)
+            surcharge: Uniform surcharge on the surface (kPa)
+            side: "active" or "passive"
+
+        Returns:
+            EarthPressureDiagram down to the given depth
+        """
+        if height <= 0:
+            raise ValueError("height must be positive")
+        if height > self.depth + 1e-9:
+            raise ValueError(f"height {height} m exceeds the borehole profile depth {self.depth} m")
+
+        n = int(np.searchsorted(self.depth_top, height, side='left'))
+        z1 = self.depth_top[:n].copy()
+        z2 = np.minimum(self.depth_bottom[:n], height)
+        t = (z2 - self.depth_top[:n]) / (self.depth_bottom[:n] - self.depth_top[:n])
+
+        s1 = self.sigma_top[:n] + surcharge
+        s2 = self.sigma_top[:n] + t * (self.sigma_bottom[:n] - self.sigma_top[:n]) + surcharge
+        u1 = self.water_top[:n]
+        u2 = self.water_top[:n] + t * (self.water_bottom[:n] - self.water_top[:n])
+        p1, p2 = self._effective_pressure(s1, s2, slice(0, n), side)
+
+        return _split_tension(side, z1, z2, p1, p2, u1, u2.copy())
+
+    def resultants(self, heights, surcharge: float = 0.0, side: str = ACTIVE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the total force and its lever arm for many wall heights at once.
+
+        The cumulative force and moment of the full-depth diagram are computed once
+        per surcharge and side (the last RESULTANT_CACHE_SIZE combinations are
+        kept); each height then only needs its partial segment.
+
+        Args:
+            heights: Wall heights (m), scalar or array
+            surcharge: Uniform surcharge on the surface (kPa)
+            side: "active" or "passive"
+
+        Returns:
+            Tuple of (force in kN/m, height of resultant above the wall base in m)
+        """
+        heights = np.asarray(heights, dtype=float)
+        if np.any(heights <= 0) or np.any(heights > self.depth + 1e-9):
+            raise ValueError("heights must lie within the borehole profile")
+
+        key = (side, float(surcharge))
+        if key in self._resultant_cache:
+            self._resultant_cache.move_to_end(key)
+        else:
+            full = self.diagram(self.depth, surcharge, side)
+            p1 = full.effective_top + full.water_top
+            p2 = full.effective_bottom + full.water_bottom
+            force = (p1 + p2) / 2 * (full.depth_bottom - full.depth_top)
+            moment = _segment_moment(full.depth_top, full.depth_bottom, p1, p2)
+            cumulative_force = np.concatenate(([0.0], np.cumsum(force)))
+            cumulative_moment = np.concatenate(([0.0], np.cumsum(moment)))
+            self._resultant_cache[key] = (full.depth_top, full.depth_bottom, p1, p2,
+                                          cumulative_force, cumulative_moment)
+            while len(self._resultant_cache) > RESULTANT_CACHE_SIZE:
+                self._resultant_cache.popitem(last=False)
+        z1, z2, p1, p2, cumulative_force, cumulative_moment = self._resultant_cache[key]
+
+        # Segment containing each height, then the partial segment above it
+        i = np.clip(np.searchsorted(z2, heights, side='left'), 0, z1.size - 1)
+        t = (heights - z1[i]) / (z2[i] - z1[i])
+        pH = p1[i] + t * (p2[i] - p1[i])
+        force = cumulative_force[i] + (p1[i] + pH) / 2 * (heights - z1[i])
+        moment = cumulative_moment[i] + _segment_moment(z1[i], heights, p1[i], pH)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            location = np.where(force > 0, heights - moment / force, 0.0)
+        return force, location
+
+    def _effective_pressure(self, s1, s2, index, side):
+        """Effective horizontal pressure from effective vertical stress for a run of segments."""
+        c = self.cohesion[index]
+        if side == ACTIVE:
+            K = self.Ka[index]
+            return K * s1 - 2 * c * np.sqrt(K), K * s2 - 2 * c * np.sqrt(K)
+        if side == PASSIVE:
+            K = self.Kp[index]
+            return K * s1 + 2 * c * np.sqrt(K), K * s2 + 2 * c * np.sqrt(K)
+        raise ValueError(f"side must be '{ACTIVE}' or '{PASSIVE}', got {side!r}")
+
+
+def _split_tension(side, z1, z2, p1, p2, u1, u2) -> EarthPressureDiagram:
+    """Split segments where the effective pressure changes sign and clip tension to zero."""
+    crossing = (p1 * p2 < 0) & (z2 > z1)
+    if np.any(crossing):
+        idx = np.nonzero(crossing)[0]
+        t = p1[idx] / (p1[idx] - p2[idx])
+        zc = z1[idx] + t * (z2[idx] - z1[idx])
+        uc = u1[idx] + t * (u2[idx] - u1[idx])
+
+        # Each crossing segment becomes two: [z1, zc] and [zc, z2]
+        z1 = np.insert(z1, idx + 1, zc)
+        z2 = np.insert(z2, idx, zc)
+        p1 = np.insert(p1, idx + 1, 0.0)
+        p2 = np.insert(p2, idx, 0.0)
+        u1 = np.insert(u1, idx + 1, uc)
+        u2 = np.insert(u2, idx, uc)
+
+    return EarthPressureDiagram(
+        side=side,
+        depth_top=z1,
+        depth_bottom=z2,
+        effective_top=np.maximum(p1, 0.0),
+        effective_bottom=np.maximum(p2, 0.0),
+        water_top=u1,
+        water_bottom=u2,
+    )
+
+
+@lru_cache(maxsize=4096)
+def _profile_from_layers(layers: Tuple[tuple, ...], water_level: Optional[float],
+                         gamma_water: float) -> VerticalStressProfile:
+    """Build a vertical stress profile from hashable layer data."""
+    if not layers:
+        raise ValueError("Borehole has no layers")
+
+    depth = 0.0
+    segments: List[Tuple[float, float, int]] = []
+    for i, (top, bottom, unit_weight, _, _) in enumerate(layers):
+        if abs(top - depth) > 1e-9:
+            raise ValueError(f"Layers must be contiguous from the surface; gap or overlap at {depth} m")
+        if bottom < top:
+            raise ValueError(f"Layer {top}-{bottom} m has a negative thickness")
+        if unit_weight is None:
+            raise ValueError(f"Layer {top}-{bottom} m has no unit weight")
+        depth = bottom
+        if bottom == top:
+            continue
+        # Split the layer at the water table so that σ'v is linear per segment
+        if water_level is not None and top < water_level < bottom:
+            segments.append((top, water_level, i))
+            segments.append((water_level, bottom, i))
+        else:
+            segments.append((top, bottom, i))
+
+    n = len(segments)
+    depth_top = np.array([s[0] for s in segments])
+    depth_bottom = np.array([s[1] for s in segments])
+    layer_index = [s[2] for s in segments]
+    unit_weight = np.array([layers[i][2] for i in layer_index], dtype=float)
+    submerged = np.zeros(n, dtype=bool) if water_level is None else depth_top >= water_level
+
+    # Effective unit weight below the water table, cumulative stress over the segments
+    effective_weight = np.where(submerged, unit_weight - gamma_water, unit_weight)
+    increments = effective_weight * (depth_bottom - depth_top)
+    sigma_bottom = np.cumsum(increments)
+    sigma_top = sigma_bottom - increments
+
+    if water_level is None:
+        water_top = np.zeros(n)
+        water_bottom = np.zeros(n)
+    else:
+        water_top = gamma_water * np.maximum(depth_top - water_level, 0.0)
+        water_bottom = gamma_water * np.maximum(depth_bottom - water_level, 0.0)
+
+    friction = sorted({layers[i][4] for i in layer_index})
+    Ka_by_phi = {phi: RetainingWallCalculator.calculate_active_earth_pressure_coefficient(phi) for phi in friction}
+    Kp_by_phi = {phi: RetainingWallCalculator.calculate_passive_earth_pressure_coefficient(phi) for phi in friction}
+
+    profile = VerticalStressProfile(
+        depth_top=depth_top,
+        depth_bottom=depth_bottom,
+        sigma_top=sigma_top,
+        sigma_bottom=sigma_bottom,
+        water_top=water_top,
+        water_bottom=water_bottom,
+        Ka=np.array([Ka_by_phi[layers[i][4]] for i in layer_index]),
+        Kp=np.array([Kp_by_phi[layers[i][4]] for i in layer_index]),
+        cohesion=np.array([layers[i][3] for i in layer_index], dtype=float),
+    )
+    # The profile is shared by every caller with the same layers, so its arrays are read-only
+    for array in (profile.depth_top, profile.depth_bottom, profile.sigma_top, profile.sigma_bottom,
+                  profile.water_top, profile.water_bottom, profile.Ka, profile.Kp, profile.cohesion):
+        array.flags.writeable = False
+    return profile
+
+
+def profiles_along_alignment(
+    boreholes: Sequence[Borehole],
+    chainage_boreholes: Sequence[int],
+    heights: Sequence[float],
+    surcharge: float = 0.0,
+    side: str = ACTIVE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate resultant earth pressure forces for every chainage of an alignment.
+
+    Chainages that share a borehole share its stress profile, and all chainages of
+    one borehole are evaluated in a single vectorized call.
+
+    Args:
+        boreholes: Boreholes along the alignment
+        chainage_boreholes: Index into boreholes for each chainage
+        heights: Retained height at each chainage (m)
+        surcharge: Uniform surcharge on the surface (kPa)
+        side: "active" or "passive"
+
+    Returns:
+        Tuple of (force in kN/m, height of resultant above the wall base in m) per chainage
+    """
+    chainage_boreholes = np.asarray(chainage_boreholes, dtype=int)
+    heights = np.asarray(heights, dtype=float)
+    force = np.zeros(heights.size)
+    location = np.zeros(heights.size)
+
+    for b in np.unique(chainage_boreholes):
+        mask = chainage_boreholes == b
+        profile = VerticalStressProfile.from_borehole(boreholes[b])
+        force[mask], location[mask] = profile.resultants(heights[mask], surcharge, side)
+
+    return force, location
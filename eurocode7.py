@@ -0,0 +1,291 @@
+"""
+Eurocode 7 Design Approaches for ENGIPIT
+
+This module checks footings and piles to EN 1997-1 with the partial factor
+sets of Annex A instead of a single global factor of safety:
+
+    DA1-1:  A1 + M1 + R1
+    DA1-2:  A2 + M2 + R1   (piles: A2 + M1 + R4)
+    DA2:    A1 + M1 + R2
+    DA3:    A1 + M2 + R3   (A1 on structural actions)
+
+All design approaches are evaluated in one batched pass. Material factors
+are applied to the soil parameters of every element, the load combinations
+of every approach are stacked along a leading axis and broadcast against the
+design resistances, and the result is a utilisation matrix with one row per
+approach and one column per element. Pile resistances computed from soil
+parameters are divided by a model factor in every approach.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app import DeepFoundationCalculator
+from bearing_capacity import VESIC
+from load_combinations import Action, PartialFactors, footing_utilisation, generate_combinations
+
+
+@dataclass
+class MaterialFactors:
+    """
+    Partial factors on soil parameters (EN 1997-1 Table A.4).
+
+    Attributes:
+        friction: γφ', applied to tan φ'
+        cohesion: γc', applied to effective cohesion
+        undrained_strength: γcu, applied to cohesion when φ = 0
+        unit_weight: γγ
+    """
+    friction: float = 1.0
+    cohesion: float = 1.0
+    undrained_strength: float = 1.0
+    unit_weight: float = 1.0
+
+
+M1 = MaterialFactors()
+M2 = MaterialFactors(friction=1.25, cohesion=1.25, undrained_strength=1.4)
+
+A1 = PartialFactors(1.35, 1.0, 1.5)
+A2 = PartialFactors(1.0, 1.0, 1.3)
+
+# Pile resistance factors (γb, γs) per pile type (EN 1997-1 Tables A.6 and A.7)
+PILE_R1 = {"driven": (1.0, 1.0), "bored": (1.25, 1.0)}
+PILE_R2 = {"driven": (1.1, 1.1), "bored": (1.1, 1.1)}
+PILE_R3 = {"driven": (1.0, 1.0), "bored": (1.0, 1.0)}
+PILE_R4 = {"driven": (1.3, 1.3), "bored": (1.6, 1.3)}
+
+
+@dataclass
+class DesignApproach:
+    """
+    A set of partial factors for one EC7 design approach.
+
+    Attributes:
+        name: Name of the design approach
+        actions: Partial factors on actions
+        materials: Partial factors on soil parameters for footings
+        bearing_resistance: γR;v on spread footing bearing resistance
+        pile_materials: Partial factors on soil parameters for piles
+        pile_resistance: (γb, γs) per pile type
+    """
+    name: str
+    actions: PartialFactors
+    materials: MaterialFactors
+    bearing_resistance: float
+    pile_materials: MaterialFactors
+    pile_resistance: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+
+DA1_1 = DesignApproach("DA1-1", A1, M1, 1.0, M1, PILE_R1)
+DA1_2 = DesignApproach("DA1-2", A2, M2, 1.0, M1, PILE_R4)
+DA2 = DesignApproach("DA2", A1, M1, 1.4, M1, PILE_R2)
+DA3 = DesignApproach("DA3", A1, M2, 1.0, M2, PILE_R3)
+DESIGN_APPROACHES = (DA1_1, DA1_2, DA2, DA3)
+
+# Model factor on pile resistance calculated from ground parameters
+PILE_MODEL_FACTOR = 1.4
+
+
+@dataclass
+class Eurocode7Result:
+    """
+    Utilisation of many elements in every design approach.
+
+    Attributes:
+        approaches: Names of the design approaches, one per row
+        utilisation: Governing utilisation, shape (n_approaches, n_elements)
+        governing_combinations: Governing combination label per approach and element
+    """
+    approaches: List[str]
+    utilisation: np.ndarray
+    governing_combinations: List[List[str]]
+
+    @property
+    def is_adequate(self) -> np.ndarray:
+        """Boolean array, True where the utilisation does not exceed 1.0."""
+        return self.utilisation <= 1.0
+
+    @property
+    def governing_approach(self) -> List[str]:
+        """Design approach with the highest utilisation per element."""
+        return [self.approaches[i] for i in np.argmax(self.utilisation, axis=0)]
+
+    def to_dict(self, index: int = 0) -> Dict[str, Dict[str, object]]:
+        """Summarise every design approach for a single element."""
+        return {
+            name: {
+                "utilisation": float(self.utilisation[i, index]),
+                "governing_combination": self.governing_combinations[i][index],
+            }
+            for i, name in enumerate(self.approaches)
+        }
+
+
+def design_soil_parameters(friction_angle, cohesion, unit_weight, materials: MaterialFactors):
+    """
+    Apply material factors to characteristic soil parameters.
+
+    Args:
+        friction_angle: Characteristic friction angle in degrees
+        cohesion: Characteristic cohesion in kPa (undrained strength where φ = 0)
+        unit_weight: Characteristic unit weight in kN/m³
+        materials: Material factor set
+
+    Returns:
+        Tuple of design (friction angle, cohesion, unit weight) arrays
+    """
+    phi = np.asarray(friction_angle, dtype=float)
+    phi_d = np.degrees(np.arctan(np.tan(np.radians(phi)) / materials.friction))
+    c_factor = np.where(phi > 0, materials.cohesion, materials.undrained_strength)
+    return phi_d, np.asarray(cohesion, dtype=float) / c_factor, np.asarray(unit_weight, dtype=float) / \
+        materials.unit_weight
+
+
+def _stacked_combinations(actions: Sequence[Action], approaches: Sequence[DesignApproach]):
+    """
+    Combination matrices of all approaches stacked to shape (n_approaches, n_max, n_actions).
+
+    Shorter matrices are padded by repeating their first row, which does not
+    change the governing case.
+    """
+    matrices = [generate_combinations(actions, approach.actions) for approach in approaches]
+    n_max = max(len(m) for m in matrices)
+    stacked = np.stack([
+        np.concatenate([m.factors, np.repeat(m.factors[:1], n_max - len(m), axis=0)]) for m in matrices
+    ])
+    return matrices, stacked
+
+
+def _governing(matrices, utilisation):
+    """Governing utilisation and combination label per approach and element."""
+    index = np.argmax(utilisation, axis=2)
+    governing = np.take_along_axis(utilisation, index[..., None], axis=2)[..., 0]
+    labels = [[m.labels[i] for i in row] for m, row in zip(matrices, index)]
+    return governing, labels
+
+
+def evaluate_footings_ec7(
+    actions: Sequence[Action],
+    width,
+    length,
+    depth,
+    unit_weight,
+    cohesion,
+    friction_angle,
+    vertical,
+    horizontal=None,
+    moment=None,
+    approaches: Sequence[DesignApproach] = DESIGN_APPROACHES,
+    method: str = VESIC,
+    **bearing_kwargs
+) -> Eurocode7Result:
+    """
+    Check the bearing resistance of footings in all design approaches at once.
+
+    Args:
+        actions: Characteristic actions, one per column of the load arrays
+        width: Footing widths in meters, shape (n_elements,)
+        length: Footing lengths in meters
+        depth: Foundation depths in meters
+        unit_weight: Characteristic soil unit weights in kN/m³
+        cohesion: Characteristic cohesions in kPa (undrained strength where φ = 0)
+        friction_angle: Characteristic friction angles in degrees
+        vertical: Characteristic vertical loads in kN, shape (n_elements, n_actions)
+        horizontal: Characteristic horizontal loads in kN along the width
+        moment: Characteristic moments in kNm
+        approaches: Design approaches to evaluate (default: DA1-1, DA1-2, DA2, DA3)
+        method: Bearing capacity method (default: 'vesic')
+        **bearing_kwargs: Further arguments for BearingCapacityEngine.calculate
+
+    Returns:
+        Eurocode7Result with utilisation of shape (n_approaches, n_elements)
+    """
+    matrices, factors = _stacked_combinations(actions, approaches)
+
+    def design(loads):
+        # (n_elements, n_actions) x (n_approaches, n_max, n_actions) -> (n_approaches, n_elements, n_max)
+        return np.einsum('ea,kca->kec', np.atleast_2d(np.asarray(loads, dtype=float)), factors)
+
+    V = design(vertical)
+    H = design(horizontal) if horizontal is not None else 0.0
+    M = design(moment) if moment is not None else 0.0
+
+    def per_element(value):
+        return np.asarray(value, dtype=float).reshape(1, -1, 1)
+
+    def per_approach(values):
+        return np.array(values, dtype=float).reshape(-1, 1, 1)
+
+    phi_d, c_d, gamma_d = zip(*(design_soil_parameters(np.ravel(friction_angle), np.ravel(cohesion),
+                                                       np.ravel(unit_weight), a.materials) for a in approaches))
+    utilisation = footing_utilisation(
+        per_element(width), per_element(length), per_element(depth),
+        np.stack(gamma_d)[..., None], np.stack(c_d)[..., None], np.stack(phi_d)[..., None],
+        V, H, M, per_approach([a.bearing_resistance for a in approaches]), method, **bearing_kwargs
+    )
+    governing, labels = _governing(matrices, utilisation)
+    return Eurocode7Result([a.name for a in approaches], governing, labels)
+
+
+def evaluate_piles_ec7(
+    actions: Sequence[Action],
+    pile_diameter: Sequence[float],
+    pile_length: Sequence[float],
+    unit_weight: Sequence[float],
+    friction_angle: Sequence[float],
+    cohesion: Sequence[float],
+    pile_type: Sequence[str],
+    vertical,
+    approaches: Sequence[DesignApproach] = DESIGN_APPROACHES,
+    model_factor: float = PILE_MODEL_FACTOR
+) -> Eurocode7Result:
+    """
+    Check the axial compression resistance of piles in all design approaches at once.
+
+    Base and shaft resistance are calculated once per pile and material set,
+    then divided by γb and γs of the approach and by the model factor.
+
+    Args:
+        actions: Characteristic actions, one per column of the load array
+        pile_diameter: Pile diameters in meters, one per element
+        pile_length: Pile lengths in meters
+        unit_weight: Characteristic soil unit weights in kN/m³
+        friction_angle: Characteristic friction angles in degrees
+        cohesion: Characteristic cohesions in kPa
+        pile_type: Pile types ("driven" or "bored")
+        vertical: Characteristic vertical loads in kN, shape (n_elements, n_actions)
+        approaches: Design approaches to evaluate (default: DA1-1, DA1-2, DA2, DA3)
+        model_factor: Model factor on calculated pile resistance (default: 1.4)
+
+    Returns:
+        Eurocode7Result with utilisation of shape (n_approaches, n_elements)
+    """
+    for t in pile_type:
+        for approach in approaches:
+            if t not in approach.pile_resistance:
+                raise ValueError(f"No pile resistance factors for pile type '{t}' in {approach.name}")
+
+    resistances = {}
+    design_resistance = np.empty((len(approaches), len(pile_type)))
+    for k, approach in enumerate(approaches):
+        key = (approach.pile_materials.friction, approach.pile_materials.cohesion,
+               approach.pile_materials.undrained_strength, approach.pile_materials.unit_weight)
+        if key not in resistances:
+            phi_d, c_d, gamma_d = design_soil_parameters(friction_angle, cohesion, unit_weight,
+                                                         approach.pile_materials)
+            resistances[key] = [
+                DeepFoundationCalculator.calculate_pile_capacity(d, l, g, phi, c, t)[2:]
+                for d, l, g, phi, c, t in zip(pile_diameter, pile_length, gamma_d, phi_d, c_d, pile_type)
+            ]
+        for e, ((Qb, Qs), t) in enumerate(zip(resistances[key], pile_type)):
+            gamma_b, gamma_s = approach.pile_resistance[t]
+            design_resistance[k, e] = (Qb / gamma_b + Qs / gamma_s) / model_factor
+
+    matrices, factors = _stacked_combinations(actions, approaches)
+    V = np.einsum('ea,kca->kec', np.atleast_2d(np.asarray(vertical, dtype=float)), factors)
+    utilisation = V / design_resistance[..., None]
+    governing, labels = _governing(matrices, utilisation)
+    return Eurocode7Result([a.name for a in approaches], governing, labels)
+
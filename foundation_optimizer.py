@@ -0,0 +1,538 @@
+"""
+Foundation Optimizer for ENGIPIT
+
+Multi-objective search for economical foundations: pad footings (width,
+length, depth), pile groups (diameter, length, number of piles) and
+cantilever retaining walls (stem thickness, base width, base thickness, toe
+length). Every candidate gets a cost, from its concrete and reinforcing steel
+volumes (and excavation for footings), and a safety margin: the governing
+safety factor of the checks in app.py and wall_stability.py divided by the
+required one. The result is the Pareto front of cost against safety margin.
+
+The search is a constrained NSGA-II (Deb et al., 2002): candidates that do
+not reach the required safety factors are ranked behind the feasible ones
+by how far they fall short. Variables are snapped to construction
+increments, so repeated candidates are looked up in a cache instead of
+being recalculated. Each generation is evaluated as one vectorized batch,
+split over worker processes when workers > 1.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+import time
+
+import numpy as np
+
+from app import DeepFoundationCalculator
+from kernels import pile_capacity, ultimate_bearing_capacity
+from wall_stability import MIN_BEARING_FS, MIN_OVERTURNING_FS, MIN_SLIDING_FS, RetainingWallStabilityCalculator
+
+
+FOOTING = "footing"
+PILE_GROUP = "pile_group"
+WALL = "wall"
+
+STEEL_DENSITY = 7850.0  # kg/m³
+
+
+@dataclass(frozen=True)
+class Variable:
+    """
+    Design variable of a problem.
+
+    Attributes:
+        name: Parameter name
+        lower: Smallest value
+        upper: Largest value
+        step: Construction increment; values are multiples of it above lower
+    """
+    name: str
+    lower: float
+    upper: float
+    step: float
+
+
+@dataclass(frozen=True)
+class CostModel:
+    """
+    Unit prices of a candidate.
+
+    Attributes:
+        concrete: Price of concrete per m³
+        steel: Price of reinforcing steel per kg
+        excavation: Price of excavation per m³
+        reinforcement: Steel volume as a fraction of the concrete volume, per problem kind
+    """
+    concrete: float = 150.0
+    steel: float = 1.5
+    excavation: float = 25.0
+    reinforcement: Tuple[Tuple[str, float], ...] = ((FOOTING, 0.008), (PILE_GROUP, 0.01), (WALL, 0.012))
+
+    def ratio(self, kind: str) -> float:
+        """Reinforcement ratio of a problem kind."""
+        return dict(self.reinforcement)[kind]
+
+
+@dataclass(frozen=True)
+class Problem:
+    """
+    A foundation to optimize.
+
+    Attributes:
+        kind: FOOTING, PILE_GROUP or WALL
+        variables: Design variables
+        parameters: Fixed loads, soil properties and required safety factors
+    """
+    kind: str
+    variables: Tuple[Variable, ...]
+    parameters: Tuple[Tuple[str, Any], ...]
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Variable names in column order."""
+        return tuple(variable.name for variable in self.variables)
+
+    def snap(self, X: np.ndarray) -> np.ndarray:
+        """Clip candidates to the bounds and round them to the construction increments."""
+        lower = np.array([variable.lower for variable in self.variables])
+        upper = np.array([variable.upper for variable in self.variables])
+        step = np.array([variable.step for variable in self.variables])
+        X = lower + np.round((np.clip(X, lower, upper) - lower) / step) * step
+        return np.round(np.minimum(X, upper), 9)
+
+
+def footing_problem(
+    load: float,
+    unit_weight: float,
+    cohesion: float,
+    friction_angle: float,
+    factor_of_safety: float = 3.0,
+    width: Tuple[float, float] = (0.5, 5.0),
+    length: Tuple[float, float] = (0.5, 5.0),
+    depth: Tuple[float, float] = (0.5, 3.0)
+) -> Problem:
+    """
+    Pad footing under a vertical load, checked with Terzaghi's equation.
+
+    The slab is max(0.3, B/4) thick; excavation is B × L × depth.
+
+    Args:
+        load: Vertical column load in kN
+        unit_weight: Unit weight of soil in kN/m³
+        cohesion: Cohesion in kPa
+        friction_angle: Internal friction angle in degrees
+        factor_of_safety: Required bearing safety factor (default: 3.0)
+        width: Range of footing width (m)
+        length: Range of footing length (m)
+        depth: Range of foundation depth (m)
+
+    Returns:
+        Problem
+    """
+    return Problem(FOOTING, (Variable('width', *width, 0.05), Variable('length', *length, 0.05),
+                             Variable('depth', *depth, 0.1)),
+                   (('load', load), ('unit_weight', unit_weight), ('cohesion', cohesion),
+                    ('friction_angle', friction_angle), ('factor_of_safety', factor_of_safety)))
+
+
+def pile_group_problem(
+    load: float,
+    unit_weight: float,
+    cohesion: float,
+    friction_angle: float,
+    pile_type: str = "bored",
+    factor_of_safety: float = 2.5,
+    spacing_ratio: float = 3.0,
+    diameter: Tuple[float, float] = (0.3, 1.2),
+    length: Tuple[float, float] = (5.0, 30.0),
+    count: Tuple[int, int] = (1, 16)
+) -> Problem:
+    """
+    Pile group with a square cap under a vertical load.
+
+    The group capacity is the number of piles times the group efficiency times
+    the single pile capacity of app.py. Piles are spaced spacing_ratio
+    diameters apart; the cap extends one diameter beyond the outer piles and is
+    max(0.6, 1.5 D) thick.
+
+    Args:
+        load: Vertical column load in kN
+        unit_weight: Unit weight of soil in kN/m³
+        cohesion: Cohesion in kPa
+        friction_angle: Internal friction angle in degrees
+        pile_type: "driven" or "bored"
+        factor_of_safety: Required safety factor on the ultimate group capacity (default: 2.5)
+        spacing_ratio: Centre-to-centre spacing over diameter (default: 3.0)
+        diameter: Range of pile diameter (m)
+        length: Range of pile length (m)
+        count: Range of the number of piles
+
+    Returns:
+        Problem
+    """
+    if pile_type not in ("driven", "bored"):
+        raise ValueError(f"Unknown pile_type '{pile_type}'")
+    return Problem(PILE_GROUP, (Variable('pile_diameter', *diameter, 0.05), Variable('pile_length', *length, 0.5),
+                                Variable('pile_count', *count, 1)),
+                   (('load', load), ('unit_weight', unit_weight), ('cohesion', cohesion),
+                    ('friction_angle', friction_angle), ('pile_type', pile_type),
+                    ('factor_of_safety', factor_of_safety), ('spacing_ratio', spacing_ratio)))
+
+
+def wall_problem(
+    stem_height: float,
+    unit_weight: float,
+    friction_angle: float,
+    surcharge: float = 0.0,
+    embedment: float = 0.0,
+    foundation_cohesion: float = 0.0,
+    stem_thickness: Tuple[float, float] = (0.2, 0.6),
+    base_width: Tuple[float, float] = (1.0, 8.0),
+    base_thickness: Tuple[float, float] = (0.3, 1.0),
+    toe_length: Tuple[float, float] = (0.0, 3.0)
+) -> Problem:
+    """
+    Cantilever retaining wall per metre run, checked for sliding, overturning and bearing.
+
+    Args:
+        stem_height: Height of the stem above the base slab (m)
+        unit_weight: Unit weight of the backfill in kN/m³
+        friction_angle: Friction angle of the backfill in degrees
+        surcharge: Surcharge on the backfill in kPa
+        embedment: Depth of the base underside below the front ground (m)
+        foundation_cohesion: Cohesion of the foundation soil in kPa
+        stem_thickness: Range of stem thickness (m)
+        base_width: Range of base width (m)
+        base_thickness: Range of base thickness (m)
+        toe_length: Range of toe length (m)
+
+    Returns:
+        Problem
+    """
+    return Problem(WALL, (Variable('stem_thickness', *stem_thickness, 0.05), Variable('base_width', *base_width, 0.05),
+                          Variable('base_thickness', *base_thickness, 0.05), Variable('toe_length', *toe_length, 0.05)),
+                   (('stem_height', stem_height), ('unit_weight', unit_weight), ('friction_angle', friction_angle),
+                    ('surcharge', surcharge), ('embedment', embedment), ('foundation_cohesion', foundation_cohesion)))
+
+
+def _footing(X: np.ndarray, p: Dict[str, Any], costs: CostModel) -> Dict[str, np.ndarray]:
+    B, L, depth = X.T
+    qu = ultimate_bearing_capacity(B, L, depth, p['unit_weight'], p['cohesion'], p['friction_angle'])
+    safety_factor = qu * B * L / p['load']
+    concrete = B * L * np.maximum(0.3, B / 4)
+    return {'concrete': concrete, 'excavation': B * L * depth,
+            'margin': safety_factor / p['factor_of_safety'], 'bearing_fs': safety_factor}
+
+
+def _pile_group(X: np.ndarray, p: Dict[str, Any], costs: CostModel) -> Dict[str, np.ndarray]:
+    D, L, n = X.T
+    Qu = pile_capacity(D, L, p['unit_weight'], p['friction_angle'], p['cohesion'], p['pile_type'])[0]
+    group = DeepFoundationCalculator.calculate_pile_group_efficiency(2, p['spacing_ratio'], 1.0)
+    efficiency = np.where(n > 1, group, 1.0)
+    safety_factor = n * efficiency * Qu / p['load']
+    cap_side = (np.ceil(np.sqrt(n)) - 1) * p['spacing_ratio'] * D + 2 * D
+    concrete = n * np.pi * D ** 2 / 4 * L + cap_side ** 2 * np.maximum(0.6, 1.5 * D)
+    return {'concrete': concrete, 'excavation': np.zeros_like(D),
+            'margin': safety_factor / p['factor_of_safety'], 'group_fs': safety_factor}
+
+
+def _wall(X: np.ndarray, p: Dict[str, Any], costs: CostModel) -> Dict[str, np.ndarray]:
+    stem, base, slab, toe = X.T
+    heel = base - toe - stem
+    valid = heel >= 0
+    margin = np.minimum(heel / np.maximum(base, 1e-9), 0.0)
+    sliding, overturning, bearing = (np.zeros_like(stem) for _ in range(3))
+    if valid.any():
+        result = RetainingWallStabilityCalculator.calculate_stability(
+            p['stem_height'], stem[valid], base[valid], slab[valid], toe[valid], p['unit_weight'],
+            p['friction_angle'], p['surcharge'], p['embedment'], foundation_cohesion=p['foundation_cohesion'])
+        sliding[valid], overturning[valid], bearing[valid] = result.sliding_fs, result.overturning_fs, result.bearing_fs
+        margin[valid] = np.minimum.reduce([result.sliding_fs / MIN_SLIDING_FS,
+                                           result.overturning_fs / MIN_OVERTURNING_FS,
+                                           result.bearing_fs / MIN_BEARING_FS])
+    return {'concrete': stem * p['stem_height'] + base * slab, 'excavation': np.zeros_like(stem),
+            'margin': margin, 'sliding_fs': sliding, 'overturning_fs': overturning, 'bearing_fs': bearing}
+
+
+EVALUATORS: Dict[str, Callable[[np.ndarray, Dict[str, Any], CostModel], Dict[str, np.ndarray]]] = {
+    FOOTING: _footing,
+    PILE_GROUP: _pile_group,
+    WALL: _wall,
+}
+
+
+def evaluate(problem: Problem, X: np.ndarray, costs: CostModel = CostModel()) -> Dict[str, np.ndarray]:
+    """
+    Evaluate candidates as one vectorized batch.
+
+    Args:
+        problem: Problem
+        X: Candidates, one row per candidate and one column per variable
+        costs: Unit prices
+
+    Returns:
+        Dictionary of arrays: 'cost', 'margin' (governing safety factor over the
+        required one), 'concrete' and 'steel' volumes (m³), 'excavation' (m³) and
+        the safety factors of the individual checks
+    """
+    X = np.asarray(X, dtype=float).reshape(-1, len(problem.variables))
+    result = EVALUATORS[problem.kind](X, dict(problem.parameters), costs)
+    result['steel'] = result['concrete'] * costs.ratio(problem.kind)
+    result['cost'] = (result['concrete'] * costs.concrete + result['steel'] * STEEL_DENSITY * costs.steel
+                      + result['excavation'] * costs.excavation)
+    return result
+
+
+class CandidateCache:
+    """
+    Evaluates candidates once: repeated candidates come from memory.
+
+    Candidates not seen before are evaluated as one batch, split over the
+    executor's workers when one is given.
+    """
+
+    def __init__(self, problem: Problem, costs: CostModel = CostModel(), executor: Optional[Executor] = None,
+                 workers: int = 1):
+        self.problem = problem
+        self.costs = costs
+        self.executor = executor
+        self.workers = workers
+        self._results: Dict[Tuple[float, ...], Dict[str, float]] = {}
+        self.hits = 0
+
+    @property
+    def evaluations(self) -> int:
+        """Number of distinct candidates evaluated."""
+        return len(self._results)
+
+    def __call__(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Results of candidates (rows of X, already snapped), as arrays in row order."""
+        keys = [tuple(row) for row in X.tolist()]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._results))
+        self.hits += len(keys) - len(missing)
+        if missing:
+            batch = np.array(missing, dtype=float)
+            if self.executor is not None and self.workers > 1 and len(missing) > self.workers:
+                chunks = np.array_split(batch, self.workers)
+                parts = list(self.executor.map(evaluate, [self.problem] * len(chunks), chunks,
+                                               [self.costs] * len(chunks)))
+                result = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+            else:
+                result = evaluate(self.problem, batch, self.costs)
+            for i, key in enumerate(missing):
+                self._results[key] = {name: float(values[i]) for name, values in result.items()}
+        rows = [self._results[key] for key in keys]
+        return {name: np.array([row[name] for row in rows]) for name in rows[0]}
+
+
+@dataclass
+class Candidate:
+    """
+    One design on the Pareto front.
+
+    Attributes:
+        variables: Design variable values
+        cost: Cost from the CostModel
+        safety_margin: Governing safety factor over the required one (feasible from 1.0)
+        concrete_volume: Concrete volume (m³, per metre run for walls)
+        steel_volume: Reinforcing steel volume (m³)
+        checks: Safety factors of the individual checks
+    """
+    variables: Dict[str, float]
+    cost: float
+    safety_margin: float
+    concrete_volume: float
+    steel_volume: float
+    checks: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'variables': self.variables,
+            'cost': self.cost,
+            'safety_margin': self.safety_margin,
+            'concrete_volume': self.concrete_volume,
+            'steel_volume': self.steel_volume,
+            'checks': self.checks,
+        }
+
+
+@dataclass
+class OptimizationResult:
+    """
+    Outcome of an optimization.
+
+    Attributes:
+        kind: Problem kind
+        pareto: Feasible non-dominated candidates, cheapest first
+        generations: Generations run
+        evaluations: Distinct candidates evaluated
+        cache_hits: Candidates answered from the cache
+        wall_time: Elapsed time (s)
+    """
+    kind: str
+    pareto: List[Candidate]
+    generations: int
+    evaluations: int
+    cache_hits: int
+    wall_time: float
+
+    def cheapest(self, min_margin: float = 1.0) -> Optional[Candidate]:
+        """Cheapest candidate on the front with at least the given safety margin."""
+        return next((candidate for candidate in self.pareto if candidate.safety_margin >= min_margin), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'kind': self.kind,
+            'pareto': [candidate.to_dict() for candidate in self.pareto],
+            'generations': self.generations,
+            'evaluations': self.evaluations,
+            'cache_hits': self.cache_hits,
+            'wall_time': self.wall_time,
+        }
+
+
+def nondominated_ranks(cost: np.ndarray, margin: np.ndarray) -> np.ndarray:
+    """
+    Pareto rank of every candidate under constrained domination (0 is the front).
+
+    Cost is minimized and margin maximized. Feasible candidates (margin >= 1)
+    dominate infeasible ones; infeasible candidates are compared by margin alone.
+
+    Args:
+        cost: Candidate costs
+        margin: Candidate safety margins
+
+    Returns:
+        Integer ranks
+    """
+    feasible = margin >= 1.0
+    a_cost, b_cost = cost[:, None], cost[None, :]
+    a_margin, b_margin = margin[:, None], margin[None, :]
+    both = feasible[:, None] & feasible[None, :]
+    dominates = (both & (a_cost <= b_cost) & (a_margin >= b_margin) & ((a_cost < b_cost) | (a_margin > b_margin)))
+    dominates |= feasible[:, None] & ~feasible[None, :]
+    dominates |= ~feasible[:, None] & ~feasible[None, :] & (a_margin > b_margin)
+
+    ranks = np.full(cost.size, -1)
+    dominated_by = dominates.sum(axis=0)
+    rank = 0
+    while (ranks < 0).any():
+        front = (dominated_by == 0) & (ranks < 0)
+        ranks[front] = rank
+        dominated_by = dominated_by - dominates[front].sum(axis=0)
+        dominated_by[ranks >= 0] = -1
+        rank += 1
+    return ranks
+
+
+def crowding_distance(cost: np.ndarray, margin: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """Crowding distance of every candidate within its front (infinite at the ends)."""
+    distance = np.zeros(cost.size)
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        for objective in (cost, margin):
+            order = members[np.argsort(objective[members], kind='stable')]
+            values = objective[order]
+            distance[order[[0, -1]]] = np.inf
+            spread = values[-1] - values[0]
+            if members.size > 2 and spread > 0:
+                distance[order[1:-1]] += (values[2:] - values[:-2]) / spread
+    return distance
+
+
+def _select(ranks: np.ndarray, distance: np.ndarray, count: int) -> np.ndarray:
+    """Indices of the best candidates: lowest rank, then largest crowding distance."""
+    return np.lexsort((-distance, ranks))[:count]
+
+
+def optimize(
+    problem: Problem,
+    population: int = 64,
+    generations: int = 40,
+    workers: int = 1,
+    seed: int = 0,
+    costs: CostModel = CostModel(),
+    mutation_scale: float = 0.1,
+    max_margin: float = 2.0
+) -> OptimizationResult:
+    """
+    Search the Pareto front of cost against safety margin.
+
+    Args:
+        problem: Problem from footing_problem, pile_group_problem or wall_problem
+        population: Candidates per generation
+        generations: Number of generations
+        workers: Worker processes for candidate evaluation (1 evaluates in-process)
+        seed: Random seed; equal seeds give equal results
+        costs: Unit prices
+        mutation_scale: Standard deviation of mutations as a fraction of each variable's range
+        max_margin: Margin above which designs count as equally safe, so the front is not
+            spread over oversized foundations
+
+    Returns:
+        OptimizationResult
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    lower = np.array([variable.lower for variable in problem.variables])
+    upper = np.array([variable.upper for variable in problem.variables])
+    dimensions = lower.size
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        cache = CandidateCache(problem, costs, executor, workers)
+        X = problem.snap(lower + rng.random((population, dimensions)) * (upper - lower))
+        result = cache(X)
+        margin = np.minimum(result['margin'], max_margin)
+        ranks = nondominated_ranks(result['cost'], margin)
+        distance = crowding_distance(result['cost'], margin, ranks)
+
+        for _ in range(generations):
+            # Binary tournaments on (rank, crowding distance)
+            pairs = rng.integers(0, population, (2 * population, 2))
+            first_wins = (ranks[pairs[:, 0]] < ranks[pairs[:, 1]]) | (
+                (ranks[pairs[:, 0]] == ranks[pairs[:, 1]]) & (distance[pairs[:, 0]] >= distance[pairs[:, 1]]))
+            parents = np.where(first_wins, pairs[:, 0], pairs[:, 1]).reshape(population, 2)
+
+            # Blend crossover and Gaussian mutation
+            alpha = rng.uniform(-0.25, 1.25, (population, dimensions))
+            children = X[parents[:, 0]] + alpha * (X[parents[:, 1]] - X[parents[:, 0]])
+            mutate = rng.random((population, dimensions)) < 1.0 / dimensions
+            children += mutate * rng.normal(0.0, mutation_scale, (population, dimensions)) * (upper - lower)
+            children = problem.snap(children)
+
+            merged = np.vstack((X, children))
+            child_result = cache(children)
+            merged_result = {name: np.concatenate((result[name], child_result[name])) for name in result}
+            merged_margin = np.minimum(merged_result['margin'], max_margin)
+            merged_ranks = nondominated_ranks(merged_result['cost'], merged_margin)
+            merged_distance = crowding_distance(merged_result['cost'], merged_margin, merged_ranks)
+
+            keep = _select(merged_ranks, merged_distance, population)
+            X = merged[keep]
+            result = {name: values[keep] for name, values in merged_result.items()}
+            margin = merged_margin[keep]
+            ranks = nondominated_ranks(result['cost'], margin)
+            distance = crowding_distance(result['cost'], margin, ranks)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    front = np.flatnonzero((ranks == 0) & (result['margin'] >= 1.0))
+    unique = {}
+    for i in front[np.argsort(result['cost'][front], kind='stable')]:
+        unique.setdefault(tuple(X[i].tolist()), i)
+    checks = [name for name in result if name.endswith('_fs')]
+    pareto = [Candidate(
+        variables=dict(zip(problem.names, X[i].tolist())),
+        cost=float(result['cost'][i]),
+        safety_margin=float(result['margin'][i]),
+        concrete_volume=float(result['concrete'][i]),
+        steel_volume=float(result['steel'][i]),
+        checks={name: float(result[name][i]) for name in checks},
+    ) for i in unique.values()]
+    return OptimizationResult(problem.kind, pareto, generations, cache.evaluations, cache.hits,
+                              time.perf_counter() - start)
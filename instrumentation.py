@@ -0,0 +1,70 @@
+"""
+Hot-Path Instrumentation for ENGIPIT
+
+Opt-in call metrics for the calculators and the project model queries: call
+counts, cumulative time, latency percentiles and batch sizes per function,
+exported as JSON or Prometheus text.
+
+Instrumentation is switched on by setting the environment variable
+ENGIPIT_INSTRUMENT=1 before the calculators are imported. The @instrumented
+decorator is applied at import time: when instrumentation is off it returns
+the undecorated function, so disabled instrumentation costs nothing per call.
+With ENGIPIT_INSTRUMENT_OUTPUT=<path>.json or <path>.prom the metrics are
+written when the process exits.
+
+This module is imported by app.py and only needs os at import time. The
+recording machinery lives in call_metrics.py and is loaded on first use:
+when instrumentation is enabled, or when one of CallStats, Registry,
+REGISTRY, batch_size or wrap is accessed from this module.
+"""
+
+from typing import Callable, Optional
+import os
+
+
+ENV_VARIABLE = "ENGIPIT_INSTRUMENT"
+OUTPUT_VARIABLE = "ENGIPIT_INSTRUMENT_OUTPUT"
+
+ENABLED = os.environ.get(ENV_VARIABLE, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+# Names re-exported from call_metrics on first access
+_METRICS = ('LATENCY_BUCKETS', 'PERCENTILES', 'CallStats', 'Registry', 'REGISTRY', 'batch_size', 'wrap')
+
+
+def __getattr__(name: str):
+    if name in _METRICS:
+        import call_metrics
+        return getattr(call_metrics, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def instrumented(function: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
+    """
+    Decorator that records calls when instrumentation is enabled.
+
+    When ENGIPIT_INSTRUMENT is not set at import time the function is
+    returned unchanged. Place it below @staticmethod.
+
+    Usage:
+        @staticmethod
+        @instrumented
+        def calculate_something(...): ...
+    """
+    def decorate(f: Callable) -> Callable:
+        if not ENABLED:
+            return f
+        from call_metrics import wrap
+        return wrap(f, name)
+    return decorate(function) if function is not None else decorate
+
+
+def _write_at_exit() -> None:
+    path = os.environ.get(OUTPUT_VARIABLE)
+    if path:
+        from call_metrics import REGISTRY
+        REGISTRY.write(path)
+
+
+if ENABLED:
+    import atexit
+    atexit.register(_write_at_exit)
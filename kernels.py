@@ -0,0 +1,301 @@
+"""
+Compiled Kernels for ENGIPIT
+
+Array versions of the hot calculator formulas of app.py: the Terzaghi
+bearing capacity factors and ultimate bearing capacity,
+DeepFoundationCalculator.calculate_pile_capacity and
+RetainingWallCalculator.calculate_total_active_force.
+
+Two backends evaluate them:
+
+- 'numba': every formula is a scalar function compiled into a NumPy ufunc
+  with numba.vectorize, so an expression is evaluated in one fused loop
+  without temporary arrays. Compilation happens on first use.
+- 'numpy': the same formulas written with NumPy array operations, used when
+  Numba is not installed.
+
+The backend is chosen at runtime: the ENGIPIT_KERNELS environment variable,
+set_backend() or the backend argument of each function. By default Numba is
+used when it can be imported. All arguments broadcast against each other.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+import functools
+import importlib.util
+import math
+import os
+
+import numpy as np
+
+
+NUMPY = "numpy"
+NUMBA = "numba"
+BACKENDS = (NUMPY, NUMBA)
+
+ENV_VARIABLE = "ENGIPIT_KERNELS"
+
+_backend: Optional[str] = None
+
+
+@functools.lru_cache(maxsize=None)
+def numba_available() -> bool:
+    """Whether Numba is installed (it is not imported until a kernel is compiled)."""
+    return importlib.util.find_spec("numba") is not None
+
+
+def available_backends() -> Tuple[str, ...]:
+    """Backends that can run here."""
+    return tuple(name for name in BACKENDS if name != NUMBA or numba_available())
+
+
+def _check_backend(name: str) -> str:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend '{name}', expected one of {BACKENDS}")
+    if name == NUMBA and not numba_available():
+        raise ValueError("The numba kernel backend needs Numba, which is not installed")
+    return name
+
+
+def get_backend() -> str:
+    """The active backend: set_backend(), else ENGIPIT_KERNELS, else Numba when installed."""
+    if _backend is not None:
+        return _backend
+    name = os.environ.get(ENV_VARIABLE, "").strip().lower()
+    if name:
+        return _check_backend(name)
+    return NUMBA if numba_available() else NUMPY
+
+
+def set_backend(name: Optional[str]) -> None:
+    """
+    Select the backend for subsequent calls.
+
+    Args:
+        name: 'numpy' or 'numba', or None to return to the default selection
+    """
+    global _backend
+    _backend = None if name is None else _check_backend(name)
+
+
+# Scalar formulas, compiled by the numba backend. They follow app.py term by term.
+
+def _terzaghi_nq(phi: float) -> float:
+    return math.exp(math.pi * math.tan(math.radians(phi))) * math.tan(math.radians(45 + phi / 2)) ** 2
+
+
+def _terzaghi_nc(phi: float) -> float:
+    if phi <= 0:
+        return 5.14
+    Nq = math.exp(math.pi * math.tan(math.radians(phi))) * math.tan(math.radians(45 + phi / 2)) ** 2
+    return (Nq - 1) / math.tan(math.radians(phi))
+
+
+def _terzaghi_ngamma(phi: float) -> float:
+    Nq = math.exp(math.pi * math.tan(math.radians(phi))) * math.tan(math.radians(45 + phi / 2)) ** 2
+    return 2 * (Nq + 1) * math.tan(math.radians(phi))
+
+
+def _ultimate_bearing(width: float, depth: float, gamma: float, cohesion: float, phi: float) -> float:
+    Nq = math.exp(math.pi * math.tan(math.radians(phi))) * math.tan(math.radians(45 + phi / 2)) ** 2
+    Nc = (Nq - 1) / math.tan(math.radians(phi)) if phi > 0 else 5.14
+    Ngamma = 2 * (Nq + 1) * math.tan(math.radians(phi))
+    return cohesion * Nc + gamma * depth * Nq + 0.5 * gamma * width * Ngamma
+
+
+def _end_bearing(diameter: float, length: float, gamma: float, phi: float, cohesion: float) -> float:
+    Nq = math.exp(math.pi * math.tan(math.radians(phi))) * math.tan(math.radians(45 + phi / 2)) ** 2
+    return (cohesion * 9 + gamma * length * Nq) * math.pi * (diameter / 2) ** 2
+
+
+def _skin_friction(diameter: float, length: float, gamma: float, phi: float, cohesion: float,
+                   driven: float) -> float:
+    if driven != 0:
+        K, delta = 0.8, 0.75 * phi
+    else:
+        K, delta = 0.7, 0.6 * phi
+    return (cohesion + K * gamma * length / 2 * math.tan(math.radians(delta))) * math.pi * diameter * length
+
+
+def _active_force(height: float, gamma: float, phi: float, surcharge: float) -> float:
+    Ka = math.tan(math.radians(45 - phi / 2)) ** 2
+    return 0.5 * Ka * gamma * height * height + Ka * surcharge * height
+
+
+def _active_force_location(height: float, gamma: float, phi: float, surcharge: float) -> float:
+    Ka = math.tan(math.radians(45 - phi / 2)) ** 2
+    soil = 0.5 * Ka * gamma * height * height
+    uniform = Ka * surcharge * height
+    return (soil * height / 3 + uniform * height / 2) / (soil + uniform)
+
+
+_SCALAR_KERNELS: Dict[str, Tuple[Callable[..., float], int]] = {
+    'nq': (_terzaghi_nq, 1),
+    'nc': (_terzaghi_nc, 1),
+    'ngamma': (_terzaghi_ngamma, 1),
+    'ultimate_bearing': (_ultimate_bearing, 5),
+    'end_bearing': (_end_bearing, 5),
+    'skin_friction': (_skin_friction, 6),
+    'active_force': (_active_force, 4),
+    'active_force_location': (_active_force_location, 4),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _numba_kernels() -> Dict[str, Callable]:
+    """Compile the scalar formulas into float64 ufuncs (once per process; cached on disk by Numba)."""
+    import numba
+
+    kernels = {}
+    for name, (function, arity) in _SCALAR_KERNELS.items():
+        signature = numba.float64(*([numba.float64] * arity))
+        kernels[name] = numba.vectorize([signature], cache=True)(function)
+    return kernels
+
+
+def _use_numba(backend: Optional[str]) -> bool:
+    return (_check_backend(backend) if backend else get_backend()) == NUMBA
+
+
+def _float(value) -> np.ndarray:
+    return np.asarray(value, dtype=float)
+
+
+def bearing_capacity_factors(friction_angle,
+                             backend: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Terzaghi bearing capacity factors, as ShallowFoundationCalculator.calculate_bearing_capacity_factors.
+
+    Args:
+        friction_angle: Internal friction angle in degrees (array-like)
+        backend: 'numpy' or 'numba' (default: get_backend())
+
+    Returns:
+        Tuple of (Nc, Nq, Nγ) arrays
+    """
+    phi = _float(friction_angle)
+    if _use_numba(backend):
+        kernels = _numba_kernels()
+        return kernels['nc'](phi), kernels['nq'](phi), kernels['ngamma'](phi)
+
+    tan_phi = np.tan(np.radians(phi))
+    Nq = np.exp(np.pi * tan_phi) * np.tan(np.radians(45 + phi / 2)) ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Nc = np.where(phi > 0, (Nq - 1) / tan_phi, 5.14)
+    Ngamma = 2 * (Nq + 1) * tan_phi
+    return Nc, Nq, Ngamma
+
+
+def ultimate_bearing_capacity(
+    width,
+    length,
+    depth,
+    unit_weight,
+    cohesion,
+    friction_angle,
+    backend: Optional[str] = None
+) -> np.ndarray:
+    """
+    Terzaghi's ultimate bearing capacity, as ShallowFoundationCalculator.calculate_ultimate_bearing_capacity.
+
+    qu = c·Nc + γ·D·Nq + 0.5·γ·B·Nγ. Length is accepted for the same signature and, like in app.py, not used.
+
+    Args:
+        width: Foundation width in meters
+        length: Foundation length in meters (unused)
+        depth: Foundation depth in meters
+        unit_weight: Unit weight of soil in kN/m³
+        cohesion: Cohesion in kPa
+        friction_angle: Internal friction angle in degrees
+        backend: 'numpy' or 'numba' (default: get_backend())
+
+    Returns:
+        Ultimate bearing capacity array in kPa
+    """
+    B, D, gamma, c, phi = (_float(v) for v in (width, depth, unit_weight, cohesion, friction_angle))
+    if _use_numba(backend):
+        return _numba_kernels()['ultimate_bearing'](B, D, gamma, c, phi)
+
+    Nc, Nq, Ngamma = bearing_capacity_factors(phi, backend=NUMPY)
+    return c * Nc + gamma * D * Nq + 0.5 * gamma * B * Ngamma
+
+
+def pile_capacity(
+    pile_diameter,
+    pile_length,
+    unit_weight,
+    friction_angle,
+    cohesion,
+    pile_type,
+    factor_of_safety=2.5,
+    backend: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pile capacity, as DeepFoundationCalculator.calculate_pile_capacity.
+
+    Args:
+        pile_diameter: Pile diameter in meters
+        pile_length: Pile length in meters
+        unit_weight: Unit weight of soil in kN/m³
+        friction_angle: Internal friction angle in degrees
+        cohesion: Cohesion in kPa
+        pile_type: "driven" or "bored"; any other value is treated as bored, like app.py
+        factor_of_safety: Factor of safety (default: 2.5)
+        backend: 'numpy' or 'numba' (default: get_backend())
+
+    Returns:
+        Tuple of (ultimate capacity, allowable capacity, end bearing, skin friction) arrays in kN
+    """
+    D, L = _float(pile_diameter), _float(pile_length)
+    gamma, phi, c = _float(unit_weight), _float(friction_angle), _float(cohesion)
+    driven = np.asarray(pile_type) == "driven"
+
+    if _use_numba(backend):
+        kernels = _numba_kernels()
+        Qb = kernels['end_bearing'](D, L, gamma, phi, c)
+        Qs = kernels['skin_friction'](D, L, gamma, phi, c, driven)
+    else:
+        Nq = np.exp(np.pi * np.tan(np.radians(phi))) * np.tan(np.radians(45 + phi / 2)) ** 2
+        Qb = (c * 9 + gamma * L * Nq) * np.pi * (D / 2) ** 2
+        K = np.where(driven, 0.8, 0.7)
+        delta = np.where(driven, 0.75, 0.6) * phi
+        Qs = (c + K * gamma * L / 2 * np.tan(np.radians(delta))) * np.pi * D * L
+
+    Qu = Qb + Qs
+    return Qu, Qu / factor_of_safety, Qb, Qs
+
+
+def total_active_force(
+    wall_height,
+    unit_weight,
+    friction_angle,
+    cohesion,
+    surcharge,
+    backend: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rankine active force, as RetainingWallCalculator.calculate_total_active_force.
+
+    Cohesion is accepted for the same signature and, like in app.py, not used.
+
+    Args:
+        wall_height: Height of wall in meters
+        unit_weight: Unit weight of soil in kN/m³
+        friction_angle: Internal friction angle in degrees
+        cohesion: Cohesion in kPa (unused)
+        surcharge: Surcharge load in kPa
+        backend: 'numpy' or 'numba' (default: get_backend())
+
+    Returns:
+        Tuple of (total force in kN/m, force location from base in m) arrays
+    """
+    H, gamma, phi, q = _float(wall_height), _float(unit_weight), _float(friction_angle), _float(surcharge)
+
+    if _use_numba(backend):
+        kernels = _numba_kernels()
+        return kernels['active_force'](H, gamma, phi, q), kernels['active_force_location'](H, gamma, phi, q)
+
+    Ka = np.tan(np.radians(45 - phi / 2)) ** 2
+    soil = 0.5 * Ka * gamma * H * H
+    uniform = Ka * q * H
+    force = soil + uniform
+    return force, (soil * H / 3 + uniform * H / 2) / force
@@ -0,0 +1,327 @@
+"""
+Load Combinations for ENGIPIT
+
+This module generates Eurocode (EN 1990, expression 6.10) ultimate limit state
+combinations from characteristic actions and partial factors, and evaluates
+footings and piles for all combinations at once.
+
+The combinations form a matrix of factors with one row per combination and
+one column per action, so design effects for every element and combination
+are a single matrix product. The resistance side is evaluated once per
+element (or, for footings, with the soil-dependent bearing capacity factors
+computed once per element) and broadcast against the demand of every
+combination. The governing combination is reported per element.
+"""
+
+from typing import Dict, List, Optional, Sequence
+from dataclasses import dataclass
+import itertools
+
+import numpy as np
+
+from app import DeepFoundationCalculator
+from bearing_capacity import BearingCapacityEngine, VESIC
+
+
+PERMANENT = "permanent"
+VARIABLE = "variable"
+
+
+@dataclass
+class Action:
+    """
+    A characteristic action.
+
+    Attributes:
+        name: Name of the action (e.g. "G1", "wind")
+        kind: 'permanent' or 'variable'
+        psi0: Combination factor ψ0 for accompanying variable actions
+    """
+    name: str
+    kind: str = PERMANENT
+    psi0: float = 0.7
+
+    def __post_init__(self):
+        if self.kind not in (PERMANENT, VARIABLE):
+            raise ValueError(f"Unknown action kind '{self.kind}'")
+
+
+@dataclass
+class PartialFactors:
+    """
+    Partial factors on actions (EN 1990 Table A1.2(B) by default).
+
+    Attributes:
+        permanent_unfavourable: γG,sup
+        permanent_favourable: γG,inf
+        variable: γQ (variable actions are omitted when favourable)
+    """
+    permanent_unfavourable: float = 1.35
+    permanent_favourable: float = 1.0
+    variable: float = 1.5
+
+
+@dataclass
+class LoadCombinations:
+    """
+    Matrix of load combination factors.
+
+    Attributes:
+        action_names: Names of the actions, one per column
+        factors: Array of shape (n_combinations, n_actions)
+    """
+    action_names: List[str]
+    factors: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.factors.shape[0])
+
+    @property
+    def labels(self) -> List[str]:
+        """Readable label per combination, e.g. '1.35·G + 1.50·Q1 + 1.05·Q2'."""
+        return [" + ".join(f"{f:.2f}·{name}" for f, name in zip(row, self.action_names) if f != 0) or "-"
+                for row in self.factors]
+
+    def design_values(self, characteristic) -> np.ndarray:
+        """
+        Combine characteristic effects into design effects.
+
+        Args:
+            characteristic: Array of shape (..., n_actions)
+
+        Returns:
+            Array of shape (..., n_combinations)
+        """
+        characteristic = np.asarray(characteristic, dtype=float)
+        if characteristic.shape[-1] != len(self.action_names):
+            raise ValueError(f"Expected {len(self.action_names)} actions in the last axis, "
+                             f"got {characteristic.shape[-1]}")
+        return characteristic @ self.factors.T
+
+
+@dataclass
+class CombinationResult:
+    """
+    Utilisation of many elements under many load combinations.
+
+    Attributes:
+        utilisation: Design effect over design resistance, shape (n_elements, n_combinations)
+        labels: Label per combination
+    """
+    utilisation: np.ndarray
+    labels: List[str]
+
+    @property
+    def governing_index(self) -> np.ndarray:
+        """Index of the governing combination per element."""
+        return np.argmax(self.utilisation, axis=1)
+
+    @property
+    def governing_utilisation(self) -> np.ndarray:
+        """Highest utilisation per element."""
+        return np.max(self.utilisation, axis=1)
+
+    @property
+    def is_adequate(self) -> np.ndarray:
+        """Boolean array, True where no combination exceeds a utilisation of 1.0."""
+        return self.governing_utilisation <= 1.0
+
+    def governing_labels(self) -> List[str]:
+        """Label of the governing combination per element."""
+        return [self.labels[i] for i in self.governing_index]
+
+    def to_dict(self, index: int = 0) -> Dict[str, object]:
+        """Summarise the governing case of a single element."""
+        governing = int(self.governing_index[index])
+        return {
+            "governing_combination": self.labels[governing],
+            "governing_index": governing,
+            "utilisation": float(self.utilisation[index, governing]),
+        }
+
+
+def generate_combinations(
+    actions: Sequence[Action],
+    partial_factors: Optional[PartialFactors] = None
+) -> LoadCombinations:
+    """
+    Generate all ULS combinations of expression 6.10.
+
+    Every permanent action is taken as unfavourable or favourable. Each
+    variable action leads in turn with γQ, the others accompany with ψ0·γQ
+    or are omitted; the combination without variable actions is included.
+    Duplicate rows are removed.
+
+    Args:
+        actions: Characteristic actions
+        partial_factors: Partial factors (default: PartialFactors())
+
+    Returns:
+        LoadCombinations with one row per combination
+    """
+    if not actions:
+        raise ValueError("At least one action is required")
+    factors = partial_factors or PartialFactors()
+
+    permanent = [i for i, a in enumerate(actions) if a.kind == PERMANENT]
+    variable = [i for i, a in enumerate(actions) if a.kind == VARIABLE]
+
+    variable_rows = [np.zeros(len(actions))]
+    for lead in variable:
+        others = [i for i in variable if i != lead]
+        for present in itertools.product((True, False), repeat=len(others)):
+            row = np.zeros(len(actions))
+            row[lead] = factors.variable
+            for i, on in zip(others, present):
+                row[i] = actions[i].psi0 * factors.variable if on else 0.0
+            variable_rows.append(row)
+
+    rows = {}
+    for choice in itertools.product((factors.permanent_unfavourable, factors.permanent_favourable),
+                                    repeat=len(permanent)):
+        for variable_row in variable_rows:
+            row = variable_row.copy()
+            row[permanent] = choice
+            rows.setdefault(tuple(np.round(row, 12)), row)
+
+    return LoadCombinations([a.name for a in actions], np.array(list(rows.values())))
+
+
+def footing_utilisation(width, length, depth, unit_weight, cohesion, friction_angle, vertical, horizontal,
+                        moment, resistance_factor=1.4, method: str = VESIC, **bearing_kwargs) -> np.ndarray:
+    """
+    Calculate the bearing utilisation of footings for design loads of any broadcast shape.
+
+    The moment acts about the length axis and shifts the load along the width
+    (e = M / V). Loads with uplift or with the resultant outside the footing
+    get an infinite utilisation.
+
+    Args:
+        width: Footing widths in meters
+        length: Footing lengths in meters
+        depth: Foundation depths in meters
+        unit_weight: Soil unit weights in kN/m³
+        cohesion: Cohesions in kPa
+        friction_angle: Friction angles in degrees
+        vertical: Design vertical loads in kN
+        horizontal: Design horizontal loads in kN along the width
+        moment: Design moments in kNm
+        resistance_factor: Partial factor on bearing resistance (scalar or broadcast array)
+        method: Bearing capacity method
+        **bearing_kwargs: Further arguments for BearingCapacityEngine.calculate
+
+    Returns:
+        Array of design load over design resistance
+    """
+    V, H, M = (np.asarray(v, dtype=float) for v in (vertical, horizontal, moment))
+    V, H, M = np.broadcast_arrays(V, H, M)
+    valid = V > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        e = np.where(valid, np.abs(M) / V, 0.0)
+    valid = valid & (2 * e < width)
+    e = np.where(valid, e, 0.0)
+
+    capacity = BearingCapacityEngine.calculate(
+        width, length, depth, unit_weight, cohesion, friction_angle,
+        vertical_load=np.where(valid, V, 1.0), horizontal_load=np.where(valid, np.abs(H), 0.0),
+        eccentricity_width=e, method=method, **bearing_kwargs
+    )
+    return np.where(valid, V * resistance_factor / capacity.ultimate_load, np.inf)
+
+
+def evaluate_footings(
+    combinations: LoadCombinations,
+    width,
+    length,
+    depth,
+    unit_weight,
+    cohesion,
+    friction_angle,
+    vertical,
+    horizontal=None,
+    moment=None,
+    resistance_factor: float = 1.4,
+    method: str = VESIC,
+    **bearing_kwargs
+) -> CombinationResult:
+    """
+    Evaluate the bearing resistance of footings for every load combination.
+
+    Footing and soil properties are per element; the characteristic effects
+    have one column per action. See footing_utilisation for the treatment
+    of moments, uplift and loads outside the footing.
+
+    Args:
+        combinations: Load combination matrix
+        width: Footing widths in meters, shape (n_elements,)
+        length: Footing lengths in meters
+        depth: Foundation depths in meters
+        unit_weight: Soil unit weights in kN/m³
+        cohesion: Cohesions in kPa
+        friction_angle: Friction angles in degrees
+        vertical: Characteristic vertical loads in kN, shape (n_elements, n_actions)
+        horizontal: Characteristic horizontal loads in kN along the width
+        moment: Characteristic moments in kNm
+        resistance_factor: Partial factor on bearing resistance (default: 1.4, EC7 DA2)
+        method: Bearing capacity method (default: 'vesic')
+        **bearing_kwargs: Further arguments for BearingCapacityEngine.calculate
+
+    Returns:
+        CombinationResult with utilisation of shape (n_elements, n_combinations)
+    """
+    V = combinations.design_values(np.atleast_2d(vertical))
+    H = combinations.design_values(horizontal) if horizontal is not None else 0.0
+    M = combinations.design_values(moment) if moment is not None else 0.0
+
+    def per_element(value):
+        return np.asarray(value, dtype=float).reshape(-1, 1)
+
+    utilisation = footing_utilisation(
+        per_element(width), per_element(length), per_element(depth), per_element(unit_weight),
+        per_element(cohesion), per_element(friction_angle), V, H, M, resistance_factor, method, **bearing_kwargs
+    )
+    return CombinationResult(utilisation, combinations.labels)
+
+
+def evaluate_piles(
+    combinations: LoadCombinations,
+    pile_diameter: Sequence[float],
+    pile_length: Sequence[float],
+    unit_weight: Sequence[float],
+    friction_angle: Sequence[float],
+    cohesion: Sequence[float],
+    pile_type: Sequence[str],
+    vertical,
+    resistance_factor: float = 1.1
+) -> CombinationResult:
+    """
+    Evaluate the axial compression resistance of piles for every load combination.
+
+    The ultimate pile capacity is calculated once per pile and broadcast
+    against the design load of every combination.
+
+    Args:
+        combinations: Load combination matrix
+        pile_diameter: Pile diameters in meters, one per element
+        pile_length: Pile lengths in meters
+        unit_weight: Soil unit weights in kN/m³
+        friction_angle: Friction angles in degrees
+        cohesion: Cohesions in kPa
+        pile_type: Pile types ("driven" or "bored")
+        vertical: Characteristic vertical loads in kN, shape (n_elements, n_actions)
+        resistance_factor: Partial factor on total pile resistance (default: 1.1, EC7 DA2)
+
+    Returns:
+        CombinationResult with utilisation of shape (n_elements, n_combinations)
+    """
+    capacity = np.array([
+        DeepFoundationCalculator.calculate_pile_capacity(d, l, g, phi, c, t)[0]
+        for d, l, g, phi, c, t in zip(pile_diameter, pile_length, unit_weight, friction_angle, cohesion,
+                                      pile_type)
+    ])
+    V = combinations.design_values(np.atleast_2d(vertical))
+    if V.shape[0] != capacity.size:
+        raise ValueError(f"Expected loads for {capacity.size} piles, got {V.shape[0]}")
+
+    utilisation = V * resistance_factor / capacity[:, None]
+    return CombinationResult(utilisation, combinations.labels)
@@ -0,0 +1,357 @@
+"""
+Log-Spiral Passive Earth Pressure for ENGIPIT
+
+This module computes passive earth pressure coefficients for a log-spiral
+failure surface, the mechanism behind the Caquot–Kérisel tables used with
+Fascicule 62 Titre V. Unlike Coulomb's plane, the spiral captures the curved
+surface that develops with wall friction, which Coulomb overestimates.
+
+Solving for one case is iterative, so coefficients are served from a
+precomputed table over (φ, δ/φ, β/φ, wall inclination) with multilinear
+interpolation. The table is read from disk on first use and built (and saved)
+if the file is missing.
+"""
+
+from typing import Optional
+from functools import lru_cache
+import itertools
+import math
+import os
+
+import numpy as np
+
+from app import RetainingWallCalculator
+
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "log_spiral_kp.npz")
+
+# Table axes: φ in degrees, δ and β as fractions of φ, wall inclination in degrees
+FRICTION_ANGLES = np.arange(15.0, 45.01, 2.5)
+WALL_FRICTION_RATIOS = np.linspace(0.0, 1.0, 5)
+SLOPE_RATIOS = np.linspace(-0.5, 1.0, 7)
+WALL_INCLINATIONS = np.arange(-20.0, 20.01, 10.0)
+
+
+def _mechanism_forces(alpha, log_radius, tan_phi, delta, beta, theta):
+    """
+    Passive force for a set of trial spirals, per unit γ and wall height.
+
+    Each trial spiral starts at the wall heel A with its tangent at angle alpha
+    below/above the horizontal and radius exp(log_radius), and ends where it
+    meets the ground surface. The soil reaction on the spiral passes through its
+    pole, so moment equilibrium about the pole gives the wall force directly.
+    Invalid mechanisms return infinity.
+    """
+    radius = np.exp(log_radius)
+    A = np.array([0.0, 0.0])
+    B = np.array([-math.tan(theta), 1.0])
+    ground_normal = np.array([-math.sin(beta), math.cos(beta)])
+    ground_direction = np.array([math.cos(beta), math.sin(beta)])
+    wall_normal = np.array([math.cos(theta), math.sin(theta)])
+
+    # Passive force acts at one third of the wall, rotated δ below the wall normal
+    C = A + (B - A) / 3
+    force_direction = np.array([math.cos(delta - theta), math.sin(theta - delta)])
+
+    # Pole position: the radius at A makes 90° - φ with the spiral tangent
+    t_start = alpha - math.pi / 2 + math.atan(tan_phi)
+    ox = A[0] - radius * np.cos(t_start)
+    oy = A[1] - radius * np.sin(t_start)
+
+    def point(sweep):
+        r = radius[..., None] * np.exp(sweep * tan_phi) if np.ndim(sweep) == 2 else radius * np.exp(sweep * tan_phi)
+        t = (t_start[..., None] if np.ndim(sweep) == 2 else t_start) + sweep
+        return ((ox[..., None] if np.ndim(sweep) == 2 else ox) + r * np.cos(t),
+                (oy[..., None] if np.ndim(sweep) == 2 else oy) + r * np.sin(t))
+
+    def above_ground(x, y):
+        return (x - B[0]) * ground_normal[0] + (y - B[1]) * ground_normal[1]
+
+    # Bracket the exit through the ground surface, then bisect. Arcs sweeping more
+    # than half a turn wrap around the pole and are not admissible.
+    samples = np.linspace(0.0, math.pi, 160)
+    px, py = point(np.broadcast_to(samples, radius.shape + samples.shape))
+    above = above_ground(px, py) >= 0
+    valid = above.any(axis=1)
+    j = np.maximum(np.argmax(above, axis=1), 1)
+    low, high = samples[j - 1], samples[j]
+    for _ in range(40):
+        mid = (low + high) / 2
+        below = above_ground(*point(mid)) < 0
+        low = np.where(below, mid, low)
+        high = np.where(below, high, mid)
+    sweep = (low + high) / 2
+    ex, ey = point(sweep)
+
+    # The spiral must exit beyond the wall top and stay on the soil side of the wall
+    valid &= (ex - B[0]) * ground_direction[0] + (ey - B[1]) * ground_direction[1] > 0
+    inside = samples[None, :] <= sweep[:, None]
+    wall_side = (px - A[0]) * wall_normal[0] + (py - A[1]) * wall_normal[1]
+    valid &= ((wall_side >= -1e-9) | ~inside)[:, 1:].all(axis=1)
+
+    # Exact area and first moment of the sliding mass relative to the pole:
+    # spiral sector plus triangles pole-E-B and pole-B-A
+    sector_area = radius ** 2 / (4 * tan_phi) * np.expm1(2 * tan_phi * sweep)
+    spiral = np.exp(1j * t_start) * (np.exp((3 * tan_phi + 1j) * sweep) - 1) / (3 * tan_phi + 1j)
+    moment_x = radius ** 3 / 3 * spiral.real
+
+    area = sector_area
+    for (px1, py1), (px2, py2) in (((ex - ox, ey - oy), (B[0] - ox, B[1] - oy)),
+                                   ((B[0] - ox, B[1] - oy), (A[0] - ox, A[1] - oy))):
+        triangle = 0.5 * (px1 * py2 - px2 * py1)
+        area = area + triangle
+        moment_x = moment_x + triangle * (px1 + px2) / 3
+
+    # Moment equilibrium about the pole: weight (0, -area) at the centroid plus wall force
+    weight_moment = -moment_x * np.sign(area)
+    arm = (C[0] - ox) * force_direction[1] - (C[1] - oy) * force_direction[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        force = -weight_moment / arm
+    valid &= np.isfinite(force) & (force > 0)
+
+    # The spiral reaction is a sum of elemental forces along the radii, so it must
+    # lie within the fan of radial directions swept by the arc
+    reaction_x = force * force_direction[0]
+    reaction_y = force * force_direction[1] - np.abs(area)
+    fan_angle = np.mod(np.arctan2(reaction_y, reaction_x) - t_start, 2 * math.pi)
+    valid &= fan_angle <= sweep
+    return np.where(valid, force, np.inf)
+
+
+def solve_log_spiral_passive_coefficient(
+    friction_angle: float,
+    wall_friction: float = 0.0,
+    backfill_slope: float = 0.0,
+    wall_inclination: float = 0.0,
+    grid_size: int = 21,
+    refinements: int = 6
+) -> float:
+    """
+    Solve the log-spiral passive earth pressure coefficient for one case.
+
+    The critical spiral is found by a grid search over the tangent angle at the
+    wall heel and the spiral radius, refined around the minimum. Plane surfaces
+    are the limit of infinitely large spirals, so the result never exceeds the
+    Coulomb coefficient.
+
+    Args:
+        friction_angle: Internal friction angle in degrees (> 0)
+        wall_friction: Wall friction angle δ in degrees
+        backfill_slope: Backfill slope angle β in degrees (positive upwards, ≥ -φ)
+        wall_inclination: Angle of the wall back from the vertical in degrees
+            (positive when the back leans away from the retained soil)
+        grid_size: Number of trial values per parameter in each search pass
+        refinements: Number of search passes
+
+    Returns:
+        Passive earth pressure coefficient Kp (resultant inclined at δ to the wall normal)
+    """
+    if friction_angle <= 0:
+        raise ValueError("friction_angle must be positive")
+
+    tan_phi = math.tan(math.radians(friction_angle))
+    delta = math.radians(wall_friction)
+    beta = math.radians(backfill_slope)
+    theta = math.radians(wall_inclination)
+
+    alpha_range = (math.radians(-80.0), math.radians(70.0))
+    radius_range = (math.log(0.05), math.log(1e3))
+    best = np.inf
+    with np.errstate(over='ignore', invalid='ignore'):
+        for _ in range(refinements):
+            alphas = np.linspace(*alpha_range, grid_size)
+            radii = np.linspace(*radius_range, grid_size)
+            grid_alpha, grid_radius = np.meshgrid(alphas, radii, indexing='ij')
+            forces = _mechanism_forces(grid_alpha.ravel(), grid_radius.ravel(), tan_phi, delta, beta, theta)
+            k = int(np.argmin(forces))
+            best = min(best, float(forces[k]))
+            i, j = np.unravel_index(k, grid_alpha.shape)
+            alpha_step = 2 * (alpha_range[1] - alpha_range[0]) / (grid_size - 1)
+            radius_step = 2 * (radius_range[1] - radius_range[0]) / (grid_size - 1)
+            alpha_range = (alphas[i] - alpha_step, alphas[i] + alpha_step)
+            radius_range = (radii[j] - radius_step, radii[j] + radius_step)
+
+    # Pp = ½·γ·H²·Kp with γ = H = 1
+    Kp = 2.0 * best
+    try:
+        Kp = min(Kp, RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(
+            friction_angle, wall_friction, backfill_slope, wall_inclination))
+    except ValueError:
+        pass
+    if not math.isfinite(Kp):
+        raise ValueError("No valid log-spiral mechanism for this geometry")
+    return Kp
+
+
+class LogSpiralTable:
+    """
+    Interpolation table of log-spiral passive coefficients.
+
+    With the default axes, interpolated values stay within about 2% of a direct
+    solve.
+    """
+
+    def __init__(self, friction_angles, wall_friction_ratios, slope_ratios, wall_inclinations, values):
+        """
+        Initialise the table.
+
+        Args:
+            friction_angles: φ axis in degrees
+            wall_friction_ratios: δ/φ axis
+            slope_ratios: β/φ axis
+            wall_inclinations: Wall inclination axis in degrees
+            values: Kp values with shape matching the four axes
+        """
+        self.axes = tuple(np.asarray(a, dtype=float) for a in
+                          (friction_angles, wall_friction_ratios, slope_ratios, wall_inclinations))
+        self.values = np.asarray(values, dtype=float)
+        # Interpolate log Kp, which varies far more linearly than Kp
+        self._log_values = np.log(self.values)
+
+    @staticmethod
+    def build(
+        friction_angles=FRICTION_ANGLES,
+        wall_friction_ratios=WALL_FRICTION_RATIOS,
+        slope_ratios=SLOPE_RATIOS,
+        wall_inclinations=WALL_INCLINATIONS
+    ) -> 'LogSpiralTable':
+        """
+        Build a table by solving every grid point.
+
+        Returns:
+            LogSpiralTable over the given axes
+        """
+        shape = (len(friction_angles), len(wall_friction_ratios), len(slope_ratios), len(wall_inclinations))
+        values = np.empty(shape)
+        for (a, phi), (b, dr), (c, br), (d, theta) in itertools.product(
+                enumerate(friction_angles), enumerate(wall_friction_ratios),
+                enumerate(slope_ratios), enumerate(wall_inclinations)):
+            values[a, b, c, d] = solve_log_spiral_passive_coefficient(phi, dr * phi, br * phi, theta)
+        return LogSpiralTable(friction_angles, wall_friction_ratios, slope_ratios, wall_inclinations, values)
+
+    def save(self, path: str) -> None:
+        """Save the table as a compressed .npz file."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(
+            path,
+            friction_angles=self.axes[0],
+            wall_friction_ratios=self.axes[1],
+            slope_ratios=self.axes[2],
+            wall_inclinations=self.axes[3],
+            values=self.values,
+        )
+
+    @staticmethod
+    def load(path: str) -> 'LogSpiralTable':
+        """Load a table saved with save()."""
+        with np.load(path) as data:
+            return LogSpiralTable(
+                data['friction_angles'], data['wall_friction_ratios'],
+                data['slope_ratios'], data['wall_inclinations'], data['values']
+            )
+
+    def _coordinates(self, friction_angle, wall_friction, backfill_slope, wall_inclination):
+        """Convert physical inputs to table coordinates."""
+        phi = np.asarray(friction_angle, dtype=float)
+        return np.broadcast_arrays(phi, np.asarray(wall_friction) / phi,
+                                   np.asarray(backfill_slope) / phi, np.asarray(wall_inclination, dtype=float))
+
+    def contains(self, friction_angle, wall_friction=0.0, backfill_slope=0.0, wall_inclination=0.0) -> np.ndarray:
+        """Boolean array, True where the inputs lie inside the table range."""
+        coords = self._coordinates(friction_angle, wall_friction, backfill_slope, wall_inclination)
+        inside = np.ones(coords[0].shape, dtype=bool)
+        for axis, x in zip(self.axes, coords):
+            inside &= (x >= axis[0] - 1e-9) & (x <= axis[-1] + 1e-9)
+        return inside
+
+    def lookup(self, friction_angle, wall_friction=0.0, backfill_slope=0.0, wall_inclination=0.0) -> np.ndarray:
+        """
+        Interpolate Kp for scalar or array inputs.
+
+        Inputs outside the table are clamped to its edges; check contains() first
+        when that matters.
+
+        Returns:
+            Array of Kp values with the broadcast shape of the inputs
+        """
+        coords = self._coordinates(friction_angle, wall_friction, backfill_slope, wall_inclination)
+        indices, weights = [], []
+        for axis, x in zip(self.axes, coords):
+            x = np.clip(x, axis[0], axis[-1])
+            i = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, axis.size - 2)
+            indices.append(i)
+            weights.append((x - axis[i]) / (axis[i + 1] - axis[i]))
+
+        result = np.zeros(coords[0].shape)
+        for corner in itertools.product((0, 1), repeat=4):
+            weight = np.ones(coords[0].shape)
+            for w, offset in zip(weights, corner):
+                weight = weight * (w if offset else 1.0 - w)
+            result += weight * self._log_values[tuple(i + offset for i, offset in zip(indices, corner))]
+        return np.exp(result)
+
+
+@lru_cache(maxsize=None)
+def get_log_spiral_table(path: Optional[str] = None) -> LogSpiralTable:
+    """
+    Get the log-spiral table, loading it on first use.
+
+    If the table file does not exist it is built and saved, which takes a
+    couple of minutes once.
+
+    Args:
+        path: Table file (default: data/log_spiral_kp.npz next to this module)
+
+    Returns:
+        LogSpiralTable
+    """
+    path = path or TABLE_PATH
+    if os.path.exists(path):
+        return LogSpiralTable.load(path)
+    table = LogSpiralTable.build()
+    try:
+        table.save(path)
+    except OSError:
+        pass
+    return table
+
+
+def log_spiral_passive_coefficient(
+    friction_angle,
+    wall_friction=0.0,
+    backfill_slope=0.0,
+    wall_inclination=0.0
+) -> np.ndarray:
+    """
+    Get log-spiral passive coefficients by table lookup.
+
+    Inputs may be scalars or arrays. Cases outside the table range are solved
+    directly.
+
+    Args:
+        friction_angle: Internal friction angle in degrees
+        wall_friction: Wall friction angle δ in degrees
+        backfill_slope: Backfill slope angle β in degrees (positive upwards)
+        wall_inclination: Angle of the wall back from the vertical in degrees
+
+    Returns:
+        Array of passive earth pressure coefficients Kp
+    """
+    table = get_log_spiral_table()
+    result = np.asarray(table.lookup(friction_angle, wall_friction, backfill_slope, wall_inclination))
+    inside = table.contains(friction_angle, wall_friction, backfill_slope, wall_inclination)
+    if inside.all():
+        return result
+
+    inputs = [np.broadcast_to(np.asarray(v, dtype=float), result.shape).ravel()
+              for v in (friction_angle, wall_friction, backfill_slope, wall_inclination)]
+    flat = result.ravel().copy()
+    for k in np.nonzero(~inside.ravel())[0]:
+        flat[k] = solve_log_spiral_passive_coefficient(*(float(v[k]) for v in inputs))
+    return flat.reshape(result.shape)
+
+
+if __name__ == "__main__":
+    # Regenerate the shipped table
+    LogSpiralTable.build().save(TABLE_PATH)
+    print(f"Saved log-spiral table to {TABLE_PATH}")
@@ -0,0 +1,377 @@
+"""
+Portfolio Index for ENGIPIT
+
+A persistent index of the boreholes of many projects, for finding nearby
+historic investigations when scoping a new job:
+
+    with PortfolioIndex("portfolio.sqlite") as index:
+        for project in projects:
+            index.update(project)
+        hits = index.search(50.8466, 4.3528, 500.0, soil_type=SoilType.CLAY, below=8.0)
+
+The index is a SQLite database (standard library only) holding, per
+project, its name, coordinates and a content hash; per borehole, its site
+and geographic position, levels and depth; and per layer, the soil type,
+depths and strength properties. Searches read only these tables, never
+the projects themselves.
+
+Borehole positions are geographic: location_x and location_y are taken as
+metres east and north of the project's coordinates (latitude, longitude).
+Boreholes of projects without coordinates are indexed but not found by
+distance. Searches narrow the candidates with a latitude/longitude box on
+an indexed column pair and then check the great-circle distance; they do
+not wrap across the ±180° meridian.
+
+update() only rewrites a project whose content hash changed, so the index
+is kept current by updating projects as they are saved.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, field
+from datetime import datetime
+import math
+import sqlite3
+
+from project_models import GeotechnicalProject, SoilType
+from result_cache import stable_hash
+
+
+INDEX_VERSION = 1
+
+EARTH_RADIUS = 6371008.8  # Mean earth radius (m)
+
+# Largest number of parameters per SQLite statement on all supported versions
+_MAX_PARAMETERS = 900
+
+_SCHEMA = """
+CREATE TABLE projects (
+    project_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    content_hash TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE boreholes (
+    id INTEGER PRIMARY KEY,
+    project_id TEXT NOT NULL REFERENCES projects (project_id),
+    investigation_id TEXT NOT NULL,
+    borehole_id TEXT NOT NULL,
+    location_x REAL NOT NULL,
+    location_y REAL NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    ground_level REAL,
+    water_level REAL,
+    total_depth REAL
+);
+CREATE INDEX boreholes_position ON boreholes (latitude, longitude);
+CREATE INDEX boreholes_project ON boreholes (project_id);
+CREATE TABLE layers (
+    borehole INTEGER NOT NULL REFERENCES boreholes (id),
+    soil_type TEXT NOT NULL,
+    depth_top REAL NOT NULL,
+    depth_bottom REAL NOT NULL,
+    unit_weight REAL,
+    cohesion REAL,
+    friction_angle REAL
+);
+CREATE INDEX layers_borehole ON layers (borehole);
+"""
+
+LAYER_COLUMNS = ('soil_type', 'depth_top', 'depth_bottom', 'unit_weight', 'cohesion', 'friction_angle')
+
+
+def borehole_position(coordinates: Tuple[float, float], x: float, y: float) -> Tuple[float, float]:
+    """
+    Latitude and longitude of a point given in metres east (x) and north (y) of a project's coordinates.
+
+    Args:
+        coordinates: Project (latitude, longitude) in degrees
+        x: Metres east
+        y: Metres north
+
+    Returns:
+        (latitude, longitude) in degrees
+    """
+    latitude, longitude = coordinates
+    return (latitude + math.degrees(y / EARTH_RADIUS),
+            longitude + math.degrees(x / (EARTH_RADIUS * math.cos(math.radians(latitude)))))
+
+
+def great_circle_distance(latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float) -> float:
+    """Haversine distance between two points (m)."""
+    phi_1, phi_2 = math.radians(latitude_1), math.radians(latitude_2)
+    a = (math.sin((phi_2 - phi_1) / 2) ** 2
+         + math.cos(phi_1) * math.cos(phi_2) * math.sin(math.radians(longitude_2 - longitude_1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def project_hash(project: GeotechnicalProject) -> str:
+    """Stable hash of everything the index stores about a project."""
+    return stable_hash({
+        'name': project.name,
+        'coordinates': list(project.coordinates) if project.coordinates else None,
+        'investigations': [investigation.to_dict() for investigation in project.soil_investigations],
+    })
+
+
+@dataclass
+class BoreholeHit:
+    """
+    A borehole found by a portfolio search.
+
+    Attributes:
+        project_id: ID of the project
+        project_name: Name of the project
+        investigation_id: ID of the soil investigation
+        borehole_id: ID of the borehole
+        latitude: Latitude (degrees)
+        longitude: Longitude (degrees)
+        distance: Distance from the search point (m)
+        total_depth: Depth of the borehole (m)
+        water_level: Groundwater depth (m)
+        layers: Summaries of the layers that satisfied the soil conditions (all layers without conditions)
+    """
+    project_id: str
+    project_name: str
+    investigation_id: str
+    borehole_id: str
+    latitude: float
+    longitude: float
+    distance: float
+    total_depth: Optional[float] = None
+    water_level: Optional[float] = None
+    layers: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'project_id': self.project_id,
+            'project_name': self.project_name,
+            'investigation_id': self.investigation_id,
+            'borehole_id': self.borehole_id,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'distance': self.distance,
+            'total_depth': self.total_depth,
+            'water_level': self.water_level,
+            'layers': self.layers,
+        }
+
+
+class PortfolioIndex:
+    """Persistent borehole index spanning many projects."""
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Open or create an index.
+
+        Args:
+            path: SQLite database file; ":memory:" keeps the index in memory
+
+        Raises:
+            ValueError: If the file holds an index of another version
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            with self._connection:
+                self._connection.executescript(_SCHEMA)
+                self._connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        elif version != INDEX_VERSION:
+            self._connection.close()
+            raise ValueError(f"Unsupported portfolio index version {version}")
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+    def __enter__(self) -> 'PortfolioIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of indexed boreholes."""
+        return self._connection.execute("SELECT COUNT(*) FROM boreholes").fetchone()[0]
+
+    def __contains__(self, project_id: str) -> bool:
+        return self._connection.execute("SELECT 1 FROM projects WHERE project_id = ?",
+                                        (project_id,)).fetchone() is not None
+
+    def projects(self) -> Dict[str, str]:
+        """Content hash of every indexed project, by project ID."""
+        return dict(self._connection.execute("SELECT project_id, content_hash FROM projects"))
+
+    def update(self, project: GeotechnicalProject, timestamp: Optional[datetime] = None) -> bool:
+        """
+        Add a project to the index, or replace its entries if it changed.
+
+        Args:
+            project: Project to index
+            timestamp: Time of indexing (default: now)
+
+        Returns:
+            True if the project was (re)indexed, False if it was unchanged
+        """
+        content_hash = project_hash(project)
+        stored = self._connection.execute("SELECT content_hash FROM projects WHERE project_id = ?",
+                                          (project.id,)).fetchone()
+        if stored is not None and stored[0] == content_hash:
+            return False
+
+        latitude, longitude = project.coordinates if project.coordinates else (None, None)
+        with self._connection:
+            self._delete(project.id)
+            self._connection.execute(
+                "INSERT INTO projects VALUES (?, ?, ?, ?, ?, ?)",
+                (project.id, project.name, latitude, longitude, content_hash,
+                 (timestamp or datetime.now()).isoformat()))
+            for investigation in project.soil_investigations:
+                for borehole in investigation.boreholes:
+                    position = (borehole_position(project.coordinates, borehole.location_x, borehole.location_y)
+                                if project.coordinates else (None, None))
+                    cursor = self._connection.execute(
+                        "INSERT INTO boreholes (project_id, investigation_id, borehole_id, location_x, location_y, "
+                        "latitude, longitude, ground_level, water_level, total_depth) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (project.id, investigation.id, borehole.id, borehole.location_x, borehole.location_y,
+                         *position, borehole.ground_level, borehole.water_level, borehole.total_depth))
+                    self._connection.executemany(
+                        "INSERT INTO layers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [(cursor.lastrowid, layer.soil_type.value, layer.depth_top, layer.depth_bottom,
+                          layer.unit_weight, layer.cohesion, layer.friction_angle) for layer in borehole.layers])
+        return True
+
+    def update_all(self, projects: Iterable[GeotechnicalProject]) -> List[str]:
+        """
+        Update the index with many projects.
+
+        Returns:
+            IDs of the projects that were (re)indexed
+        """
+        return [project.id for project in projects if self.update(project)]
+
+    def remove(self, project_id: str) -> bool:
+        """
+        Remove a project from the index.
+
+        Returns:
+            True if the project was indexed
+        """
+        with self._connection:
+            return self._delete(project_id)
+
+    def _delete(self, project_id: str) -> bool:
+        self._connection.execute(
+            "DELETE FROM layers WHERE borehole IN (SELECT id FROM boreholes WHERE project_id = ?)", (project_id,))
+        self._connection.execute("DELETE FROM boreholes WHERE project_id = ?", (project_id,))
+        return self._connection.execute("DELETE FROM projects WHERE project_id = ?", (project_id,)).rowcount > 0
+
+    @staticmethod
+    def _layer_conditions(soil_type: Union[None, SoilType, Sequence[SoilType]], below: Optional[float],
+                          above: Optional[float]) -> Tuple[List[str], List[Any]]:
+        conditions, parameters = [], []
+        if soil_type is not None:
+            soil_types = [soil_type] if isinstance(soil_type, SoilType) else list(soil_type)
+            conditions.append(f"l.soil_type IN ({', '.join('?' * len(soil_types))})")
+            parameters.extend(soil.value for soil in soil_types)
+        if below is not None:
+            conditions.append("l.depth_bottom > ?")
+            parameters.append(below)
+        if above is not None:
+            conditions.append("l.depth_top < ?")
+            parameters.append(above)
+        return conditions, parameters
+
+    def search(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        soil_type: Union[None, SoilType, Sequence[SoilType]] = None,
+        below: Optional[float] = None,
+        above: Optional[float] = None,
+        exclude_project: Optional[str] = None
+    ) -> List[BoreholeHit]:
+        """
+        Boreholes of any indexed project within a distance of a point.
+
+        The soil conditions apply to single layers: with soil_type=SoilType.CLAY
+        and below=8.0 a borehole matches if it has a clay layer extending below 8 m.
+
+        Args:
+            latitude: Latitude of the point (degrees)
+            longitude: Longitude of the point (degrees)
+            radius: Distance (m)
+            soil_type: Soil type, or soil types, of a matching layer
+            below: Depth a matching layer must extend below (m)
+            above: Depth a matching layer must start above (m)
+            exclude_project: ID of a project to leave out, e.g. the new job itself
+
+        Returns:
+            Hits sorted by distance
+
+        Raises:
+            ValueError: If the radius is negative
+        """
+        if radius < 0:
+            raise ValueError("radius must not be negative")
+        d_latitude = math.degrees(radius / EARTH_RADIUS)
+        d_longitude = math.degrees(radius / (EARTH_RADIUS * max(math.cos(math.radians(latitude)), 1e-9)))
+        sql = ("SELECT b.id, b.project_id, p.name, b.investigation_id, b.borehole_id, b.latitude, b.longitude, "
+               "b.total_depth, b.water_level FROM boreholes b JOIN projects p ON p.project_id = b.project_id "
+               "WHERE b.latitude BETWEEN ? AND ? AND b.longitude BETWEEN ? AND ?")
+        parameters: List[Any] = [latitude - d_latitude, latitude + d_latitude,
+                                 longitude - d_longitude, longitude + d_longitude]
+        if exclude_project is not None:
+            sql += " AND b.project_id != ?"
+            parameters.append(exclude_project)
+        conditions, layer_parameters = self._layer_conditions(soil_type, below, above)
+        if conditions:
+            sql += f" AND EXISTS (SELECT 1 FROM layers l WHERE l.borehole = b.id AND {' AND '.join(conditions)})"
+            parameters.extend(layer_parameters)
+
+        hits: Dict[int, BoreholeHit] = {}
+        for row in self._connection.execute(sql, parameters):
+            distance = great_circle_distance(latitude, longitude, row[5], row[6])
+            if distance <= radius:
+                hits[row[0]] = BoreholeHit(*row[1:7], distance, *row[7:])
+
+        keys = list(hits)
+        for start in range(0, len(keys), _MAX_PARAMETERS):
+            block = keys[start:start + _MAX_PARAMETERS]
+            layer_sql = (f"SELECT l.borehole, {', '.join('l.' + name for name in LAYER_COLUMNS)} FROM layers l "
+                         f"WHERE l.borehole IN ({', '.join('?' * len(block))})")
+            if conditions:
+                layer_sql += f" AND {' AND '.join(conditions)}"
+            for row in self._connection.execute(layer_sql + " ORDER BY l.borehole, l.depth_top",
+                                                block + layer_parameters):
+                hits[row[0]].layers.append(dict(zip(LAYER_COLUMNS, row[1:])))
+        return sorted(hits.values(), key=lambda hit: (hit.distance, hit.project_id, hit.borehole_id))
+
+    def search_project(self, project: GeotechnicalProject, radius: float, x: float = 0.0, y: float = 0.0,
+                       **conditions) -> List[BoreholeHit]:
+        """
+        Boreholes of other projects near a point of a project's site.
+
+        Args:
+            project: Project with coordinates, e.g. a new job
+            radius: Distance (m)
+            x: Metres east of the project coordinates
+            y: Metres north of the project coordinates
+            **conditions: soil_type, below and above, as for search()
+
+        Returns:
+            Hits sorted by distance
+
+        Raises:
+            ValueError: If the project has no coordinates
+        """
+        if not project.coordinates:
+            raise ValueError(f"Project {project.id} has no coordinates")
+        latitude, longitude = borehole_position(project.coordinates, x, y)
+        return self.search(latitude, longitude, radius, exclude_project=project.id, **conditions)
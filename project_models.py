@@ -10,6 +10,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
+from instrumentation import instrumented
+
 
 class SoilType(Enum):
     """Classification of soil types according to standard geotechnical classification."""
@@ -118,11 +120,13 @@ class Borehole:
     layers: List[SoilLayer] = field(default_factory=list)
     notes: str = ""
     
+    @instrumented
     def add_layer(self, layer: SoilLayer) -> None:
         """Add a soil layer to the borehole."""
         self.layers.append(layer)
         self.layers.sort(key=lambda x: x.depth_top)
     
+    @instrumented
     def get_layer_at_depth(self, depth: float) -> Optional[SoilLayer]:
         """
         Get the soil layer at a specific depth.
@@ -186,6 +190,7 @@ class SoilInvestigation:
         """Add a borehole to the investigation."""
         self.boreholes.append(borehole)
     
+    @instrumented
     def get_borehole(self, borehole_id: str) -> Optional[Borehole]:
         """Get a specific borehole by ID."""
         for borehole in self.boreholes:
@@ -193,6 +198,7 @@ class SoilInvestigation:
                 return borehole
         return None
     
+    @instrumented
     def get_average_properties(self, depth_range: Optional[tuple] = None) -> Dict[str, float]:
         """
         Calculate average soil properties across all boreholes.
@@ -376,6 +382,14 @@ class GeotechnicalProject:
         design.project_id = self.id
         self.foundation_designs.append(design)
     
+    def remove_foundation_design(self, design_id: str) -> Optional[FoundationDesign]:
+        """Remove a foundation design by ID and return it (None if the project has no such design)."""
+        for i, design in enumerate(self.foundation_designs):
+            if design.id == design_id:
+                return self.foundation_designs.pop(i)
+        return None
+    
+    @instrumented
     def get_active_soil_investigation(self) -> Optional[SoilInvestigation]:
         """Get the most recent soil investigation."""
         if not self.soil_investigations:
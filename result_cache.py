@@ -0,0 +1,207 @@
+"""
+Content-Addressed Result Cache for ENGIPIT
+
+This module caches foundation design results under a stable hash of
+everything that determines them: the foundation type, the design parameters,
+the data of the boreholes the design depends on and the calculator version.
+Recalculating a project then only recomputes designs whose inputs changed;
+after editing one borehole, only the designs that use it are recalculated.
+
+Results are kept in an in-memory LRU and, optionally, in an on-disk store of
+JSON files that survives between sessions.
+"""
+
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from enum import Enum
+from datetime import datetime
+import copy
+import hashlib
+import json
+import os
+
+from design_calculation import CALCULATOR_VERSION, calculate_design, find_investigation, referenced_boreholes
+from project_models import FoundationDesign, GeotechnicalProject, SoilInvestigation
+
+
+def json_default(value):
+    """Serialise enums, datetimes and sets for json.dump (hashes, stored results and histories)."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Cannot hash value of type {type(value).__name__}")
+
+
+def stable_hash(value: Any) -> str:
+    """
+    Calculate a hash of a JSON-like value that is stable across runs and platforms.
+
+    Args:
+        value: Nested dicts, lists and scalars (enums and datetimes are allowed)
+
+    Returns:
+        Hexadecimal SHA-256 digest
+    """
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), default=json_default, allow_nan=True)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def design_cache_key(design: FoundationDesign, investigation: SoilInvestigation) -> str:
+    """
+    Calculate the cache key of a design.
+
+    Args:
+        design: Foundation design
+        investigation: Soil investigation used by the design
+
+    Returns:
+        Stable hash of the design inputs, referenced borehole data and calculator version
+    """
+    return stable_hash({
+        'calculator_version': CALCULATOR_VERSION,
+        'foundation_type': design.foundation_type,
+        'design_parameters': design.design_parameters,
+        'boreholes': [borehole.to_dict() for borehole in referenced_boreholes(design, investigation)],
+    })
+
+
+class ResultCache:
+    """
+    LRU cache of calculation results with an optional on-disk store.
+
+    Attributes:
+        max_entries: Maximum number of results kept in memory
+        directory: Directory of the on-disk store, or None for memory only
+        hits: Number of lookups answered from the cache
+        misses: Number of lookups not found in the cache
+    """
+
+    def __init__(self, max_entries: int = 1024, directory: Optional[str] = None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or (self.directory is not None and os.path.exists(self._path(key)))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a result.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            A copy of the cached result, or None if it is not cached
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(self._entries[key])
+
+        if self.directory is not None and os.path.exists(self._path(key)):
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            self._remember(key, value)
+            self.hits += 1
+            return copy.deepcopy(value)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a result in memory and, if configured, on disk.
+
+        Args:
+            key: Cache key
+            value: JSON-serialisable result dictionary
+        """
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        if self.directory is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(value, f, default=json_default)
+            os.replace(temporary, path)
+
+    def clear(self) -> None:
+        """Empty the in-memory cache (the on-disk store is kept)."""
+        self._entries.clear()
+
+    def calculate(self, design: FoundationDesign, investigation: SoilInvestigation) -> bool:
+        """
+        Calculate a design, using the cached result if its inputs are unchanged.
+
+        Args:
+            design: Foundation design; its results are replaced
+            investigation: Soil investigation used by the design
+
+        Returns:
+            True if the design was recomputed, False if the result came from the cache
+        """
+        key = design_cache_key(design, investigation)
+        cached = self.get(key)
+        if cached is not None:
+            design.results = cached
+            return False
+
+        design.results = calculate_design(design, investigation)
+        self.put(key, design.results)
+        return True
+
+
+def recalculate_project(project: GeotechnicalProject, cache: Optional[ResultCache] = None,
+                        errors: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Recalculate all foundation designs of a project.
+
+    Designs without a soil investigation are skipped. A design that cannot be
+    calculated gets {'error': message} as results, like a failed row of
+    batch_runner, and the other designs are still calculated.
+
+    Args:
+        project: Project to recalculate
+        cache: Result cache (default: a new in-memory cache, i.e. recompute everything)
+        errors: Dictionary filled with an error message per failed design ID
+
+    Returns:
+        IDs of the designs that were recomputed
+    """
+    cache = cache if cache is not None else ResultCache()
+    recomputed = []
+    for design in project.foundation_designs:
+        investigation = find_investigation(project, design)
+        if investigation is None:
+            continue
+        try:
+            if cache.calculate(design, investigation):
+                recomputed.append(design.id)
+        except (KeyError, TypeError, ValueError, ArithmeticError) as error:
+            design.results = {'error': str(error)}
+            if errors is not None:
+                errors[design.id] = str(error)
+    return recomputed
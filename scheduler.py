@@ -0,0 +1,241 @@
+"""
+Project-Wide Recalculation Scheduler for ENGIPIT
+
+This module recalculates every FoundationDesign of one or more projects. Designs
+are grouped by foundation type into batches; shallow foundation batches are
+evaluated as one vectorized NumPy calculation, other types design by design
+with the calculators of app.py. Batches are fanned out over a process pool and
+the results and achieved safety factor are written back to each design,
+together with per-design timings.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import os
+import time
+
+import numpy as np
+
+from app import ShallowFoundationCalculator
+from design_calculation import SHALLOW_TYPES, calculate_design, design_soil, find_investigation, finish_results
+from kernels import ultimate_bearing_capacity
+from project_models import FoundationDesign, FoundationType, GeotechnicalProject, SoilInvestigation
+
+
+# (key, design, investigation) as sent to a worker
+BatchItem = Tuple[str, FoundationDesign, SoilInvestigation]
+# (key, results or None, error message or None, seconds) as returned by a worker
+BatchOutcome = Tuple[str, Optional[Dict[str, Any]], Optional[str], float]
+
+
+@dataclass
+class ScheduleReport:
+    """
+    Summary of a recalculation run.
+
+    Design keys are '<project id>/<design id>'.
+
+    Attributes:
+        timings: Calculation time per design in seconds (shared equally within vectorized batches)
+        errors: Error message per design that could not be calculated
+        batches: Number of batches dispatched
+        workers: Number of worker processes used (1 means calculated in-process)
+        wall_time: Total elapsed time in seconds
+    """
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    batches: int = 0
+    workers: int = 1
+    wall_time: float = 0.0
+
+    @property
+    def calculated(self) -> int:
+        """Number of designs calculated successfully."""
+        return len(self.timings) - len(self.errors)
+
+    def slowest(self, count: int = 10) -> List[Tuple[str, float]]:
+        """The designs that took longest, slowest first."""
+        return sorted(self.timings.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for storage."""
+        return {
+            'calculated': self.calculated,
+            'errors': self.errors,
+            'batches': self.batches,
+            'workers': self.workers,
+            'wall_time': self.wall_time,
+            'timings': self.timings,
+        }
+
+
+def _shallow_batch(items: Sequence[BatchItem]) -> List[BatchOutcome]:
+    """Evaluate Terzaghi's equation for a batch of shallow foundations as arrays."""
+    start = time.perf_counter()
+    outcomes = []
+    valid = []
+    for key, design, investigation in items:
+        try:
+            borehole, soil = design_soil(design, investigation)
+            p = design.design_parameters
+            load = p.get('load')
+            width, length, fos = float(p['width']), float(p['length']), float(p.get('factor_of_safety', 3.0))
+            # The scalar calculators divide by these; reject them here rather than produce inf
+            if width <= 0 or length <= 0:
+                raise ValueError(f"Width and length must be positive, got {width} x {length} m")
+            if fos <= 0:
+                raise ValueError(f"Factor of safety must be positive, got {fos}")
+            valid.append((key, borehole, soil, width, length, float(p['depth']), fos,
+                          None if load is None else float(load)))
+        except (KeyError, TypeError, ValueError, ArithmeticError) as error:
+            outcomes.append((key, None, str(error), 0.0))
+
+    if valid:
+        keys, boreholes, soils, B, L, D, fos, loads = zip(*valid)
+        B, L, D, fos = (np.array(v, dtype=float) for v in (B, L, D, fos))
+        gamma = np.array([s['unit_weight'] for s in soils])
+        c = np.array([s['cohesion'] for s in soils])
+        phi = np.array([s['friction_angle'] for s in soils])
+
+        qu = ultimate_bearing_capacity(B, L, D, gamma, c, phi)
+        qa = qu / fos
+
+        elapsed = (time.perf_counter() - start) / len(items)
+        for i, key in enumerate(keys):
+            results = {'ultimate_bearing_capacity': float(qu[i]), 'allowable_bearing_capacity': float(qa[i])}
+            if loads[i] is not None:
+                pressure = ShallowFoundationCalculator.calculate_applied_pressure(loads[i], B[i], L[i])
+                results['applied_pressure'] = float(pressure)
+                results['safety_factor'] = float(qu[i] / pressure) if pressure > 0 else None
+            outcomes.append((key, finish_results(results, boreholes[i], soils[i]), None, elapsed))
+    return outcomes
+
+
+def calculate_batch(foundation_type: FoundationType, items: Sequence[BatchItem]) -> List[BatchOutcome]:
+    """
+    Calculate a batch of designs of one foundation type.
+
+    This is the unit of work sent to a worker process.
+
+    Args:
+        foundation_type: Foundation type shared by all designs of the batch
+        items: (key, design, investigation) tuples
+
+    Returns:
+        (key, results, error, seconds) per design; results is None if the calculation failed
+    """
+    if foundation_type in SHALLOW_TYPES:
+        return _shallow_batch(items)
+
+    outcomes = []
+    for key, design, investigation in items:
+        start = time.perf_counter()
+        try:
+            results, error = calculate_design(design, investigation), None
+        except (KeyError, TypeError, ValueError, ArithmeticError) as exception:
+            results, error = None, str(exception)
+        outcomes.append((key, results, error, time.perf_counter() - start))
+    return outcomes
+
+
+def make_batches(
+    projects: Sequence[GeotechnicalProject],
+    batch_size: int = 256
+) -> Tuple[List[Tuple[FoundationType, List[BatchItem]]], Dict[str, FoundationDesign], Dict[str, str]]:
+    """
+    Group the designs of all projects by foundation type into batches.
+
+    Args:
+        projects: Projects to recalculate
+        batch_size: Maximum number of designs per batch
+
+    Returns:
+        Tuple of (batches, design per key, error per key for designs without an investigation)
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    groups: Dict[FoundationType, List[BatchItem]] = {}
+    designs: Dict[str, FoundationDesign] = {}
+    errors: Dict[str, str] = {}
+    for project in projects:
+        for design in project.foundation_designs:
+            key = f"{project.id}/{design.id}"
+            designs[key] = design
+            investigation = find_investigation(project, design)
+            if investigation is None:
+                errors[key] = "No soil investigation available"
+                continue
+            groups.setdefault(design.foundation_type, []).append((key, design, investigation))
+
+    batches = []
+    for foundation_type, items in groups.items():
+        for i in range(0, len(items), batch_size):
+            batches.append((foundation_type, items[i:i + batch_size]))
+    return batches, designs, errors
+
+
+def run_projects(
+    projects: Sequence[GeotechnicalProject],
+    max_workers: Optional[int] = None,
+    batch_size: int = 256
+) -> ScheduleReport:
+    """
+    Recalculate every design of the given projects.
+
+    Results are written to design.results and the achieved safety factor, if
+    any, to design.safety_factor. Designs that fail keep their previous
+    results and are listed in the report errors.
+
+    Args:
+        projects: Projects to recalculate
+        max_workers: Number of worker processes (default: CPU count; 1 calculates in-process)
+        batch_size: Maximum number of designs per batch
+
+    Returns:
+        ScheduleReport with timings and errors
+    """
+    start = time.perf_counter()
+    batches, designs, errors = make_batches(projects, batch_size)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(batches)))
+    report = ScheduleReport(errors=dict(errors), batches=len(batches), workers=workers)
+    for key in errors:
+        report.timings[key] = 0.0
+
+    def collect(outcomes: List[BatchOutcome]) -> None:
+        for key, results, error, seconds in outcomes:
+            report.timings[key] = seconds
+            if error is not None:
+                report.errors[key] = error
+                continue
+            design = designs[key]
+            design.results = results
+            design.safety_factor = results.get('safety_factor')
+
+    if workers == 1:
+        for foundation_type, items in batches:
+            collect(calculate_batch(foundation_type, items))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(calculate_batch, foundation_type, items) for foundation_type, items in batches]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    report.wall_time = time.perf_counter() - start
+    return report
+
+
+def run_project(project: GeotechnicalProject, max_workers: Optional[int] = None,
+                batch_size: int = 256) -> ScheduleReport:
+    """
+    Recalculate every design of a project.
+
+    Args:
+        project: Project to recalculate
+        max_workers: Number of worker processes (default: CPU count; 1 calculates in-process)
+        batch_size: Maximum number of designs per batch
+
+    Returns:
+        ScheduleReport with timings and errors
+    """
+    return run_projects([project], max_workers, batch_size)
@@ -0,0 +1,439 @@
+"""
+Calculation Service for ENGIPIT
+
+A small asyncio HTTP/JSON service exposing the foundation calculators and
+project queries. It uses only the standard library (plus NumPy for the
+vectorized calculators).
+
+Concurrent calculation requests are coalesced: each endpoint has a
+RequestBatcher that collects requests for a short window (or until the batch
+is full), evaluates them in one vectorized call in a worker thread and answers
+every caller from the batch result. Requests beyond a queue limit are refused
+with 503 (backpressure), and requests that are not answered in time get 504.
+
+Endpoints:
+    GET  /health
+    GET  /projects
+    GET  /projects/<id>
+    GET  /projects/<id>/designs
+    GET  /metrics              Calculator call metrics (with ENGIPIT_INSTRUMENT=1)
+    POST /bearing-capacity     BearingCapacityEngine.calculate arguments
+    POST /pile-capacity        DeepFoundationCalculator.calculate_pile_capacity arguments
+    POST /earth-pressure       {"friction_angle": ...} -> Rankine Ka and Kp
+
+Run with: python service.py --port 8080
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from http import HTTPStatus
+import argparse
+import asyncio
+import json
+import math
+
+import numpy as np
+
+from app import DeepFoundationCalculator, RetainingWallCalculator
+from bearing_capacity import BearingCapacityEngine, VESIC
+from instrumentation import REGISTRY
+from project_models import GeotechnicalProject
+
+
+MAX_BODY_SIZE = 1 << 20
+
+BEARING_ARGUMENTS = ('width', 'length', 'depth', 'unit_weight', 'cohesion', 'friction_angle')
+BEARING_OPTIONAL = ('vertical_load', 'horizontal_load', 'eccentricity_width', 'eccentricity_length',
+                    'base_tilt', 'ground_slope', 'water_depth', 'saturated_unit_weight')
+PILE_ARGUMENTS = ('pile_diameter', 'pile_length', 'unit_weight', 'friction_angle', 'cohesion', 'pile_type')
+
+
+class ServiceOverloaded(Exception):
+    """Raised when a batcher queue is full."""
+
+
+class RequestError(Exception):
+    """Raised for invalid requests; carries the HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RequestBatcher:
+    """
+    Coalesce concurrent requests into batch calls.
+
+    The batch handler receives a list of payloads and returns a list of
+    results in the same order; a result that is an Exception is raised to
+    its caller only.
+
+    Attributes:
+        handler: Function evaluating a batch of payloads
+        window: Time to wait for more requests after the first one (s)
+        max_batch_size: Largest batch passed to the handler
+        max_pending: Number of queued requests beyond which new ones are refused
+        batches: Number of batches evaluated so far
+    """
+
+    def __init__(self, handler: Callable[[List[Dict[str, Any]]], List[Any]], window: float = 0.002,
+                 max_batch_size: int = 512, max_pending: int = 8192):
+        self.handler = handler
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.max_pending = max_pending
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of queued requests."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Start the collector task on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.ensure_future(self._collect())
+
+    async def close(self) -> None:
+        """Stop the collector task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, payload: Dict[str, Any]) -> Any:
+        """
+        Queue a payload and wait for its result.
+
+        Raises:
+            ServiceOverloaded: If the queue is full
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((payload, future))
+        except asyncio.QueueFull:
+            raise ServiceOverloaded("Too many pending requests")
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                # Take what is already queued without waiting, then wait out the window
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that timed out have cancelled their futures
+            batch = [(payload, future) for payload, future in batch if not future.done()]
+            if not batch:
+                continue
+            self.batches += 1
+            try:
+                results = await loop.run_in_executor(None, self.handler, [payload for payload, _ in batch])
+            except Exception as error:  # the handler failed as a whole
+                results = [error] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+def _per_item(function: Callable[[Dict[str, Any]], Any], payloads: Sequence[Dict[str, Any]]) -> List[Any]:
+    """
+    Evaluate payloads one by one, returning exceptions in place of failed results.
+
+    Invalid arguments become 400 errors; any other exception is returned as
+    is, so a calculation that fails only fails its own request.
+    """
+    results = []
+    for payload in payloads:
+        try:
+            results.append(function(payload))
+        except (KeyError, TypeError, ValueError) as error:
+            results.append(RequestError(HTTPStatus.BAD_REQUEST, f"Invalid request: {error!r}"))
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+def _finite(value: Any) -> Any:
+    """Replace infinite and NaN floats (not valid JSON) by None."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def encode_response(response: Any) -> bytes:
+    """Encode a response as strict JSON; non-finite numbers become null."""
+    return json.dumps(_finite(response), allow_nan=False).encode('utf-8')
+
+
+def _require(payload: Dict[str, Any], names: Sequence[str]) -> None:
+    missing = [name for name in names if name not in payload]
+    if missing:
+        raise KeyError(", ".join(missing))
+
+
+def bearing_capacity_batch(payloads: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Evaluate bearing capacity requests, vectorized per method and set of optional arguments.
+
+    If a vectorized call fails, its payloads are evaluated one by one so only
+    the invalid requests get an error.
+    """
+    results: List[Any] = [None] * len(payloads)
+    groups: Dict[Tuple, List[int]] = {}
+    for i, payload in enumerate(payloads):
+        optional = tuple(name for name in BEARING_OPTIONAL if name in payload)
+        groups.setdefault((payload.get('method', VESIC), optional), []).append(i)
+
+    def single(payload):
+        _require(payload, BEARING_ARGUMENTS)
+        return BearingCapacityEngine.calculate(**payload).to_dict()
+
+    for (method, optional), indices in groups.items():
+        try:
+            for i in indices:
+                _require(payloads[i], BEARING_ARGUMENTS)
+            arrays = {name: np.array([float(payloads[i][name]) for i in indices])
+                      for name in BEARING_ARGUMENTS + optional}
+            batch = BearingCapacityEngine.calculate(method=method, **arrays)
+            for k, i in enumerate(indices):
+                results[i] = batch.to_dict(k)
+        except (KeyError, TypeError, ValueError):
+            for i, result in zip(indices, _per_item(single, [payloads[i] for i in indices])):
+                results[i] = result
+    return results
+
+
+def pile_capacity_batch(payloads: List[Dict[str, Any]]) -> List[Any]:
+    """Evaluate pile capacity requests."""
+    def single(payload):
+        _require(payload, PILE_ARGUMENTS)
+        Qu, Qa, Qb, Qs = DeepFoundationCalculator.calculate_pile_capacity(**payload)
+        return {'ultimate_capacity': Qu, 'allowable_capacity': Qa, 'end_bearing': Qb, 'skin_friction': Qs}
+    return _per_item(single, payloads)
+
+
+def earth_pressure_batch(payloads: List[Dict[str, Any]]) -> List[Any]:
+    """Evaluate Rankine coefficients, once per distinct friction angle in the batch."""
+    coefficients: Dict[float, Dict[str, float]] = {}
+
+    def single(payload):
+        phi = float(payload['friction_angle'])
+        if phi not in coefficients:
+            coefficients[phi] = {
+                'Ka': RetainingWallCalculator.calculate_active_earth_pressure_coefficient(phi),
+                'Kp': RetainingWallCalculator.calculate_passive_earth_pressure_coefficient(phi),
+            }
+        return coefficients[phi]
+    return _per_item(single, payloads)
+
+
+class CalculationService:
+    """
+    HTTP/JSON service with batched calculation endpoints.
+
+    Attributes:
+        projects: Projects available to the query endpoints, by ID
+        request_timeout: Time allowed for a calculation request (s)
+        read_timeout: Time allowed for a client to send a request (s)
+        batchers: RequestBatcher per calculation endpoint
+    """
+
+    def __init__(self, projects: Optional[Sequence[GeotechnicalProject]] = None, window: float = 0.002,
+                 max_batch_size: int = 512, max_pending: int = 8192, request_timeout: float = 5.0,
+                 read_timeout: float = 10.0, max_connections: int = 1024):
+        self.projects = {project.id: project for project in projects or []}
+        self.request_timeout = request_timeout
+        self.read_timeout = read_timeout
+        self.batchers = {
+            '/bearing-capacity': RequestBatcher(bearing_capacity_batch, window, max_batch_size, max_pending),
+            '/pile-capacity': RequestBatcher(pile_capacity_batch, window, max_batch_size, max_pending),
+            '/earth-pressure': RequestBatcher(earth_pressure_batch, window, max_batch_size, max_pending),
+        }
+        self.max_connections = max_connections
+        self._connections: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def handle(self, method: str, path: str, body: bytes = b"") -> Tuple[HTTPStatus, Any]:
+        """
+        Handle a request without the HTTP layer.
+
+        Args:
+            method: HTTP method
+            path: Request path
+            body: JSON request body
+
+        Returns:
+            Tuple of (status, JSON-serialisable response)
+        """
+        try:
+            if method == 'POST' and path in self.batchers:
+                payload = json.loads(body or b"{}")
+                if not isinstance(payload, dict):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+                result = await asyncio.wait_for(self.batchers[path].submit(payload), self.request_timeout)
+                return HTTPStatus.OK, result
+            if method == 'GET':
+                return HTTPStatus.OK, self._query(path)
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+        except RequestError as error:
+            return error.status, {'error': str(error)}
+        except json.JSONDecodeError as error:
+            return HTTPStatus.BAD_REQUEST, {'error': f"Invalid JSON: {error}"}
+        except ServiceOverloaded as error:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': str(error)}
+        except asyncio.TimeoutError:
+            return HTTPStatus.GATEWAY_TIMEOUT, {'error': "Calculation timed out"}
+        except Exception as error:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"Calculation failed: {error!r}"}
+
+    def _query(self, path: str) -> Any:
+        parts = [part for part in path.split('/') if part]
+        if parts == ['metrics']:
+            return REGISTRY.to_dict()
+        if parts == ['health']:
+            return {'status': 'ok', 'pending': {route: b.pending for route, b in self.batchers.items()}}
+        if parts == ['projects']:
+            return [{'id': p.id, 'name': p.name, 'status': p.status.value} for p in self.projects.values()]
+        if len(parts) in (2, 3) and parts[0] == 'projects':
+            project = self.projects.get(parts[1])
+            if project is None:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Project {parts[1]} not found")
+            if len(parts) == 2:
+                return project.to_dict()
+            if parts[2] == 'designs':
+                return [design.to_dict() for design in project.foundation_designs]
+        raise RequestError(HTTPStatus.NOT_FOUND, f"No route for GET {path}")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """Start listening; the bound port is available from the returned server's sockets."""
+        for batcher in self.batchers.values():
+            batcher.start()
+        self._connections = asyncio.Semaphore(self.max_connections)
+        self._server = await asyncio.start_server(self._client, host, port)
+        return self._server
+
+    async def close(self) -> None:
+        """Stop the server and the batchers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async with self._connections:
+            try:
+                while True:
+                    try:
+                        request = await asyncio.wait_for(self._read_request(reader), self.read_timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if request is None:
+                        break
+                    method, path, body, keep_alive = request
+                    status, response = await self.handle(method, path, body)
+                    self._write_response(writer, status, response, keep_alive)
+                    await writer.drain()
+                    if not keep_alive:
+                        break
+            except RequestError as error:
+                self._write_response(writer, error.status, {'error': str(error)}, False)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            finally:
+                writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes, bool]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        return method, path.split('?', 1)[0], body, keep_alive
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, response: Any, keep_alive: bool) -> None:
+        body = encode_response(response)
+        headers = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + body)
+
+
+async def _serve(host: str, port: int, projects: Sequence[GeotechnicalProject]) -> None:
+    service = CalculationService(projects)
+    server = await service.start(host, port)
+    print(f"ENGIPIT calculation service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    """Run the service from the command line."""
+    from project_models import create_example_project
+
+    parser = argparse.ArgumentParser(description="ENGIPIT calculation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--example", action="store_true", help="serve the example project")
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port, [create_example_project()] if args.example else []))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Embedded Sheet-Pile Wall Design for ENGIPIT
+
+This module finds the embedment depth and maximum bending moment of
+cantilever and single-anchored sheet-pile walls in cohesionless soil.
+
+The net pressure on the wall is discretised on a depth grid and its
+cumulative force and moment integrals are computed once per case. The
+embedment depth is then found with a bracketed bisection on moment
+equilibrium, vectorized over all cases, so thousands of wall heights and
+soil cases are solved in one call.
+
+Cantilever walls use the full (Blum/Krey) method: the wall rotates about a
+pivot above the toe, with passive pressure reversing below it, and both
+force and moment equilibrium are satisfied. Anchored walls use the free
+earth support method with moment equilibrium about the anchor.
+"""
+
+from typing import Dict, Optional
+from dataclasses import dataclass
+
+import numpy as np
+
+from app import RetainingWallCalculator
+
+
+@dataclass
+class SheetPileResult:
+    """
+    Sheet-pile design results, one entry per case.
+
+    Attributes:
+        embedment_depth: Embedment below the dredge level (m), NaN if no solution
+        pivot_depth: Depth of the rotation point below the top (m), NaN for anchored walls
+        anchor_force: Anchor force (kN/m), zero for cantilever walls
+        max_bending_moment: Maximum bending moment in the wall (kNm/m)
+        max_moment_depth: Depth of the maximum bending moment below the top (m)
+    """
+    embedment_depth: np.ndarray
+    pivot_depth: np.ndarray
+    anchor_force: np.ndarray
+    max_bending_moment: np.ndarray
+    max_moment_depth: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.embedment_depth.size)
+
+    def to_dict(self, index: int = 0) -> Dict[str, float]:
+        """Convert the result of a single case to a dictionary."""
+        return {name: float(np.ravel(value)[index]) for name, value in self.__dict__.items()}
+
+
+class _PressureProfile:
+    """
+    Net pressure on a wall on a per-case depth grid with cumulative integrals.
+
+    The grid has a node at the dredge level so that every pressure is linear
+    between nodes and the cumulative force and moment are exact at the nodes.
+    """
+
+    def __init__(self, retained_height, unit_weight, surcharge, Ka, Kp, max_depth, n_points):
+        self.height = retained_height
+        self.max_depth = max_depth
+        self.n_above = max(n_points // 4, 2)
+        self.n_below = max(n_points - self.n_above, 2)
+
+        above = np.linspace(0.0, 1.0, self.n_above)[None, :] * retained_height[:, None]
+        below = retained_height[:, None] + np.linspace(0.0, 1.0, self.n_below)[None, :] * \
+            (max_depth - retained_height)[:, None]
+        self.z = np.concatenate([above, below[:, 1:]], axis=1)
+
+        z = self.z
+        g = unit_weight[:, None]
+        q = surcharge[:, None]
+        dredge = np.maximum(z - retained_height[:, None], 0.0)
+        active_back = Ka[:, None] * (g * z + q)
+        passive_front = Kp[:, None] * g * dredge
+        passive_back = Kp[:, None] * (g * z + q)
+        active_front = Ka[:, None] * g * dredge
+
+        # Above the pivot the wall moves forward; below it, backwards into the retained soil
+        self.forward = active_back - passive_front
+        self.backward = passive_back - active_front
+        self.forward_cum = self._cumulative(self.forward)
+        self.backward_cum = self._cumulative(self.backward)
+
+    def _cumulative(self, pressure):
+        """Cumulative force ∫p dz and moment ∫p·z dz from the top to every node."""
+        z1, z2 = self.z[:, :-1], self.z[:, 1:]
+        p1, p2 = pressure[:, :-1], pressure[:, 1:]
+        force = (p1 + p2) / 2 * (z2 - z1)
+        moment = (z2 - z1) * (p1 * (2 * z1 + z2) + p2 * (z1 + 2 * z2)) / 6.0
+        zeros = np.zeros((self.z.shape[0], 1))
+        return (np.concatenate([zeros, np.cumsum(force, axis=1)], axis=1),
+                np.concatenate([zeros, np.cumsum(moment, axis=1)], axis=1))
+
+    def _cell(self, depth):
+        """Index of the grid cell containing each depth (one depth per case)."""
+        fraction_above = depth / self.height * (self.n_above - 1)
+        fraction_below = (self.n_above - 1) + (depth - self.height) / (self.max_depth - self.height) * \
+            (self.n_below - 1)
+        index = np.where(depth <= self.height, fraction_above, fraction_below)
+        return np.clip(np.floor(index).astype(int), 0, self.z.shape[1] - 2)
+
+    def integrals(self, which, depth):
+        """Exact cumulative force and moment from the top down to a depth per case."""
+        pressure = self.forward if which == 'forward' else self.backward
+        force_cum, moment_cum = self.forward_cum if which == 'forward' else self.backward_cum
+        rows = np.arange(self.z.shape[0])
+        k = self._cell(depth)
+        z1 = self.z[rows, k]
+        z2 = self.z[rows, k + 1]
+        t = np.where(z2 > z1, (depth - z1) / np.where(z2 > z1, z2 - z1, 1.0), 0.0)
+        p1 = pressure[rows, k]
+        pz = p1 + t * (pressure[rows, k + 1] - p1)
+        force = force_cum[rows, k] + (p1 + pz) / 2 * (depth - z1)
+        moment = moment_cum[rows, k] + (depth - z1) * (p1 * (2 * z1 + depth) + pz * (z1 + 2 * depth)) / 6.0
+        return force, moment
+
+
+def _bisect(residual, low, high, iterations):
+    """Vectorized bisection for residuals that are positive at low and negative at high."""
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        positive = residual(mid) > 0
+        low = np.where(positive, mid, low)
+        high = np.where(positive, high, mid)
+    return (low + high) / 2
+
+
+def _prepare(retained_height, unit_weight, friction_angle, surcharge, Ka, Kp, passive_safety_factor):
+    """Broadcast inputs to flat arrays and resolve the earth pressure coefficients."""
+    retained_height, unit_weight, friction_angle, surcharge = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (retained_height, unit_weight, friction_angle, surcharge))
+    )
+    shape = retained_height.shape
+    if np.any(retained_height <= 0):
+        raise ValueError("retained_height must be positive")
+
+    unique, inverse = np.unique(friction_angle, return_inverse=True)
+    if Ka is None:
+        Ka = np.array([RetainingWallCalculator.calculate_active_earth_pressure_coefficient(phi)
+                       for phi in unique])[inverse]
+    if Kp is None:
+        Kp = np.array([RetainingWallCalculator.calculate_passive_earth_pressure_coefficient(phi)
+                       for phi in unique])[inverse]
+    Ka = np.broadcast_to(np.asarray(Ka, dtype=float), shape).ravel()
+    Kp = np.broadcast_to(np.asarray(Kp, dtype=float), shape).ravel() / passive_safety_factor
+
+    return shape, retained_height.ravel(), unit_weight.ravel(), surcharge.ravel(), Ka, Kp
+
+
+class SheetPileCalculator:
+    """Calculator for embedded cantilever and single-anchored sheet-pile walls."""
+
+    @staticmethod
+    def calculate_cantilever_embedment(
+        retained_height,
+        unit_weight,
+        friction_angle,
+        surcharge=0.0,
+        Ka=None,
+        Kp=None,
+        passive_safety_factor: float = 1.0,
+        max_embedment_ratio: float = 5.0,
+        n_points: int = 400,
+        iterations: int = 60
+    ) -> SheetPileResult:
+        """
+        Calculate the embedment depth of cantilever sheet-pile walls.
+
+        For a trial toe depth the pivot depth follows from horizontal force
+        equilibrium; the toe depth is then bisected until the moment about the
+        toe vanishes. Arguments broadcast, so many cases are solved at once.
+
+        Args:
+            retained_height: Height retained above the dredge level (m)
+            unit_weight: Unit weight of the soil in kN/m³ (effective below water)
+            friction_angle: Internal friction angle in degrees
+            surcharge: Surcharge on the retained side in kPa
+            Ka: Optional active coefficients replacing Rankine
+            Kp: Optional passive coefficients replacing Rankine (e.g. log-spiral)
+            passive_safety_factor: Factor dividing Kp (default: 1.0)
+            max_embedment_ratio: Largest embedment searched, as a multiple of the retained height
+            n_points: Number of grid points of the pressure profile per case
+            iterations: Number of bisection iterations
+
+        Returns:
+            SheetPileResult with one entry per case (NaN embedment if none is found)
+        """
+        shape, H, gamma, q, Ka, Kp = _prepare(
+            retained_height, unit_weight, friction_angle, surcharge, Ka, Kp, passive_safety_factor)
+        max_depth = H * (1.0 + max_embedment_ratio)
+        profile = _PressureProfile(H, gamma, q, Ka, Kp, max_depth, n_points)
+
+        def pivot(toe):
+            # Force balance: F_fwd(zr) + F_back(toe) - F_back(zr) = 0; the left side falls with zr
+            target = -profile.integrals('backward', toe)[0]
+
+            def residual(zr):
+                return profile.integrals('forward', zr)[0] - profile.integrals('backward', zr)[0] - target
+
+            # Bracket the root between grid nodes before bisecting within the cell
+            nodes = profile.forward_cum[0] - profile.backward_cum[0]
+            inside = (nodes > target[:, None]) & (profile.z <= toe[:, None])
+            k = np.clip(inside.sum(axis=1) - 1, 0, profile.z.shape[1] - 2)
+            rows = np.arange(k.size)
+            low = np.minimum(profile.z[rows, k], toe)
+            high = np.minimum(profile.z[rows, k + 1], toe)
+            return _bisect(residual, low, high, iterations // 2)
+
+        def toe_moment(toe):
+            zr = pivot(toe)
+            F1, S1 = profile.integrals('forward', zr)
+            F2t, S2t = profile.integrals('backward', toe)
+            F2r, S2r = profile.integrals('backward', zr)
+            force = F1 + F2t - F2r
+            moment = toe * force - (S1 + S2t - S2r)
+            # Without enough passive resistance there is no pivot that balances the forces
+            feasible = np.abs(force) <= 1e-6 * np.maximum(np.abs(F2t), 1.0)
+            return np.where(feasible, moment, np.inf)
+
+        low, high = H.copy(), max_depth.copy()
+        solvable = toe_moment(high) <= 0
+        toe = _bisect(toe_moment, low, high, iterations)
+        zr = pivot(toe)
+
+        # Maximum moment above the pivot, where the shear changes sign
+        M = profile.z * profile.forward_cum[0] - profile.forward_cum[1]
+        M = np.where(profile.z <= zr[:, None], M, -np.inf)
+        k = np.argmax(M, axis=1)
+        rows = np.arange(k.size)
+
+        nan = np.full(toe.shape, np.nan)
+        return SheetPileResult(
+            embedment_depth=np.where(solvable, toe - H, nan).reshape(shape),
+            pivot_depth=np.where(solvable, zr, nan).reshape(shape),
+            anchor_force=np.zeros(shape),
+            max_bending_moment=np.where(solvable, M[rows, k], nan).reshape(shape),
+            max_moment_depth=np.where(solvable, profile.z[rows, k], nan).reshape(shape),
+        )
+
+    @staticmethod
+    def calculate_anchored_embedment(
+        retained_height,
+        anchor_depth,
+        unit_weight,
+        friction_angle,
+        surcharge=0.0,
+        Ka=None,
+        Kp=None,
+        passive_safety_factor: float = 1.0,
+        max_embedment_ratio: float = 5.0,
+        n_points: int = 400,
+        iterations: int = 60
+    ) -> SheetPileResult:
+        """
+        Calculate the embedment depth of single-anchored walls (free earth support).
+
+        The toe depth is bisected until the net pressure has no moment about the
+        anchor; the anchor force then follows from horizontal force equilibrium.
+
+        Args:
+            retained_height: Height retained above the dredge level (m)
+            anchor_depth: Depth of the anchor below the top of the wall (m)
+            unit_weight: Unit weight of the soil in kN/m³ (effective below water)
+            friction_angle: Internal friction angle in degrees
+            surcharge: Surcharge on the retained side in kPa
+            Ka: Optional active coefficients replacing Rankine
+            Kp: Optional passive coefficients replacing Rankine (e.g. log-spiral)
+            passive_safety_factor: Factor dividing Kp (default: 1.0)
+            max_embedment_ratio: Largest embedment searched, as a multiple of the retained height
+            n_points: Number of grid points of the pressure profile per case
+            iterations: Number of bisection iterations
+
+        Returns:
+            SheetPileResult with one entry per case (NaN embedment if none is found)
+        """
+        shape, H, gamma, q, Ka, Kp = _prepare(
+            retained_height, unit_weight, friction_angle, surcharge, Ka, Kp, passive_safety_factor)
+        anchor_depth = np.broadcast_to(np.asarray(anchor_depth, dtype=float), shape).ravel()
+        if np.any(anchor_depth < 0) or np.any(anchor_depth >= H):
+            raise ValueError("anchor_depth must lie between the top of the wall and the dredge level")
+
+        max_depth = H * (1.0 + max_embedment_ratio)
+        profile = _PressureProfile(H, gamma, q, Ka, Kp, max_depth, n_points)
+
+        def anchor_moment(toe):
+            force, moment = profile.integrals('forward', toe)
+            return moment - anchor_depth * force
+
+        low, high = H.copy(), max_depth.copy()
+        solvable = anchor_moment(high) <= 0
+        toe = _bisect(anchor_moment, low, high, iterations)
+        anchor_force = profile.integrals('forward', toe)[0]
+
+        # Bending moment along the wall with the anchor as a point support
+        z = profile.z
+        M = z * profile.forward_cum[0] - profile.forward_cum[1] - \
+            anchor_force[:, None] * np.maximum(z - anchor_depth[:, None], 0.0)
+        M = np.where(z <= toe[:, None], np.abs(M), -np.inf)
+        k = np.argmax(M, axis=1)
+        rows = np.arange(k.size)
+
+        nan = np.full(toe.shape, np.nan)
+        return SheetPileResult(
+            embedment_depth=np.where(solvable, toe - H, nan).reshape(shape),
+            pivot_depth=np.full(shape, np.nan),
+            anchor_force=np.where(solvable, anchor_force, nan).reshape(shape),
+            max_bending_moment=np.where(solvable, M[rows, k], nan).reshape(shape),
+            max_moment_depth=np.where(solvable, z[rows, k], nan).reshape(shape),
+        )
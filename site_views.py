@@ -0,0 +1,386 @@
+"""
+Site Cross-Sections and 3D Stratigraphy for ENGIPIT
+
+This module renders many boreholes at once:
+
+- cross-sections along a polyline: boreholes are projected onto the line
+  and drawn as soil columns at their chainage, with the ground level, the
+  groundwater level and the CPT cone resistance traces;
+- 3D stratigraphy: every layer is a prism around its borehole.
+
+The figure data is packed: all layers of one soil type form a single trace
+(polygons separated by NaN in a scatter trace, or one mesh in 3D), so the
+number of traces depends on the number of soil types, not on the number of
+layers. Consecutive layers of the same soil type are merged, and dense CPT
+traces are decimated with a min/max-preserving downsampling that keeps
+every peak and trough.
+
+The trace builders return plotly trace dictionaries built from NumPy arrays
+and do not need plotly; plotly is only imported by the *_figure functions.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+
+import numpy as np
+
+from project_models import Borehole, SoilType
+
+
+SOIL_TYPES: Tuple[SoilType, ...] = tuple(SoilType)
+
+SOIL_COLORS: Dict[SoilType, str] = {
+    SoilType.CLAY: "#8c6d46",
+    SoilType.SILT: "#b59b6d",
+    SoilType.SAND: "#e8d17a",
+    SoilType.GRAVEL: "#b0a89c",
+    SoilType.PEAT: "#4a3a2a",
+    SoilType.ROCK: "#6e6e78",
+    SoilType.FILL: "#a3a3a3",
+    SoilType.MIXED: "#c49a6c",
+}
+
+# Points kept per CPT trace after decimation
+MAX_TRACE_POINTS = 400
+
+# Corners of a unit prism (x, y, top/bottom) and its 12 triangles
+_PRISM_CORNERS = np.array([[-1, -1, 0], [1, -1, 0], [1, 1, 0], [-1, 1, 0],
+                           [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]], dtype=float)
+_PRISM_TRIANGLES = np.array([[0, 1, 2], [0, 2, 3], [4, 5, 6], [4, 6, 7], [0, 1, 5], [0, 5, 4],
+                             [1, 2, 6], [1, 6, 5], [2, 3, 7], [2, 7, 6], [3, 0, 4], [3, 4, 7]])
+
+
+def minmax_decimate(values, max_points: int = MAX_TRACE_POINTS) -> np.ndarray:
+    """
+    Indices of a min/max-preserving subset of a trace.
+
+    The first and last points are kept; the points between them are split
+    into equal buckets and the minimum and maximum of every bucket are kept,
+    in their original order. Peaks therefore survive any decimation.
+
+    Args:
+        values: Values along the trace (e.g. cone resistance by depth)
+        max_points: Maximum number of points kept (at least 4)
+
+    Returns:
+        Sorted indices into values
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    inner = n - 2
+    size = -(-inner // max(1, (max_points - 2) // 2))
+    buckets = -(-inner // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:inner] = values[1:-1]
+    blocks = padded.reshape(buckets, size)
+    padding = np.isnan(blocks)
+    low = np.where(padding, np.inf, blocks).argmin(axis=1)
+    high = np.where(padding, -np.inf, blocks).argmax(axis=1)
+    start = 1 + np.arange(buckets) * size
+    return np.unique(np.concatenate(([0], start + low, start + high, [n - 1])))
+
+
+def project_onto_polyline(x, y, polyline: Sequence[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Project points onto a polyline.
+
+    Args:
+        x: X coordinates of the points (m)
+        y: Y coordinates of the points (m)
+        polyline: Vertices of the section line, at least two
+
+    Returns:
+        Tuple of (chainage along the line, distance from the line) arrays in m
+    """
+    vertices = np.asarray(polyline, dtype=float)
+    if vertices.ndim != 2 or vertices.shape[0] < 2 or vertices.shape[1] != 2:
+        raise ValueError("A section line needs at least two (x, y) vertices")
+    points = np.column_stack((np.asarray(x, dtype=float), np.asarray(y, dtype=float)))
+
+    start = vertices[:-1]
+    direction = vertices[1:] - start
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    chainage_start = np.concatenate(([0.0], np.cumsum(length)[:-1]))
+
+    relative = points[:, None, :] - start[None, :, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length > 0, (relative * direction).sum(axis=2) / length ** 2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    distance = np.hypot(*np.moveaxis(relative - t[..., None] * direction, 2, 0))
+
+    segment = distance.argmin(axis=1)
+    rows = np.arange(len(points))
+    return chainage_start[segment] + t[rows, segment] * length[segment], distance[rows, segment]
+
+
+@dataclass
+class PackedLayers:
+    """
+    Layers of many boreholes in flat arrays.
+
+    Attributes:
+        borehole: Index of the borehole of each layer
+        top: Top elevation (m)
+        bottom: Bottom elevation (m)
+        soil: Index into SOIL_TYPES
+    """
+    borehole: np.ndarray
+    top: np.ndarray
+    bottom: np.ndarray
+    soil: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.top.size)
+
+    def merged(self) -> 'PackedLayers':
+        """Merge consecutive, touching layers of the same soil type in a borehole."""
+        if len(self) == 0:
+            return self
+        first = np.ones(len(self), dtype=bool)
+        first[1:] = ((self.borehole[1:] != self.borehole[:-1]) | (self.soil[1:] != self.soil[:-1])
+                     | ~np.isclose(self.top[1:], self.bottom[:-1]))
+        starts = np.flatnonzero(first)
+        ends = np.append(starts[1:], len(self)) - 1
+        return PackedLayers(self.borehole[starts], self.top[starts], self.bottom[ends], self.soil[starts])
+
+
+def pack_layers(boreholes: Sequence[Borehole]) -> PackedLayers:
+    """
+    Pack the layers of boreholes as elevations (ground level minus depth), sorted by depth.
+
+    Args:
+        boreholes: Boreholes
+
+    Returns:
+        PackedLayers, in borehole order
+    """
+    codes = {soil: code for code, soil in enumerate(SOIL_TYPES)}
+    index, top, bottom, soil = [], [], [], []
+    for i, borehole in enumerate(boreholes):
+        for layer in sorted(borehole.layers, key=lambda layer: layer.depth_top):
+            index.append(i)
+            top.append(borehole.ground_level - layer.depth_top)
+            bottom.append(borehole.ground_level - layer.depth_bottom)
+            soil.append(codes[layer.soil_type])
+    return PackedLayers(np.array(index, dtype=int), np.array(top, dtype=float),
+                        np.array(bottom, dtype=float), np.array(soil, dtype=int))
+
+
+def cpt_trace(borehole: Borehole) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cone resistance of a sounding as a step trace.
+
+    Args:
+        borehole: Borehole whose layers carry cpt_qc
+
+    Returns:
+        Tuple of (elevation in m, qc in MPa) arrays, two points per layer; empty without CPT data
+    """
+    layers = sorted((layer for layer in borehole.layers if layer.cpt_qc is not None),
+                    key=lambda layer: layer.depth_top)
+    depth = np.array([(layer.depth_top, layer.depth_bottom) for layer in layers], dtype=float).reshape(-1)
+    qc = np.repeat(np.array([layer.cpt_qc for layer in layers], dtype=float), 2)
+    return borehole.ground_level - depth, qc
+
+
+def _packed_traces(boreholes: Sequence[Borehole], max_points: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Decimated CPT traces of all boreholes: (borehole index, elevation, qc) per point."""
+    index, elevation, qc = [], [], []
+    for i, borehole in enumerate(boreholes):
+        z, values = cpt_trace(borehole)
+        if values.size:
+            keep = minmax_decimate(values, max_points)
+            index.append(np.full(keep.size, i))
+            elevation.append(z[keep])
+            qc.append(values[keep])
+    if not qc:
+        return np.zeros(0, dtype=int), np.zeros(0), np.zeros(0)
+    return np.concatenate(index), np.concatenate(elevation), np.concatenate(qc)
+
+
+def _separated(groups: np.ndarray, *arrays: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Insert NaN between consecutive runs of equal group values, so that one trace draws separate lines."""
+    breaks = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+    return tuple(np.insert(array.astype(float), breaks, np.nan) for array in arrays)
+
+
+@dataclass
+class CrossSection:
+    """
+    Boreholes projected onto a section line.
+
+    Attributes:
+        boreholes: Boreholes in chainage order
+        chainage: Distance of each borehole along the line (m)
+        offset: Distance of each borehole from the line (m)
+        ground_level: Ground level of each borehole (m)
+        water_level: Groundwater elevation of each borehole (m), NaN if unknown
+        layers: Layers packed per borehole index
+        length: Length of the section line (m)
+    """
+    boreholes: List[Borehole]
+    chainage: np.ndarray
+    offset: np.ndarray
+    ground_level: np.ndarray
+    water_level: np.ndarray
+    layers: PackedLayers
+    length: float
+
+    @staticmethod
+    def build(boreholes: Iterable[Borehole], polyline: Sequence[Tuple[float, float]],
+              max_offset: Optional[float] = None, merge: bool = True) -> 'CrossSection':
+        """
+        Project boreholes onto a section line.
+
+        Args:
+            boreholes: Boreholes of the site
+            polyline: Vertices of the section line (m)
+            max_offset: Leave out boreholes farther from the line than this (m); None keeps all
+            merge: Merge consecutive layers of the same soil type
+
+        Returns:
+            CrossSection
+        """
+        boreholes = list(boreholes)
+        x = np.array([borehole.location_x for borehole in boreholes], dtype=float)
+        y = np.array([borehole.location_y for borehole in boreholes], dtype=float)
+        chainage, offset = project_onto_polyline(x, y, polyline)
+
+        keep = np.arange(len(boreholes)) if max_offset is None else np.flatnonzero(offset <= max_offset)
+        keep = keep[np.argsort(chainage[keep], kind='stable')]
+        selected = [boreholes[i] for i in keep]
+
+        ground = np.array([borehole.ground_level for borehole in selected], dtype=float)
+        water = np.array([np.nan if borehole.water_level is None else borehole.ground_level - borehole.water_level
+                          for borehole in selected], dtype=float)
+        layers = pack_layers(selected)
+        vertices = np.asarray(polyline, dtype=float)
+        length = float(np.hypot(*np.diff(vertices, axis=0).T).sum())
+        return CrossSection(selected, chainage[keep], offset[keep], ground, water,
+                            layers.merged() if merge else layers, length)
+
+    def column_width(self) -> float:
+        """Default drawing width of a soil column: 40 % of the median borehole spacing."""
+        spacing = np.diff(self.chainage)
+        spacing = spacing[spacing > 0]
+        return 0.4 * float(np.median(spacing)) if spacing.size else max(self.length, 1.0) * 0.02
+
+    def traces(self, column_width: Optional[float] = None, max_points: int = MAX_TRACE_POINTS,
+               qc_scale: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Plotly trace dictionaries of the section.
+
+        One filled trace per soil type, plus the ground line, the water level
+        and one trace with all CPT soundings, drawn as qc to the right of
+        their column.
+
+        Args:
+            column_width: Drawing width of a soil column (m); default column_width()
+            max_points: Points kept per CPT trace
+            qc_scale: Horizontal metres per MPa of cone resistance; default fills one column width
+
+        Returns:
+            List of trace dictionaries
+        """
+        width = self.column_width() if column_width is None else column_width
+        traces = []
+        centre = self.chainage[self.layers.borehole]
+        for code in np.unique(self.layers.soil):
+            rows = self.layers.soil == code
+            left, right = centre[rows] - width / 2, centre[rows] + width / 2
+            top, bottom = self.layers.top[rows], self.layers.bottom[rows]
+            gap = np.full(left.size, np.nan)
+            x = np.column_stack((left, right, right, left, left, gap)).reshape(-1)
+            y = np.column_stack((top, top, bottom, bottom, top, gap)).reshape(-1)
+            soil = SOIL_TYPES[code]
+            traces.append({'type': 'scatter', 'name': soil.value, 'mode': 'lines', 'fill': 'toself',
+                           'fillcolor': SOIL_COLORS[soil], 'line': {'color': SOIL_COLORS[soil], 'width': 0.5},
+                           'hoverinfo': 'name', 'x': x, 'y': y})
+
+        traces.append({'type': 'scatter', 'name': "Ground level", 'mode': 'lines', 'line': {'color': "#2f6b2f"},
+                       'x': self.chainage, 'y': self.ground_level})
+        if np.isfinite(self.water_level).any():
+            traces.append({'type': 'scatter', 'name': "Groundwater", 'mode': 'lines+markers',
+                           'line': {'color': "#1f77b4", 'dash': 'dash'}, 'x': self.chainage, 'y': self.water_level})
+
+        index, elevation, qc = _packed_traces(self.boreholes, max_points)
+        if qc.size:
+            scale = qc_scale if qc_scale is not None else width / max(float(qc.max()), 1e-9)
+            x, y = _separated(index, self.chainage[index] + width / 2 + qc * scale, elevation)
+            traces.append({'type': 'scatter', 'name': "CPT qc", 'mode': 'lines', 'line': {'color': "#d62728",
+                           'width': 1}, 'x': x, 'y': y})
+        return traces
+
+    def figure(self, title: str = "Cross-section", **options):
+        """Plotly figure of the section; options are passed to traces()."""
+        go = _plotly()
+        figure = go.Figure(data=self.traces(**options))
+        figure.update_layout(title=title, xaxis_title="Chainage (m)", yaxis_title="Elevation (m)",
+                             legend_title="Soil type")
+        return figure
+
+
+def stratigraphy_traces(boreholes: Iterable[Borehole], size: float = 2.0, merge: bool = True,
+                        max_points: int = MAX_TRACE_POINTS) -> List[Dict[str, Any]]:
+    """
+    Plotly 3D trace dictionaries of a site.
+
+    Every layer is a square prism around its borehole; the prisms of one
+    soil type form a single mesh. CPT soundings form one line trace coloured
+    by cone resistance.
+
+    Args:
+        boreholes: Boreholes of the site
+        size: Width of the prisms (m)
+        merge: Merge consecutive layers of the same soil type
+        max_points: Points kept per CPT trace
+
+    Returns:
+        List of trace dictionaries
+    """
+    boreholes = list(boreholes)
+    x = np.array([borehole.location_x for borehole in boreholes], dtype=float)
+    y = np.array([borehole.location_y for borehole in boreholes], dtype=float)
+    layers = pack_layers(boreholes)
+    if merge:
+        layers = layers.merged()
+
+    traces = []
+    for code in np.unique(layers.soil):
+        rows = np.flatnonzero(layers.soil == code)
+        corner = _PRISM_CORNERS[None, :, :]
+        vx = x[layers.borehole[rows], None] + corner[..., 0] * size / 2
+        vy = y[layers.borehole[rows], None] + corner[..., 1] * size / 2
+        vz = np.where(corner[..., 2] > 0, layers.top[rows, None], layers.bottom[rows, None])
+        triangles = (_PRISM_TRIANGLES[None, :, :] + 8 * np.arange(rows.size)[:, None, None]).reshape(-1, 3)
+        soil = SOIL_TYPES[code]
+        traces.append({'type': 'mesh3d', 'name': soil.value, 'color': SOIL_COLORS[soil], 'flatshading': True,
+                       'showlegend': True, 'x': vx.reshape(-1), 'y': vy.reshape(-1), 'z': vz.reshape(-1),
+                       'i': triangles[:, 0], 'j': triangles[:, 1], 'k': triangles[:, 2]})
+
+    index, elevation, qc = _packed_traces(boreholes, max_points)
+    if qc.size:
+        px, py, pz, colour = _separated(index, x[index], y[index], elevation, qc)
+        traces.append({'type': 'scatter3d', 'name': "CPT qc", 'mode': 'lines', 'x': px, 'y': py, 'z': pz,
+                       'line': {'color': colour, 'colorscale': 'Reds', 'width': 4}})
+    return traces
+
+
+def stratigraphy_figure(boreholes: Iterable[Borehole], title: str = "Stratigraphy", **options):
+    """Plotly 3D figure of a site; options are passed to stratigraphy_traces()."""
+    go = _plotly()
+    figure = go.Figure(data=stratigraphy_traces(boreholes, **options))
+    figure.update_layout(title=title, scene={'xaxis_title': "X (m)", 'yaxis_title': "Y (m)",
+                                             'zaxis_title': "Elevation (m)"})
+    return figure
+
+
+def _plotly():
+    try:
+        import plotly.graph_objects
+    except ImportError:
+        raise ImportError("Rendering figures requires plotly (pip install plotly)")
+    return plotly.graph_objects
@@ -0,0 +1,605 @@
+"""
+Soil Query Engine for ENGIPIT
+
+Queries over the layers of a soil investigation without nested loops over
+boreholes and layers. The layers are held in a columnar LayerTable with
+indexes built once: a uniform grid over the borehole locations, sorted
+depth and property columns, and the layers of each soil type. Queries
+combine predicates,
+
+    query = table.query(soil_type(SoilType.SAND), field('friction_angle') > 32,
+                        depth_between(5.0, 15.0), within(px, py, 50.0))
+    for match in query:
+        print(match.borehole, match.layer.depth_top)
+
+and are planned when iterated: every predicate estimates from its index how
+many layers it keeps, the most selective one reads its candidates from its
+index, and the others are applied, most selective first, as vectorized
+filters on those candidates. Candidates are filtered in batches, so results
+are produced lazily and limit() stops early.
+
+Sites too large for Borehole objects can be loaded from the columnar chunks
+of synthetic_site.iter_layer_chunks().
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+from project_models import Borehole, SoilInvestigation, SoilLayer, SoilType
+
+
+SOIL_TYPES = tuple(SoilType)
+_SOIL_CODES = {soil: code for code, soil in enumerate(SOIL_TYPES)}
+_SOIL_CODES.update({soil.value: code for code, soil in enumerate(SOIL_TYPES)})
+
+PROPERTY_COLUMNS = ('unit_weight', 'cohesion', 'friction_angle', 'water_content', 'plasticity_index',
+                    'liquid_limit', 'spt_n', 'cpt_qc')
+
+# Candidates filtered per step of a lazy iteration
+BATCH_SIZE = 65536
+
+
+def _expand(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of the index ranges [start, end) without a Python loop."""
+    lengths = ends - starts
+    keep = lengths > 0
+    starts, lengths = starts[keep], lengths[keep]
+    if starts.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(lengths)
+    steps = np.ones(offsets[-1], dtype=np.int64)
+    steps[0] = starts[0]
+    steps[offsets[:-1]] = starts[1:] - (starts[:-1] + lengths[:-1] - 1)
+    return np.cumsum(steps)
+
+
+class LayerTable:
+    """
+    Columnar layers of a site with spatial, depth, property and soil type indexes.
+
+    Layers are stored borehole by borehole, so the layers of a borehole are
+    one contiguous range of rows.
+    """
+
+    def __init__(self, borehole_ids: Sequence[str], borehole_x: np.ndarray, borehole_y: np.ndarray,
+                 columns: Dict[str, np.ndarray], layers: Optional[List[SoilLayer]] = None):
+        """
+        Initialize the table and build its indexes.
+
+        Args:
+            borehole_ids: Borehole IDs
+            borehole_x: Borehole X coordinates (m)
+            borehole_y: Borehole Y coordinates (m)
+            columns: One array per column with one entry per layer: 'borehole' (index
+                into borehole_ids, non-decreasing), 'depth_top', 'depth_bottom',
+                'soil_type' (index into SOIL_TYPES) and property columns (NaN if unknown)
+            layers: The SoilLayer objects of the rows, if the table was built from them
+
+        Raises:
+            ValueError: If the layers are not grouped by borehole
+        """
+        self.borehole_ids = list(borehole_ids)
+        self.borehole_x = np.asarray(borehole_x, dtype=float)
+        self.borehole_y = np.asarray(borehole_y, dtype=float)
+        self.columns = columns
+        self.layers = layers
+        borehole = columns['borehole']
+        if borehole.size and np.any(np.diff(borehole) < 0):
+            raise ValueError("Layers must be grouped by borehole")
+
+        boreholes = np.arange(len(self.borehole_ids))
+        self.layer_start = np.searchsorted(borehole, boreholes, side='left')
+        self.layer_end = np.searchsorted(borehole, boreholes, side='right')
+        self._build_grid()
+        soil = columns['soil_type']
+        self._by_soil = np.argsort(soil, kind='stable')
+        self._soil_start = np.searchsorted(soil[self._by_soil], np.arange(len(SOIL_TYPES) + 1))
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # Last spatial lookup, shared by a Within predicate's estimate and candidates
+        self._last_within: Optional[Tuple[Tuple[float, float, float], np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self.columns['borehole'].size
+
+    @classmethod
+    def from_investigation(cls, investigation: SoilInvestigation) -> 'LayerTable':
+        """Table of all layers of an investigation; matches refer to the original SoilLayer objects."""
+        return cls.from_boreholes(investigation.boreholes)
+
+    @classmethod
+    def from_boreholes(cls, boreholes: Iterable[Borehole]) -> 'LayerTable':
+        """Table of the layers of boreholes; matches refer to the original SoilLayer objects."""
+        boreholes = list(boreholes)
+        layers = [layer for borehole in boreholes for layer in borehole.layers]
+        columns = {
+            'borehole': np.repeat(np.arange(len(boreholes)), [len(borehole.layers) for borehole in boreholes]),
+            'depth_top': np.array([layer.depth_top for layer in layers], dtype=float),
+            'depth_bottom': np.array([layer.depth_bottom for layer in layers], dtype=float),
+            'soil_type': np.array([_SOIL_CODES[layer.soil_type] for layer in layers], dtype=np.int64),
+        }
+        for name in PROPERTY_COLUMNS:
+            columns[name] = np.array([getattr(layer, name) for layer in layers], dtype=float)
+        return cls([borehole.id for borehole in boreholes], [borehole.location_x for borehole in boreholes],
+                   [borehole.location_y for borehole in boreholes], columns, layers)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Dict[str, np.ndarray]],
+                    borehole_id: Callable[[int], str] = str) -> 'LayerTable':
+        """
+        Table of columnar layer chunks, as streamed by synthetic_site.iter_layer_chunks().
+
+        Args:
+            chunks: Dictionaries of arrays with 'sounding', 'x', 'y', 'depth_top',
+                'depth_bottom', 'soil_type' (SoilType values) and property columns
+            borehole_id: ID of a sounding from its number
+
+        Returns:
+            LayerTable
+        """
+        parts: Dict[str, List[np.ndarray]] = {}
+        for chunk in chunks:
+            for name, values in chunk.items():
+                parts.setdefault(name, []).append(np.asarray(values))
+        data = {name: np.concatenate(values) for name, values in parts.items()}
+        if not data:
+            return cls([], [], [], {'borehole': np.zeros(0, dtype=np.int64), 'depth_top': np.zeros(0),
+                                    'depth_bottom': np.zeros(0), 'soil_type': np.zeros(0, dtype=np.int64)})
+
+        soundings, first, borehole = np.unique(data['sounding'], return_index=True, return_inverse=True)
+        soil_values = np.unique(data['soil_type'])
+        codes = np.array([_SOIL_CODES[value] for value in soil_values.tolist()], dtype=np.int64)
+        columns = {
+            'borehole': borehole.astype(np.int64),
+            'depth_top': data['depth_top'].astype(float),
+            'depth_bottom': data['depth_bottom'].astype(float),
+            'soil_type': codes[np.searchsorted(soil_values, data['soil_type'])],
+        }
+        columns.update({name: data[name].astype(float) for name in PROPERTY_COLUMNS if name in data})
+        return cls([borehole_id(number) for number in soundings.tolist()], data['x'][first], data['y'][first],
+                   columns)
+
+    def _build_grid(self) -> None:
+        """Bucket the boreholes into square cells of about two boreholes each."""
+        n = len(self.borehole_ids)
+        if n == 0:
+            self._origin, self._cell, self._shape = (0.0, 0.0), 1.0, (1, 1)
+            self._by_cell, self._cell_start = np.zeros(0, dtype=np.int64), np.zeros(2, dtype=np.int64)
+            return
+        x0, y0 = self.borehole_x.min(), self.borehole_y.min()
+        width = max(self.borehole_x.max() - x0, self.borehole_y.max() - y0, 1e-9)
+        self._cell = max(width / math.ceil(math.sqrt(n / 2.0)), 1e-9)
+        self._origin = (x0, y0)
+        self._shape = (int(width // self._cell) + 1, int(width // self._cell) + 1)
+        cells = self._cell_of(self.borehole_x, self.borehole_y)
+        self._by_cell = np.argsort(cells, kind='stable')
+        self._cell_start = np.searchsorted(cells[self._by_cell], np.arange(self._shape[0] * self._shape[1] + 1))
+
+    def _cell_of(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        ix = np.clip(((x - self._origin[0]) // self._cell).astype(np.int64), 0, self._shape[0] - 1)
+        iy = np.clip(((y - self._origin[1]) // self._cell).astype(np.int64), 0, self._shape[1] - 1)
+        return ix * self._shape[1] + iy
+
+    def boreholes_within(self, x: float, y: float, radius: float) -> np.ndarray:
+        """Indices of the boreholes within a distance of a point, from the grid index (do not modify)."""
+        last = self._last_within
+        if last is not None and last[0] == (x, y, radius):
+            return last[1]
+        found = self._boreholes_within(x, y, radius)
+        self._last_within = ((x, y, radius), found)
+        return found
+
+    def _boreholes_within(self, x: float, y: float, radius: float) -> np.ndarray:
+        low = np.floor((np.array([x, y]) - radius - self._origin) / self._cell).astype(np.int64)
+        high = np.floor((np.array([x, y]) + radius - self._origin) / self._cell).astype(np.int64)
+        low, high = np.maximum(low, 0), np.minimum(high, np.array(self._shape) - 1)
+        if np.any(high < low):
+            return np.zeros(0, dtype=np.int64)
+        ix, iy = np.meshgrid(np.arange(low[0], high[0] + 1), np.arange(low[1], high[1] + 1), indexing='ij')
+        cells = (ix * self._shape[1] + iy).ravel()
+        candidates = self._by_cell[_expand(self._cell_start[cells], self._cell_start[cells + 1])]
+        distance = np.hypot(self.borehole_x[candidates] - x, self.borehole_y[candidates] - y)
+        return np.sort(candidates[distance <= radius])
+
+    def sorted_column(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows ordered by a column (unknown values last) and the sorted known values, built on first use.
+
+        Raises:
+            ValueError: If the table has no such column
+        """
+        if name not in self._sorted:
+            values = self.column(name)
+            order = np.argsort(values, kind='stable')
+            known = int(np.count_nonzero(~np.isnan(values)))
+            self._sorted[name] = (order, values[order[:known]])
+        return self._sorted[name]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        A column of the table.
+
+        Raises:
+            ValueError: If the table has no such column
+        """
+        if name not in self.columns:
+            raise ValueError(f"Unknown column '{name}'; available: {sorted(self.columns)}")
+        return self.columns[name]
+
+    def soil_rows(self, code: int) -> np.ndarray:
+        """Rows of one soil type code, in table order."""
+        return self._by_soil[self._soil_start[code]:self._soil_start[code + 1]]
+
+    def layer(self, row: int) -> SoilLayer:
+        """The layer of a row: the original object, or one built from the columns."""
+        if self.layers is not None:
+            return self.layers[row]
+        values = {name: float(self.columns[name][row]) for name in PROPERTY_COLUMNS if name in self.columns}
+        values = {name: (None if math.isnan(value) else value) for name, value in values.items()}
+        if values.get('spt_n') is not None:
+            values['spt_n'] = int(values['spt_n'])
+        return SoilLayer(float(self.columns['depth_top'][row]), float(self.columns['depth_bottom'][row]),
+                         SOIL_TYPES[int(self.columns['soil_type'][row])], **values)
+
+    def query(self, *predicates: 'Predicate') -> 'Query':
+        """Query of the layers matching all predicates."""
+        return Query(self, predicates)
+
+
+class Predicate(ABC):
+    """
+    Condition on layers.
+
+    Subclasses estimate the number of matching layers from an index, list
+    candidate rows from it (a superset of the matches, sorted), and filter
+    given rows with a vectorized mask.
+    """
+
+    @abstractmethod
+    def estimate(self, table: LayerTable) -> int:
+        """Upper bound of the number of matching layers."""
+
+    @abstractmethod
+    def candidates(self, table: LayerTable) -> np.ndarray:
+        """Sorted rows that may match."""
+
+    @abstractmethod
+    def mask(self, table: LayerTable, rows: np.ndarray) -> np.ndarray:
+        """Which of the given rows match."""
+
+    def __and__(self, other: 'Predicate') -> 'Predicate':
+        return AllOf((self, other))
+
+    def __or__(self, other: 'Predicate') -> 'Predicate':
+        return AnyOf((self, other))
+
+
+@dataclass(frozen=True)
+class Range(Predicate):
+    """
+    Layers with a column value within a range; unknown values never match.
+
+    Attributes:
+        column: Column name, e.g. 'friction_angle'
+        low: Lower bound (None: unbounded)
+        high: Upper bound (None: unbounded)
+        include_low: Whether the lower bound matches
+        include_high: Whether the upper bound matches
+    """
+    column: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+    include_low: bool = True
+    include_high: bool = True
+
+    def _bounds(self, table: LayerTable) -> Tuple[np.ndarray, int, int]:
+        order, values = table.sorted_column(self.column)
+        start = 0 if self.low is None else int(np.searchsorted(values, self.low,
+                                                               side='left' if self.include_low else 'right'))
+        end = values.size if self.high is None else int(np.searchsorted(values, self.high,
+                                                                        side='right' if self.include_high else 'left'))
+        return order, start, max(start, end)
+
+    def estimate(self, table: LayerTable) -> int:
+        _, start, end = self._bounds(table)
+        return end - start
+
+    def candidates(self, table: LayerTable) -> np.ndarray:
+        order, start, end = self._bounds(table)
+        return np.sort(order[start:end])
+
+    def mask(self, table: LayerTable, rows: np.ndarray) -> np.ndarray:
+        values = table.column(self.column)[rows]
+        keep = ~np.isnan(values)
+        if self.low is not None:
+            keep &= (values >= self.low) if self.include_low else (values > self.low)
+        if self.high is not None:
+            keep &= (values <= self.high) if self.include_high else (values < self.high)
+        return keep
+
+
+class Field:
+    """Column of a query; comparisons give Range predicates, e.g. field('friction_angle') > 32."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __gt__(self, value: float) -> Range:
+        return Range(self.name, low=value, include_low=False)
+
+    def __ge__(self, value: float) -> Range:
+        return Range(self.name, low=value)
+
+    def __lt__(self, value: float) -> Range:
+        return Range(self.name, high=value, include_high=False)
+
+    def __le__(self, value: float) -> Range:
+        return Range(self.name, high=value)
+
+    def between(self, low: float, high: float) -> Range:
+        """Values from low to high, both included."""
+        return Range(self.name, low, high)
+
+
+def field(name: str) -> Field:
+    """Column of a query, e.g. field('friction_angle') > 32."""
+    return Field(name)
+
+
+@dataclass(frozen=True)
+class SoilTypeIs(Predicate):
+    """
+    Layers of one of the given soil types.
+
+    Attributes:
+        soil_types: Soil types
+    """
+    soil_types: Tuple[SoilType, ...]
+
+    def estimate(self, table: LayerTable) -> int:
+        return int(sum(table.soil_rows(_SOIL_CODES[soil]).size for soil in self.soil_types))
+
+    def candidates(self, table: LayerTable) -> np.ndarray:
+        rows = [table.soil_rows(_SOIL_CODES[soil]) for soil in self.soil_types]
+        return np.sort(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64)
+
+    def mask(self, table: LayerTable, rows: np.ndarray) -> np.ndarray:
+        codes = [_SOIL_CODES[soil] for soil in self.soil_types]
+        return np.isin(table.columns['soil_type'][rows], codes)
+
+
+def soil_type(*soil_types: SoilType) -> SoilTypeIs:
+    """Layers of one of the given soil types."""
+    return SoilTypeIs(tuple(soil_types))
+
+
+@dataclass(frozen=True)
+class DepthOverlap(Predicate):
+    """
+    Layers that reach into a depth range (depths below the surface, m).
+
+    Attributes:
+        top: Top of the range
+        bottom: Bottom of the range
+    """
+    top: float
+    bottom: float
+
+    def _bounds(self, table: LayerTable) -> Tuple[Tuple[np.ndarray, int, int], Tuple[np.ndarray, int, int]]:
+        # Layers starting above the bottom of the range, and layers ending below its top
+        top_order, tops = table.sorted_column('depth_top')
+        bottom_order, bottoms = table.sorted_column('depth_bottom')
+        return ((top_order, 0, int(np.searchsorted(tops, self.bottom, side='left'))),
+                (bottom_order, int(np.searchsorted(bottoms, self.top, side='right')), bottoms.size))
+
+    def estimate(self, table: LayerTable) -> int:
+        return min(end - start for _, start, end in self._bounds(table))
+
+    def candidates(self, table: LayerTable) -> np.ndarray:
+        order, start, end = min(self._bounds(table), key=lambda bounds: bounds[2] - bounds[1])
+        return np.sort(order[start:end])
+
+    def mask(self, table: LayerTable, rows: np.ndarray) -> np.ndarray:
+        return (table.columns['depth_top'][rows] < self.bottom) & (table.columns['depth_bottom'][rows] > self.top)
+
+
+def depth_between(top: float, bottom: float) -> DepthOverlap:
+    """
+    Layers that reach into a depth range.
+
+    Raises:
+        ValueError: If top is below bottom
+    """
+    if top > bottom:
+        raise ValueError("top must not be below bottom")
+    return DepthOverlap(float(top), float(bottom))
+
+
+@dataclass(frozen=True)
+class Within(Predicate):
+    """
+    Layers of boreholes within a distance of a point.
+
+    Attributes:
+        x: X coordinate of the point (m)
+        y: Y coordinate of the point (m)
+        radius: Distance (m)
+    """
+    x: float
+    y: float
+    radius: float
+
+    def candidates(self, table: LayerTable) -> np.ndarray:
+        boreholes = table.boreholes_within(self.x, self.y, self.radius)
+        return _expand(table.layer_start[boreholes], table.layer_end[boreholes])
+
+    def estimate(self, table: LayerTable) -> int:
+        boreholes = table.boreholes_within(self.x, self.y, self.radius)
+        return int((table.layer_end[boreholes] - table.layer_start[boreholes]).sum())
+
+    def mask(self, table: LayerTable, rows: np.ndarray) -> np.ndarray:
+        borehole = table.columns['borehole'][rows]
+        return np.hypot(table.borehole_x[borehole] - self.x, table.borehole_y[borehole] - self.y) <= self.radius
+
+
+def within(x: float, y: float, radius: float) -> Within:
+    """
+    Layers of boreholes within a distance of a point.
+
+    Raises:
+        ValueError: If the radius is negative
+    """
+    if radius < 0:
+        raise ValueError("radius must not be negative")
+    return Within(float(x), float(y), float(radius))
+
+
+@dataclass(frozen=True)
+class AllOf(Predicate):
+    """Layers matching every predicate; candidates come from the most selective one."""
+    predicates: Tuple[Predicate, ...]
+
+    def estimate(self, table: LayerTable) -> int:
+        return min(predicate.estimate(table) for predicate in self.predicates)
+
+    def candidates(self, table: LayerTable) -> np.ndarray:
+        return min(self.predicates, key=lambda predicate: predicate.estimate(table)).candidates(table)
+
+    def mask(self, table: LayerTable, rows: np.ndarray) -> np.ndarray:
+        keep = np.ones(rows.size, dtype=bool)
+        for predicate in self.predicates:
+            keep[keep] = predicate.mask(table, rows[keep])
+        return keep
+
+
+@dataclass(frozen=True)
+class AnyOf(Predicate):
+    """Layers matching at least one predicate; candidates are the union of theirs."""
+    predicates: Tuple[Predicate, ...]
+
+    def estimate(self, table: LayerTable) -> int:
+        return min(len(table), sum(predicate.estimate(table) for predicate in self.predicates))
+
+    def candidates(self, table: LayerTable) -> np.ndarray:
+        return np.unique(np.concatenate([predicate.candidates(table) for predicate in self.predicates]))
+
+    def mask(self, table: LayerTable, rows: np.ndarray) -> np.ndarray:
+        return np.logical_or.reduce([predicate.mask(table, rows) for predicate in self.predicates])
+
+
+@dataclass(frozen=True)
+class LayerMatch:
+    """
+    A layer found by a query.
+
+    Attributes:
+        row: Row of the layer in the table
+        borehole: ID of the borehole
+        x: Borehole X coordinate (m)
+        y: Borehole Y coordinate (m)
+        layer: The layer
+    """
+    row: int
+    borehole: str
+    x: float
+    y: float
+    layer: SoilLayer
+
+
+class Query:
+    """
+    Lazy query of the layers of a LayerTable that match all its predicates.
+
+    Nothing is evaluated until the query is iterated or counted. Queries are
+    immutable: where() and limit() return new queries.
+    """
+
+    def __init__(self, table: LayerTable, predicates: Sequence[Predicate] = (), max_rows: Optional[int] = None):
+        self.table = table
+        self.predicates = tuple(predicates)
+        self.max_rows = max_rows
+
+    def where(self, *predicates: Predicate) -> 'Query':
+        """Query with additional predicates."""
+        return Query(self.table, self.predicates + predicates, self.max_rows)
+
+    def limit(self, count: int) -> 'Query':
+        """Query that stops after count matches."""
+        return Query(self.table, self.predicates, count)
+
+    def plan(self) -> List[Tuple[Predicate, int]]:
+        """Predicates with their estimates, in the order they are applied (most selective first)."""
+        estimates = [(predicate, predicate.estimate(self.table)) for predicate in self.predicates]
+        return sorted(estimates, key=lambda item: item[1])
+
+    def _batches(self) -> Iterator[np.ndarray]:
+        plan = self.plan()
+        if plan:
+            candidates = plan[0][0].candidates(self.table)
+        else:
+            candidates = np.arange(len(self.table))
+        remaining = self.max_rows
+        for start in range(0, candidates.size, BATCH_SIZE):
+            if remaining is not None and remaining <= 0:
+                return
+            rows = candidates[start:start + BATCH_SIZE]
+            for predicate, _ in plan:
+                rows = rows[predicate.mask(self.table, rows)]
+                if rows.size == 0:
+                    break
+            if remaining is not None:
+                rows = rows[:remaining]
+                remaining -= rows.size
+            if rows.size:
+                yield rows
+
+    def rows(self) -> np.ndarray:
+        """Rows of all matches, in table order."""
+        batches = list(self._batches())
+        return np.concatenate(batches) if batches else np.zeros(0, dtype=np.int64)
+
+    def count(self) -> int:
+        """Number of matches."""
+        return int(sum(rows.size for rows in self._batches()))
+
+    def columns(self, *names: str) -> Dict[str, np.ndarray]:
+        """
+        Columns of the matches; 'borehole' gives borehole IDs.
+
+        Args:
+            names: Column names (default: all)
+
+        Returns:
+            Dictionary of arrays, one entry per match
+        """
+        rows = self.rows()
+        result = {}
+        for name in names or tuple(self.table.columns):
+            values = self.table.column(name)[rows]
+            if name == 'borehole':
+                values = np.array(self.table.borehole_ids, dtype=object)[values] if values.size else values
+            elif name == 'soil_type':
+                values = np.array([soil.value for soil in SOIL_TYPES])[values]
+            result[name] = values
+        return result
+
+    def boreholes(self) -> List[str]:
+        """IDs of the boreholes with at least one match, in table order."""
+        boreholes = np.unique(self.table.columns['borehole'][self.rows()])
+        return [self.table.borehole_ids[index] for index in boreholes.tolist()]
+
+    def __iter__(self) -> Iterator[LayerMatch]:
+        table = self.table
+        for rows in self._batches():
+            boreholes = table.columns['borehole'][rows].tolist()
+            for row, borehole in zip(rows.tolist(), boreholes):
+                yield LayerMatch(row, table.borehole_ids[borehole], float(table.borehole_x[borehole]),
+                                 float(table.borehole_y[borehole]), table.layer(row))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plan of the query, for logging."""
+        return {'rows': len(self.table), 'limit': self.max_rows,
+                'plan': [{'predicate': repr(predicate), 'estimate': estimate} for predicate, estimate in self.plan()]}
@@ -0,0 +1,265 @@
+"""
+Boussinesq Stress Superposition for ENGIPIT
+
+This module computes the vertical stress increase in the ground caused by many
+uniformly loaded rectangular footings. Each footing contributes through the
+Newmark corner solution of the Boussinesq equations and contributions are
+superposed. Points are processed in chunks and footings beyond a cutoff
+distance are skipped, so large sites never build the full footing × point
+matrix.
+"""
+
+from typing import Optional, Sequence, Tuple
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+from app import ShallowFoundationCalculator
+
+
+@dataclass
+class Footing:
+    """
+    A uniformly loaded rectangular footing in plan.
+
+    Attributes:
+        x: X coordinate of the footing centre (m)
+        y: Y coordinate of the footing centre (m)
+        width: Footing dimension along the x axis (m)
+        length: Footing dimension along the y axis (m)
+        load: Total vertical load on the footing (kN)
+        depth: Founding depth below ground surface (m)
+        name: Optional footing name
+    """
+    x: float
+    y: float
+    width: float
+    length: float
+    load: float
+    depth: float = 0.0
+    name: str = ""
+
+    @property
+    def pressure(self) -> float:
+        """Applied contact pressure in kPa."""
+        return ShallowFoundationCalculator.calculate_applied_pressure(self.load, self.width, self.length)
+
+
+def corner_influence_factor(m, n):
+    """
+    Newmark influence factor below the corner of a loaded rectangle.
+
+    Args:
+        m: Ratio of rectangle side to depth (B/z), scalar or array
+        n: Ratio of other rectangle side to depth (L/z), scalar or array
+
+    Returns:
+        Influence factor I such that Δσz = q·I (between 0 and 0.25)
+    """
+    m = np.asarray(m, dtype=float)
+    n = np.asarray(n, dtype=float)
+    m2 = m * m
+    n2 = n * n
+    s = m2 + n2 + 1.0
+    root = np.sqrt(s)
+    mn = m * n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        term1 = 2.0 * mn * root / (s + m2 * n2) * (m2 + n2 + 2.0) / s
+    # arctan2 keeps the angle in (0, π) when m²n² exceeds m² + n² + 1
+    term2 = np.arctan2(2.0 * mn * root, s - m2 * n2)
+    return np.nan_to_num(term1) / (4.0 * math.pi) + term2 / (4.0 * math.pi)
+
+
+def _signed_corner(a, b, z):
+    """Corner influence of the rectangle spanned by offsets (a, b), carrying their signs."""
+    with np.errstate(divide='ignore'):
+        factor = corner_influence_factor(np.abs(a) / z, np.abs(b) / z)
+    return np.sign(a) * np.sign(b) * factor
+
+
+class StressSuperpositionEngine:
+    """
+    Vectorized Boussinesq superposition engine for a set of footings.
+
+    Stresses are evaluated in chunks of points. For every chunk only footings
+    whose cutoff zone reaches the chunk bounding box are considered, and
+    footing-point pairs further apart than the cutoff distance contribute zero.
+    """
+
+    # Depth used in place of z = 0 to avoid the singular corner solution
+    MIN_DEPTH = 1e-6
+
+    def __init__(
+        self,
+        footings: Sequence[Footing],
+        cutoff_distance: Optional[float] = None,
+        cutoff_factor: float = 5.0,
+        chunk_size: int = 4096
+    ):
+        """
+        Initialise the engine.
+
+        Args:
+            footings: Footings to superpose
+            cutoff_distance: Horizontal distance from the footing edge beyond which
+                its influence is ignored (m). If None, each footing uses
+                cutoff_factor times its larger plan dimension.
+            cutoff_factor: Cutoff as a multiple of the footing size, used when
+                cutoff_distance is None. A factor of 5 keeps the neglected stress
+                below roughly 0.1% of the contact pressure.
+            chunk_size: Number of points evaluated per vectorized chunk
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        self.footings = list(footings)
+        self.chunk_size = chunk_size
+
+        self._x = np.array([f.x for f in self.footings], dtype=float)
+        self._y = np.array([f.y for f in self.footings], dtype=float)
+        self._half_width = np.array([f.width / 2 for f in self.footings], dtype=float)
+        self._half_length = np.array([f.length / 2 for f in self.footings], dtype=float)
+        self._depth = np.array([f.depth for f in self.footings], dtype=float)
+        self._pressure = np.array([f.pressure for f in self.footings], dtype=float)
+
+        if cutoff_distance is not None:
+            self._cutoff = np.full(len(self.footings), float(cutoff_distance))
+        else:
+            self._cutoff = cutoff_factor * 2 * np.maximum(self._half_width, self._half_length)
+
+    def _candidate_footings(self, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+        """Indices of footings whose cutoff zone overlaps the bounding box of the points."""
+        reach_x = self._half_width + self._cutoff
+        reach_y = self._half_length + self._cutoff
+        overlaps = (
+            (self._x + reach_x >= px.min()) & (self._x - reach_x <= px.max()) &
+            (self._y + reach_y >= py.min()) & (self._y - reach_y <= py.max())
+        )
+        return np.nonzero(overlaps)[0]
+
+    def _chunk_stress(self, px: np.ndarray, py: np.ndarray, pz: np.ndarray,
+                      exclude: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vertical stress at one chunk of points."""
+        stress = np.zeros(px.shape[0])
+        idx = self._candidate_footings(px, py)
+        if idx.size == 0:
+            return stress
+
+        # Offsets of the footing edges relative to each point: shape (points, footings)
+        dx = self._x[idx][None, :] - px[:, None]
+        dy = self._y[idx][None, :] - py[:, None]
+        hw = self._half_width[idx][None, :]
+        hl = self._half_length[idx][None, :]
+        z = pz[:, None] - self._depth[idx][None, :]
+
+        # Distance from the point to the footing edge in plan
+        gap = np.hypot(np.maximum(np.abs(dx) - hw, 0.0), np.maximum(np.abs(dy) - hl, 0.0))
+        active = (z >= 0.0) & (gap <= self._cutoff[idx][None, :])
+        if exclude is not None:
+            active &= idx[None, :] != exclude[:, None]
+
+        z = np.maximum(z, self.MIN_DEPTH)
+        x1, x2 = dx - hw, dx + hw
+        y1, y2 = dy - hl, dy + hl
+        influence = (_signed_corner(x2, y2, z) - _signed_corner(x1, y2, z) -
+                     _signed_corner(x2, y1, z) + _signed_corner(x1, y1, z))
+
+        return np.where(active, influence * self._pressure[idx][None, :], 0.0).sum(axis=1)
+
+    def vertical_stress(self, points) -> np.ndarray:
+        """
+        Calculate the vertical stress increase at arbitrary points.
+
+        Args:
+            points: Array-like of shape (M, 3) with x, y and depth below ground (m)
+
+        Returns:
+            Array of shape (M,) with the vertical stress increase in kPa
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        result = np.zeros(points.shape[0])
+        for start in range(0, points.shape[0], self.chunk_size):
+            chunk = points[start:start + self.chunk_size]
+            result[start:start + chunk.shape[0]] = self._chunk_stress(chunk[:, 0], chunk[:, 1], chunk[:, 2])
+        return result
+
+    def neighbour_influence(self, depth_below_base: float) -> np.ndarray:
+        """
+        Calculate the stress each footing receives from its neighbours.
+
+        The stress is evaluated below the centre of every footing at the given depth
+        below its base, leaving out the footing's own contribution.
+
+        Args:
+            depth_below_base: Depth below each footing base (m)
+
+        Returns:
+            Array with the neighbour-induced vertical stress in kPa per footing
+        """
+        result = np.zeros(len(self.footings))
+        if not self.footings:
+            return result
+
+        # Visit footings in plan strips so that each chunk covers a compact area
+        strip = max(float(np.max(self._cutoff + 2 * np.maximum(self._half_width, self._half_length))), 1e-9)
+        order = np.lexsort((self._y, np.floor(self._x / strip)))
+        for start in range(0, len(self.footings), self.chunk_size):
+            own = order[start:start + self.chunk_size]
+            result[own] = self._chunk_stress(
+                self._x[own], self._y[own], self._depth[own] + depth_below_base, exclude=own
+            )
+        return result
+
+    def stress_grid(
+        self,
+        x: Sequence[float],
+        y: Sequence[float],
+        z: Sequence[float],
+        memmap_path: Optional[str] = None,
+        tile_size: Optional[Tuple[int, int]] = None
+    ) -> np.ndarray:
+        """
+        Calculate the vertical stress increase on a regular 3D grid.
+
+        The grid is processed in plan tiles that span all depths, so each tile only
+        sees the footings near it. With memmap_path the result is written to a
+        ``.npy`` memory-mapped file, which keeps very large grids out of RAM and can
+        be reopened with ``numpy.load(path, mmap_mode='r')``.
+
+        Args:
+            x: Grid coordinates along x (m)
+            y: Grid coordinates along y (m)
+            z: Depths below ground surface (m)
+            memmap_path: Optional path of a .npy file to write the grid into
+            tile_size: Optional (nx, ny) plan tile size; derived from chunk_size if None
+
+        Returns:
+            Array of shape (len(x), len(y), len(z)) with stresses in kPa
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        z = np.asarray(z, dtype=float)
+        shape = (x.size, y.size, z.size)
+
+        if memmap_path is not None:
+            grid = np.lib.format.open_memmap(memmap_path, mode='w+', dtype=np.float64, shape=shape)
+        else:
+            grid = np.zeros(shape)
+
+        if tile_size is None:
+            side = max(1, int(math.sqrt(max(1, self.chunk_size // max(1, z.size)))))
+            tile_size = (side, side)
+
+        for i0 in range(0, x.size, tile_size[0]):
+            xs = x[i0:i0 + tile_size[0]]
+            for j0 in range(0, y.size, tile_size[1]):
+                ys = y[j0:j0 + tile_size[1]]
+                gx, gy, gz = np.meshgrid(xs, ys, z, indexing='ij')
+                stress = self._chunk_stress(gx.ravel(), gy.ravel(), gz.ravel())
+                grid[i0:i0 + xs.size, j0:j0 + ys.size, :] = stress.reshape(gx.shape)
+
+        if memmap_path is not None:
+            grid.flush()
+        return grid
+
@@ -0,0 +1,435 @@
+"""
+Synthetic Site Generator for ENGIPIT
+
+This module builds seeded synthetic GeotechnicalProjects for benchmarks and
+scale tests: boreholes and CPT soundings on jittered grids, layered soil and
+a mix of shallow, pile and retaining wall designs. The same seed always
+produces the same site.
+
+The stratigraphy is spatially correlated. A site has one sequence of strata;
+the thickness and the properties of every stratum vary smoothly over the site
+following stationary Gaussian random fields, so neighbouring soundings look
+alike and distant ones differ. Properties stay within the typical ranges of
+their soil type.
+
+Soundings are generated in fixed blocks of BLOCK_SIZE as NumPy arrays, so a
+site of 10^7 layers can be streamed, either as columnar layer tables with
+iter_layer_chunks() or as Borehole objects with iter_boreholes(), without
+holding the whole site in memory.
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+from dataclasses import dataclass, field
+import math
+
+import numpy as np
+
+from project_models import (Borehole, FoundationDesign, FoundationType, GeotechnicalProject, SoilInvestigation,
+                            SoilLayer, SoilType, TestType)
+
+
+# Typical ranges per soil type: (unit weight kN/m³, cohesion kPa, friction angle °, SPT N)
+SOIL_PROPERTIES: Dict[SoilType, Tuple[Tuple[float, float], ...]] = {
+    SoilType.FILL: ((16.0, 19.0), (0.0, 10.0), (25.0, 30.0), (4, 12)),
+    SoilType.CLAY: ((17.0, 21.0), (20.0, 80.0), (18.0, 25.0), (6, 30)),
+    SoilType.SILT: ((17.0, 20.0), (5.0, 20.0), (26.0, 31.0), (8, 20)),
+    SoilType.SAND: ((18.0, 21.0), (0.0, 2.0), (30.0, 38.0), (10, 40)),
+    SoilType.GRAVEL: ((19.0, 22.0), (0.0, 0.0), (34.0, 42.0), (25, 50)),
+}
+
+# CPT cone resistance per soil type: (qc at the surface in MPa, increase in MPa/m)
+CPT_RESISTANCE: Dict[SoilType, Tuple[float, float]] = {
+    SoilType.FILL: (2.0, 0.10),
+    SoilType.CLAY: (0.8, 0.05),
+    SoilType.SILT: (2.0, 0.10),
+    SoilType.SAND: (6.0, 0.50),
+    SoilType.GRAVEL: (12.0, 0.60),
+}
+
+# Soil types below the fill, from which the strata are drawn
+NATURAL_SOILS = (SoilType.CLAY, SoilType.SILT, SoilType.SAND, SoilType.GRAVEL)
+
+BOREHOLE = "borehole"
+CPT = "cpt"
+
+# Soundings generated per block; the unit of randomness, so results do not depend on how they are consumed
+BLOCK_SIZE = 1024
+
+# Random streams of a site, so that boreholes, CPTs and designs do not share random numbers
+_STREAMS = {BOREHOLE: 1, CPT: 2, 'designs': 3}
+
+
+class CorrelatedField:
+    """
+    Stationary Gaussian random field with zero mean, unit variance and a
+    squared-exponential correlation, built from random Fourier features.
+
+    It can be evaluated at any point without a grid, so the field is defined
+    over the whole site but costs memory only for the points asked for.
+    """
+
+    def __init__(self, rng: np.random.Generator, correlation_length: float, modes: int = 64):
+        self.wavenumbers = rng.normal(0.0, 1.0 / correlation_length, (modes, 2))
+        self.phases = rng.uniform(0.0, 2 * math.pi, modes)
+
+    def __call__(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Field values at the points (x, y)."""
+        angles = np.multiply.outer(x, self.wavenumbers[:, 0]) + np.multiply.outer(y, self.wavenumbers[:, 1])
+        return math.sqrt(2.0 / len(self.phases)) * np.cos(angles + self.phases).sum(axis=-1)
+
+
+@dataclass
+class SiteModel:
+    """
+    Stratigraphic model of a synthetic site.
+
+    Attributes:
+        seed: Seed of the site
+        site_size: Side of the square site (m)
+        strata: Soil type of each stratum, top to bottom
+        mean_thickness: Site-average thickness of each stratum (m)
+        strength: Site-average position of each stratum within its property ranges (0-1)
+        thickness_variation: Standard deviation of the log-thickness
+        property_variation: Standard deviation of the position within the property ranges
+        thickness_fields: Correlated field of each stratum's thickness
+        property_fields: Correlated field of each stratum's properties
+        water_field: Correlated field of the groundwater level
+        ground_field: Correlated field of the ground level
+    """
+    seed: int
+    site_size: float
+    strata: Tuple[SoilType, ...]
+    mean_thickness: np.ndarray
+    strength: np.ndarray
+    thickness_variation: float
+    property_variation: float
+    thickness_fields: Tuple[CorrelatedField, ...]
+    property_fields: Tuple[CorrelatedField, ...]
+    water_field: CorrelatedField
+    ground_field: CorrelatedField
+    _grid_terms: Dict[Tuple[str, int], Tuple[np.ndarray, ...]] = field(default_factory=dict, repr=False,
+                                                                         compare=False)
+
+    @staticmethod
+    def create(seed: int = 0, layers: int = 4, site_size: float = 250.0, mean_thickness: float = 3.0,
+               correlation_length: float = 150.0, thickness_variation: float = 0.3,
+               property_variation: float = 0.15) -> 'SiteModel':
+        """
+        Draw a site model.
+
+        Args:
+            seed: Seed of the random number generator
+            layers: Number of strata (the top one is fill)
+            site_size: Side of the square site (m)
+            mean_thickness: Mean stratum thickness (m)
+            correlation_length: Correlation length of the thickness and property fields (m)
+            thickness_variation: Standard deviation of the log-thickness
+            property_variation: Standard deviation of the position within the property ranges
+
+        Returns:
+            SiteModel
+        """
+        rng = np.random.default_rng([seed, 0])
+        strata = []
+        for i in range(layers):
+            if i == 0:
+                strata.append(SoilType.FILL)
+                continue
+            # Adjacent strata differ, otherwise they would be one layer
+            choices = [soil for soil in NATURAL_SOILS if soil != strata[-1]]
+            strata.append(choices[rng.integers(len(choices))])
+        return SiteModel(
+            seed=seed,
+            site_size=site_size,
+            strata=tuple(strata),
+            mean_thickness=rng.uniform(0.5, 1.5, layers) * mean_thickness,
+            strength=rng.uniform(0.2, 0.8, layers),
+            thickness_variation=thickness_variation,
+            property_variation=property_variation,
+            thickness_fields=tuple(CorrelatedField(rng, correlation_length) for _ in range(layers)),
+            property_fields=tuple(CorrelatedField(rng, correlation_length) for _ in range(layers)),
+            water_field=CorrelatedField(rng, correlation_length),
+            ground_field=CorrelatedField(rng, 2 * correlation_length),
+        )
+
+    @property
+    def layers(self) -> int:
+        """Number of strata."""
+        return len(self.strata)
+
+    def grid(self, kind: str, count: int) -> Tuple[int, float, float]:
+        """
+        Sounding grid of a kind as (columns, spacing, offset).
+
+        Each kind has its own square grid over the site; CPTs are offset by half a cell.
+        """
+        columns = max(1, math.ceil(math.sqrt(count)))
+        spacing = self.site_size / columns
+        return columns, spacing, 0.5 * spacing if kind == CPT else 0.0
+
+    def _sample_fields(self, kind: str, count: int, row: np.ndarray, column: np.ndarray) -> np.ndarray:
+        """
+        All fields at grid nodes, shape (n, fields): thickness fields, property fields, water, ground.
+
+        cos(kx·x + ky·y + φ) = cos(kx·x)·cos(ky·y + φ) - sin(kx·x)·sin(ky·y + φ), so the
+        trigonometric terms are computed once per grid column and row and cached;
+        a block then costs one matrix product over the modes.
+        """
+        key = (kind, count)
+        if key not in self._grid_terms:
+            fields = self.thickness_fields + self.property_fields + (self.water_field, self.ground_field)
+            kx = np.stack([f.wavenumbers[:, 0] for f in fields])
+            ky = np.stack([f.wavenumbers[:, 1] for f in fields])
+            phases = np.stack([f.phases for f in fields])
+            columns, spacing, offset = self.grid(kind, count)
+            nodes = np.arange(columns) * spacing + offset
+            ax = kx[:, None, :] * nodes[None, :, None]
+            ay = ky[:, None, :] * nodes[None, :, None] + phases[:, None, :]
+            self._grid_terms[key] = (np.cos(ax), np.sin(ax), np.cos(ay), np.sin(ay))
+        cos_x, sin_x, cos_y, sin_y = self._grid_terms[key]
+        if not len(row):
+            return np.zeros((0, cos_x.shape[0]))
+
+        rows = slice(int(row.min()), int(row.max()) + 1)
+        values = (np.matmul(cos_y[:, rows], cos_x.transpose(0, 2, 1)) -
+                  np.matmul(sin_y[:, rows], sin_x.transpose(0, 2, 1)))
+        scale = math.sqrt(2.0 / cos_x.shape[2])
+        return scale * values[:, row - rows.start, column].T
+
+    def block(self, kind: str, count: int, index: int) -> Dict[str, np.ndarray]:
+        """
+        Generate one block of soundings as arrays.
+
+        Args:
+            kind: BOREHOLE or CPT
+            count: Total number of soundings of this kind on the site
+            index: Block number
+
+        Returns:
+            Dictionary with per-sounding arrays 'x', 'y', 'ground_level', 'water_level' of shape (n,)
+            and per-layer arrays 'depth_top', 'depth_bottom', 'unit_weight', 'cohesion',
+            'friction_angle', 'spt_n', 'cpt_qc' of shape (n, layers)
+        """
+        start = index * BLOCK_SIZE
+        stop = min(count, start + BLOCK_SIZE)
+        n = max(0, stop - start)
+        rng = np.random.default_rng([self.seed, _STREAMS[kind], index])
+        columns, spacing, offset = self.grid(kind, count)
+        row, column = np.divmod(np.arange(start, stop), columns)
+
+        # The fields are sampled at the grid nodes; the jitter is small against their correlation length
+        fields = self._sample_fields(kind, count, row, column)
+        layers = self.layers
+        x = column * spacing + offset + rng.uniform(-0.25, 0.25, n) * spacing
+        y = row * spacing + offset + rng.uniform(-0.25, 0.25, n) * spacing
+
+        # Log-normal thicknesses around the stratum mean, smooth over the site plus a little local noise
+        sigma = self.thickness_variation
+        thickness = self.mean_thickness * np.exp(sigma * fields[:, :layers] - 0.5 * sigma ** 2)
+        thickness = np.maximum(thickness * rng.uniform(0.95, 1.05, thickness.shape), 0.2)
+        depth_bottom = np.round(np.cumsum(thickness, axis=-1), 2)
+        depth_top = np.concatenate([np.zeros((n, 1)), depth_bottom[:, :-1]], axis=-1)
+
+        # Position within the property range of each stratum's soil type
+        position = self.strength + self.property_variation * fields[:, layers:2 * layers]
+        position = np.clip(position + rng.normal(0.0, 0.05, position.shape), 0.0, 1.0)
+        ranges = np.array([SOIL_PROPERTIES[soil] for soil in self.strata]).reshape(self.layers, 4, 2)
+        values = ranges[:, :, 0] + position[..., None] * (ranges[:, :, 1] - ranges[:, :, 0])
+
+        qc = np.array([CPT_RESISTANCE[soil] for soil in self.strata]).reshape(self.layers, 2)
+        middle = 0.5 * (depth_top + depth_bottom)
+        cpt_qc = (qc[:, 0] + qc[:, 1] * middle) * (0.7 + 0.6 * position)
+
+        return {
+            'x': np.round(x, 2),
+            'y': np.round(y, 2),
+            'ground_level': np.round(10.0 + 2.0 * fields[:, -1], 2),
+            'water_level': np.round(np.clip(3.0 + 1.5 * fields[:, -2], 0.5, 8.0), 2),
+            'depth_top': depth_top,
+            'depth_bottom': depth_bottom,
+            'unit_weight': np.round(values[..., 0], 1),
+            'cohesion': np.round(values[..., 1], 1),
+            'friction_angle': np.round(values[..., 2], 1),
+            'spt_n': np.rint(values[..., 3]).astype(int),
+            'cpt_qc': np.round(cpt_qc, 2),
+        }
+
+
+def sounding_id(kind: str, index: int) -> str:
+    """ID of the index-th sounding of a kind, e.g. 'BH-000001' or 'CPT-000001'."""
+    return f"{'CPT' if kind == CPT else 'BH'}-{index + 1:06d}"
+
+
+def iter_layer_chunks(model: SiteModel, count: int, kind: str = BOREHOLE) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Stream the layers of a site as columnar tables, one block of soundings at a time.
+
+    Args:
+        model: Site model
+        count: Number of soundings of this kind
+        kind: BOREHOLE or CPT
+
+    Yields:
+        Dictionaries of 1-D arrays with one entry per layer: 'sounding' (index), 'x', 'y',
+        'depth_top', 'depth_bottom', 'soil_type' (SoilType values) and the layer properties
+    """
+    soil_types = np.array([soil.value for soil in model.strata])
+    for index in range(math.ceil(count / BLOCK_SIZE)):
+        block = model.block(kind, count, index)
+        n = len(block['x'])
+        chunk = {
+            'sounding': np.repeat(np.arange(index * BLOCK_SIZE, index * BLOCK_SIZE + n), model.layers),
+            'x': np.repeat(block['x'], model.layers),
+            'y': np.repeat(block['y'], model.layers),
+            'soil_type': np.tile(soil_types, n),
+        }
+        for name in ('depth_top', 'depth_bottom', 'unit_weight', 'cohesion', 'friction_angle',
+                     'cpt_qc' if kind == CPT else 'spt_n'):
+            chunk[name] = block[name].ravel()
+        yield chunk
+
+
+def iter_boreholes(model: SiteModel, count: int, kind: str = BOREHOLE) -> Iterator[Borehole]:
+    """
+    Stream the soundings of a site as Borehole objects.
+
+    Boreholes carry SPT N-values; CPT soundings are returned as Boreholes
+    whose layers carry the cone resistance instead, with notes naming the test.
+
+    Args:
+        model: Site model
+        count: Number of soundings of this kind
+        kind: BOREHOLE or CPT
+
+    Yields:
+        Borehole per sounding, with contiguous layers from the surface
+    """
+    cpt = kind == CPT
+    for index in range(math.ceil(count / BLOCK_SIZE)):
+        block = model.block(kind, count, index)
+        columns = {name: block[name].tolist() for name in block}
+        for i in range(len(columns['x'])):
+            borehole = Borehole(
+                id=sounding_id(kind, index * BLOCK_SIZE + i),
+                name=sounding_id(kind, index * BLOCK_SIZE + i),
+                location_x=columns['x'][i],
+                location_y=columns['y'][i],
+                ground_level=columns['ground_level'][i],
+                water_level=columns['water_level'][i],
+                total_depth=columns['depth_bottom'][i][-1] if model.layers else 0.0,
+                notes=TestType.CPT.value if cpt else "",
+            )
+            # Layers are created in depth order, so add_layer's sort is not needed
+            borehole.layers = [
+                SoilLayer(
+                    depth_top=columns['depth_top'][i][j],
+                    depth_bottom=columns['depth_bottom'][i][j],
+                    soil_type=soil,
+                    description=f"Synthetic {soil.value.lower()}",
+                    unit_weight=columns['unit_weight'][i][j],
+                    cohesion=columns['cohesion'][i][j],
+                    friction_angle=columns['friction_angle'][i][j],
+                    spt_n=None if cpt else columns['spt_n'][i][j],
+                    cpt_qc=columns['cpt_qc'][i][j] if cpt else None,
+                )
+                for j, soil in enumerate(model.strata)
+            ]
+            yield borehole
+
+
+def iter_designs(model: SiteModel, count: int, project_id: str = "SYN-001",
+                 investigation_id: Optional[str] = None) -> Iterator[FoundationDesign]:
+    """
+    Stream shallow, pile and retaining wall designs at random locations on the site.
+
+    Designs locate their borehole by location_x / location_y.
+
+    Args:
+        model: Site model
+        count: Number of designs
+        project_id: ID of the parent project
+        investigation_id: Soil investigation the designs use
+
+    Yields:
+        FoundationDesign, cycling through shallow, pile and retaining wall
+    """
+    for index in range(math.ceil(count / BLOCK_SIZE)):
+        start = index * BLOCK_SIZE
+        n = min(count, start + BLOCK_SIZE) - start
+        rng = np.random.default_rng([model.seed, _STREAMS['designs'], index])
+        draws = rng.uniform(0.0, 1.0, (n, 6)).tolist()
+        for i, u in enumerate(draws):
+            number = start + i
+            kind = number % 3
+            if kind == 0:
+                foundation_type = FoundationType.SHALLOW
+                parameters = {'width': round(1.0 + 3.0 * u[0], 2), 'length': round(1.0 + 5.0 * u[1], 2),
+                              'depth': round(0.5 + 1.5 * u[2], 2), 'load': round(200.0 + 2800.0 * u[3])}
+            elif kind == 1:
+                foundation_type = FoundationType.DEEP_PILE
+                parameters = {'pile_diameter': (0.4, 0.5, 0.6, 0.8)[int(4 * u[0])],
+                              'pile_length': round(6.0 + 4.0 * u[1], 1),
+                              'pile_type': "driven" if u[2] < 0.5 else "bored",
+                              'load': round(300.0 + 1700.0 * u[3])}
+            else:
+                foundation_type = FoundationType.RETAINING_WALL
+                parameters = {'wall_height': round(2.0 + 4.0 * u[0], 1), 'surcharge': round(20.0 * u[1])}
+            parameters.update(location_x=round(model.site_size * u[4], 2),
+                              location_y=round(model.site_size * u[5], 2))
+            yield FoundationDesign(f"D-{number + 1:06d}", f"Synthetic design {number + 1}", foundation_type,
+                                   project_id, soil_investigation_id=investigation_id,
+                                   design_parameters=parameters)
+
+
+def generate_investigation(model: SiteModel, boreholes: int = 100, cpts: int = 0,
+                           investigation_id: str = "SI-SYN", project_id: str = "SYN-001") -> SoilInvestigation:
+    """
+    Create a soil investigation with the boreholes and CPT soundings of a site.
+
+    Args:
+        model: Site model
+        boreholes: Number of boreholes
+        cpts: Number of CPT soundings
+        investigation_id: ID of the investigation
+        project_id: ID of the parent project
+
+    Returns:
+        SoilInvestigation
+    """
+    investigation = SoilInvestigation(id=investigation_id, name="Synthetic site investigation",
+                                      project_id=project_id, site_description="Synthetic site")
+    investigation.boreholes.extend(iter_boreholes(model, boreholes, BOREHOLE))
+    investigation.boreholes.extend(iter_boreholes(model, cpts, CPT))
+    return investigation
+
+
+def generate_project(boreholes: int = 100, layers: int = 4, designs: int = 0, seed: int = 0,
+                     spacing: float = 25.0, project_id: str = "SYN-001", cpts: int = 0,
+                     correlation_length: float = 150.0) -> GeotechnicalProject:
+    """
+    Create a synthetic project.
+
+    The whole project is held in memory; use SiteModel with iter_boreholes()
+    or iter_layer_chunks() to stream larger sites.
+
+    Args:
+        boreholes: Number of boreholes
+        layers: Number of strata
+        designs: Number of foundation designs
+        seed: Seed of the random number generator
+        spacing: Grid spacing between boreholes (m)
+        project_id: ID of the project
+        cpts: Number of CPT soundings
+        correlation_length: Correlation length of the stratigraphy (m)
+
+    Returns:
+        GeotechnicalProject with one soil investigation
+    """
+    site_size = max(1, math.ceil(math.sqrt(boreholes))) * spacing
+    model = SiteModel.create(seed, layers, site_size, correlation_length=correlation_length)
+    project = GeotechnicalProject(id=project_id, name=f"Synthetic site {project_id}",
+                                  description=f"{boreholes} boreholes, {cpts} CPTs, {layers} layers, seed {seed}")
+    investigation_id = f"SI-{project_id}"
+    project.add_soil_investigation(generate_investigation(model, boreholes, cpts, investigation_id, project_id))
+    project.foundation_designs.extend(iter_designs(model, designs, project_id, investigation_id))
+    return project
@@ -0,0 +1,177 @@
+"""
+Unit tests for the CSV/Parquet batch runner.
+
+Tests check that chunked vectorized results equal the calculators, that bad
+rows are reported per row, and that files round-trip with the same rows in
+the same order for any chunk size or worker count.
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+from app import DeepFoundationCalculator
+from batch_runner import FOOTING, PILE, WALL, evaluate_chunk, main, read_chunks, run_file
+from bearing_capacity import BearingCapacityEngine, HANSEN
+from wall_stability import RetainingWallStabilityCalculator
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+FOOTING_ROWS = [
+    {'width': '2.0', 'length': '3.0', 'depth': '1.0', 'unit_weight': '18', 'cohesion': '5', 'friction_angle': '30',
+     'vertical_load': '', 'horizontal_load': ''},
+    {'width': '1.5', 'length': '1.5', 'depth': '0.8', 'unit_weight': '19', 'cohesion': '0', 'friction_angle': '34',
+     'vertical_load': '800', 'horizontal_load': '50'},
+    {'width': '-1', 'length': '1.5', 'depth': '0.8', 'unit_weight': '19', 'cohesion': '0', 'friction_angle': '34',
+     'vertical_load': '', 'horizontal_load': ''},
+    {'width': 'abc', 'length': '1.5', 'depth': '0.8', 'unit_weight': '19', 'cohesion': '0', 'friction_angle': '34',
+     'vertical_load': '', 'horizontal_load': ''},
+]
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _read_csv(path):
+    with open(path, newline='') as handle:
+        return list(csv.DictReader(handle))
+
+
+class TestEvaluateChunk(unittest.TestCase):
+    """Test chunk evaluation against the calculators."""
+
+    def _chunk(self, rows):
+        return {name: [row[name] for row in rows] for name in rows[0]}
+
+    def test_footings(self):
+        """Test footing results and per-row errors."""
+        results = evaluate_chunk(FOOTING, self._chunk(FOOTING_ROWS), method=HANSEN)
+
+        plain = BearingCapacityEngine.calculate(2.0, 3.0, 1.0, 18.0, 5.0, 30.0, method=HANSEN)
+        self.assertAlmostEqual(results['ultimate_capacity'][0], float(plain.ultimate_capacity))
+        self.assertAlmostEqual(results['allowable_capacity'][0], float(plain.ultimate_capacity) / 3.0)
+        self.assertIsNone(results['safety_factor'][0])
+
+        inclined = BearingCapacityEngine.calculate(1.5, 1.5, 0.8, 19.0, 0.0, 34.0, vertical_load=800.0,
+                                                   horizontal_load=50.0, method=HANSEN)
+        self.assertAlmostEqual(results['ultimate_capacity'][1], float(inclined.ultimate_capacity))
+        self.assertAlmostEqual(results['safety_factor'][1], float(inclined.ultimate_load) / 800.0)
+
+        self.assertIsNone(results['error'][1])
+        self.assertIn("positive", results['error'][2])
+        self.assertIn("not a number", results['error'][3])
+        self.assertIsNone(results['ultimate_capacity'][2])
+
+    def test_piles(self):
+        """Test that vectorized pile capacities equal calculate_pile_capacity."""
+        chunk = {'pile_diameter': [0.6, 0.4, 0.5], 'pile_length': [15.0, 10.0, 8.0],
+                 'unit_weight': [18.0, 19.0, 18.0], 'friction_angle': [32.0, 28.0, 30.0],
+                 'cohesion': [0.0, 10.0, 0.0], 'pile_type': ["driven", "Bored", "screwed"], 'load': [1000.0, None, None]}
+        results = evaluate_chunk(PILE, chunk)
+
+        for i, pile_type in enumerate(("driven", "bored")):
+            Qu, Qa, Qb, Qs = DeepFoundationCalculator.calculate_pile_capacity(
+                chunk['pile_diameter'][i], chunk['pile_length'][i], chunk['unit_weight'][i],
+                chunk['friction_angle'][i], chunk['cohesion'][i], pile_type)
+            self.assertAlmostEqual(results['ultimate_capacity'][i], Qu)
+            self.assertAlmostEqual(results['allowable_capacity'][i], Qa)
+            self.assertAlmostEqual(results['end_bearing'][i], Qb)
+            self.assertAlmostEqual(results['skin_friction'][i], Qs)
+        self.assertAlmostEqual(results['safety_factor'][0], results['ultimate_capacity'][0] / 1000.0)
+        self.assertIn("pile_type", results['error'][2])
+
+    def test_walls(self):
+        """Test wall results."""
+        chunk = {'stem_height': [4.0, 5.0], 'stem_thickness': [0.3, 0.3], 'base_width': [3.0, 1.0],
+                 'base_thickness': [0.5, 0.5], 'toe_length': [0.8, 0.8], 'unit_weight': [18.0, 18.0],
+                 'friction_angle': [30.0, 30.0], 'surcharge': [10.0, 10.0]}
+        results = evaluate_chunk(WALL, chunk)
+
+        expected = RetainingWallStabilityCalculator.calculate_stability(4.0, 0.3, 3.0, 0.5, 0.8, 18.0, 30.0, 10.0)
+        self.assertAlmostEqual(results['sliding_fs'][0], float(expected.sliding_fs))
+        self.assertEqual(results['is_stable'][0], bool(expected.is_stable))
+        self.assertIn("base_width", results['error'][1])
+
+    def test_missing_column(self):
+        """Test that a missing required column is rejected."""
+        with self.assertRaises(ValueError):
+            evaluate_chunk(PILE, {'pile_diameter': [0.5]})
+
+
+class TestRunFile(unittest.TestCase):
+    """Test streaming files through the runner."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.directory.name, "cases.csv")
+        rows = [dict(FOOTING_ROWS[i % 2], width=str(1.0 + 0.01 * i)) for i in range(250)]
+        rows[100]['cohesion'] = ''
+        _write_csv(self.input, rows)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_chunks_and_workers_give_the_same_file(self):
+        """Test that chunk size and worker count do not change the output."""
+        single = os.path.join(self.directory.name, "single.csv")
+        parallel = os.path.join(self.directory.name, "parallel.csv")
+        seen = []
+
+        summary = run_file(self.input, single, FOOTING, chunk_size=1000)
+        parallel_summary = run_file(self.input, parallel, FOOTING, chunk_size=16, workers=2, progress=seen.append)
+
+        self.assertEqual(_read_csv(single), _read_csv(parallel))
+        self.assertEqual((summary.rows, summary.errors, summary.chunks), (250, 1, 1))
+        self.assertEqual(parallel_summary.chunks, 16)
+        self.assertEqual(seen[-1], 250)
+        self.assertEqual(seen, sorted(seen))
+
+        rows = _read_csv(single)
+        self.assertEqual([row['width'] for row in rows], [str(1.0 + 0.01 * i) for i in range(250)])
+        self.assertIn("cohesion", rows[100]['error'])
+        self.assertEqual(rows[0]['error'], '')
+
+    def test_read_chunks(self):
+        """Test that CSV files are read in chunks of the requested size."""
+        sizes = [len(chunk['width']) for chunk in read_chunks(self.input, chunk_size=100)]
+        self.assertEqual(sizes, [100, 100, 50])
+
+    def test_command_line(self):
+        """Test the command-line entry point and its default output path."""
+        self.assertEqual(main([self.input, '--type', 'footing', '--chunk-size', '64']), 0)
+        rows = _read_csv(os.path.join(self.directory.name, "cases_results.csv"))
+        self.assertEqual(len(rows), 250)
+        with self.assertRaises(SystemExit):
+            main([self.input, '--type', 'footing', '-o', os.path.join(self.directory.name, "out.parquet")])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        """Test a Parquet round trip."""
+        import pyarrow.parquet
+
+        source = os.path.join(self.directory.name, "cases.parquet")
+        output = os.path.join(self.directory.name, "results.parquet")
+        pyarrow.parquet.write_table(pyarrow.table({
+            'width': [2.0, 1.5], 'length': [3.0, 1.5], 'depth': [1.0, 0.8], 'unit_weight': [18.0, 19.0],
+            'cohesion': [5.0, 0.0], 'friction_angle': [30.0, 34.0]}), source)
+
+        summary = run_file(source, output, FOOTING, chunk_size=1)
+        table = pyarrow.parquet.read_table(output).to_pydict()
+
+        self.assertEqual(summary.rows, 2)
+        self.assertAlmostEqual(table['ultimate_capacity'][0], float(BearingCapacityEngine.calculate(
+            2.0, 3.0, 1.0, 18.0, 5.0, 30.0).ultimate_capacity))
+        self.assertEqual(table['error'], [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
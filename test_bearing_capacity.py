@@ -0,0 +1,139 @@
+"""
+Unit tests for the extended bearing capacity engine.
+
+Tests check the Meyerhof, Hansen and Vesić factors against tabulated values
+and hand calculations, and the effect of eccentricity, inclination and
+groundwater.
+"""
+
+import unittest
+
+import numpy as np
+
+from app import ShallowFoundationCalculator
+from bearing_capacity import (
+    BearingCapacityEngine,
+    HANSEN,
+    MEYERHOF,
+    METHODS,
+    VESIC,
+    bearing_capacity_factors
+)
+
+
+class TestBearingCapacityFactors(unittest.TestCase):
+    """Test the bearing capacity factors."""
+
+    def test_tabulated_values(self):
+        """Test factors for φ = 30° against published tables."""
+        expected = {MEYERHOF: 15.67, HANSEN: 15.07, VESIC: 22.40}
+        for method, Ngamma in expected.items():
+            Nc, Nq, Ng = bearing_capacity_factors(30.0, method)
+            self.assertAlmostEqual(float(Nc), 30.14, places=2)
+            self.assertAlmostEqual(float(Nq), 18.40, places=2)
+            self.assertAlmostEqual(float(Ng), Ngamma, places=2)
+
+    def test_undrained_factors(self):
+        """Test Nc = π + 2 for φ = 0."""
+        Nc, Nq, Ngamma = bearing_capacity_factors(0.0)
+        self.assertAlmostEqual(float(Nc), 5.14, places=2)
+        self.assertAlmostEqual(float(Nq), 1.0)
+        self.assertAlmostEqual(float(Ngamma), 0.0)
+
+    def test_unknown_method(self):
+        """Test that an unknown method is rejected."""
+        with self.assertRaises(ValueError):
+            bearing_capacity_factors(30.0, "terzaghi")
+
+
+class TestBearingCapacityEngine(unittest.TestCase):
+    """Test the general bearing capacity equation."""
+
+    def test_vesic_square_footing(self):
+        """Test a hand calculation for a 2 m square footing in sand."""
+        result = BearingCapacityEngine.calculate(2.0, 2.0, 1.5, 18.0, 0.0, 30.0)
+
+        tan_phi = np.tan(np.radians(30.0))
+        q_term = 27.0 * 18.401 * (1 + tan_phi) * (1 + 2 * tan_phi * 0.25 * 0.75)
+        gamma_term = 0.5 * 18.0 * 2.0 * 22.402 * 0.6
+        self.assertAlmostEqual(float(result.ultimate_capacity), q_term + gamma_term, delta=0.5)
+        self.assertAlmostEqual(float(result.ultimate_load), 4.0 * float(result.ultimate_capacity))
+
+    def test_long_footing_approaches_strip(self):
+        """Test that shape factors vanish for a very long footing at the surface."""
+        Nc, Nq, Ngamma = ShallowFoundationCalculator.calculate_bearing_capacity_factors(30.0)
+        strip = 10.0 * Nc + 0.5 * 18.0 * 2.0 * Ngamma
+        result = BearingCapacityEngine.calculate(2.0, 1e6, 0.0, 18.0, 10.0, 30.0, method=VESIC)
+        self.assertAlmostEqual(float(result.ultimate_capacity), strip, delta=0.01)
+
+    def test_undrained_methods(self):
+        """Test φ = 0 capacity of a square footing for all methods."""
+        for method in METHODS:
+            result = BearingCapacityEngine.calculate(2.0, 2.0, 1.0, 18.0, 50.0, 0.0, method=method)
+            qu = float(result.ultimate_capacity)
+            # About 1.2-1.4 times the strip value 5.14c + q
+            self.assertGreater(qu, 1.15 * (5.14 * 50.0 + 18.0))
+            self.assertLess(qu, 1.5 * (5.14 * 50.0 + 18.0))
+
+    def test_eccentricity_uses_effective_width(self):
+        """Test Meyerhof's effective area for eccentric loads."""
+        centric = BearingCapacityEngine.calculate(2.0, 3.0, 1.0, 18.0, 0.0, 32.0, vertical_load=800.0)
+        eccentric = BearingCapacityEngine.calculate(2.0, 3.0, 1.0, 18.0, 0.0, 32.0, vertical_load=800.0,
+                                                    eccentricity_width=0.25)
+
+        self.assertAlmostEqual(float(eccentric.effective_width), 1.5)
+        self.assertAlmostEqual(float(eccentric.effective_length), 3.0)
+        self.assertLess(float(eccentric.ultimate_load), float(centric.ultimate_load))
+
+        with self.assertRaises(ValueError):
+            BearingCapacityEngine.calculate(2.0, 3.0, 1.0, 18.0, 0.0, 32.0, eccentricity_width=1.0)
+
+    def test_reduction_factors(self):
+        """Test that inclination, base tilt and ground slope reduce capacity."""
+        for method in METHODS:
+            base = BearingCapacityEngine.calculate(2.0, 2.0, 1.0, 18.0, 5.0, 30.0, vertical_load=800.0,
+                                                   method=method)
+            inclined = BearingCapacityEngine.calculate(2.0, 2.0, 1.0, 18.0, 5.0, 30.0, vertical_load=800.0,
+                                                       horizontal_load=150.0, method=method)
+            self.assertLess(float(inclined.ultimate_capacity), float(base.ultimate_capacity))
+
+            if method != MEYERHOF:
+                tilted = BearingCapacityEngine.calculate(2.0, 2.0, 1.0, 18.0, 5.0, 30.0, base_tilt=10.0,
+                                                         method=method)
+                sloped = BearingCapacityEngine.calculate(2.0, 2.0, 1.0, 18.0, 5.0, 30.0, ground_slope=15.0,
+                                                         method=method)
+                self.assertLess(float(tilted.ultimate_capacity), float(base.ultimate_capacity))
+                self.assertLess(float(sloped.ultimate_capacity), float(base.ultimate_capacity))
+
+        with self.assertRaises(ValueError):
+            BearingCapacityEngine.calculate(2.0, 2.0, 1.0, 18.0, 5.0, 30.0, horizontal_load=150.0)
+
+    def test_groundwater_correction(self):
+        """Test the three groundwater cases."""
+        def capacity(water_depth):
+            return float(BearingCapacityEngine.calculate(
+                2.0, 2.0, 1.0, 18.0, 0.0, 30.0, water_depth=water_depth,
+                saturated_unit_weight=20.0).ultimate_capacity)
+
+        dry = capacity(None)
+        self.assertAlmostEqual(capacity(10.0), dry)
+        self.assertLess(capacity(2.0), dry)
+        self.assertLess(capacity(1.0), capacity(2.0))
+        self.assertLess(capacity(0.0), capacity(1.0))
+
+    def test_vectorized_matches_scalar(self):
+        """Test broadcast inputs against scalar calls."""
+        widths = np.array([1.0, 2.0, 3.0])[:, None]
+        loads = np.array([300.0, 600.0])[None, :]
+        result = BearingCapacityEngine.calculate(widths, 4.0, 1.2, 19.0, 10.0, 28.0, vertical_load=loads,
+                                                 horizontal_load=0.1 * loads, method=HANSEN)
+
+        self.assertEqual(result.ultimate_capacity.shape, (3, 2))
+        self.assertEqual(len(result), 6)
+        single = BearingCapacityEngine.calculate(2.0, 4.0, 1.2, 19.0, 10.0, 28.0, vertical_load=600.0,
+                                                 horizontal_load=60.0, method=HANSEN)
+        self.assertAlmostEqual(result.ultimate_capacity[1, 1], float(single.ultimate_capacity))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit tests for the benchmark suite.
+
+Tests run the suite at a small scale and check the report layout and the
+baseline comparison. They do not assert on timings, except the cold-start
+import budgets when ENGIPIT_TIMING_TESTS=1.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks import (BENCHMARKS, CALCULATOR_CASES, IMPORT_BUDGETS, check_imports, cold_import, compare, main,
+                        make_report, run_benchmarks, select)
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Test the benchmark suite."""
+
+    def test_every_calculator_method_is_covered(self):
+        """Test that every public calculator method has a scalar and a batch benchmark."""
+        covered = {(cls, method) for cls, method, _ in CALCULATOR_CASES}
+        for cls in {cls for cls, _, _ in CALCULATOR_CASES}:
+            for method in (name for name in vars(cls) if name.startswith('calculate_')):
+                self.assertIn((cls, method), covered)
+                self.assertIn(f"{cls.__name__}.{method}.scalar", BENCHMARKS)
+                self.assertIn(f"{cls.__name__}.{method}.batch", BENCHMARKS)
+
+    def test_run_and_report(self):
+        """Test running every benchmark at a small scale."""
+        results = run_benchmarks(scale=0.001, repeat=2, min_time=0.0)
+        report = make_report(results, scale=0.001)
+
+        self.assertEqual(list(report['benchmarks']), select())
+        self.assertEqual(report['benchmarks']['Borehole.get_layer_at_depth']['items'], 1000)
+        for entry in report['benchmarks'].values():
+            self.assertEqual(entry['repeats'], 2)
+            self.assertGreater(entry['median'], 0.0)
+
+    def test_compare(self):
+        """Test that slowdowns beyond the tolerance are reported as regressions."""
+        baseline = {'schema': 1, 'scale': 1.0, 'benchmarks': {'a': {'per_item': 1.0}, 'b': {'per_item': 1.0}}}
+        report = {'schema': 1, 'scale': 1.0, 'benchmarks': {'a': {'per_item': 1.2}, 'b': {'per_item': 1.5},
+                                                            'c': {'per_item': 9.0}}}
+        comparisons, regressions = compare(report, baseline, tolerance=0.25)
+
+        self.assertEqual([c.name for c in comparisons], ['a', 'b'])
+        self.assertEqual([r.name for r in regressions], ['b'])
+        with self.assertRaises(ValueError):
+            compare(dict(report, scale=0.5), baseline)
+
+    def test_import_modules(self):
+        """Test that the calculators import with the standard library only."""
+        self.assertEqual(cold_import('app')[1], ['app', 'instrumentation'])
+        self.assertIn('numpy', cold_import('bearing_capacity')[1])
+        self.assertEqual(check_imports(timings=False), [])
+
+    @unittest.skipUnless(os.environ.get('ENGIPIT_TIMING_TESTS') == '1', "set ENGIPIT_TIMING_TESTS=1 to check timings")
+    def test_import_budgets(self):
+        """Test the cold-start import times against their budgets."""
+        self.assertLess(cold_import('app')[0], IMPORT_BUDGETS['app'][0])
+        self.assertEqual(main(['--check-imports']), 0)
+
+    def test_command_line(self):
+        """Test stable JSON output and the baseline exit code."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            arguments = ['-k', 'ShallowFoundationCalculator.*.scalar', '--scale', '0.001', '--repeat', '2',
+                         '--min-time', '0', '-o', output]
+            self.assertEqual(main(arguments), 0)
+            with open(output) as handle:
+                text = handle.read()
+            report = json.loads(text)
+            self.assertEqual(text, json.dumps(report, indent=2, sort_keys=True) + "\n")
+            self.assertEqual(len(report['benchmarks']), 4)
+
+            for entry in report['benchmarks'].values():
+                entry['per_item'] /= 100.0
+            baseline = os.path.join(directory, "baseline.json")
+            with open(baseline, 'w') as handle:
+                json.dump(report, handle)
+            self.assertEqual(main(arguments + ['--baseline', baseline]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
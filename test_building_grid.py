@@ -0,0 +1,166 @@
+"""
+Unit tests for the building grid design.
+
+Tests check locating columns in the soil investigation, the footing and
+pile group sizes against the calculators of app.py, and the table and
+FoundationDesign entries of a whole grid.
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app import DeepFoundationCalculator, ShallowFoundationCalculator
+from building_grid import INTERPOLATED, NEAREST, BoreholeSoil, ColumnGrid, DesignRules, design_grid, grid_label
+from foundation_optimizer import FOOTING, PILE_GROUP
+from project_models import Borehole, FoundationType, GeotechnicalProject, SoilInvestigation, SoilLayer, SoilType
+
+
+def _borehole(name, x, y, friction_angle, cohesion=0.0):
+    borehole = Borehole(name, name, x, y, total_depth=20.0)
+    borehole.add_layer(SoilLayer(0.0, 1.0, SoilType.FILL, unit_weight=16.0, cohesion=None, friction_angle=25.0))
+    borehole.add_layer(SoilLayer(1.0, 20.0, SoilType.SAND, unit_weight=19.0, cohesion=cohesion,
+                                 friction_angle=friction_angle))
+    return borehole
+
+
+def _project():
+    project = GeotechnicalProject("PROJ", "Building")
+    investigation = SoilInvestigation("SI-1", "Site", "PROJ")
+    investigation.boreholes.extend([_borehole("BH-1", 0.0, 0.0, 30.0), _borehole("BH-2", 20.0, 0.0, 34.0),
+                                    _borehole("BH-3", 0.0, 20.0, 20.0, cohesion=2.0)])
+    project.add_soil_investigation(investigation)
+    return project
+
+
+class TestGrid(unittest.TestCase):
+    """Test column grids."""
+
+    def test_regular(self):
+        """Test names, positions and loads of a regular grid."""
+        grid = ColumnGrid.regular([0.0, 6.0], [0.0, 5.0, 10.0], [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+        self.assertEqual(grid.names, ["A1", "A2", "A3", "B1", "B2", "B3"])
+        np.testing.assert_array_equal(grid.y, [0.0, 5.0, 10.0, 0.0, 5.0, 10.0])
+        self.assertEqual(grid.load[4], 5.0)
+        self.assertEqual([grid_label(i) for i in (0, 25, 26, 27, 701, 702)], ["A", "Z", "AA", "AB", "ZZ", "AAA"])
+        with self.assertRaises(ValueError):
+            ColumnGrid(["A1", "A1"], [0.0, 1.0], [0.0, 0.0], [100.0, 100.0])
+        with self.assertRaises(ValueError):
+            ColumnGrid.regular([0.0], [0.0], 0.0)
+
+
+class TestSoil(unittest.TestCase):
+    """Test locating columns in the investigation."""
+
+    def test_thickness_weighted_average(self):
+        """Test averaging each borehole over a depth range."""
+        soil = BoreholeSoil.from_investigation(_project().soil_investigations[0], (0.0, 4.0))
+        self.assertEqual(soil.ids, ["BH-1", "BH-2", "BH-3"])
+        self.assertAlmostEqual(soil.properties['unit_weight'][0], (16.0 + 3 * 19.0) / 4)
+        self.assertAlmostEqual(soil.properties['friction_angle'][1], (25.0 + 3 * 34.0) / 4)
+        self.assertAlmostEqual(soil.properties['cohesion'][2], 2.0)
+        with self.assertRaises(ValueError):
+            BoreholeSoil.from_investigation(_project().soil_investigations[0], (25.0, 30.0))
+
+    def test_nearest_and_interpolated(self):
+        """Test nearest borehole soil and inverse distance weighting."""
+        soil = BoreholeSoil.from_investigation(_project().soil_investigations[0], (1.0, 5.0))
+        nearest, index, distance = soil.at([1.0, 10.0, 0.0], [1.0, 0.0, 20.0], NEAREST)
+        np.testing.assert_allclose(nearest['friction_angle'], [30.0, 30.0, 20.0])
+        np.testing.assert_allclose(distance, [np.sqrt(2.0), 10.0, 0.0])
+        self.assertEqual(index.tolist(), [0, 0, 2])
+
+        interpolated = soil.at([10.0, 0.0], [0.0, 20.0], INTERPOLATED)[0]
+        weights = 1.0 / np.array([10.0, 10.0, np.hypot(10.0, 20.0)]) ** 2
+        self.assertAlmostEqual(interpolated['friction_angle'][0], weights @ [30.0, 34.0, 20.0] / weights.sum())
+        self.assertEqual(interpolated['friction_angle'][1], 20.0)
+        with self.assertRaises(ValueError):
+            soil.at([0.0], [0.0], "kriging")
+
+
+class TestDesignGrid(unittest.TestCase):
+    """Test designing whole grids."""
+
+    def test_sizes_match_calculators(self):
+        """Test that footings are the smallest adequate width and pile groups the fewest piles."""
+        project = _project()
+        grid = ColumnGrid(["C1", "C2", "C3"], [1.0, 19.0, 1.0], [1.0, 1.0, 19.0], [800.0, 2500.0, 4000.0])
+        rules = DesignRules()
+        design = design_grid(project, grid, rules)
+
+        self.assertEqual(design.foundation.tolist(), [FOOTING, FOOTING, PILE_GROUP])
+        self.assertTrue(design.feasible.all())
+        soil = BoreholeSoil.from_investigation(project.soil_investigations[0], rules.footing_soil_range).properties
+        for i in range(2):
+            gamma, c, phi = (soil[name][i] for name in ('unit_weight', 'cohesion', 'friction_angle'))
+            B = design.width[i]
+            qu = ShallowFoundationCalculator.calculate_ultimate_bearing_capacity(B, B, 1.0, gamma, c, phi)
+            smaller = ShallowFoundationCalculator.calculate_ultimate_bearing_capacity(B - 0.05, B - 0.05, 1.0,
+                                                                                      gamma, c, phi)
+            self.assertGreaterEqual(qu * B ** 2 / grid.load[i], 3.0)
+            self.assertLess(smaller * (B - 0.05) ** 2 / grid.load[i], 3.0)
+            self.assertAlmostEqual(design.safety_factor[i], qu * B ** 2 / grid.load[i])
+
+        # Pile soil of BH-3 over 15 m: 1 m of fill without cohesion data over 14 m of sand
+        Qu = DeepFoundationCalculator.calculate_pile_capacity(0.6, 15.0, (16.0 + 14 * 19.0) / 15,
+                                                              (25.0 + 14 * 20.0) / 15, 2.0, "bored")[0]
+        n = design.pile_count[2]
+        efficiency = DeepFoundationCalculator.calculate_pile_group_efficiency(n, 1.8, 0.6)
+        self.assertGreaterEqual(n * efficiency * Qu / 4000.0, 2.5)
+        self.assertLess((n - 1) * efficiency * Qu / 4000.0, 2.5)
+        self.assertEqual(design.borehole, ["BH-1", "BH-2", "BH-3"])
+
+    def test_forced_foundations(self):
+        """Test designing every column as a footing or as a pile group."""
+        project = _project()
+        grid = ColumnGrid(["C1", "C2"], [1.0, 1.0], [1.0, 19.0], [400.0, 9000.0])
+        footings = design_grid(project, grid, foundation=FOOTING, add_to_project=False)
+        self.assertEqual(footings.foundation.tolist(), [FOOTING, FOOTING])
+        self.assertEqual(footings.feasible.tolist(), [True, False])
+        self.assertTrue(np.isnan(footings.width[1]))
+        self.assertLess(footings.safety_factor[1], 3.0)
+
+        piles = design_grid(project, grid, DesignRules(max_piles=4), foundation=PILE_GROUP, add_to_project=False)
+        self.assertEqual(piles.pile_count.tolist(), [1, 4])
+        self.assertEqual(piles.feasible.tolist(), [True, False])
+        self.assertEqual(project.foundation_designs, [])
+        with self.assertRaises(ValueError):
+            design_grid(project, grid, foundation="raft")
+        with self.assertRaises(ValueError):
+            DesignRules(pile_type="screwed")
+
+    def test_project_designs_and_table(self):
+        """Test the FoundationDesign entries, re-running a grid and writing the table."""
+        project = _project()
+        grid = ColumnGrid.regular([2.0, 10.0, 18.0], [2.0, 18.0], 1500.0)
+        design = design_grid(project, grid, soil_method=INTERPOLATED)
+        created = project.foundation_designs[0].created_date
+        design_grid(project, grid, soil_method=INTERPOLATED)
+
+        self.assertEqual(len(project.foundation_designs), 6)
+        first = project.foundation_designs[0]
+        self.assertEqual(first.created_date, created)
+        self.assertGreaterEqual(first.modified_date, created)
+        self.assertEqual((first.id, first.name, first.project_id), ("COL-A1", "Column A1", "PROJ"))
+        self.assertEqual(first.foundation_type, FoundationType.SHALLOW)
+        self.assertEqual(first.design_parameters['width'], design.width[0])
+        self.assertEqual(first.soil_investigation_id, "SI-1")
+        self.assertAlmostEqual(first.safety_factor, design.safety_factor[0])
+
+        table = design.table()
+        self.assertEqual(table['column'], grid.names)
+        self.assertEqual(table['pile_count'], [None] * 6)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "columns.csv")
+            design.write(path)
+            with open(path, newline='') as handle:
+                rows = list(csv.DictReader(handle))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(float(rows[0]['width']), design.width[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
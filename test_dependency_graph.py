@@ -0,0 +1,150 @@
+"""
+Unit tests for the dependency graph and incremental recalculation.
+
+Tests check that edits to layers, boreholes and designs mark only the
+affected designs dirty and that dirty designs are recomputed in
+topological order.
+"""
+
+import unittest
+
+from dependency_graph import DependencyGraph, borehole_node, layer_node
+from project_models import Borehole, FoundationDesign, FoundationType, SoilLayer, SoilType, create_example_project
+
+
+def _project():
+    project = create_example_project()
+    investigation = project.soil_investigations[0]
+    second = Borehole(id="BH-02", name="BH-02", location_x=300.0, location_y=100.0)
+    second.add_layer(SoilLayer(0.0, 6.0, SoilType.SAND, unit_weight=19.0, cohesion=0.0, friction_angle=33.0))
+    second.add_layer(SoilLayer(6.0, 20.0, SoilType.CLAY, unit_weight=20.0, cohesion=60.0, friction_angle=0.0))
+    investigation.add_borehole(second)
+
+    designs = [
+        FoundationDesign("F1", "Footing 1", FoundationType.SHALLOW, project.id,
+                         design_parameters={'width': 2.0, 'length': 2.0, 'depth': 1.0, 'borehole_id': "BH-01"}),
+        FoundationDesign("F2", "Footing 2", FoundationType.SHALLOW, project.id,
+                         design_parameters={'width': 2.0, 'length': 2.0, 'depth': 3.0, 'borehole_id': "BH-01"}),
+        FoundationDesign("P1", "Pile 1", FoundationType.DEEP_PILE, project.id,
+                         design_parameters={'pile_diameter': 0.6, 'pile_length': 12.0,
+                                            'location_x': 280.0, 'location_y': 100.0}),
+        FoundationDesign("C1", "Cap on P1", FoundationType.SHALLOW, project.id,
+                         design_parameters={'width': 3.0, 'length': 3.0, 'depth': 1.0, 'borehole_id': "BH-02",
+                                            'depends_on': ["P1"]}),
+    ]
+    for design in designs:
+        project.add_foundation_design(design)
+    return project
+
+
+class TestDependencyGraph(unittest.TestCase):
+    """Test dependency tracking."""
+
+    def setUp(self):
+        self.project = _project()
+        self.investigation = self.project.soil_investigations[0]
+        self.graph = DependencyGraph(self.project)
+        self.graph.mark_all_dirty()
+        self.graph.recalculate_dirty()
+
+    def test_dependencies(self):
+        """Test that designs depend only on the layers they use."""
+        self.assertIn(layer_node("SI-001", "BH-01", 0), self.graph.dependencies("F1"))
+        self.assertNotIn(layer_node("SI-001", "BH-01", 1), self.graph.dependencies("F1"))
+        self.assertEqual(self.graph.dependents(borehole_node("SI-001", "BH-02")), {"P1", "C1"})
+        self.assertEqual(self.graph.dependents(layer_node("SI-001", "BH-02", 1)), {"P1"})
+
+    def test_topological_order(self):
+        """Test that upstream designs are recalculated before their dependents."""
+        self.graph.mark_all_dirty()
+        order = self.graph.recalculate_dirty()
+
+        self.assertEqual(set(order), {"F1", "F2", "P1", "C1"})
+        self.assertLess(order.index("P1"), order.index("C1"))
+        self.assertEqual(self.graph.dirty, set())
+
+    def test_layer_edit_marks_only_users(self):
+        """Test that a layer edit marks the designs using it and their downstream designs."""
+        self.investigation.get_borehole("BH-02").layers[1].cohesion = 80.0
+        self.assertEqual(self.graph.detect_changes(), {"P1"})
+
+        before = self.project.foundation_designs[2].results['ultimate_capacity']
+        self.assertEqual(self.graph.recalculate_dirty(), ["P1", "C1"])
+        self.assertGreater(self.project.foundation_designs[2].results['ultimate_capacity'], before)
+        self.assertEqual(self.graph.detect_changes(), set())
+
+    def test_explicit_marks(self):
+        """Test marking edits without fingerprint comparison."""
+        self.assertEqual(self.graph.mark_layer_edited("SI-001", "BH-01", 1), {"F2"})
+        self.assertEqual(self.graph.mark_borehole_edited("SI-001", "BH-01"), {"F1", "F2", "P1"})
+        self.assertEqual(self.graph.mark_design_edited("C1"), {"C1"})
+        self.assertEqual(self.graph.dirty, {"F1", "F2", "P1", "C1"})
+
+    def test_borehole_move_changes_selection(self):
+        """Test that moving boreholes re-targets nearest-borehole designs."""
+        self.investigation.get_borehole("BH-01").location_x = 279.0
+        self.assertEqual(self.graph.detect_changes(), {"F1", "F2", "P1"})
+        self.graph.recalculate_dirty()
+
+        self.assertEqual(self.project.foundation_designs[2].results['borehole_id'], "BH-01")
+        self.assertIn(borehole_node("SI-001", "BH-01"), self.graph.dependencies("P1"))
+
+    def test_new_design_and_errors(self):
+        """Test that new designs are picked up and calculation errors are recorded."""
+        self.project.add_foundation_design(FoundationDesign(
+            "F3", "Bad footing", FoundationType.SHALLOW, self.project.id,
+            design_parameters={'width': 2.0, 'length': 2.0, 'depth': 50.0, 'borehole_id': "BH-01"}))
+
+        self.assertEqual(self.graph.detect_changes(), {"F3"})
+        self.assertEqual(self.graph.recalculate_dirty(), ["F3"])
+        self.assertIn("F3", self.graph.errors)
+        self.assertIn('error', self.project.foundation_designs[-1].results)
+
+    def test_removed_and_late_upstream_designs(self):
+        """Test that removing a design drops its edges and a design added later is linked to its dependents."""
+        pile = self.project.foundation_designs.pop(2)
+        self.graph.detect_changes()
+        self.graph.mark_all_dirty()
+        self.assertEqual(self.graph.recalculate_dirty(), ["C1", "F1", "F2"])
+        self.assertNotIn("P1", self.graph._downstream)
+        self.assertEqual(self.graph._upstream["C1"], set())
+
+        self.project.add_foundation_design(pile)
+        self.assertIn("P1", self.graph.detect_changes())
+        self.assertEqual(self.graph.recalculate_dirty(), ["P1", "C1"])
+
+        self.project.add_foundation_design(FoundationDesign(
+            "C2", "Cap on P2", FoundationType.SHALLOW, self.project.id,
+            design_parameters={'width': 3.0, 'length': 3.0, 'depth': 1.0, 'borehole_id': "BH-02",
+                               'depends_on': ["P2"]}))
+        self.graph.detect_changes()
+        self.graph.recalculate_dirty()
+        self.project.add_foundation_design(FoundationDesign(
+            "P2", "Pile 2", FoundationType.DEEP_PILE, self.project.id,
+            design_parameters={'pile_diameter': 0.6, 'pile_length': 10.0, 'borehole_id': "BH-02"}))
+        self.assertEqual(self.graph.detect_changes(), {"P2"})
+        self.assertEqual(self.graph.recalculate_dirty(), ["P2", "C2"])
+
+    def test_failing_design_leaves_graph_clean(self):
+        """Test that a design raising an arithmetic error does not stop the others."""
+        self.project.foundation_designs[0].design_parameters.update(width=0.0, load=500.0)
+        self.graph.mark_all_dirty()
+
+        self.assertEqual(set(self.graph.recalculate_dirty()), {"F1", "F2", "P1", "C1"})
+        self.assertEqual(set(self.graph.errors), {"F1"})
+        self.assertEqual(self.graph.dirty, set())
+        self.assertIn('error', self.project.foundation_designs[0].results)
+        self.assertNotIn('error', self.project.foundation_designs[1].results)
+        self.assertNotIn('error', self.project.foundation_designs[3].results)
+
+    def test_circular_dependencies(self):
+        """Test that circular design dependencies are rejected."""
+        self.project.foundation_designs[2].design_parameters['depends_on'] = ["C1"]
+        graph = DependencyGraph(self.project)
+        graph.mark_all_dirty()
+        with self.assertRaises(ValueError):
+            graph.recalculate_dirty()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Unit tests for foundation design calculation.
+
+Tests check the dispatch on foundation type and the choice of borehole.
+"""
+
+import unittest
+
+from app import ShallowFoundationCalculator, DeepFoundationCalculator
+from design_calculation import CALCULATOR_VERSION, calculate_design, find_investigation, referenced_boreholes
+from project_models import Borehole, FoundationDesign, FoundationType, SoilLayer, SoilType, create_example_project
+
+
+class TestDesignCalculation(unittest.TestCase):
+    """Test calculate_design and its borehole selection."""
+
+    def setUp(self):
+        self.project = create_example_project()
+        self.investigation = self.project.soil_investigations[0]
+        far = Borehole(id="BH-02", name="BH-02", location_x=500.0, location_y=100.0)
+        far.add_layer(SoilLayer(0.0, 20.0, SoilType.CLAY, unit_weight=18.0, cohesion=40.0, friction_angle=0.0))
+        self.investigation.add_borehole(far)
+
+    def test_shallow_design(self):
+        """Test a footing against the layer at foundation level."""
+        design = FoundationDesign("FD-01", "F1", FoundationType.SHALLOW, self.project.id,
+                                  design_parameters={'width': 2.0, 'length': 2.0, 'depth': 3.0, 'load': 1000.0,
+                                                     'borehole_id': "BH-01"})
+        results = calculate_design(design, self.investigation)
+
+        qu = ShallowFoundationCalculator.calculate_ultimate_bearing_capacity(2.0, 2.0, 3.0, 19.0, 0.0, 32.0)
+        self.assertAlmostEqual(results['ultimate_bearing_capacity'], qu)
+        self.assertAlmostEqual(results['safety_factor'], qu / 250.0)
+        self.assertEqual(results['borehole_id'], "BH-01")
+        self.assertEqual(results['calculator_version'], CALCULATOR_VERSION)
+
+    def test_pile_design_uses_nearest_borehole(self):
+        """Test that designs with a location use the nearest borehole."""
+        design = FoundationDesign("FD-02", "P1", FoundationType.DEEP_PILE, self.project.id,
+                                  design_parameters={'pile_diameter': 0.6, 'pile_length': 12.0,
+                                                     'location_x': 480.0, 'location_y': 90.0})
+        results = calculate_design(design, self.investigation)
+
+        self.assertEqual(results['borehole_id'], "BH-02")
+        Qu = DeepFoundationCalculator.calculate_pile_capacity(0.6, 12.0, 18.0, 0.0, 40.0, "driven")[0]
+        self.assertAlmostEqual(results['ultimate_capacity'], Qu)
+
+    def test_retaining_wall_design(self):
+        """Test a retaining wall with averaged backfill properties."""
+        design = FoundationDesign("FD-03", "W1", FoundationType.RETAINING_WALL, self.project.id,
+                                  design_parameters={'wall_height': 4.0, 'surcharge': 10.0})
+        results = calculate_design(design, self.investigation)
+
+        self.assertEqual(results['borehole_id'], "BH-01")
+        self.assertAlmostEqual(results['soil']['unit_weight'], (2 * 18.0 + 2 * 19.0) / 4)
+        self.assertGreater(results['active_force'], 0.0)
+
+    def test_missing_borehole(self):
+        """Test that a reference to an unknown borehole is reported."""
+        design = FoundationDesign("FD-04", "F2", FoundationType.SHALLOW, self.project.id,
+                                  design_parameters={'width': 2.0, 'length': 2.0, 'depth': 1.0,
+                                                     'borehole_id': "BH-99"})
+        self.assertEqual(referenced_boreholes(design, self.investigation), [])
+        with self.assertRaises(ValueError):
+            calculate_design(design, self.investigation)
+
+    def test_find_investigation(self):
+        """Test explicit and default investigation lookup."""
+        design = FoundationDesign("FD-05", "F3", FoundationType.SHALLOW, self.project.id)
+        self.assertIs(find_investigation(self.project, design), self.investigation)
+        design.soil_investigation_id = "SI-404"
+        self.assertIsNone(find_investigation(self.project, design))
+
+
+if __name__ == "__main__":
+    unittest.main()
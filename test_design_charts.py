@@ -0,0 +1,112 @@
+"""
+Unit tests for the design charts.
+
+Tests check the interpolation error against the calculators of app.py on
+random points, the scalar and array queries, serialization, and loading
+charts from a library directory keyed to soil investigations.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app import DeepFoundationCalculator, ShallowFoundationCalculator
+from design_charts import FOOTING, PILE, ChartLibrary, ResponseSurface, representative_soil
+from project_models import Borehole, SoilInvestigation, SoilLayer, SoilType
+
+SOIL = {'unit_weight': 18.0, 'cohesion': 5.0, 'friction_angle': 32.0}
+
+
+def _investigation(investigation_id, friction_angle):
+    investigation = SoilInvestigation(investigation_id, "Site", "PROJ")
+    borehole = Borehole("BH-01", "BH-01", 0.0, 0.0, total_depth=10.0)
+    borehole.add_layer(SoilLayer(0.0, 10.0, SoilType.SAND, unit_weight=18.04, cohesion=0.0,
+                                 friction_angle=friction_angle))
+    investigation.boreholes.append(borehole)
+    return investigation
+
+
+class TestResponseSurface(unittest.TestCase):
+    """Test building and querying charts."""
+
+    def test_pile_error_bound(self):
+        """Test that random queries stay within the tolerance of calculate_pile_capacity."""
+        chart = ResponseSurface.build(PILE, SOIL, tolerance=1e-3, pile_type="bored")
+        rng = np.random.default_rng(0)
+        diameters, lengths = rng.uniform(0.3, 1.5, 500), rng.uniform(5.0, 40.0, 500)
+
+        expected = np.array([DeepFoundationCalculator.calculate_pile_capacity(D, L, 18.0, 32.0, 5.0, "bored")[1]
+                             for D, L in zip(diameters, lengths)])
+        actual = np.array([chart(D, L) for D, L in zip(diameters, lengths)])
+
+        self.assertLessEqual(chart.max_error, 1e-3)
+        self.assertLess(np.max(np.abs(actual - expected) / expected), 1e-3)
+        np.testing.assert_allclose(chart.evaluate(diameters, lengths), actual, rtol=1e-12)
+        self.assertGreater(len(chart.x_nodes), 5)
+        self.assertAlmostEqual(chart(1.5, 40.0), DeepFoundationCalculator.calculate_pile_capacity(
+            1.5, 40.0, 18.0, 32.0, 5.0, "bored")[1])
+
+    def test_footing_is_exact_on_the_starting_grid(self):
+        """Test that the footing chart, linear in width and depth, needs no refinement."""
+        chart = ResponseSurface.build(FOOTING, SOIL, tolerance=1e-6)
+        self.assertEqual((len(chart.x_nodes), len(chart.y_nodes)), (5, 5))
+        self.assertAlmostEqual(chart(2.3, 1.7), ShallowFoundationCalculator.calculate_ultimate_bearing_capacity(
+            2.3, 2.3, 1.7, 18.0, 5.0, 32.0))
+
+    def test_errors(self):
+        """Test invalid charts and queries outside the range."""
+        chart = ResponseSurface.build(PILE, SOIL, tolerance=1e-2)
+        with self.assertRaises(ValueError):
+            chart(0.2, 10.0)
+        with self.assertRaises(ValueError):
+            chart.evaluate([0.5, 0.5], [10.0, 41.0])
+        with self.assertRaises(ValueError):
+            ResponseSurface.build("wall", SOIL)
+        with self.assertRaises(ValueError):
+            ResponseSurface.build(PILE, SOIL, pile_type="screwed")
+        with self.assertRaises(ValueError):
+            ResponseSurface.build(PILE, SOIL, tolerance=1e-9, max_level=2)
+
+    def test_round_trip(self):
+        """Test that a chart survives to_dict and from_dict."""
+        chart = ResponseSurface.build(PILE, SOIL, tolerance=1e-2)
+        copy = ResponseSurface.from_dict(chart.to_dict())
+        self.assertEqual(copy(0.77, 23.3), chart(0.77, 23.3))
+        self.assertEqual(copy.axes, ('pile_diameter', 'pile_length'))
+        with self.assertRaises(ValueError):
+            ResponseSurface.from_dict(dict(chart.to_dict(), version=0))
+
+
+class TestChartLibrary(unittest.TestCase):
+    """Test charts keyed to soil investigations."""
+
+    def test_charts_are_built_once_and_loaded(self):
+        """Test in-memory reuse, loading from disk and sharing by rounded soil properties."""
+        with tempfile.TemporaryDirectory() as directory:
+            library = ChartLibrary(directory)
+            first = library.chart(_investigation("SI-1", 30.0), PILE, tolerance=1e-2)
+            self.assertIs(library.chart(_investigation("SI-2", 30.02), PILE, tolerance=1e-2), first)
+            library.chart(_investigation("SI-1", 30.0), FOOTING)
+            self.assertEqual((library.built, library.loaded), (2, 0))
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+            reloaded = ChartLibrary(directory)
+            chart = reloaded.chart(_investigation("SI-3", 30.0), PILE, tolerance=1e-2, pile_type="driven")
+            self.assertEqual((reloaded.built, reloaded.loaded), (0, 1))
+            self.assertEqual(chart(0.6, 12.0), first(0.6, 12.0))
+            self.assertEqual(chart.soil, {'unit_weight': 18.0, 'cohesion': 0.0, 'friction_angle': 30.0})
+
+    def test_representative_soil(self):
+        """Test that representative properties take precedence over borehole averages."""
+        investigation = _investigation("SI", 30.0)
+        investigation.representative_properties = {'friction_angle': 27.46, 'cohesion': None}
+        self.assertEqual(representative_soil(investigation),
+                         {'unit_weight': 18.0, 'cohesion': 0.0, 'friction_angle': 27.5})
+        with self.assertRaises(ValueError):
+            representative_soil(SoilInvestigation("SI", "Empty", "PROJ"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Unit tests for the versioned design history.
+
+Tests check that unchanged records are shared between revisions, that
+reopened revisions are isolated from later edits, the attribute paths of
+diffs, and saving and loading a history.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from design_history import ADDED, DESIGN, INVESTIGATION, MODIFIED, REMOVED, Change, DesignHistory
+from project_models import FoundationDesign, FoundationType, SoilLayer, SoilType, create_example_project
+from synthetic_site import generate_project
+
+
+class TestCommit(unittest.TestCase):
+    """Test recording revisions."""
+
+    def test_structural_sharing(self):
+        """Test that one changed layer adds one layer, one borehole, one investigation and one root."""
+        project = generate_project(boreholes=50, layers=4, designs=30)
+        history = DesignHistory()
+        history.commit(project, "Initial")
+        initial = len(history.store)
+
+        project.soil_investigations[0].boreholes[3].layers[1].friction_angle += 2.0
+        revision = history.commit(project, "Retested", author="JD")
+
+        self.assertEqual(len(history.store) - initial, 4)
+        self.assertEqual((revision.number, revision.parent, revision.author), (1, 0, "JD"))
+        self.assertIs(history.commit(project, "Nothing changed"), revision)
+        self.assertEqual(len(history), 2)
+
+    def test_reopened_revisions_are_isolated(self):
+        """Test that edits after a commit, or to a reopened object, do not change the history."""
+        project = create_example_project()
+        project.add_foundation_design(FoundationDesign("FD-1", "Pad", FoundationType.SHALLOW, project.id,
+                                                       design_parameters={'width': 2.0},
+                                                       created_date=datetime(2026, 2, 1)))
+        history = DesignHistory()
+        history.commit(project, "Initial", timestamp=datetime(2026, 2, 1))
+
+        project.foundation_designs[0].design_parameters['width'] = 2.5
+        project.soil_investigations[0].boreholes[0].layers[0].cohesion = 8.0
+        history.commit(project, "Wider pad")
+
+        old = history.open(0)
+        design = old.design("FD-1")
+        self.assertEqual(design.design_parameters, {'width': 2.0})
+        self.assertEqual(design.created_date, datetime(2026, 2, 1))
+        design.design_parameters['width'] = 9.0
+        self.assertEqual(history.open(0).design("FD-1").design_parameters, {'width': 2.0})
+
+        investigation = old.investigation("SI-001")
+        self.assertEqual(investigation.boreholes[0].layers[0].cohesion, 5.0)
+        self.assertEqual(investigation.boreholes[0].layers[0].soil_type, SoilType.FILL)
+        self.assertEqual(investigation.to_dict()['boreholes'][0]['layers'][1],
+                         project.soil_investigations[0].boreholes[0].layers[1].to_dict())
+        self.assertEqual(history.open().investigation("SI-001").to_dict(), project.soil_investigations[0].to_dict())
+
+        restored = old.restore(create_example_project())
+        self.assertEqual(restored.foundation_designs[0].design_parameters['width'], 2.0)
+        with self.assertRaises(ValueError):
+            old.design("FD-2")
+        with self.assertRaises(ValueError):
+            history.open(2)
+
+
+class TestDiff(unittest.TestCase):
+    """Test differences between revisions."""
+
+    def test_paths(self):
+        """Test added, removed and modified investigations, boreholes, layers and designs."""
+        project = create_example_project()
+        project.add_foundation_design(FoundationDesign("FD-1", "Pad", FoundationType.SHALLOW, project.id,
+                                                       design_parameters={'width': 2.0, 'depth': 1.0}))
+        history = DesignHistory()
+        history.commit(project)
+
+        borehole = project.soil_investigations[0].boreholes[0]
+        borehole.water_level = 4.0
+        borehole.layers[2].friction_angle = 24.0
+        borehole.add_layer(SoilLayer(15.0, 18.0, SoilType.ROCK))
+        project.foundation_designs[0].design_parameters['width'] = 2.5
+        project.foundation_designs[0].safety_factor = 3.2
+        project.add_foundation_design(FoundationDesign("FD-2", "Pile", FoundationType.DEEP_PILE, project.id))
+        history.commit(project)
+        project.foundation_designs.pop(0)
+        history.commit(project)
+
+        self.assertEqual(history.diff(0, 1), [
+            Change(INVESTIGATION, "SI-001", MODIFIED, ("boreholes[BH-01].water_level",
+                                                       "boreholes[BH-01].layers[2].friction_angle",
+                                                       "boreholes[BH-01].layers[4]")),
+            Change(DESIGN, "FD-1", MODIFIED, ("design_parameters.width", "safety_factor")),
+            Change(DESIGN, "FD-2", ADDED),
+        ])
+        self.assertEqual(history.diff(1), [Change(DESIGN, "FD-1", REMOVED)])
+        self.assertEqual(history.diff(2, 2), [])
+
+
+class TestStorage(unittest.TestCase):
+    """Test saving histories."""
+
+    def test_save_and_load(self):
+        """Test that a loaded history reopens and diffs like the original."""
+        project = generate_project(boreholes=5, designs=3)
+        history = DesignHistory()
+        history.commit(project, "Initial", timestamp=datetime(2026, 3, 1, 12, 0))
+        project.soil_investigations[0].boreholes.pop()
+        history.commit(project, "Borehole withdrawn")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.json")
+            history.save(path)
+            loaded = DesignHistory.load(path)
+
+        self.assertEqual(loaded.revisions, history.revisions)
+        self.assertEqual(loaded.diff(0), history.diff(0))
+        self.assertEqual(loaded.open(0).investigation("SI-SYN-001").to_dict(),
+                         history.open(0).investigation("SI-SYN-001").to_dict())
+        with self.assertRaises(ValueError):
+            DesignHistory.from_dict(dict(history.to_dict(), version=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
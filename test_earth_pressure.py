@@ -0,0 +1,156 @@
+"""
+Unit tests for layered earth pressure profiles.
+
+Tests compare layered diagrams with closed-form Rankine results, tension
+cracks in cohesive soil and hydrostatic water pressure.
+"""
+
+import unittest
+
+import numpy as np
+
+from app import RetainingWallCalculator
+from project_models import Borehole, SoilLayer, SoilType
+from earth_pressure import (
+    GAMMA_WATER,
+    RESULTANT_CACHE_SIZE,
+    VerticalStressProfile,
+    profiles_along_alignment
+)
+
+
+def make_borehole(layers, water_level=None, borehole_id="BH-01"):
+    """Create a borehole from (top, bottom, γ, c, φ) tuples."""
+    borehole = Borehole(id=borehole_id, name=borehole_id, location_x=0.0, location_y=0.0,
+                        water_level=water_level)
+    for top, bottom, unit_weight, cohesion, friction_angle in layers:
+        borehole.add_layer(SoilLayer(
+            depth_top=top,
+            depth_bottom=bottom,
+            soil_type=SoilType.CLAY if cohesion else SoilType.SAND,
+            unit_weight=unit_weight,
+            cohesion=cohesion,
+            friction_angle=friction_angle
+        ))
+    return borehole
+
+
+class TestEarthPressureDiagram(unittest.TestCase):
+    """Test earth pressure diagrams built from borehole layers."""
+
+    def test_single_layer_matches_rankine_force(self):
+        """Test a dry single layer against calculate_total_active_force."""
+        borehole = make_borehole([(0.0, 10.0, 18.0, 0.0, 30.0)])
+        profile = VerticalStressProfile.from_borehole(borehole)
+
+        for surcharge in (0.0, 10.0):
+            diagram = profile.diagram(5.0, surcharge=surcharge)
+            Fa, location = RetainingWallCalculator.calculate_total_active_force(5.0, 18.0, 30.0, 0.0, surcharge)
+            self.assertAlmostEqual(diagram.force, Fa, places=6)
+            self.assertAlmostEqual(diagram.location, location, places=6)
+
+    def test_tension_crack_in_clay(self):
+        """Test that the tension crack depth is 2c/γ for φ = 0."""
+        borehole = make_borehole([(0.0, 10.0, 18.0, 20.0, 0.0)])
+        diagram = VerticalStressProfile.from_borehole(borehole).diagram(5.0)
+
+        crack_depth = 2 * 20.0 / 18.0
+        base_pressure = 18.0 * 5.0 - 2 * 20.0
+
+        self.assertAlmostEqual(diagram.pressure_at(crack_depth / 2)[0], 0.0)
+        self.assertAlmostEqual(diagram.pressure_at(5.0)[0], base_pressure, places=6)
+        self.assertAlmostEqual(diagram.force, 0.5 * base_pressure * (5.0 - crack_depth), places=6)
+        self.assertAlmostEqual(diagram.location, (5.0 - crack_depth) / 3, places=6)
+
+    def test_water_table(self):
+        """Test effective and water pressures below the water table."""
+        borehole = make_borehole([(0.0, 10.0, 20.0, 0.0, 30.0)], water_level=2.0)
+        diagram = VerticalStressProfile.from_borehole(borehole).diagram(6.0)
+
+        Ka = RetainingWallCalculator.calculate_active_earth_pressure_coefficient(30.0)
+        sigma_2 = 20.0 * 2.0
+        sigma_6 = sigma_2 + (20.0 - GAMMA_WATER) * 4.0
+        expected_effective = 0.5 * Ka * sigma_2 * 2.0 + Ka * (sigma_2 + sigma_6) / 2 * 4.0
+        expected_water = 0.5 * GAMMA_WATER * 4.0 * 4.0
+
+        self.assertAlmostEqual(diagram.effective_force, expected_effective, places=6)
+        self.assertAlmostEqual(diagram.water_force, expected_water, places=6)
+        self.assertAlmostEqual(diagram.pressure_at(6.0)[1], GAMMA_WATER * 4.0, places=6)
+
+    def test_layer_boundary_jump(self):
+        """Test the pressure jump at the boundary between layers with different Ka."""
+        borehole = make_borehole([(0.0, 3.0, 18.0, 0.0, 30.0), (3.0, 8.0, 19.0, 0.0, 36.0)])
+        diagram = VerticalStressProfile.from_borehole(borehole).diagram(8.0)
+
+        Ka_lower = RetainingWallCalculator.calculate_active_earth_pressure_coefficient(36.0)
+        self.assertAlmostEqual(diagram.pressure_at(3.0)[0], Ka_lower * 18.0 * 3.0, places=6)
+        self.assertAlmostEqual(diagram.effective_top[1], Ka_lower * 54.0, places=6)
+        self.assertAlmostEqual(diagram.effective_bottom[0], 54.0 / 3.0, places=6)
+
+    def test_passive_exceeds_active(self):
+        """Test that the passive diagram exceeds the active diagram."""
+        borehole = make_borehole([(0.0, 10.0, 18.0, 10.0, 28.0)])
+        profile = VerticalStressProfile.from_borehole(borehole)
+
+        self.assertGreater(profile.diagram(4.0, side="passive").force, profile.diagram(4.0).force)
+
+    def test_invalid_inputs(self):
+        """Test rejection of invalid heights, sides and layer gaps."""
+        profile = VerticalStressProfile.from_borehole(make_borehole([(0.0, 5.0, 18.0, 0.0, 30.0)]))
+        with self.assertRaises(ValueError):
+            profile.diagram(6.0)
+        with self.assertRaises(ValueError):
+            profile.diagram(3.0, side="sideways")
+        with self.assertRaises(ValueError):
+            VerticalStressProfile.from_borehole(make_borehole([(1.0, 5.0, 18.0, 0.0, 30.0)]))
+
+
+class TestResultants(unittest.TestCase):
+    """Test vectorized resultants over many wall heights."""
+
+    def setUp(self):
+        self.borehole = make_borehole(
+            [(0.0, 2.0, 18.0, 5.0, 28.0), (2.0, 6.0, 19.0, 0.0, 32.0), (6.0, 12.0, 20.0, 40.0, 22.0)],
+            water_level=3.5
+        )
+        self.profile = VerticalStressProfile.from_borehole(self.borehole)
+
+    def test_resultants_match_diagrams(self):
+        """Test that cumulative resultants equal the integrated diagrams."""
+        heights = np.array([0.5, 2.0, 3.5, 4.2, 6.0, 9.7, 12.0])
+        force, location = self.profile.resultants(heights, surcharge=10.0)
+
+        for H, F, z in zip(heights, force, location):
+            diagram = self.profile.diagram(H, surcharge=10.0)
+            self.assertAlmostEqual(F, diagram.force, places=6)
+            self.assertAlmostEqual(z, diagram.location, places=6)
+
+    def test_profile_is_cached_per_borehole(self):
+        """Test that an unchanged borehole reuses its stress profile."""
+        self.assertIs(VerticalStressProfile.from_borehole(self.borehole), self.profile)
+
+        self.borehole.water_level = 5.0
+        self.assertIsNot(VerticalStressProfile.from_borehole(self.borehole), self.profile)
+
+    def test_shared_profile_is_bounded_and_read_only(self):
+        """Test that a cached profile keeps a bounded number of resultants and cannot be modified."""
+        for surcharge in range(RESULTANT_CACHE_SIZE + 10):
+            self.profile.resultants(4.0, surcharge=float(surcharge))
+        self.assertEqual(len(self.profile._resultant_cache), RESULTANT_CACHE_SIZE)
+        with self.assertRaises(ValueError):
+            self.profile.sigma_top[0] = 1.0
+
+    def test_alignment(self):
+        """Test resultants per chainage along an alignment with two boreholes."""
+        other = make_borehole([(0.0, 10.0, 18.0, 0.0, 30.0)], borehole_id="BH-02")
+        force, location = profiles_along_alignment(
+            [self.borehole, other], [0, 1, 0, 1], [4.0, 4.0, 6.0, 5.0]
+        )
+
+        self.assertAlmostEqual(force[0], self.profile.diagram(4.0).force, places=6)
+        self.assertAlmostEqual(force[3], 0.5 * 18.0 * 25.0 / 3.0, places=6)
+        self.assertAlmostEqual(location[3], 5.0 / 3.0, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
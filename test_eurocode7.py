@@ -0,0 +1,106 @@
+"""
+Unit tests for the Eurocode 7 design approaches.
+
+Tests check the batched evaluation of all design approaches against
+single-approach calculations with the same partial factors.
+"""
+
+import math
+import unittest
+
+import numpy as np
+
+from app import DeepFoundationCalculator
+from eurocode7 import (
+    DA1_2,
+    DA2,
+    DA3,
+    M2,
+    PILE_MODEL_FACTOR,
+    design_soil_parameters,
+    evaluate_footings_ec7,
+    evaluate_piles_ec7
+)
+from load_combinations import VARIABLE, Action, evaluate_footings, generate_combinations
+
+
+ACTIONS = [Action("G"), Action("Q", VARIABLE)]
+
+
+class TestDesignSoilParameters(unittest.TestCase):
+    """Test material factors."""
+
+    def test_m2_factors(self):
+        """Test M2 on tan φ', c' and cu."""
+        phi_d, c_d, gamma_d = design_soil_parameters([30.0, 0.0], [10.0, 70.0], [18.0, 18.0], M2)
+
+        self.assertAlmostEqual(phi_d[0], math.degrees(math.atan(math.tan(math.radians(30.0)) / 1.25)))
+        self.assertAlmostEqual(c_d[0], 8.0)
+        self.assertAlmostEqual(c_d[1], 50.0)
+        self.assertAlmostEqual(gamma_d[1], 18.0)
+
+
+class TestFootingsEC7(unittest.TestCase):
+    """Test footing checks in all design approaches."""
+
+    def setUp(self):
+        self.footings = dict(width=[2.0, 2.5], length=[2.0, 3.0], depth=[1.0, 1.2], unit_weight=[18.0, 19.0],
+                             cohesion=[0.0, 60.0], friction_angle=[30.0, 0.0])
+        self.vertical = np.array([[600.0, 200.0], [700.0, 300.0]])
+        self.horizontal = np.array([[0.0, 60.0], [0.0, 0.0]])
+
+    def test_matches_single_approach(self):
+        """Test each row of the batched matrix against evaluate_footings."""
+        result = evaluate_footings_ec7(ACTIONS, vertical=self.vertical, horizontal=self.horizontal,
+                                       **self.footings)
+        self.assertEqual(result.utilisation.shape, (4, 2))
+        self.assertEqual(result.approaches, ["DA1-1", "DA1-2", "DA2", "DA3"])
+
+        for row, approach in ((1, DA1_2), (2, DA2), (3, DA3)):
+            phi_d, c_d, gamma_d = design_soil_parameters(self.footings["friction_angle"], self.footings["cohesion"],
+                                                         self.footings["unit_weight"], approach.materials)
+            single = evaluate_footings(
+                generate_combinations(ACTIONS, approach.actions), self.footings["width"], self.footings["length"],
+                self.footings["depth"], gamma_d, c_d, phi_d, self.vertical, self.horizontal,
+                resistance_factor=approach.bearing_resistance)
+            np.testing.assert_allclose(result.utilisation[row], single.governing_utilisation)
+            self.assertEqual(result.governing_combinations[row], single.governing_labels())
+
+    def test_governing_approach(self):
+        """Test the per-element summary of design approaches."""
+        result = evaluate_footings_ec7(ACTIONS, vertical=self.vertical, **self.footings)
+        summary = result.to_dict(1)
+
+        self.assertEqual(set(summary), set(result.approaches))
+        governing = result.governing_approach[1]
+        self.assertEqual(summary[governing]["utilisation"], max(v["utilisation"] for v in summary.values()))
+        # DA1-1 has no factors on resistance or materials, so it never governs
+        self.assertNotIn("DA1-1", result.governing_approach)
+
+
+class TestPilesEC7(unittest.TestCase):
+    """Test pile checks in all design approaches."""
+
+    def test_design_resistance(self):
+        """Test DA2 against a hand calculation with γb = γs = 1.1 and the model factor."""
+        result = evaluate_piles_ec7(ACTIONS, [0.6], [15.0], [18.0], [32.0], [0.0], ["driven"], [[800.0, 300.0]])
+
+        _, _, Qb, Qs = DeepFoundationCalculator.calculate_pile_capacity(0.6, 15.0, 18.0, 32.0, 0.0, "driven")
+        Rd = (Qb + Qs) / 1.1 / PILE_MODEL_FACTOR
+        self.assertAlmostEqual(result.utilisation[2, 0], (1.35 * 800 + 1.5 * 300) / Rd)
+        self.assertEqual(result.governing_combinations[2][0], "1.35·G + 1.50·Q")
+
+    def test_bored_piles_are_penalised(self):
+        """Test that bored piles get higher base factors in DA1."""
+        result = evaluate_piles_ec7(ACTIONS, [0.6, 0.6], [15.0, 15.0], [18.0, 18.0], [32.0, 32.0], [0.0, 0.0],
+                                    ["driven", "bored"], [[800.0, 300.0], [800.0, 300.0]])
+        self.assertTrue(np.all(result.utilisation[:2, 1] > result.utilisation[:2, 0]))
+
+    def test_unknown_pile_type(self):
+        """Test that a pile type without resistance factors is rejected."""
+        with self.assertRaises(ValueError):
+            evaluate_piles_ec7(ACTIONS, [0.6], [15.0], [18.0], [32.0], [0.0], ["screw"], [[800.0, 300.0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
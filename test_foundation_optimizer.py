@@ -0,0 +1,122 @@
+"""
+Unit tests for the foundation optimizer.
+
+Tests check candidate evaluation against the calculators, the constrained
+Pareto ranking, and that optimization finds a front close to the brute-force
+optimum, reproducibly and identically with worker processes.
+"""
+
+import unittest
+
+import numpy as np
+
+from app import DeepFoundationCalculator, ShallowFoundationCalculator
+from foundation_optimizer import (CandidateCache, CostModel, evaluate, footing_problem, nondominated_ranks, optimize,
+                                  pile_group_problem, wall_problem)
+from wall_stability import RetainingWallStabilityCalculator
+
+
+class TestEvaluate(unittest.TestCase):
+    """Test candidate evaluation."""
+
+    def test_footing(self):
+        """Test the bearing safety factor and cost of footings."""
+        problem = footing_problem(1500.0, 18.0, 5.0, 32.0)
+        result = evaluate(problem, [[2.0, 2.5, 1.0], [1.0, 1.0, 0.5]])
+
+        qu = ShallowFoundationCalculator.calculate_ultimate_bearing_capacity(2.0, 2.5, 1.0, 18.0, 5.0, 32.0)
+        self.assertAlmostEqual(result['bearing_fs'][0], qu * 2.0 * 2.5 / 1500.0)
+        self.assertAlmostEqual(result['margin'][0], result['bearing_fs'][0] / 3.0)
+        self.assertAlmostEqual(result['concrete'][0], 2.0 * 2.5 * 0.5)
+        costs = CostModel()
+        self.assertAlmostEqual(result['cost'][1], 0.3 * costs.concrete + 0.3 * 0.008 * 7850.0 * costs.steel
+                               + 0.5 * costs.excavation)
+
+    def test_pile_group(self):
+        """Test the group safety factor against the single pile capacity and group efficiency."""
+        problem = pile_group_problem(6000.0, 18.0, 5.0, 30.0, pile_type="driven")
+        result = evaluate(problem, [[0.6, 20.0, 4.0], [0.6, 20.0, 1.0]])
+
+        Qu = DeepFoundationCalculator.calculate_pile_capacity(0.6, 20.0, 18.0, 30.0, 5.0, "driven")[0]
+        efficiency = DeepFoundationCalculator.calculate_pile_group_efficiency(4, 1.8, 0.6)
+        self.assertAlmostEqual(result['group_fs'][0], 4 * efficiency * Qu / 6000.0)
+        self.assertAlmostEqual(result['group_fs'][1], Qu / 6000.0)
+        with self.assertRaises(ValueError):
+            pile_group_problem(6000.0, 18.0, 5.0, 30.0, pile_type="screwed")
+
+    def test_wall(self):
+        """Test the governing margin of walls and the penalty for impossible geometry."""
+        problem = wall_problem(4.0, 18.0, 30.0, surcharge=10.0)
+        result = evaluate(problem, [[0.3, 3.0, 0.5, 0.8], [0.3, 1.0, 0.5, 0.8]])
+
+        expected = RetainingWallStabilityCalculator.calculate_stability(4.0, 0.3, 3.0, 0.5, 0.8, 18.0, 30.0, 10.0)
+        self.assertAlmostEqual(result['sliding_fs'][0], float(expected.sliding_fs))
+        self.assertAlmostEqual(result['margin'][0], min(float(expected.sliding_fs) / 1.5,
+                                                        float(expected.overturning_fs) / 2.0,
+                                                        float(expected.bearing_fs) / 3.0))
+        self.assertLess(result['margin'][1], 0.0)
+        self.assertAlmostEqual(result['concrete'][0], 0.3 * 4.0 + 3.0 * 0.5)
+
+    def test_cache(self):
+        """Test that repeated candidates are evaluated once."""
+        cache = CandidateCache(footing_problem(1500.0, 18.0, 5.0, 32.0))
+        first = cache(np.array([[2.0, 2.0, 1.0], [2.0, 2.0, 1.0], [3.0, 2.0, 1.0]]))
+        second = cache(np.array([[3.0, 2.0, 1.0]]))
+        self.assertEqual((cache.evaluations, cache.hits), (2, 2))
+        self.assertEqual(second['cost'][0], first['cost'][2])
+
+
+class TestRanking(unittest.TestCase):
+    """Test constrained non-dominated sorting."""
+
+    def test_ranks(self):
+        """Test fronts with feasible and infeasible candidates."""
+        cost = np.array([1.0, 2.0, 3.0, 2.5, 0.5, 0.4])
+        margin = np.array([1.2, 1.5, 1.4, 2.0, 0.9, 0.5])
+        np.testing.assert_array_equal(nondominated_ranks(cost, margin), [0, 0, 1, 0, 2, 3])
+        self.assertEqual(nondominated_ranks(np.array([1.0, 1.0]), np.array([1.0, 1.0])).tolist(), [0, 0])
+
+
+class TestOptimize(unittest.TestCase):
+    """Test the optimizer."""
+
+    def test_footing_front(self):
+        """Test the front against a brute-force search over all footings."""
+        problem = footing_problem(1500.0, 18.0, 5.0, 32.0)
+        result = optimize(problem, population=48, generations=40, seed=1)
+
+        grid = np.stack(np.meshgrid(np.arange(0.5, 5.001, 0.05), np.arange(0.5, 5.001, 0.05),
+                                    np.arange(0.5, 3.001, 0.1), indexing='ij'), axis=-1).reshape(-1, 3)
+        brute = evaluate(problem, grid)
+        optimum = brute['cost'][brute['margin'] >= 1.0].min()
+
+        costs = [candidate.cost for candidate in result.pareto]
+        margins = [candidate.safety_margin for candidate in result.pareto]
+        self.assertEqual(costs, sorted(costs))
+        self.assertTrue(all(np.diff(margins) > 0))
+        self.assertGreaterEqual(min(margins), 1.0)
+        self.assertLess(margins[-2], 2.0)
+        self.assertLess(result.cheapest().cost, 1.05 * optimum)
+        self.assertGreater(result.cache_hits, 0)
+        self.assertIsNone(result.cheapest(min_margin=1e6))
+
+    def test_reproducible_and_parallel(self):
+        """Test that a seed fixes the result and workers do not change it."""
+        problem = pile_group_problem(6000.0, 18.0, 5.0, 30.0)
+        serial = optimize(problem, population=32, generations=8, seed=3)
+        parallel = optimize(problem, population=32, generations=8, seed=3, workers=2)
+        self.assertEqual(serial.to_dict()['pareto'], parallel.to_dict()['pareto'])
+        self.assertTrue(all(candidate.variables['pile_count'] == int(candidate.variables['pile_count'])
+                            for candidate in serial.pareto))
+
+    def test_wall_front(self):
+        """Test that wall sections on the front are stable and constructible."""
+        result = optimize(wall_problem(4.0, 18.0, 30.0, surcharge=10.0), population=32, generations=20)
+        for candidate in result.pareto:
+            v = candidate.variables
+            self.assertLessEqual(v['toe_length'] + v['stem_thickness'], v['base_width'] + 1e-9)
+            self.assertGreaterEqual(candidate.checks['sliding_fs'], 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
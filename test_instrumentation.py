@@ -0,0 +1,112 @@
+"""
+Unit tests for the call instrumentation.
+
+Tests check the recorded counts, percentiles and batch sizes, both export
+formats, and that the calculators are only wrapped when ENGIPIT_INSTRUMENT is
+set before they are imported.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+import instrumentation
+from app import ShallowFoundationCalculator
+from instrumentation import CallStats, Registry, batch_size, wrap
+
+
+class TestCallStats(unittest.TestCase):
+    """Test the per-function metrics."""
+
+    def test_percentiles(self):
+        """Test that percentiles come from the histogram buckets."""
+        stats = CallStats()
+        for _ in range(98):
+            stats.record(1.5e-6, 1)
+        stats.record(3e-3, 10)
+        stats.record(0.1, 10, failed=True)
+
+        self.assertEqual(stats.count, 100)
+        self.assertEqual(stats.percentile(50), 2e-6)
+        self.assertGreater(stats.percentile(99), 2e-3)
+        self.assertEqual(stats.percentile(100), 0.1)
+        self.assertEqual((stats.items, stats.max_batch, stats.errors), (118, 10, 1))
+        self.assertAlmostEqual(stats.to_dict()['mean_batch'], 1.18)
+
+    def test_empty(self):
+        """Test metrics without calls."""
+        self.assertEqual(CallStats().to_dict()['p99'], 0.0)
+        self.assertEqual(CallStats().to_dict()['min_time'], 0.0)
+
+
+class TestWrap(unittest.TestCase):
+    """Test wrapped functions and the exports."""
+
+    def setUp(self):
+        self.registry = Registry()
+        self.add = wrap(lambda a, b=0: a + b, name="add", registry=self.registry)
+
+    def test_calls_and_batches(self):
+        """Test that calls, array sizes and errors are recorded."""
+        self.add(1, b=2)
+        self.add(np.ones(50), b=np.ones(50))
+        with self.assertRaises(TypeError):
+            self.add("a", 1)
+
+        stats = self.registry.stats("add")
+        self.assertEqual((stats.count, stats.items, stats.max_batch, stats.errors), (3, 52, 50, 1))
+        self.assertIsNone(self.registry.stats("other"))
+        self.assertEqual(batch_size((2.0, (0.0, 5.0), [1, 2, 3]), {}), 3)
+
+    def test_exports(self):
+        """Test the JSON and Prometheus exports."""
+        self.add(1)
+        self.add(2)
+
+        document = json.loads(self.registry.to_json())
+        self.assertEqual(document['functions']['add']['count'], 2)
+
+        text = self.registry.to_prometheus()
+        self.assertIn('engipit_call_seconds_count{function="add"} 2', text)
+        self.assertIn('engipit_call_seconds_bucket{function="add",le="+Inf"} 2', text)
+        self.assertIn('engipit_batch_items_total{function="add"} 2', text)
+        self.assertTrue(text.endswith("\n"))
+
+        self.registry.reset()
+        self.assertEqual(self.registry.to_dict()['functions'], {})
+
+
+class TestSwitch(unittest.TestCase):
+    """Test switching instrumentation on and off through the environment."""
+
+    @unittest.skipIf(instrumentation.ENABLED, "instrumentation is enabled for this run")
+    def test_disabled_leaves_functions_alone(self):
+        """Test that nothing is wrapped without ENGIPIT_INSTRUMENT."""
+        self.assertFalse(hasattr(ShallowFoundationCalculator.calculate_bearing_capacity_factors, '__wrapped__'))
+
+    def test_enabled_writes_metrics_at_exit(self):
+        """Test a process with ENGIPIT_INSTRUMENT=1 writing its metrics."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "metrics.json")
+            environment = dict(os.environ, ENGIPIT_INSTRUMENT="1", ENGIPIT_INSTRUMENT_OUTPUT=output)
+            script = ("from app import ShallowFoundationCalculator as S\n"
+                      "for phi in range(20, 40): S.calculate_bearing_capacity_factors(phi)\n")
+            subprocess.run([sys.executable, "-c", script], env=environment, check=True,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+
+            with open(output) as handle:
+                document = json.load(handle)
+
+        self.assertTrue(document['enabled'])
+        stats = document['functions']['app.ShallowFoundationCalculator.calculate_bearing_capacity_factors']
+        self.assertEqual(stats['count'], 20)
+        self.assertGreater(stats['p99'], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
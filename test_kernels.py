@@ -0,0 +1,150 @@
+"""
+Unit tests for the compiled kernels.
+
+Tests check that every backend reproduces the scalar calculators of app.py,
+that the scalar formulas compiled by Numba equal the NumPy backend, and the
+runtime backend selection. Numba tests are skipped when it is not installed.
+"""
+
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import kernels
+from app import DeepFoundationCalculator, RetainingWallCalculator, ShallowFoundationCalculator
+from kernels import NUMBA, NUMPY, bearing_capacity_factors, pile_capacity, total_active_force, ultimate_bearing_capacity
+
+FRICTION_ANGLES = np.array([0.0, 5.0, 20.0, 28.5, 30.0, 36.0, 45.0])
+PILES = [(0.6, 15.0, 18.0, 32.0, 0.0, "driven"), (0.4, 10.0, 19.0, 28.0, 10.0, "bored"),
+         (1.2, 25.0, 20.0, 35.0, 2.0, "driven"), (0.5, 8.0, 17.0, 0.0, 40.0, "bored")]
+WALLS = [(4.0, 18.0, 30.0, 0.0, 10.0), (6.5, 19.0, 34.0, 5.0, 0.0), (2.0, 17.0, 25.0, 0.0, 20.0)]
+
+
+class BackendTests:
+    """Equivalence with app.py, run for each backend."""
+
+    backend = NUMPY
+
+    def test_bearing_capacity_factors(self):
+        """Test Nc, Nq and Nγ against calculate_bearing_capacity_factors."""
+        Nc, Nq, Ngamma = bearing_capacity_factors(FRICTION_ANGLES, backend=self.backend)
+        for i, phi in enumerate(FRICTION_ANGLES):
+            expected = ShallowFoundationCalculator.calculate_bearing_capacity_factors(phi)
+            np.testing.assert_allclose((Nc[i], Nq[i], Ngamma[i]), expected, rtol=1e-12)
+
+    def test_ultimate_bearing_capacity(self):
+        """Test footings against calculate_ultimate_bearing_capacity, with broadcasting."""
+        widths = np.array([[1.0], [2.5]])
+        qu = ultimate_bearing_capacity(widths, 2.0, 1.2, 18.0, 5.0, FRICTION_ANGLES, backend=self.backend)
+        self.assertEqual(qu.shape, (2, FRICTION_ANGLES.size))
+        for i, phi in enumerate(FRICTION_ANGLES):
+            expected = ShallowFoundationCalculator.calculate_ultimate_bearing_capacity(2.5, 2.0, 1.2, 18.0, 5.0, phi)
+            self.assertAlmostEqual(qu[1, i] / expected, 1.0, places=12)
+
+    def test_pile_capacity(self):
+        """Test piles against calculate_pile_capacity, with broadcasting."""
+        columns = [np.array(column) for column in zip(*PILES)]
+        results = pile_capacity(*columns, factor_of_safety=3.0, backend=self.backend)
+        for i, pile in enumerate(PILES):
+            expected = DeepFoundationCalculator.calculate_pile_capacity(*pile, factor_of_safety=3.0)
+            np.testing.assert_allclose([result[i] for result in results], expected, rtol=1e-12)
+
+        Qu = pile_capacity(0.6, np.array([[10.0], [20.0]]), 18.0, np.array([28.0, 32.0]), 0.0, "driven",
+                           backend=self.backend)[0]
+        self.assertEqual(Qu.shape, (2, 2))
+        self.assertAlmostEqual(Qu[1, 0], DeepFoundationCalculator.calculate_pile_capacity(
+            0.6, 20.0, 18.0, 28.0, 0.0, "driven")[0])
+
+    def test_total_active_force(self):
+        """Test walls against calculate_total_active_force."""
+        columns = [np.array(column) for column in zip(*WALLS)]
+        force, location = total_active_force(*columns, backend=self.backend)
+        for i, wall in enumerate(WALLS):
+            expected = RetainingWallCalculator.calculate_total_active_force(*wall)
+            np.testing.assert_allclose((force[i], location[i]), expected, rtol=1e-12)
+
+
+class TestNumpyBackend(BackendTests, unittest.TestCase):
+    """Test the NumPy backend."""
+
+    backend = NUMPY
+
+    def test_scalar_formulas(self):
+        """Test that the scalar formulas compiled by Numba equal the NumPy backend."""
+        for name, (function, arity) in kernels._SCALAR_KERNELS.items():
+            self.assertEqual(function.__code__.co_argcount, arity, name)
+
+        Nc, Nq, Ngamma = bearing_capacity_factors(FRICTION_ANGLES, backend=NUMPY)
+        np.testing.assert_allclose(np.vectorize(kernels._terzaghi_nc)(FRICTION_ANGLES), Nc, rtol=1e-12)
+        np.testing.assert_allclose(np.vectorize(kernels._terzaghi_nq)(FRICTION_ANGLES), Nq, rtol=1e-12)
+        np.testing.assert_allclose(np.vectorize(kernels._terzaghi_ngamma)(FRICTION_ANGLES), Ngamma, rtol=1e-12)
+
+        D, L, gamma, phi, c, pile_type = [np.array(column) for column in zip(*PILES)]
+        _, _, Qb, Qs = pile_capacity(D, L, gamma, phi, c, pile_type, backend=NUMPY)
+        np.testing.assert_allclose(np.vectorize(kernels._end_bearing)(D, L, gamma, phi, c), Qb, rtol=1e-12)
+        np.testing.assert_allclose(np.vectorize(kernels._skin_friction)(D, L, gamma, phi, c, pile_type == "driven"),
+                                   Qs, rtol=1e-12)
+
+        H, gamma, phi, _, q = [np.array(column) for column in zip(*WALLS)]
+        force, location = total_active_force(H, gamma, phi, 0.0, q, backend=NUMPY)
+        np.testing.assert_allclose(np.vectorize(kernels._active_force)(H, gamma, phi, q), force, rtol=1e-12)
+        np.testing.assert_allclose(np.vectorize(kernels._active_force_location)(H, gamma, phi, q), location,
+                                   rtol=1e-12)
+
+        B, D, c = np.array([1.0, 2.0, 3.0, 1.5, 0.8, 2.2, 4.0]), 1.5, 8.0
+        np.testing.assert_allclose(np.vectorize(kernels._ultimate_bearing)(B, D, 18.0, c, FRICTION_ANGLES),
+                                   ultimate_bearing_capacity(B, 0.0, D, 18.0, c, FRICTION_ANGLES, backend=NUMPY),
+                                   rtol=1e-12)
+
+
+@unittest.skipUnless(kernels.numba_available(), "numba is not installed")
+class TestNumbaBackend(BackendTests, unittest.TestCase):
+    """Test the Numba backend."""
+
+    backend = NUMBA
+
+    def test_matches_numpy_on_a_sweep(self):
+        """Test a large sweep against the NumPy backend."""
+        phi = np.linspace(0.0, 45.0, 100001)
+        for numba_result, numpy_result in zip(bearing_capacity_factors(phi, backend=NUMBA),
+                                              bearing_capacity_factors(phi, backend=NUMPY)):
+            np.testing.assert_allclose(numba_result, numpy_result, rtol=1e-12)
+
+
+class TestBackendSelection(unittest.TestCase):
+    """Test selecting the backend at runtime."""
+
+    def tearDown(self):
+        kernels.set_backend(None)
+
+    def test_default(self):
+        """Test that Numba is the default when installed and NumPy otherwise."""
+        with mock.patch.dict(os.environ, {kernels.ENV_VARIABLE: ""}):
+            self.assertEqual(kernels.get_backend(), NUMBA if kernels.numba_available() else NUMPY)
+        self.assertIn(NUMPY, kernels.available_backends())
+
+    def test_environment_and_set_backend(self):
+        """Test ENGIPIT_KERNELS and set_backend."""
+        with mock.patch.dict(os.environ, {kernels.ENV_VARIABLE: "NumPy"}):
+            self.assertEqual(kernels.get_backend(), NUMPY)
+        kernels.set_backend(NUMPY)
+        self.assertEqual(kernels.get_backend(), NUMPY)
+        with self.assertRaises(ValueError):
+            kernels.set_backend("cython")
+        with self.assertRaises(ValueError):
+            bearing_capacity_factors(30.0, backend="fortran")
+
+    @unittest.skipIf(kernels.numba_available(), "numba is installed")
+    def test_numba_missing(self):
+        """Test that asking for Numba without it installed is an error."""
+        with self.assertRaises(ValueError):
+            kernels.set_backend(NUMBA)
+        with mock.patch.dict(os.environ, {kernels.ENV_VARIABLE: NUMBA}):
+            with self.assertRaises(ValueError):
+                kernels.get_backend()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for the load combination engine.
+
+Tests check the generated combination matrix and the evaluation of
+footings and piles against single-combination calculations.
+"""
+
+import unittest
+
+import numpy as np
+
+from app import DeepFoundationCalculator
+from bearing_capacity import BearingCapacityEngine
+from load_combinations import (
+    PERMANENT,
+    VARIABLE,
+    Action,
+    PartialFactors,
+    evaluate_footings,
+    evaluate_piles,
+    generate_combinations
+)
+
+
+def _actions():
+    return [
+        Action("G", PERMANENT),
+        Action("Q1", VARIABLE, psi0=0.7),
+        Action("Q2", VARIABLE, psi0=0.6),
+    ]
+
+
+class TestGenerateCombinations(unittest.TestCase):
+    """Test the combination matrix."""
+
+    def test_combination_count(self):
+        """Test 2 permanent options × (1 + 2 leading × 2 accompanying) rows."""
+        combinations = generate_combinations(_actions())
+
+        self.assertEqual(combinations.factors.shape, (10, 3))
+        self.assertEqual(len(combinations), 10)
+        self.assertIn("1.35·G + 1.50·Q1 + 0.90·Q2", combinations.labels)
+        self.assertIn("1.00·G", combinations.labels)
+
+    def test_large_set(self):
+        """Test that a realistic set of actions produces 50-200 combinations."""
+        actions = [Action("G1"), Action("G2")] + [Action(f"Q{i}", VARIABLE) for i in range(4)]
+        combinations = generate_combinations(actions)
+
+        self.assertEqual(len(combinations), 4 * (1 + 4 * 8))
+        self.assertEqual(len(np.unique(combinations.factors, axis=0)), len(combinations))
+
+    def test_custom_partial_factors(self):
+        """Test that custom partial factors are used."""
+        combinations = generate_combinations([Action("G")], PartialFactors(1.0, 1.0, 1.3))
+        np.testing.assert_allclose(combinations.factors, [[1.0]])
+
+    def test_design_values(self):
+        """Test combining characteristic effects by matrix product."""
+        combinations = generate_combinations(_actions())
+        loads = np.array([[100.0, 50.0, 20.0], [200.0, 0.0, 40.0]])
+        design = combinations.design_values(loads)
+
+        self.assertEqual(design.shape, (2, 10))
+        self.assertAlmostEqual(design.max(axis=1)[0], 1.35 * 100 + 1.5 * 50 + 0.9 * 20)
+
+        with self.assertRaises(ValueError):
+            combinations.design_values(np.ones((2, 2)))
+
+    def test_invalid_action_kind(self):
+        """Test that an unknown action kind is rejected."""
+        with self.assertRaises(ValueError):
+            Action("A", "accidental")
+
+
+class TestEvaluateElements(unittest.TestCase):
+    """Test footing and pile evaluation over all combinations."""
+
+    def test_footings_match_single_calculation(self):
+        """Test the governing footing case against a direct calculation."""
+        combinations = generate_combinations(_actions())
+        vertical = np.array([[600.0, 200.0, 100.0], [900.0, 300.0, 0.0]])
+        horizontal = np.array([[0.0, 0.0, 40.0], [0.0, 0.0, 0.0]])
+        result = evaluate_footings(combinations, [2.0, 2.5], [2.0, 2.5], [1.0, 1.2], [18.0, 19.0],
+                                   [0.0, 5.0], [30.0, 32.0], vertical, horizontal)
+
+        self.assertEqual(result.utilisation.shape, (2, len(combinations)))
+        g = int(result.governing_index[0])
+        factors = combinations.factors[g]
+        single = BearingCapacityEngine.calculate(2.0, 2.0, 1.0, 18.0, 0.0, 30.0,
+                                                 vertical_load=vertical[0] @ factors,
+                                                 horizontal_load=horizontal[0] @ factors)
+        self.assertAlmostEqual(result.governing_utilisation[0],
+                               vertical[0] @ factors * 1.4 / float(single.ultimate_load))
+        # Q2 is zero for the second footing, so the leading Q1 case governs (with or without Q2)
+        self.assertTrue(result.governing_labels()[1].startswith("1.35·G + 1.50·Q1"))
+        self.assertEqual(result.to_dict(1)["governing_combination"], result.governing_labels()[1])
+
+    def test_load_outside_footing(self):
+        """Test that a moment moving the load outside the footing governs."""
+        combinations = generate_combinations(_actions())
+        result = evaluate_footings(combinations, [2.0], [2.0], [1.0], [18.0], [0.0], [30.0],
+                                   [[100.0, 0.0, 0.0]], moment=[[0.0, 0.0, 200.0]])
+
+        self.assertTrue(np.isinf(result.governing_utilisation[0]))
+        self.assertFalse(result.is_adequate[0])
+
+    def test_piles(self):
+        """Test that pile capacity is computed once and broadcast per combination."""
+        combinations = generate_combinations(_actions())
+        result = evaluate_piles(combinations, [0.6, 0.8], [15.0, 20.0], [18.0, 19.0], [32.0, 34.0],
+                                [0.0, 0.0], ["driven", "bored"], [[800.0, 300.0, 100.0], [1500.0, 400.0, 0.0]])
+
+        Qu = DeepFoundationCalculator.calculate_pile_capacity(0.6, 15.0, 18.0, 32.0, 0.0, "driven")[0]
+        expected = (1.35 * 800 + 1.5 * 300 + 0.9 * 100) * 1.1 / Qu
+        self.assertAlmostEqual(result.governing_utilisation[0], expected)
+        self.assertTrue(np.all(result.is_adequate))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Unit tests for Coulomb and log-spiral earth pressure coefficients.
+
+Tests check the Coulomb coefficients against Rankine theory and tabulated
+values, and the log-spiral solver and lookup table against each other.
+"""
+
+import unittest
+
+import numpy as np
+
+from app import RetainingWallCalculator
+from log_spiral import (
+    get_log_spiral_table,
+    log_spiral_passive_coefficient,
+    solve_log_spiral_passive_coefficient
+)
+
+
+class TestCoulombCoefficients(unittest.TestCase):
+    """Test Coulomb earth pressure coefficients."""
+
+    def test_reduces_to_rankine(self):
+        """Test that Coulomb equals Rankine for a smooth vertical wall and level backfill."""
+        for phi in (20.0, 30.0, 40.0):
+            self.assertAlmostEqual(
+                RetainingWallCalculator.calculate_coulomb_active_earth_pressure_coefficient(phi),
+                RetainingWallCalculator.calculate_active_earth_pressure_coefficient(phi), places=10)
+            self.assertAlmostEqual(
+                RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(phi),
+                RetainingWallCalculator.calculate_passive_earth_pressure_coefficient(phi), places=10)
+
+    def test_tabulated_values(self):
+        """Test against tabulated Coulomb coefficients."""
+        # φ=30°, δ=20°, β=10°, vertical wall: Ka ≈ 0.340
+        Ka = RetainingWallCalculator.calculate_coulomb_active_earth_pressure_coefficient(30.0, 20.0, 10.0)
+        self.assertAlmostEqual(Ka, 0.340, places=3)
+
+        # φ=30°, δ=20°, level backfill: Kp ≈ 6.105
+        Kp = RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(30.0, 20.0)
+        self.assertAlmostEqual(Kp, 6.105, places=2)
+
+    def test_wall_friction_effect(self):
+        """Test that wall friction lowers Ka and raises Kp."""
+        Ka_smooth = RetainingWallCalculator.calculate_coulomb_active_earth_pressure_coefficient(30.0)
+        Ka_rough = RetainingWallCalculator.calculate_coulomb_active_earth_pressure_coefficient(30.0, 20.0)
+        Kp_smooth = RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(30.0)
+        Kp_rough = RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(30.0, 20.0)
+
+        self.assertLess(Ka_rough, Ka_smooth)
+        self.assertGreater(Kp_rough, Kp_smooth)
+
+    def test_active_slope_steeper_than_friction_angle(self):
+        """Test that an active backfill steeper than φ is rejected."""
+        with self.assertRaises(ValueError):
+            RetainingWallCalculator.calculate_coulomb_active_earth_pressure_coefficient(30.0, 0.0, 35.0)
+
+
+class TestLogSpiralSolver(unittest.TestCase):
+    """Test the iterative log-spiral solver."""
+
+    def test_smooth_wall_matches_plane_solution(self):
+        """Test that without wall friction the critical surface is close to the Coulomb plane."""
+        for theta in (0.0, 10.0, -10.0):
+            Kp = solve_log_spiral_passive_coefficient(30.0, 0.0, 0.0, theta)
+            Kp_coulomb = RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(
+                30.0, 0.0, 0.0, theta)
+            self.assertLessEqual(Kp, Kp_coulomb + 1e-9)
+            self.assertAlmostEqual(Kp / Kp_coulomb, 1.0, delta=0.02)
+
+    def test_never_exceeds_coulomb(self):
+        """Test that the log spiral never exceeds the Coulomb plane solution."""
+        for case in ((30.0, 0.0, 10.0, 0.0), (35.0, 10.0, -10.0, 5.0), (25.0, 20.0, 20.0, -15.0)):
+            self.assertLessEqual(solve_log_spiral_passive_coefficient(*case),
+                                 RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(*case))
+
+    def test_rough_wall_below_coulomb(self):
+        """Test that the log spiral corrects Coulomb's overestimate for δ = φ."""
+        Kp = solve_log_spiral_passive_coefficient(30.0, 30.0)
+        Kp_coulomb = RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(30.0, 30.0)
+
+        self.assertLess(Kp, 0.75 * Kp_coulomb)
+        # Log-spiral charts give Kp of about 6.5-7 for φ = δ = 30°
+        self.assertGreater(Kp, 6.0)
+        self.assertLess(Kp, 7.5)
+
+    def test_invalid_friction_angle(self):
+        """Test that a zero friction angle is rejected."""
+        with self.assertRaises(ValueError):
+            solve_log_spiral_passive_coefficient(0.0)
+
+
+class TestLogSpiralTable(unittest.TestCase):
+    """Test the interpolated log-spiral lookup table."""
+
+    def test_table_is_loaded_once(self):
+        """Test that the table is cached after first use."""
+        self.assertIs(get_log_spiral_table(), get_log_spiral_table())
+
+    def test_lookup_matches_solver(self):
+        """Test lookup against direct solves between grid points."""
+        cases = [(31.0, 14.0, 5.0, 3.0), (37.3, 30.0, -8.0, -12.0), (24.0, 8.0, 15.0, 7.5)]
+        for case in cases:
+            self.assertAlmostEqual(
+                float(log_spiral_passive_coefficient(*case)) / solve_log_spiral_passive_coefficient(*case),
+                1.0, delta=0.02)
+
+    def test_lookup_is_vectorized(self):
+        """Test array lookup against scalar lookups."""
+        phi = np.array([25.0, 30.0, 35.0, 40.0])
+        delta = 2.0 / 3.0 * phi
+        values = log_spiral_passive_coefficient(phi, delta)
+
+        self.assertEqual(values.shape, (4,))
+        for p, d, v in zip(phi, delta, values):
+            self.assertAlmostEqual(float(log_spiral_passive_coefficient(p, d)), v)
+        self.assertTrue(np.all(np.diff(values) > 0))
+
+    def test_outside_table_falls_back_to_solver(self):
+        """Test that cases outside the table range are solved directly."""
+        table = get_log_spiral_table()
+        self.assertFalse(table.contains(12.0, 6.0))
+        self.assertAlmostEqual(float(log_spiral_passive_coefficient(12.0, 6.0)),
+                               solve_log_spiral_passive_coefficient(12.0, 6.0))
+
+    def test_calculator_method(self):
+        """Test the RetainingWallCalculator entry point."""
+        Kp = RetainingWallCalculator.calculate_log_spiral_passive_earth_pressure_coefficient(30.0, 20.0)
+
+        self.assertIsInstance(Kp, float)
+        self.assertLess(Kp, RetainingWallCalculator.calculate_coulomb_passive_earth_pressure_coefficient(30.0, 20.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Unit tests for the portfolio index.
+
+Tests check geographic borehole positions, searches against distances and
+layers computed from the projects, incremental updates and reopening an
+index from disk.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from portfolio_index import (INDEX_VERSION, PortfolioIndex, borehole_position, great_circle_distance,
+                             project_hash)
+from project_models import Borehole, GeotechnicalProject, SoilInvestigation, SoilLayer, SoilType
+from synthetic_site import generate_project
+
+
+def _project(project_id, coordinates, boreholes):
+    project = GeotechnicalProject(project_id, f"Project {project_id}", coordinates=coordinates)
+    investigation = SoilInvestigation(f"SI-{project_id}", "Site", project_id)
+    for name, x, y, soils in boreholes:
+        borehole = Borehole(name, name, x, y, total_depth=4.0 * len(soils))
+        for i, soil in enumerate(soils):
+            borehole.add_layer(SoilLayer(4.0 * i, 4.0 * (i + 1), soil, unit_weight=18.0, friction_angle=25.0))
+        investigation.boreholes.append(borehole)
+    project.add_soil_investigation(investigation)
+    return project
+
+
+class TestGeometry(unittest.TestCase):
+    """Test positions and distances."""
+
+    def test_offsets(self):
+        """Test that site offsets become the same great-circle distances."""
+        origin = (50.85, 4.35)
+        north = borehole_position(origin, 0.0, 300.0)
+        east = borehole_position(origin, 400.0, 0.0)
+        self.assertAlmostEqual(great_circle_distance(*origin, *north), 300.0, delta=0.01)
+        self.assertAlmostEqual(great_circle_distance(*origin, *east), 400.0, delta=0.01)
+        self.assertAlmostEqual(great_circle_distance(*north, *east), 500.0, delta=0.1)
+
+
+class TestPortfolioIndex(unittest.TestCase):
+    """Test indexing and searching projects."""
+
+    def setUp(self):
+        self.old = _project("OLD", (50.85, 4.35), [
+            ("BH-1", 0.0, 0.0, [SoilType.FILL, SoilType.SAND, SoilType.CLAY]),    # clay from 8 to 12 m
+            ("BH-2", 300.0, 0.0, [SoilType.CLAY, SoilType.SAND, SoilType.SAND]),  # clay above 4 m only
+            ("BH-3", 0.0, 900.0, [SoilType.CLAY, SoilType.CLAY, SoilType.CLAY]),
+        ])
+        self.other = _project("OTHER", (50.8505, 4.3505), [("BH-1", 0.0, 0.0, [SoilType.SAND, SoilType.CLAY,
+                                                                                SoilType.CLAY])])
+        self.index = PortfolioIndex()
+        nowhere = _project("NOWHERE", None, [("BH-9", 0.0, 0.0, [SoilType.CLAY])])
+        self.index.update_all([self.old, self.other, nowhere])
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_clay_below_depth(self):
+        """Test boreholes within 500 m with clay below 8 m."""
+        hits = self.index.search(50.85, 4.35, 500.0, soil_type=SoilType.CLAY, below=8.0)
+
+        self.assertEqual([(hit.project_id, hit.borehole_id) for hit in hits], [("OLD", "BH-1"), ("OTHER", "BH-1")])
+        self.assertEqual(hits[0].distance, 0.0)
+        self.assertAlmostEqual(hits[1].distance, great_circle_distance(50.85, 4.35, 50.8505, 4.3505))
+        self.assertEqual(hits[0].layers, [{'soil_type': "Clay", 'depth_top': 8.0, 'depth_bottom': 12.0,
+                                           'unit_weight': 18.0, 'cohesion': None, 'friction_angle': 25.0}])
+        self.assertEqual([layer['depth_top'] for layer in hits[1].layers], [8.0])
+
+    def test_filters(self):
+        """Test soil type lists, depth bounds, exclusion and search radius."""
+        everything = self.index.search(50.85, 4.35, 2000.0)
+        self.assertEqual(len(everything), 4)
+        self.assertEqual(len(everything[0].layers), 3)
+        self.assertEqual(len(self.index.search(50.85, 4.35, 500.0, soil_type=SoilType.CLAY, above=4.0)), 1)
+        self.assertEqual(len(self.index.search(50.85, 4.35, 500.0, soil_type=[SoilType.CLAY, SoilType.FILL],
+                                               above=4.0)), 2)
+        self.assertEqual(len(self.index.search(50.85, 4.35, 299.0)), 2)
+
+        near_old = self.index.search_project(self.old, 500.0, x=10.0)
+        self.assertEqual([hit.project_id for hit in near_old], ["OTHER"])
+        with self.assertRaises(ValueError):
+            self.index.search_project(GeotechnicalProject("NEW", "New job"), 500.0)
+        with self.assertRaises(ValueError):
+            self.index.search(50.85, 4.35, -1.0)
+
+    def test_incremental_update(self):
+        """Test that unchanged projects are skipped and changed ones replaced."""
+        self.assertEqual(len(self.index), 5)
+        self.assertFalse(self.index.update(self.old))
+
+        self.old.soil_investigations[0].boreholes.pop()
+        self.old.soil_investigations[0].boreholes[1].layers[2].soil_type = SoilType.CLAY
+        self.assertTrue(self.index.update(self.old))
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.projects()["OLD"], project_hash(self.old))
+        hits = self.index.search(50.85, 4.35, 500.0, soil_type=SoilType.CLAY, below=8.0)
+        self.assertEqual(len(hits), 3)
+
+        self.assertTrue(self.index.remove("OTHER"))
+        self.assertFalse(self.index.remove("OTHER"))
+        self.assertNotIn("OTHER", self.index)
+        self.assertEqual(len(self.index), 3)
+
+
+class TestPersistence(unittest.TestCase):
+    """Test the index file."""
+
+    def test_reopen(self):
+        """Test that a reopened index answers without the projects and keeps their hashes."""
+        projects = []
+        for seed in range(3):
+            project = generate_project(boreholes=30, seed=seed, project_id=f"P{seed}")
+            project.coordinates = (51.0 + 0.001 * seed, 3.7)
+            projects.append(project)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "portfolio.sqlite")
+            with PortfolioIndex(path) as index:
+                self.assertEqual(index.update_all(projects), ["P0", "P1", "P2"])
+                expected = [hit.to_dict() for hit in index.search(51.001, 3.7005, 150.0)]
+            with PortfolioIndex(path) as index:
+                self.assertEqual([hit.to_dict() for hit in index.search(51.001, 3.7005, 150.0)], expected)
+                self.assertEqual(index.update_all(projects), [])
+                self.assertFalse(index.update(projects[1], timestamp=datetime(2026, 5, 1)))
+            self.assertGreater(len(expected), 0)
+
+            connection = sqlite3.connect(path)
+            connection.execute(f"PRAGMA user_version = {INDEX_VERSION + 1}")
+            connection.close()
+            with self.assertRaises(ValueError):
+                PortfolioIndex(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -330,6 +330,24 @@ class TestGeotechnicalProject(unittest.TestCase):
         self.assertEqual(len(project.foundation_designs), 1)
         self.assertEqual(design.project_id, "PROJ-001")
     
+    def test_remove_foundation_design(self):
+        """Test removing foundation design from project."""
+        project = GeotechnicalProject(
+            id="PROJ-001",
+            name="Project"
+        )
+        design = FoundationDesign(
+            id="FD-001",
+            name="Foundation",
+            foundation_type=FoundationType.SHALLOW,
+            project_id=""
+        )
+        project.add_foundation_design(design)
+        
+        self.assertIs(project.remove_foundation_design("FD-001"), design)
+        self.assertIsNone(project.remove_foundation_design("FD-001"))
+        self.assertEqual(project.foundation_designs, [])
+    
     def test_get_active_soil_investigation(self):
         """Test getting most recent soil investigation."""
         project = GeotechnicalProject(
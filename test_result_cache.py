@@ -0,0 +1,132 @@
+"""
+Unit tests for the content-addressed result cache.
+
+Tests check the stability of cache keys, LRU eviction, the on-disk store
+and that a project recalculation only recomputes designs whose inputs changed.
+"""
+
+import shutil
+import tempfile
+import unittest
+
+from project_models import Borehole, FoundationDesign, FoundationType, SoilLayer, SoilType, create_example_project
+from result_cache import ResultCache, design_cache_key, recalculate_project, stable_hash
+
+
+def _project():
+    project = create_example_project()
+    investigation = project.soil_investigations[0]
+    second = Borehole(id="BH-02", name="BH-02", location_x=200.0, location_y=100.0)
+    second.add_layer(SoilLayer(0.0, 20.0, SoilType.SAND, unit_weight=19.0, cohesion=0.0, friction_angle=34.0))
+    investigation.add_borehole(second)
+
+    for i, borehole_id in enumerate(["BH-01", "BH-01", "BH-02"]):
+        project.add_foundation_design(FoundationDesign(
+            f"FD-{i}", f"F{i}", FoundationType.SHALLOW, project.id,
+            design_parameters={'width': 2.0 + i, 'length': 2.0, 'depth': 1.5, 'borehole_id': borehole_id}))
+    return project
+
+
+class TestStableHash(unittest.TestCase):
+    """Test the stable hash."""
+
+    def test_key_order_does_not_matter(self):
+        """Test that dictionaries hash independently of insertion order."""
+        self.assertEqual(stable_hash({'a': 1, 'b': [1.5, None]}), stable_hash({'b': [1.5, None], 'a': 1}))
+        self.assertNotEqual(stable_hash({'a': 1}), stable_hash({'a': 1.0000001}))
+
+    def test_enums(self):
+        """Test that enums hash by value."""
+        self.assertEqual(stable_hash(FoundationType.SHALLOW), stable_hash(FoundationType.SHALLOW.value))
+
+
+class TestResultCache(unittest.TestCase):
+    """Test the cache and project recalculation."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", {'v': 1})
+        cache.put("b", {'v': 2})
+        cache.get("a")
+        cache.put("c", {'v': 3})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {'v': 1})
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_returned_results_are_copies(self):
+        """Test that modifying a returned result does not change the cache."""
+        cache = ResultCache()
+        cache.put("a", {'soil': {'c': 0.0}})
+        cache.get("a")['soil']['c'] = 99.0
+        self.assertEqual(cache.get("a"), {'soil': {'c': 0.0}})
+
+    def test_on_disk_store(self):
+        """Test that results survive a new cache instance."""
+        ResultCache(directory=self.directory).put("ab12", {'v': 1.5})
+
+        fresh = ResultCache(directory=self.directory)
+        self.assertIn("ab12", fresh)
+        self.assertEqual(fresh.get("ab12"), {'v': 1.5})
+
+    def test_borehole_edit_recomputes_dependent_designs(self):
+        """Test that editing one borehole only recomputes the designs using it."""
+        project = _project()
+        cache = ResultCache(directory=self.directory)
+
+        self.assertEqual(recalculate_project(project, cache), ["FD-0", "FD-1", "FD-2"])
+        self.assertEqual(recalculate_project(project, cache), [])
+
+        project.soil_investigations[0].get_borehole("BH-02").layers[0].friction_angle = 36.0
+        self.assertEqual(recalculate_project(project, cache), ["FD-2"])
+
+        project.foundation_designs[0].design_parameters['width'] = 4.5
+        self.assertEqual(recalculate_project(project, cache), ["FD-0"])
+
+    def test_failing_design_does_not_stop_recalculation(self):
+        """Test that a failing design is recorded and the other designs are still calculated."""
+        project = _project()
+        project.foundation_designs[1].design_parameters['depth'] = 99.0
+        errors = {}
+
+        self.assertEqual(recalculate_project(project, ResultCache(), errors), ["FD-0", "FD-2"])
+        self.assertEqual(list(errors), ["FD-1"])
+        self.assertEqual(project.foundation_designs[1].results, {'error': errors["FD-1"]})
+        self.assertIn('ultimate_bearing_capacity', project.foundation_designs[2].results)
+
+    def test_results_restored_from_disk(self):
+        """Test that a new session reuses stored results."""
+        project = _project()
+        recalculate_project(project, ResultCache(directory=self.directory))
+        expected = [design.results for design in project.foundation_designs]
+
+        restored = _project()
+        self.assertEqual(recalculate_project(restored, ResultCache(directory=self.directory)), [])
+        self.assertEqual([design.results for design in restored.foundation_designs], expected)
+
+    def test_key_depends_on_version(self):
+        """Test that the calculator version enters the key."""
+        import result_cache
+        project = _project()
+        design = project.foundation_designs[0]
+        investigation = project.soil_investigations[0]
+        key = design_cache_key(design, investigation)
+
+        original = result_cache.CALCULATOR_VERSION
+        try:
+            result_cache.CALCULATOR_VERSION = "next"
+            self.assertNotEqual(design_cache_key(design, investigation), key)
+        finally:
+            result_cache.CALCULATOR_VERSION = original
+
+
+if __name__ == "__main__":
+    unittest.main()
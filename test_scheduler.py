@@ -0,0 +1,105 @@
+"""
+Unit tests for the project-wide recalculation scheduler.
+
+Tests check batching by foundation type, that vectorized batches match the
+design-by-design calculation, and that the process pool writes results back.
+"""
+
+import unittest
+
+from design_calculation import calculate_design
+from project_models import FoundationDesign, FoundationType, create_example_project
+from scheduler import make_batches, run_project, run_projects
+
+
+def _project(project_id="PROJ-001", count=12):
+    project = create_example_project()
+    project.id = project_id
+    for i in range(count):
+        if i % 3 == 0:
+            parameters = {'pile_diameter': 0.5, 'pile_length': 8.0 + i, 'load': 800.0}
+            foundation_type = FoundationType.DEEP_PILE
+        elif i % 3 == 1:
+            parameters = {'width': 1.5 + 0.1 * i, 'length': 2.0, 'depth': 0.5 + 0.4 * i, 'load': 600.0}
+            foundation_type = FoundationType.SHALLOW
+        else:
+            parameters = {'wall_height': 2.0 + 0.2 * i, 'surcharge': 10.0}
+            foundation_type = FoundationType.RETAINING_WALL
+        project.add_foundation_design(FoundationDesign(f"D{i}", f"Design {i}", foundation_type, project.id,
+                                                       design_parameters=parameters))
+    return project
+
+
+class TestScheduler(unittest.TestCase):
+    """Test the scheduler."""
+
+    def test_batches_group_by_type(self):
+        """Test that batches hold one foundation type and respect the batch size."""
+        batches, designs, errors = make_batches([_project()], batch_size=3)
+
+        self.assertEqual(len(designs), 12)
+        self.assertEqual(errors, {})
+        self.assertEqual(len(batches), 6)
+        for foundation_type, items in batches:
+            self.assertLessEqual(len(items), 3)
+            self.assertTrue(all(design.foundation_type == foundation_type for _, design, _ in items))
+
+    def test_in_process_matches_calculate_design(self):
+        """Test that vectorized batches give the same results as calculate_design."""
+        project = _project()
+        investigation = project.soil_investigations[0]
+        expected = {design.id: calculate_design(design, investigation) for design in project.foundation_designs}
+
+        report = run_project(project, max_workers=1)
+
+        self.assertEqual(report.workers, 1)
+        self.assertEqual(report.errors, {})
+        self.assertEqual(report.calculated, 12)
+        for design in project.foundation_designs:
+            self.assertEqual(design.results, expected[design.id])
+            self.assertEqual(design.safety_factor, expected[design.id].get('safety_factor'))
+        self.assertEqual(len(report.slowest(3)), 3)
+
+    def test_process_pool(self):
+        """Test recalculating several projects over a process pool."""
+        projects = [_project("A"), _project("B")]
+        report = run_projects(projects, max_workers=2, batch_size=4)
+
+        self.assertEqual(report.workers, 2)
+        self.assertEqual(report.calculated, 24)
+        self.assertIn("B/D4", report.timings)
+        for project in projects:
+            self.assertTrue(all(design.results for design in project.foundation_designs))
+            self.assertIsNotNone(project.foundation_designs[0].safety_factor)
+
+    def test_errors_are_reported(self):
+        """Test that failing designs are reported without stopping the run."""
+        project = _project(count=2)
+        project.foundation_designs[1].design_parameters['depth'] = 99.0
+        project.add_foundation_design(FoundationDesign("W", "No width", FoundationType.SHALLOW, project.id,
+                                                       design_parameters={'width': None, 'length': 2.0,
+                                                                          'depth': 1.0}))
+        project.add_foundation_design(FoundationDesign("Z", "No depth", FoundationType.SHALLOW, project.id,
+                                                       design_parameters={'width': 2.0, 'length': 2.0,
+                                                                          'depth': None}))
+        project.add_foundation_design(FoundationDesign("B0", "Zero width", FoundationType.SHALLOW, project.id,
+                                                       design_parameters={'width': 0.0, 'length': 2.0,
+                                                                          'depth': 1.0, 'load': 500.0}))
+        project.add_foundation_design(FoundationDesign("P0", "Zero safety factor", FoundationType.DEEP_PILE,
+                                                       project.id,
+                                                       design_parameters={'pile_diameter': 0.5, 'pile_length': 8.0,
+                                                                          'factor_of_safety': 0.0}))
+        project.add_foundation_design(FoundationDesign("X", "No investigation", FoundationType.SHALLOW, project.id,
+                                                       soil_investigation_id="SI-404"))
+
+        report = run_project(project, max_workers=1)
+
+        self.assertEqual(set(report.errors), {"PROJ-001/D1", "PROJ-001/W", "PROJ-001/Z", "PROJ-001/B0",
+                                             "PROJ-001/P0", "PROJ-001/X"})
+        self.assertEqual(report.calculated, 1)
+        self.assertEqual(project.foundation_designs[1].results, {})
+        self.assertEqual(report.to_dict()['calculated'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
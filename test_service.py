@@ -0,0 +1,189 @@
+"""
+Unit tests for the asyncio calculation service.
+
+Tests check request coalescing, per-request errors inside a batch,
+backpressure, timeouts and the HTTP layer.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from http import HTTPStatus
+
+from bearing_capacity import BearingCapacityEngine
+from project_models import create_example_project
+from service import CalculationService, RequestBatcher, ServiceOverloaded, encode_response
+
+
+FOOTING = {'width': 2.0, 'length': 2.0, 'depth': 1.0, 'unit_weight': 18.0, 'cohesion': 0.0,
+           'friction_angle': 30.0}
+
+
+class TestRequestBatcher(unittest.IsolatedAsyncioTestCase):
+    """Test request coalescing."""
+
+    async def test_concurrent_requests_share_a_batch(self):
+        """Test that concurrent requests are evaluated in one handler call."""
+        sizes = []
+
+        def handler(payloads):
+            sizes.append(len(payloads))
+            return [p['x'] * 2 for p in payloads]
+
+        batcher = RequestBatcher(handler, window=0.5)
+        results = await asyncio.gather(*(batcher.submit({'x': i}) for i in range(50)))
+        await batcher.close()
+
+        self.assertEqual(results, [2 * i for i in range(50)])
+        self.assertEqual(sizes, [50])
+        self.assertEqual(batcher.batches, 1)
+
+    async def test_max_batch_size(self):
+        """Test that large bursts are split into batches."""
+        batcher = RequestBatcher(lambda payloads: payloads, window=0.05, max_batch_size=16)
+        await asyncio.gather(*(batcher.submit({'x': i}) for i in range(40)))
+        await batcher.close()
+        self.assertEqual(batcher.batches, 3)
+
+    async def test_backpressure(self):
+        """Test that requests beyond the queue limit are refused."""
+        release = threading.Event()
+
+        def slow(payloads):
+            release.wait(2.0)
+            return payloads
+
+        batcher = RequestBatcher(slow, window=0.0, max_pending=1)
+        first = asyncio.ensure_future(batcher.submit({'x': 1}))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(batcher.submit({'x': 2}))
+        await asyncio.sleep(0.01)
+        with self.assertRaises(ServiceOverloaded):
+            await batcher.submit({'x': 3})
+        release.set()
+        self.assertEqual(await first, {'x': 1})
+        self.assertEqual(await second, {'x': 2})
+        await batcher.close()
+
+
+class TestCalculationService(unittest.IsolatedAsyncioTestCase):
+    """Test the service endpoints."""
+
+    async def asyncSetUp(self):
+        self.service = CalculationService([create_example_project()], window=0.2)
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_bearing_capacity_batch(self):
+        """Test that batched results equal direct calculations and errors stay per request."""
+        requests = [dict(FOOTING, width=1.0 + 0.1 * i) for i in range(20)]
+        requests.append(dict(FOOTING, width=-1.0))
+        requests.append({'width': 2.0})
+        responses = await asyncio.gather(*(self.service.handle('POST', '/bearing-capacity', json.dumps(r).encode())
+                                           for r in requests))
+
+        for request, (status, body) in zip(requests[:20], responses):
+            self.assertEqual(status, HTTPStatus.OK)
+            self.assertAlmostEqual(body['ultimate_capacity'],
+                                   float(BearingCapacityEngine.calculate(**request).ultimate_capacity))
+        self.assertEqual(responses[20][0], HTTPStatus.BAD_REQUEST)
+        self.assertEqual(responses[21][0], HTTPStatus.BAD_REQUEST)
+        self.assertEqual(self.service.batchers['/bearing-capacity'].batches, 1)
+
+    async def test_failing_request_in_batch(self):
+        """Test that a calculation error fails only its own request, with a 500."""
+        pile = {'pile_diameter': 0.6, 'pile_length': 15.0, 'unit_weight': 18.0, 'friction_angle': 32.0,
+                'cohesion': 0.0, 'pile_type': 'driven'}
+        good, bad = await asyncio.gather(
+            self.service.handle('POST', '/pile-capacity', json.dumps(pile).encode()),
+            self.service.handle('POST', '/pile-capacity', json.dumps(dict(pile, factor_of_safety=0)).encode()))
+
+        self.assertEqual(self.service.batchers['/pile-capacity'].batches, 1)
+        self.assertEqual(good[0], HTTPStatus.OK)
+        self.assertGreater(good[1]['ultimate_capacity'], 0.0)
+        self.assertEqual(bad[0], HTTPStatus.INTERNAL_SERVER_ERROR)
+        self.assertIn('ZeroDivisionError', bad[1]['error'])
+
+    def test_encode_non_finite(self):
+        """Test that infinite and NaN results are encoded as null."""
+        body = encode_response({'safety_factor': float('inf'), 'values': [1.5, float('nan')]})
+        self.assertEqual(json.loads(body), {'safety_factor': None, 'values': [1.5, None]})
+
+    async def test_other_endpoints(self):
+        """Test pile, earth pressure and project queries."""
+        status, pile = await self.service.handle('POST', '/pile-capacity', json.dumps({
+            'pile_diameter': 0.6, 'pile_length': 15.0, 'unit_weight': 18.0, 'friction_angle': 32.0,
+            'cohesion': 0.0, 'pile_type': 'driven'}).encode())
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertGreater(pile['ultimate_capacity'], pile['allowable_capacity'])
+
+        status, pressure = await self.service.handle('POST', '/earth-pressure', b'{"friction_angle": 30}')
+        self.assertAlmostEqual(pressure['Ka'], 1.0 / 3.0)
+
+        status, project = await self.service.handle('GET', '/projects/PROJ-001')
+        self.assertEqual(project['name'], "Office Building Foundation Design")
+        self.assertEqual((await self.service.handle('GET', '/projects/NONE'))[0], HTTPStatus.NOT_FOUND)
+        self.assertEqual((await self.service.handle('POST', '/earth-pressure', b'{'))[0], HTTPStatus.BAD_REQUEST)
+
+        status, metrics = await self.service.handle('GET', '/metrics')
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertIn('functions', metrics)
+
+    async def test_timeout(self):
+        """Test that slow calculations answer 504."""
+        def slow(payloads):
+            time.sleep(0.3)
+            return payloads
+
+        service = CalculationService(window=0.0, request_timeout=0.05)
+        service.batchers['/earth-pressure'].handler = slow
+        status, _ = await service.handle('POST', '/earth-pressure', b'{"friction_angle": 30}')
+        await service.close()
+        self.assertEqual(status, HTTPStatus.GATEWAY_TIMEOUT)
+
+    async def test_http(self):
+        """Test a keep-alive HTTP connection."""
+        server = await self.service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        responses = []
+        for body in (json.dumps(FOOTING).encode(), b'{"friction_angle": 30}'):
+            path = '/bearing-capacity' if b'width' in body else '/earth-pressure'
+            writer.write(f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(':')
+                headers[name.lower()] = value.strip()
+            payload = json.loads(await reader.readexactly(int(headers['content-length'])))
+            responses.append((status_line.split()[1], payload))
+        writer.close()
+
+        self.assertEqual(responses[0][0], b"200")
+        self.assertIn('ultimate_capacity', responses[0][1])
+        self.assertEqual(responses[1][0], b"200")
+
+
+    async def test_invalid_content_length(self):
+        """Test that a non-numeric or negative Content-Length gets a 400 response."""
+        server = await self.service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        for length in ("abc", "-1"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"POST /earth-pressure HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), 2.0)
+            writer.close()
+            self.assertEqual(status_line.split()[1], b"400")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Unit tests for the embedded sheet-pile wall solver.
+
+Tests check the embedment, anchor force and bending moment against
+hand calculations for homogeneous sand, and the vectorized behaviour.
+"""
+
+import unittest
+
+import numpy as np
+
+from app import RetainingWallCalculator
+from sheet_pile import SheetPileCalculator
+
+
+class TestCantileverSheetPile(unittest.TestCase):
+    """Test cantilever sheet-pile embedment."""
+
+    def test_equilibrium_and_moment(self):
+        """Test the full method for H = 5 m in sand with φ = 30°."""
+        result = SheetPileCalculator.calculate_cantilever_embedment(5.0, 18.0, 30.0)
+
+        # Simplified method: D0 = H / ((Kp/Ka)^(1/3) - 1), design D ≈ 1.2 D0
+        D0 = 5.0 / (9.0 ** (1.0 / 3.0) - 1.0)
+        D = float(result.embedment_depth)
+        self.assertGreater(D, D0)
+        self.assertLess(D, 1.2 * D0)
+        self.assertGreater(float(result.pivot_depth), 5.0)
+        self.assertLess(float(result.pivot_depth), 5.0 + D)
+
+        # Zero shear at z = 7.5 m: M = 6·7.5³/6 - 54·2.5³/6
+        self.assertAlmostEqual(float(result.max_bending_moment), 281.25, delta=0.5)
+        self.assertAlmostEqual(float(result.max_moment_depth), 7.5, delta=0.05)
+
+    def test_passive_safety_factor_increases_embedment(self):
+        """Test that factoring Kp requires a deeper wall."""
+        unfactored = SheetPileCalculator.calculate_cantilever_embedment(5.0, 18.0, 30.0)
+        factored = SheetPileCalculator.calculate_cantilever_embedment(5.0, 18.0, 30.0, passive_safety_factor=1.5)
+
+        self.assertGreater(float(factored.embedment_depth), float(unfactored.embedment_depth))
+        self.assertGreater(float(factored.max_bending_moment), float(unfactored.max_bending_moment))
+
+    def test_no_solution_within_search_range(self):
+        """Test that an embedment beyond the search range gives NaN."""
+        result = SheetPileCalculator.calculate_cantilever_embedment(5.0, 18.0, 10.0, max_embedment_ratio=1.0)
+        self.assertTrue(np.isnan(result.embedment_depth))
+
+    def test_vectorized_matches_scalar(self):
+        """Test array input against scalar calls."""
+        heights = np.array([3.0, 5.0, 8.0])
+        phis = np.array([28.0, 32.0, 36.0])
+        result = SheetPileCalculator.calculate_cantilever_embedment(heights[:, None], 19.0, phis[None, :], 10.0)
+
+        self.assertEqual(result.embedment_depth.shape, (3, 3))
+        self.assertEqual(len(result), 9)
+        for i, H in enumerate(heights):
+            for j, phi in enumerate(phis):
+                single = SheetPileCalculator.calculate_cantilever_embedment(H, 19.0, phi, 10.0)
+                self.assertAlmostEqual(result.embedment_depth[i, j], float(single.embedment_depth), places=6)
+
+        # Taller walls need deeper embedment; stronger soil needs less
+        self.assertTrue(np.all(np.diff(result.embedment_depth, axis=0) > 0))
+        self.assertTrue(np.all(np.diff(result.embedment_depth, axis=1) < 0))
+
+
+class TestAnchoredSheetPile(unittest.TestCase):
+    """Test single-anchored sheet-pile embedment."""
+
+    def test_free_earth_support(self):
+        """Test moment equilibrium about the anchor and the anchor force."""
+        result = SheetPileCalculator.calculate_anchored_embedment(5.0, 1.0, 18.0, 30.0)
+        D = float(result.embedment_depth)
+        T = 5.0 + D
+
+        active = 6.0 * T ** 2 / 2
+        passive = 54.0 * D ** 2 / 2
+        self.assertAlmostEqual(active * (2 * T / 3 - 1.0), passive * (5.0 + 2 * D / 3 - 1.0), delta=0.5)
+        self.assertAlmostEqual(float(result.anchor_force), active - passive, places=2)
+        self.assertTrue(np.isnan(result.pivot_depth))
+
+    def test_anchor_reduces_embedment(self):
+        """Test that an anchored wall needs less embedment than a cantilever."""
+        cantilever = SheetPileCalculator.calculate_cantilever_embedment(6.0, 18.0, 32.0)
+        anchored = SheetPileCalculator.calculate_anchored_embedment(6.0, 1.5, 18.0, 32.0)
+
+        self.assertLess(float(anchored.embedment_depth), float(cantilever.embedment_depth))
+        self.assertLess(float(anchored.max_bending_moment), float(cantilever.max_bending_moment))
+
+    def test_custom_passive_coefficient(self):
+        """Test that a higher Kp (e.g. from wall friction) reduces embedment."""
+        Kp = RetainingWallCalculator.calculate_log_spiral_passive_earth_pressure_coefficient(30.0, 20.0)
+        rankine = SheetPileCalculator.calculate_anchored_embedment(5.0, 1.0, 18.0, 30.0)
+        rough = SheetPileCalculator.calculate_anchored_embedment(5.0, 1.0, 18.0, 30.0, Kp=Kp)
+
+        self.assertLess(float(rough.embedment_depth), float(rankine.embedment_depth))
+
+    def test_invalid_anchor_depth(self):
+        """Test that an anchor below the dredge level is rejected."""
+        with self.assertRaises(ValueError):
+            SheetPileCalculator.calculate_anchored_embedment(5.0, 6.0, 18.0, 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
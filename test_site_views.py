@@ -0,0 +1,139 @@
+"""
+Unit tests for the site cross-sections and 3D stratigraphy.
+
+Tests check the min/max decimation, the projection onto section lines and
+that the figure data is packed into a fixed number of traces. Figures are
+only built when plotly is installed.
+"""
+
+import unittest
+
+import numpy as np
+
+from project_models import Borehole, SoilLayer, SoilType
+from site_views import (CrossSection, MAX_TRACE_POINTS, cpt_trace, minmax_decimate, pack_layers,
+                        project_onto_polyline, stratigraphy_figure, stratigraphy_traces)
+from synthetic_site import CPT, SiteModel, iter_boreholes
+
+try:
+    import plotly
+except ImportError:
+    plotly = None
+
+
+def _borehole(name, x, y, soils, ground_level=0.0, water_level=None):
+    borehole = Borehole(name, name, x, y, ground_level=ground_level, water_level=water_level,
+                        total_depth=2.0 * len(soils))
+    for i, soil in enumerate(soils):
+        borehole.add_layer(SoilLayer(2.0 * i, 2.0 * (i + 1), soil, unit_weight=18.0))
+    return borehole
+
+
+class TestDecimation(unittest.TestCase):
+    """Test the min/max-preserving downsampling."""
+
+    def test_keeps_extremes(self):
+        """Test that peaks, troughs and the end points survive."""
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=100000)
+        values[12345], values[67890] = 50.0, -50.0
+
+        keep = minmax_decimate(values, 200)
+
+        self.assertLessEqual(keep.size, 200)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+        self.assertEqual((keep[0], keep[-1]), (0, values.size - 1))
+        self.assertIn(12345, keep)
+        self.assertIn(67890, keep)
+
+    def test_short_traces_are_kept(self):
+        """Test that traces within the limit are not touched."""
+        np.testing.assert_array_equal(minmax_decimate([3.0, 1.0, 2.0], 10), [0, 1, 2])
+
+
+class TestProjection(unittest.TestCase):
+    """Test projecting points onto a polyline."""
+
+    def test_l_shaped_line(self):
+        """Test chainage and offset on both legs of a bent line."""
+        chainage, offset = project_onto_polyline([5.0, 12.0, -3.0], [2.0, 4.0, 0.0],
+                                                 [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)])
+        np.testing.assert_allclose(chainage, [5.0, 14.0, 0.0])
+        np.testing.assert_allclose(offset, [2.0, 2.0, 3.0])
+        with self.assertRaises(ValueError):
+            project_onto_polyline([0.0], [0.0], [(0.0, 0.0)])
+
+
+class TestCrossSection(unittest.TestCase):
+    """Test building cross-sections."""
+
+    def test_order_offset_and_merging(self):
+        """Test chainage order, the offset filter and merging of equal layers."""
+        boreholes = [
+            _borehole("B", 20.0, 1.0, [SoilType.CLAY, SoilType.CLAY, SoilType.SAND], ground_level=5.0, water_level=1.5),
+            _borehole("A", 0.0, -1.0, [SoilType.FILL, SoilType.SAND]),
+            _borehole("FAR", 10.0, 50.0, [SoilType.ROCK]),
+        ]
+        section = CrossSection.build(boreholes, [(0.0, 0.0), (30.0, 0.0)], max_offset=5.0)
+
+        self.assertEqual([borehole.id for borehole in section.boreholes], ["A", "B"])
+        np.testing.assert_allclose(section.chainage, [0.0, 20.0])
+        np.testing.assert_allclose(section.water_level, [np.nan, 3.5])
+        self.assertEqual(len(section.layers), 4)
+        np.testing.assert_allclose(section.layers.bottom[section.layers.borehole == 1], [1.0, -1.0])
+        self.assertEqual(len(pack_layers(section.boreholes)), 5)
+
+    def test_traces_are_packed(self):
+        """Test that 300 boreholes with CPTs give one trace per soil type, not per layer."""
+        model = SiteModel.create(seed=3, layers=40, site_size=600.0)
+        soundings = list(iter_boreholes(model, 300, CPT))
+        line = [(0.0, 0.0), (600.0, 600.0)]
+
+        section = CrossSection.build(soundings, line, merge=False)
+        traces = section.traces(max_points=20)
+
+        soil_types = {layer.soil_type for sounding in soundings for layer in sounding.layers}
+        self.assertEqual(len(traces), len(soil_types) + 3)
+        cpt = traces[-1]
+        self.assertEqual(cpt['name'], "CPT qc")
+        self.assertEqual(int(np.isnan(cpt['x']).sum()), 299)
+        self.assertLessEqual(cpt['x'].size, 300 * 21)
+        columns = sum(trace['x'].size for trace in traces if trace.get('fill') == 'toself')
+        self.assertEqual(columns, 6 * len(section.layers))
+
+    def test_cpt_trace(self):
+        """Test the step trace of a sounding."""
+        borehole = _borehole("C", 0.0, 0.0, [SoilType.SAND, SoilType.CLAY], ground_level=1.0)
+        borehole.layers[0].cpt_qc, borehole.layers[1].cpt_qc = 8.0, 1.5
+        elevation, qc = cpt_trace(borehole)
+        np.testing.assert_allclose(elevation, [1.0, -1.0, -1.0, -3.0])
+        np.testing.assert_allclose(qc, [8.0, 8.0, 1.5, 1.5])
+        self.assertEqual(cpt_trace(_borehole("D", 0.0, 0.0, [SoilType.SAND]))[1].size, 0)
+
+
+class TestStratigraphy(unittest.TestCase):
+    """Test the 3D view."""
+
+    def test_mesh_per_soil_type(self):
+        """Test one mesh per soil type with eight vertices and twelve triangles per layer."""
+        boreholes = [_borehole(f"B{i}", 10.0 * i, 0.0, [SoilType.FILL, SoilType.SAND, SoilType.SAND])
+                     for i in range(5)]
+        traces = stratigraphy_traces(boreholes, size=2.0)
+
+        self.assertEqual([trace['name'] for trace in traces], ["Sand", "Fill"])
+        sand = traces[0]
+        self.assertEqual((sand['x'].size, sand['i'].size), (5 * 8, 5 * 12))
+        self.assertEqual(sand['z'].min(), -6.0)
+        self.assertEqual(int(sand['k'].max()), 5 * 8 - 1)
+
+    @unittest.skipIf(plotly is None, "plotly is not installed")
+    def test_figures(self):
+        """Test building the plotly figures."""
+        boreholes = list(iter_boreholes(SiteModel.create(seed=1, layers=6), 20, CPT))
+        section = CrossSection.build(boreholes, [(0.0, 0.0), (250.0, 250.0)])
+        self.assertEqual(len(section.figure().data), len(section.traces()))
+        self.assertGreater(len(stratigraphy_figure(boreholes, max_points=MAX_TRACE_POINTS).data), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
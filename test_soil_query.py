@@ -0,0 +1,144 @@
+"""
+Unit tests for the soil query engine.
+
+Tests compare queries against nested loops over boreholes and layers, and
+check the query plan, lazy iteration with limits and tables loaded from
+columnar chunks.
+"""
+
+import math
+import unittest
+
+import numpy as np
+
+from project_models import SoilType
+from soil_query import (LayerTable, Predicate, Range, SoilTypeIs, Within, _expand, depth_between, field,
+                        soil_type, within)
+from synthetic_site import (BOREHOLE, SiteModel, generate_investigation, generate_project, iter_layer_chunks,
+                            sounding_id)
+
+
+class TestQuery(unittest.TestCase):
+    """Test queries over an investigation."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.investigation = generate_project(boreholes=400, layers=8, seed=4).soil_investigations[0]
+        cls.table = LayerTable.from_investigation(cls.investigation)
+
+    def brute_force(self, keep):
+        return [(borehole.id, layer) for borehole in self.investigation.boreholes for layer in borehole.layers
+                if keep(borehole, layer)]
+
+    def assertMatches(self, query, keep):
+        expected = self.brute_force(keep)
+        actual = [(match.borehole, match.layer) for match in query]
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(len(actual), len(expected))
+        for (borehole, layer), (expected_borehole, expected_layer) in zip(actual, expected):
+            self.assertEqual(borehole, expected_borehole)
+            self.assertIs(layer, expected_layer)
+
+    def test_combined_predicates(self):
+        """Test sand layers with φ > 32° between 5 and 15 m within 120 m of a point."""
+        query = self.table.query(soil_type(SoilType.SAND), field('friction_angle') > 32,
+                                 depth_between(5.0, 15.0), within(250.0, 250.0, 120.0))
+        self.assertMatches(query, lambda borehole, layer: (
+            layer.soil_type == SoilType.SAND and layer.friction_angle > 32 and layer.depth_top < 15.0
+            and layer.depth_bottom > 5.0
+            and math.hypot(borehole.location_x - 250.0, borehole.location_y - 250.0) <= 120.0))
+
+    def test_ranges_and_alternatives(self):
+        """Test bounds, unknown values and predicates combined with & and |."""
+        query = self.table.query(field('cohesion').between(0.0, 5.0) | (soil_type(SoilType.CLAY)
+                                                                        & (field('unit_weight') >= 20.0)))
+        self.assertMatches(query, lambda borehole, layer: (
+            0.0 <= layer.cohesion <= 5.0 or (layer.soil_type == SoilType.CLAY and layer.unit_weight >= 20.0)))
+        self.assertEqual(self.table.query(field('spt_n') < 10, field('cpt_qc') > 0).count(), 0)
+        self.assertEqual(self.table.query().count(), len(self.table))
+
+    def test_plan_and_limit(self):
+        """Test that the most selective predicate comes first and limit stops early."""
+        near = within(100.0, 100.0, 30.0)
+        query = self.table.query(field('friction_angle') > 20, near, soil_type(SoilType.FILL, SoilType.SAND))
+        plan = query.plan()
+        self.assertIs(plan[0][0], near)
+        self.assertEqual([estimate for _, estimate in plan], sorted(estimate for _, estimate in plan))
+        self.assertEqual(query.to_dict()['plan'][0]['estimate'], plan[0][1])
+
+        everything = self.table.query(field('unit_weight') > 0)
+        first = list(everything.limit(5))
+        self.assertEqual([match.row for match in first], list(range(5)))
+        self.assertEqual(everything.limit(0).count(), 0)
+
+    def test_spatial_lookup_once(self):
+        """Test that a query looks up the boreholes near its point once, for plan and candidates."""
+        table = LayerTable.from_investigation(self.investigation)
+        lookups = []
+        lookup = table._boreholes_within
+        table._boreholes_within = lambda *args: lookups.append(args) or lookup(*args)
+
+        count = table.query(within(50.0, 60.0, 70.0), field('friction_angle') > 20).count()
+        self.assertEqual(lookups, [(50.0, 60.0, 70.0)])
+        self.assertEqual(count, self.table.query(within(50.0, 60.0, 70.0), field('friction_angle') > 20).count())
+
+    def test_columns_and_boreholes(self):
+        """Test columnar results and the boreholes with matches."""
+        query = self.table.query(within(0.0, 0.0, 40.0), depth_between(0.0, 0.5))
+        columns = query.columns('borehole', 'soil_type', 'depth_top')
+        self.assertEqual(list(columns['soil_type']), ["Fill"] * len(columns['borehole']))
+        self.assertEqual(query.boreholes(), sorted(set(columns['borehole'])))
+        with self.assertRaises(ValueError):
+            self.table.query(field('porosity') > 0.3).count()
+        with self.assertRaises(ValueError):
+            depth_between(5.0, 2.0)
+
+
+class TestLayerTable(unittest.TestCase):
+    """Test building tables."""
+
+    def test_chunks_match_boreholes(self):
+        """Test that a table of columnar chunks answers like one of Borehole objects."""
+        model = SiteModel.create(seed=2, layers=5)
+        chunks = LayerTable.from_chunks(iter_layer_chunks(model, 1500), lambda i: sounding_id(BOREHOLE, i))
+        objects = LayerTable.from_investigation(generate_investigation(model, 1500))
+
+        predicates = (soil_type(SoilType.SILT, SoilType.GRAVEL), field('friction_angle') >= 30,
+                      within(120.0, 80.0, 60.0))
+        expected = list(objects.query(*predicates))
+        actual = list(chunks.query(*predicates))
+        self.assertEqual(len(actual), len(expected))
+        self.assertEqual([match.borehole for match in actual], [match.borehole for match in expected])
+        # Chunks carry no layer descriptions
+        self.assertEqual(dict(actual[0].layer.to_dict(), description=""),
+                         dict(expected[0].layer.to_dict(), description=""))
+
+    def test_spatial_index(self):
+        """Test the grid index against distances to every borehole."""
+        table = LayerTable.from_chunks(iter_layer_chunks(SiteModel.create(seed=5, layers=2), 3000))
+        for x, y, radius in ((10.0, 10.0, 25.0), (125.0, 125.0, 0.0), (-500.0, 0.0, 100.0), (100.0, 200.0, 1e4)):
+            distance = np.hypot(table.borehole_x - x, table.borehole_y - y)
+            np.testing.assert_array_equal(table.boreholes_within(x, y, radius), np.flatnonzero(distance <= radius))
+
+    def test_expand(self):
+        """Test concatenating index ranges."""
+        np.testing.assert_array_equal(_expand(np.array([3, 10, 4, 7]), np.array([5, 10, 6, 8])), [3, 4, 4, 5, 7])
+        self.assertEqual(_expand(np.array([2]), np.array([2])).size, 0)
+
+    def test_predicate_types(self):
+        """Test the predicate objects built by the helpers."""
+        self.assertEqual(field('cohesion') <= 5, Range('cohesion', high=5))
+        self.assertEqual(soil_type(SoilType.SAND), SoilTypeIs((SoilType.SAND,)))
+        self.assertEqual(within(1, 2, 3), Within(1.0, 2.0, 3.0))
+        with self.assertRaises(ValueError):
+            within(0.0, 0.0, -1.0)
+
+        class Incomplete(Predicate):
+            def estimate(self, table):
+                return 0
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+if __name__ == "__main__":
+    unittest.main()
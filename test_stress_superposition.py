@@ -0,0 +1,140 @@
+"""
+Unit tests for the Boussinesq stress superposition engine.
+
+Tests validate the corner influence factors against tabulated values and the
+superposition engine against single-footing closed-form results.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from stress_superposition import (
+    Footing,
+    StressSuperpositionEngine,
+    corner_influence_factor
+)
+
+
+class TestCornerInfluenceFactor(unittest.TestCase):
+    """Test the Newmark corner influence factor."""
+
+    def test_square_unit_ratio(self):
+        """Test the tabulated value for m = n = 1."""
+        self.assertAlmostEqual(float(corner_influence_factor(1.0, 1.0)), 0.1752, places=4)
+
+    def test_large_ratio_limit(self):
+        """Test that a very large rectangle approaches 0.25 at the corner."""
+        self.assertAlmostEqual(float(corner_influence_factor(1e4, 1e4)), 0.25, places=3)
+
+    def test_branch_for_large_mn(self):
+        """Test m = n = 2, where m²n² exceeds m² + n² + 1."""
+        self.assertAlmostEqual(float(corner_influence_factor(2.0, 2.0)), 0.2325, places=3)
+
+
+class TestStressSuperpositionEngine(unittest.TestCase):
+    """Test stress superposition for groups of footings."""
+
+    def setUp(self):
+        self.footing = Footing(x=0.0, y=0.0, width=2.0, length=2.0, load=400.0)
+
+    def test_pressure_from_applied_load(self):
+        """Test that contact pressure follows the applied pressure calculation."""
+        self.assertAlmostEqual(self.footing.pressure, 100.0)
+
+    def test_centre_stress_single_footing(self):
+        """Test stress under the centre equals four corner rectangles."""
+        engine = StressSuperpositionEngine([self.footing])
+        stress = engine.vertical_stress([[0.0, 0.0, 1.0]])[0]
+
+        # Four 1 m × 1 m corner rectangles at z = 1 m
+        self.assertAlmostEqual(stress, 4 * 0.1752 * 100.0, places=1)
+
+    def test_surface_stress_inside_and_outside(self):
+        """Test stress just below the surface equals the contact pressure inside the footing."""
+        engine = StressSuperpositionEngine([self.footing])
+        stress = engine.vertical_stress([[0.0, 0.0, 0.0], [5.0, 0.0, 0.0]])
+
+        self.assertAlmostEqual(stress[0], 100.0, places=3)
+        self.assertAlmostEqual(stress[1], 0.0, places=3)
+
+    def test_points_above_founding_level(self):
+        """Test that points above the footing base receive no stress."""
+        footing = Footing(x=0.0, y=0.0, width=2.0, length=2.0, load=400.0, depth=2.0)
+        engine = StressSuperpositionEngine([footing])
+
+        self.assertEqual(engine.vertical_stress([[0.0, 0.0, 1.0]])[0], 0.0)
+
+    def test_superposition_is_additive(self):
+        """Test that two footings give the sum of their separate contributions."""
+        other = Footing(x=3.0, y=0.0, width=2.0, length=2.0, load=800.0)
+        point = [[1.5, 0.5, 2.0]]
+
+        combined = StressSuperpositionEngine([self.footing, other]).vertical_stress(point)[0]
+        separate = (StressSuperpositionEngine([self.footing]).vertical_stress(point)[0] +
+                    StressSuperpositionEngine([other]).vertical_stress(point)[0])
+
+        self.assertAlmostEqual(combined, separate, places=8)
+
+    def test_cutoff_skips_distant_footings(self):
+        """Test that footings beyond the cutoff distance contribute nothing."""
+        far = Footing(x=100.0, y=0.0, width=2.0, length=2.0, load=400.0)
+        engine = StressSuperpositionEngine([self.footing, far], cutoff_distance=10.0)
+
+        self.assertEqual(engine.vertical_stress([[100.0, 20.0, 5.0]])[0], 0.0)
+        self.assertGreater(engine.vertical_stress([[100.0, 0.0, 5.0]])[0], 0.0)
+
+    def test_chunking_does_not_change_results(self):
+        """Test that the chunk size does not change the computed stresses."""
+        rng = np.random.default_rng(1)
+        footings = [
+            Footing(x=x, y=y, width=1.5, length=2.0, load=300.0)
+            for x, y in rng.uniform(0, 50, size=(30, 2))
+        ]
+        points = np.column_stack([rng.uniform(0, 50, 200), rng.uniform(0, 50, 200), rng.uniform(0.5, 10, 200)])
+
+        small = StressSuperpositionEngine(footings, chunk_size=7).vertical_stress(points)
+        large = StressSuperpositionEngine(footings, chunk_size=1000).vertical_stress(points)
+
+        np.testing.assert_allclose(small, large)
+
+    def test_neighbour_influence_excludes_own_footing(self):
+        """Test neighbour influence for an isolated footing and a pair."""
+        alone = StressSuperpositionEngine([self.footing]).neighbour_influence(1.0)
+        self.assertEqual(alone[0], 0.0)
+
+        other = Footing(x=3.0, y=0.0, width=2.0, length=2.0, load=400.0)
+        pair = StressSuperpositionEngine([self.footing, other]).neighbour_influence(1.0)
+        self.assertGreater(pair[0], 0.0)
+        self.assertAlmostEqual(pair[0], pair[1], places=8)
+
+    def test_stress_grid_matches_points(self):
+        """Test that the 3D grid matches point evaluation."""
+        engine = StressSuperpositionEngine([self.footing], chunk_size=16)
+        x = np.linspace(-3, 3, 7)
+        y = np.linspace(-2, 2, 5)
+        z = np.array([0.5, 1.0, 2.0])
+
+        grid = engine.stress_grid(x, y, z)
+        self.assertEqual(grid.shape, (7, 5, 3))
+
+        gx, gy, gz = np.meshgrid(x, y, z, indexing='ij')
+        expected = engine.vertical_stress(np.column_stack([gx.ravel(), gy.ravel(), gz.ravel()]))
+        np.testing.assert_allclose(grid.ravel(), expected)
+
+    def test_stress_grid_memmap_output(self):
+        """Test writing the stress grid to a memory-mapped file."""
+        engine = StressSuperpositionEngine([self.footing])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stress.npy")
+            grid = engine.stress_grid([0.0, 1.0], [0.0], [1.0, 2.0], memmap_path=path)
+            reopened = np.load(path, mmap_mode='r')
+
+            np.testing.assert_allclose(reopened, grid)
+            del grid, reopened
+
+
+if __name__ == "__main__":
+    unittest.main()
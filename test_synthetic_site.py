@@ -0,0 +1,89 @@
+"""
+Unit tests for the synthetic site generator.
+
+Tests check that generation is reproducible per seed, that the generated
+boreholes and designs are valid input for the calculators, that the
+stratigraphy is spatially correlated and that large sites stream in blocks.
+"""
+
+import unittest
+
+import numpy as np
+
+from design_calculation import calculate_design
+from project_models import FoundationType
+from synthetic_site import (BLOCK_SIZE, CPT, SOIL_PROPERTIES, SiteModel, generate_project, iter_boreholes,
+                            iter_layer_chunks)
+
+
+class TestSyntheticSite(unittest.TestCase):
+    """Test synthetic project generation."""
+
+    def test_seeded(self):
+        """Test that the same seed gives the same project and another seed does not."""
+        first = generate_project(boreholes=20, layers=5, designs=9, seed=3).to_dict()
+        self.assertEqual(first, generate_project(boreholes=20, layers=5, designs=9, seed=3).to_dict())
+        self.assertNotEqual(first, generate_project(boreholes=20, layers=5, designs=9, seed=4).to_dict())
+
+    def test_boreholes(self):
+        """Test borehole count, contiguous layers and property ranges."""
+        project = generate_project(boreholes=50, layers=6)
+        boreholes = project.soil_investigations[0].boreholes
+
+        self.assertEqual(len(boreholes), 50)
+        self.assertEqual(len({b.id for b in boreholes}), 50)
+        for borehole in boreholes:
+            self.assertEqual(len(borehole.layers), 6)
+            self.assertEqual(borehole.layers[0].depth_top, 0.0)
+            self.assertEqual(borehole.layers[-1].depth_bottom, borehole.total_depth)
+            for upper, lower in zip(borehole.layers, borehole.layers[1:]):
+                self.assertEqual(upper.depth_bottom, lower.depth_top)
+            for layer in borehole.layers:
+                low, high = SOIL_PROPERTIES[layer.soil_type][2]
+                self.assertTrue(low <= layer.friction_angle <= high)
+
+    def test_designs_calculate(self):
+        """Test that generated designs of every type can be calculated."""
+        project = generate_project(boreholes=16, designs=30, seed=1)
+        investigation = project.soil_investigations[0]
+
+        self.assertEqual({d.foundation_type for d in project.foundation_designs},
+                         {FoundationType.SHALLOW, FoundationType.DEEP_PILE, FoundationType.RETAINING_WALL})
+        for design in project.foundation_designs:
+            self.assertIn('borehole_id', calculate_design(design, investigation))
+
+    def test_cpts(self):
+        """Test that CPT soundings carry cone resistance instead of SPT values."""
+        boreholes = generate_project(boreholes=4, cpts=9).soil_investigations[0].boreholes
+        cpts = [b for b in boreholes if b.id.startswith("CPT-")]
+
+        self.assertEqual(len(cpts), 9)
+        for cpt in cpts:
+            self.assertEqual(cpt.notes, "Cone Penetration Test")
+            self.assertTrue(all(layer.cpt_qc > 0 and layer.spt_n is None for layer in cpt.layers))
+
+    def test_spatial_correlation(self):
+        """Test that neighbouring boreholes are more alike than distant ones."""
+        model = SiteModel.create(seed=2, layers=3, site_size=2000.0, correlation_length=300.0)
+        boreholes = list(iter_boreholes(model, 400))
+        thickness = np.array([b.layers[1].thickness for b in boreholes]).reshape(20, 20)
+
+        neighbours = np.abs(np.diff(thickness, axis=1)).mean()
+        distant = np.abs(thickness[:, :10] - thickness[:, 10:]).mean()
+        self.assertLess(neighbours, 0.5 * distant)
+
+    def test_streaming(self):
+        """Test that layer tables and Borehole objects stream the same site block by block."""
+        model = SiteModel.create(seed=5, layers=5, site_size=1000.0)
+        count = 2 * BLOCK_SIZE + 10
+        chunks = list(iter_layer_chunks(model, count, CPT))
+
+        self.assertEqual([len(chunk['depth_top']) for chunk in chunks], [5 * BLOCK_SIZE] * 2 + [50])
+        last = next(b for i, b in enumerate(iter_boreholes(model, count, CPT)) if i == count - 1)
+        self.assertEqual(chunks[-1]['depth_bottom'][-5:].tolist(), [layer.depth_bottom for layer in last.layers])
+        self.assertEqual(chunks[-1]['cpt_qc'][-1], last.layers[-1].cpt_qc)
+        self.assertEqual(chunks[-1]['sounding'][-1], count - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
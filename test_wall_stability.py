@@ -0,0 +1,127 @@
+"""
+Unit tests for the retaining wall stability engine.
+
+Tests check the stability calculation against a hand calculation and the
+batch evaluation against single-wall results.
+"""
+
+import unittest
+
+import numpy as np
+
+from app import RetainingWallCalculator
+from wall_stability import (
+    WallGeometry,
+    RetainingWallStabilityCalculator
+)
+
+
+class TestWallStability(unittest.TestCase):
+    """Test sliding, overturning and bearing checks."""
+
+    def setUp(self):
+        self.wall = WallGeometry(
+            stem_height=5.0,
+            stem_thickness=0.4,
+            base_width=3.5,
+            base_thickness=0.5,
+            toe_length=0.8,
+            embedment=1.0
+        )
+
+    def _single(self, **overrides):
+        params = dict(
+            stem_height=5.0, stem_thickness=0.4, base_width=3.5, base_thickness=0.5,
+            toe_length=0.8, embedment=1.0, unit_weight=18.0, friction_angle=30.0, surcharge=10.0
+        )
+        params.update(overrides)
+        return RetainingWallStabilityCalculator.calculate_stability(**params)
+
+    def test_active_force_matches_rankine_calculator(self):
+        """Test that the active thrust matches calculate_total_active_force over the full height."""
+        result = self._single()
+        Fa, location = RetainingWallCalculator.calculate_total_active_force(5.5, 18.0, 30.0, 0.0, 10.0)
+
+        self.assertAlmostEqual(float(result.active_force), Fa, places=6)
+        self.assertAlmostEqual(float(result.active_force_location), location, places=6)
+
+    def test_hand_calculation(self):
+        """Test vertical force and overturning safety factor against a hand calculation."""
+        result = self._single()
+
+        # Stem 25*0.4*5 = 50, base 25*3.5*0.5 = 43.75, soil 18*2.3*5 = 207
+        self.assertAlmostEqual(float(result.vertical_force), 300.75, places=6)
+
+        # Moments about the toe: 50*1.0 + 43.75*1.75 + 207*2.35
+        M_r = 50 * 1.0 + 43.75 * 1.75 + 207 * 2.35
+        self.assertAlmostEqual(float(result.resisting_moment), M_r, places=6)
+        self.assertAlmostEqual(float(result.overturning_fs), M_r / float(result.overturning_moment), places=6)
+
+    def test_sliding_resistance_includes_passive(self):
+        """Test that passive resistance increases the sliding safety factor."""
+        with_passive = self._single()
+        without_passive = self._single(passive_factor=0.0)
+
+        self.assertGreater(float(with_passive.passive_force), 0.0)
+        self.assertGreater(float(with_passive.sliding_fs), float(without_passive.sliding_fs))
+
+    def test_effective_width_reduces_with_eccentricity(self):
+        """Test that the bearing check uses B' = B - 2e."""
+        result = self._single()
+        e = float(result.eccentricity)
+
+        self.assertAlmostEqual(float(result.effective_width), 3.5 - 2 * abs(e), places=6)
+        self.assertAlmostEqual(float(result.applied_pressure), float(result.vertical_force) / (3.5 - 2 * abs(e)))
+
+    def test_wider_base_is_more_stable(self):
+        """Test that a wider base improves all safety factors."""
+        narrow = self._single(base_width=3.0)
+        wide = self._single(base_width=4.5)
+
+        self.assertGreater(float(wide.sliding_fs), float(narrow.sliding_fs))
+        self.assertGreater(float(wide.overturning_fs), float(narrow.overturning_fs))
+
+    def test_invalid_geometry(self):
+        """Test that a toe and stem wider than the base is rejected."""
+        with self.assertRaises(ValueError):
+            self._single(toe_length=3.4)
+
+    def test_batch_matches_single_evaluations(self):
+        """Test that batch evaluation matches wall-by-wall evaluation."""
+        walls = [
+            self.wall,
+            WallGeometry(stem_height=3.0, stem_thickness=0.3, base_width=2.2, base_thickness=0.4,
+                         toe_length=0.5, embedment=0.8),
+            WallGeometry(stem_height=7.0, stem_thickness=0.5, base_width=4.8, base_thickness=0.6,
+                         toe_length=1.0, embedment=1.2),
+        ]
+        batch = RetainingWallStabilityCalculator.evaluate_walls(walls, 18.0, 30.0, surcharge=10.0)
+        self.assertEqual(len(batch), 3)
+
+        for i, wall in enumerate(walls):
+            single = self._single(
+                stem_height=wall.stem_height, stem_thickness=wall.stem_thickness,
+                base_width=wall.base_width, base_thickness=wall.base_thickness,
+                toe_length=wall.toe_length, embedment=wall.embedment
+            )
+            self.assertAlmostEqual(batch.to_dict(i)['bearing_fs'], float(single.bearing_fs), places=8)
+            self.assertAlmostEqual(batch.to_dict(i)['sliding_fs'], float(single.sliding_fs), places=8)
+
+    def test_minimum_base_width(self):
+        """Test that the minimum base width is stable and the next smaller candidate is not."""
+        candidates = np.arange(1.0, 8.01, 0.25)
+        widths = RetainingWallStabilityCalculator.minimum_base_width(
+            [self.wall], 18.0, 30.0, candidates, surcharge=10.0
+        )
+        width = widths[0]
+        self.assertFalse(np.isnan(width))
+
+        toe = self.wall.toe_length / self.wall.base_width * width
+        stable = self._single(base_width=width, toe_length=toe)
+        unstable = self._single(base_width=width - 0.25, toe_length=toe / width * (width - 0.25))
+        self.assertTrue(bool(stable.is_stable))
+        self.assertFalse(bool(unstable.is_stable))
+
+
+if __name__ == "__main__":
+    unittest.main()
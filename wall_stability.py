@@ -0,0 +1,318 @@
+"""
+Retaining Wall Stability for ENGIPIT
+
+This module checks cantilever retaining walls for sliding, overturning and
+bearing. It combines the Rankine active and passive forces from
+RetainingWallCalculator, the self-weight of wall and backfill, base friction,
+and the base bearing capacity from ShallowFoundationCalculator. All inputs
+broadcast as NumPy arrays, so a whole family of wall sections along an
+alignment is evaluated in one call.
+"""
+
+from typing import Dict, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from app import ShallowFoundationCalculator, RetainingWallCalculator
+from instrumentation import instrumented
+
+
+# Minimum safety factors commonly required for retaining walls
+MIN_SLIDING_FS = 1.5
+MIN_OVERTURNING_FS = 2.0
+MIN_BEARING_FS = 3.0
+
+
+@dataclass
+class WallGeometry:
+    """
+    Geometry of a cantilever (L- or T-shaped) retaining wall, per metre run.
+
+    Attributes:
+        stem_height: Height of the stem above the base slab (m)
+        stem_thickness: Thickness of the stem (m)
+        base_width: Total width of the base slab (m)
+        base_thickness: Thickness of the base slab (m)
+        toe_length: Length of the base slab in front of the stem (m)
+        embedment: Depth of the base underside below the front ground level (m)
+    """
+    stem_height: float
+    stem_thickness: float
+    base_width: float
+    base_thickness: float
+    toe_length: float
+    embedment: float = 0.0
+
+    @property
+    def heel_length(self) -> float:
+        """Length of the base slab behind the stem."""
+        return self.base_width - self.toe_length - self.stem_thickness
+
+
+@dataclass
+class WallStabilityResult:
+    """
+    Stability check results for one or more walls.
+
+    All attributes are NumPy arrays with one entry per wall. Forces are per metre
+    run (kN/m), moments are about the toe (kNm/m).
+    """
+    active_force: np.ndarray
+    active_force_location: np.ndarray
+    passive_force: np.ndarray
+    vertical_force: np.ndarray
+    resisting_moment: np.ndarray
+    overturning_moment: np.ndarray
+    eccentricity: np.ndarray
+    effective_width: np.ndarray
+    applied_pressure: np.ndarray
+    ultimate_bearing_capacity: np.ndarray
+    sliding_fs: np.ndarray
+    overturning_fs: np.ndarray
+    bearing_fs: np.ndarray
+
+    @property
+    def is_stable(self) -> np.ndarray:
+        """Boolean array, True where all three checks reach their minimum safety factor."""
+        return ((self.sliding_fs >= MIN_SLIDING_FS) &
+                (self.overturning_fs >= MIN_OVERTURNING_FS) &
+                (self.bearing_fs >= MIN_BEARING_FS))
+
+    def __len__(self) -> int:
+        return int(self.sliding_fs.size)
+
+    def to_dict(self, index: int = 0) -> Dict[str, float]:
+        """Convert the result of a single wall to a dictionary."""
+        return {name: float(np.ravel(value)[index]) for name, value in self.__dict__.items()}
+
+
+def _rankine_coefficients(friction_angle: np.ndarray):
+    """Rankine Ka and Kp for every distinct friction angle, broadcast back to the input."""
+    unique, inverse = np.unique(friction_angle, return_inverse=True)
+    Ka = np.array([RetainingWallCalculator.calculate_active_earth_pressure_coefficient(phi) for phi in unique])
+    Kp = np.array([RetainingWallCalculator.calculate_passive_earth_pressure_coefficient(phi) for phi in unique])
+    return Ka[inverse].reshape(friction_angle.shape), Kp[inverse].reshape(friction_angle.shape)
+
+
+def _bearing_factors(friction_angle: np.ndarray):
+    """Terzaghi bearing capacity factors for every distinct friction angle."""
+    unique, inverse = np.unique(friction_angle, return_inverse=True)
+    factors = np.array([ShallowFoundationCalculator.calculate_bearing_capacity_factors(phi) for phi in unique])
+    factors = factors[inverse].reshape(friction_angle.shape + (3,))
+    return factors[..., 0], factors[..., 1], factors[..., 2]
+
+
+class RetainingWallStabilityCalculator:
+    """Calculator for sliding, overturning and bearing stability of cantilever walls."""
+
+    @staticmethod
+    @instrumented
+    def calculate_stability(
+        stem_height,
+        stem_thickness,
+        base_width,
+        base_thickness,
+        toe_length,
+        unit_weight,
+        friction_angle,
+        surcharge=0.0,
+        embedment=0.0,
+        concrete_unit_weight=25.0,
+        foundation_unit_weight=None,
+        foundation_friction_angle=None,
+        foundation_cohesion=0.0,
+        passive_factor: float = 1.0
+    ) -> WallStabilityResult:
+        """
+        Calculate the stability of one or many cantilever retaining walls.
+
+        Every numeric argument may be a scalar or an array; arrays are broadcast
+        against each other so that many wall sections are evaluated together.
+
+        The active thrust acts on the vertical plane through the heel over the full
+        wall height (stem plus base). Backfill above the heel counts as resisting
+        weight; the surcharge above the heel is conservatively left out. Base
+        friction and adhesion use 2/3 of the foundation soil φ and c. Bearing is
+        checked on the effective width B' = B - 2e with Terzaghi's equation.
+
+        Args:
+            stem_height: Height of the stem above the base slab (m)
+            stem_thickness: Thickness of the stem (m)
+            base_width: Total width of the base slab (m)
+            base_thickness: Thickness of the base slab (m)
+            toe_length: Length of the base slab in front of the stem (m)
+            unit_weight: Unit weight of the backfill in kN/m³
+            friction_angle: Friction angle of the backfill in degrees
+            surcharge: Surcharge on the backfill in kPa
+            embedment: Depth of the base underside below the front ground (m)
+            concrete_unit_weight: Unit weight of the wall concrete in kN/m³ (default: 25.0)
+            foundation_unit_weight: Unit weight of the foundation soil (default: backfill value)
+            foundation_friction_angle: Friction angle of the foundation soil (default: backfill value)
+            foundation_cohesion: Cohesion of the foundation soil in kPa
+            passive_factor: Fraction of the passive resistance in front of the toe to rely on
+
+        Returns:
+            WallStabilityResult with one entry per wall
+        """
+        (stem_height, stem_thickness, base_width, base_thickness, toe_length,
+         unit_weight, friction_angle, surcharge, embedment, concrete_unit_weight) = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (
+                stem_height, stem_thickness, base_width, base_thickness, toe_length,
+                unit_weight, friction_angle, surcharge, embedment, concrete_unit_weight))
+        )
+        foundation_unit_weight = unit_weight if foundation_unit_weight is None else \
+            np.broadcast_to(np.asarray(foundation_unit_weight, dtype=float), unit_weight.shape)
+        foundation_friction_angle = friction_angle if foundation_friction_angle is None else \
+            np.broadcast_to(np.asarray(foundation_friction_angle, dtype=float), friction_angle.shape)
+        foundation_cohesion = np.broadcast_to(np.asarray(foundation_cohesion, dtype=float), unit_weight.shape)
+
+        heel_length = base_width - toe_length - stem_thickness
+        if np.any(heel_length < -1e-9):
+            raise ValueError("toe_length + stem_thickness must not exceed base_width")
+        heel_length = np.maximum(heel_length, 0.0)
+
+        Ka, _ = _rankine_coefficients(friction_angle)
+        _, Kp_foundation = _rankine_coefficients(foundation_friction_angle)
+
+        # Active thrust on the virtual back through the heel
+        height = stem_height + base_thickness
+        Fa_soil = 0.5 * Ka * unit_weight * height ** 2
+        Fa_surcharge = Ka * surcharge * height
+        Fa = Fa_soil + Fa_surcharge
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Fa_location = np.where(Fa > 0, (Fa_soil * height / 3 + Fa_surcharge * height / 2) / Fa, 0.0)
+
+        # Passive resistance in front of the toe
+        Pp = passive_factor * (0.5 * Kp_foundation * foundation_unit_weight * embedment ** 2 +
+                               2 * foundation_cohesion * np.sqrt(Kp_foundation) * embedment)
+
+        # Vertical loads and their lever arms about the toe
+        W_stem = concrete_unit_weight * stem_thickness * stem_height
+        W_base = concrete_unit_weight * base_width * base_thickness
+        W_soil = unit_weight * heel_length * stem_height
+        V = W_stem + W_base + W_soil
+        M_resisting = (W_stem * (toe_length + stem_thickness / 2) +
+                       W_base * base_width / 2 +
+                       W_soil * (base_width - heel_length / 2))
+        M_overturning = Fa * Fa_location
+
+        # Sliding along the base
+        base_friction = np.tan(np.radians(2.0 / 3.0 * foundation_friction_angle))
+        sliding_resistance = V * base_friction + base_width * 2.0 / 3.0 * foundation_cohesion + Pp
+
+        # Resultant position and effective width
+        eccentricity = base_width / 2 - (M_resisting - M_overturning) / V
+        effective_width = np.maximum(base_width - 2 * np.abs(eccentricity), 0.0)
+
+        Nc, Nq, Ngamma = _bearing_factors(foundation_friction_angle)
+        qu = (foundation_cohesion * Nc +
+              foundation_unit_weight * embedment * Nq +
+              0.5 * foundation_unit_weight * effective_width * Ngamma)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            applied = np.where(effective_width > 0, V / effective_width, np.inf)
+            sliding_fs = np.where(Fa > 0, sliding_resistance / Fa, np.inf)
+            overturning_fs = np.where(M_overturning > 0, M_resisting / M_overturning, np.inf)
+            bearing_fs = np.where(effective_width > 0, qu / applied, 0.0)
+
+        return WallStabilityResult(
+            active_force=Fa,
+            active_force_location=Fa_location,
+            passive_force=Pp,
+            vertical_force=V,
+            resisting_moment=M_resisting,
+            overturning_moment=M_overturning,
+            eccentricity=eccentricity,
+            effective_width=effective_width,
+            applied_pressure=applied,
+            ultimate_bearing_capacity=qu,
+            sliding_fs=sliding_fs,
+            overturning_fs=overturning_fs,
+            bearing_fs=bearing_fs,
+        )
+
+    @staticmethod
+    def evaluate_walls(
+        walls: Sequence[WallGeometry],
+        unit_weight,
+        friction_angle,
+        surcharge=0.0,
+        **kwargs
+    ) -> WallStabilityResult:
+        """
+        Calculate the stability of a list of wall geometries in one batch.
+
+        Args:
+            walls: Wall geometries, e.g. one per chainage along an alignment
+            unit_weight: Unit weight of the backfill in kN/m³ (scalar or one per wall)
+            friction_angle: Friction angle of the backfill in degrees (scalar or one per wall)
+            surcharge: Surcharge on the backfill in kPa (scalar or one per wall)
+            **kwargs: Further arguments passed to calculate_stability
+
+        Returns:
+            WallStabilityResult with one entry per wall
+        """
+        return RetainingWallStabilityCalculator.calculate_stability(
+            stem_height=[w.stem_height for w in walls],
+            stem_thickness=[w.stem_thickness for w in walls],
+            base_width=[w.base_width for w in walls],
+            base_thickness=[w.base_thickness for w in walls],
+            toe_length=[w.toe_length for w in walls],
+            embedment=[w.embedment for w in walls],
+            unit_weight=unit_weight,
+            friction_angle=friction_angle,
+            surcharge=surcharge,
+            **kwargs
+        )
+
+    @staticmethod
+    def minimum_base_width(
+        walls: Sequence[WallGeometry],
+        unit_weight,
+        friction_angle,
+        candidate_widths: Sequence[float],
+        surcharge=0.0,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Find the smallest stable base width for each wall from a list of candidates.
+
+        The toe length is kept at the same fraction of the base width as in the
+        given geometry. All walls and candidate widths are evaluated in one batch.
+
+        Args:
+            walls: Wall geometries to optimise
+            unit_weight: Unit weight of the backfill in kN/m³
+            friction_angle: Friction angle of the backfill in degrees
+            candidate_widths: Base widths to try (m)
+            surcharge: Surcharge on the backfill in kPa
+            **kwargs: Further arguments passed to calculate_stability
+
+        Returns:
+            Array with the smallest stable base width per wall (NaN if none is stable)
+        """
+        widths = np.sort(np.asarray(candidate_widths, dtype=float))
+        toe_ratio = np.array([w.toe_length / w.base_width for w in walls])[:, None]
+        stem_thickness = np.array([w.stem_thickness for w in walls])[:, None]
+
+        # Candidates narrower than the stem are evaluated at the stem width and discarded
+        feasible = widths[None, :] >= stem_thickness
+        base_width = np.maximum(widths[None, :], stem_thickness)
+        toe = np.minimum(toe_ratio * base_width, base_width - stem_thickness)
+
+        result = RetainingWallStabilityCalculator.calculate_stability(
+            stem_height=np.array([w.stem_height for w in walls])[:, None],
+            stem_thickness=stem_thickness,
+            base_width=base_width,
+            base_thickness=np.array([w.base_thickness for w in walls])[:, None],
+            toe_length=toe,
+            embedment=np.array([w.embedment for w in walls])[:, None],
+            unit_weight=np.asarray(unit_weight, dtype=float).reshape(-1, 1) if np.ndim(unit_weight) else unit_weight,
+            friction_angle=np.asarray(friction_angle, dtype=float).reshape(-1, 1) if np.ndim(friction_angle) else friction_angle,
+            surcharge=np.asarray(surcharge, dtype=float).reshape(-1, 1) if np.ndim(surcharge) else surcharge,
+            **kwargs
+        )
+        stable = result.is_stable & feasible
+        first = np.argmax(stable, axis=1)
+        return np.where(stable.any(axis=1), widths[first], np.nan)